@@ -0,0 +1,332 @@
+"""
+Asenkron Trendyol scraper
+Tüm bot için tek, uzun ömürlü ve keep-alive destekli bir bağlantı havuzu kullanır;
+böylece her ürün için yeni TCP+TLS el sıkışması yapılmaz.
+"""
+import asyncio
+import logging
+import random
+from typing import Optional
+
+import aiohttp
+
+try:
+    import httpx  # Opsiyonel: HTTP/2 desteği için httpx[http2]
+except ImportError:
+    httpx = None
+
+from link_resolver import is_short_link, canonical_product_url, product_id_from_url
+from config import (
+    HTTP_POOL_SIZE, HTTP_POOL_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP2_ENABLED,
+    STREAM_FETCH, STREAM_CHUNK_SIZE
+)
+from metrics import metrics
+from page_extractor import StreamScanner
+from scraper import (
+    TrendyolScraper, HEAD_HEADERS, PAGE_HEADERS,
+    MAX_RETRIES, BACKOFF_FACTOR, TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+# Çağırana aktarılan yanıt başlıkları: koşullu istek doğrulayıcıları ve hız sınırlayıcı için Retry-After
+RESPONSE_HEADERS = ('ETag', 'Last-Modified', 'Retry-After')
+
+
+class AsyncHTTPPool:
+    """Bot genelinde paylaşılan asenkron HTTP bağlantı havuzu"""
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, per_host: int = HTTP_POOL_PER_HOST,
+                 keepalive_timeout: int = HTTP_KEEPALIVE_TIMEOUT, http2: bool = HTTP2_ENABLED,
+                 verify_ssl: bool = True, timeout: int = TIMEOUT):
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.verify_ssl = verify_ssl
+        self.timeout = timeout
+        self.http2 = http2
+        if http2 and httpx is None:
+            logger.warning("HTTP/2 için httpx[http2] kurulu değil, aiohttp (HTTP/1.1 keep-alive) kullanılacak")
+            self.http2 = False
+        self._client = None
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Yeni ve yeniden kullanılan bağlantıları metriklere yazar"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_end(session, context, params):
+            metrics.incr('http.connections_created')
+
+        async def on_connection_reuseconn(session, context, params):
+            metrics.incr('http.connections_reused')
+
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def _create_client(self):
+        """Havuz istemcisini oluşturur (çalışan bir event loop içinde çağrılmalı)"""
+        if self.http2:
+            try:
+                limits = httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive_timeout
+                )
+                client = httpx.AsyncClient(http2=True, verify=self.verify_ssl, limits=limits, timeout=self.timeout)
+                logger.info(f"HTTP/2 bağlantı havuzu oluşturuldu (havuz: {self.pool_size})")
+                return client
+            except ImportError as e:
+                logger.warning(f"HTTP/2 istemcisi oluşturulamadı ({e}), aiohttp kullanılacak")
+                self.http2 = False
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+            ssl=None if self.verify_ssl else False
+        )
+        logger.info(f"Keep-alive bağlantı havuzu oluşturuldu (havuz: {self.pool_size}, host başına: {self.per_host})")
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[self._trace_config()]
+        )
+
+    def _is_closed(self) -> bool:
+        if self._client is None:
+            return True
+        return self._client.is_closed if self.http2 else self._client.closed
+
+    @staticmethod
+    def _copy_headers(headers, response_headers: Optional[dict]):
+        """Yanıtın ETag / Last-Modified / Retry-After başlıklarını çağıranın verdiği dict'e yazar"""
+        if response_headers is not None:
+            for name in RESPONSE_HEADERS:
+                response_headers[name] = headers.get(name)
+
+    async def request(self, method: str, url: str, headers: dict = None, allow_redirects: bool = True,
+                      response_headers: dict = None):
+        """
+        Havuz üzerinden istek yapar
+
+        response_headers verilirse yanıtın ETag / Last-Modified / Retry-After başlıkları içine yazılır.
+
+        Returns:
+            (durum kodu, yönlendirmeler sonrası URL, gövde metni) üçlüsü
+        """
+        if self._is_closed():
+            self._client = self._create_client()
+        metrics.incr('http.requests')
+
+        if self.http2:
+            response = await self._client.request(method, url, headers=headers, follow_redirects=allow_redirects)
+            self._copy_headers(response.headers, response_headers)
+            body = response.text if method != 'HEAD' else ''
+            return response.status_code, str(response.url), body
+
+        async with self._client.request(method, url, headers=headers, allow_redirects=allow_redirects) as response:
+            self._copy_headers(response.headers, response_headers)
+            body = await response.text() if method != 'HEAD' else ''
+            return response.status, str(response.url), body
+
+    async def stream(self, url: str, headers: dict = None, chunk_size: int = STREAM_CHUNK_SIZE,
+                     response_headers: dict = None):
+        """
+        GET gövdesini parça parça okur ve StreamScanner'a verir; tarayıcı yeterli bilgiyi
+        bulunca bağlantı sayfa bitmeden kapatılır
+
+        response_headers verilirse yanıtın ETag / Last-Modified / Retry-After başlıkları içine yazılır.
+
+        Returns:
+            (durum kodu, yönlendirmeler sonrası URL, okunan metin) üçlüsü
+        """
+        if self._is_closed():
+            self._client = self._create_client()
+        metrics.incr('http.requests')
+
+        if self.http2:
+            async with self._client.stream('GET', url, headers=headers, follow_redirects=True) as response:
+                self._copy_headers(response.headers, response_headers)
+                if response.status_code != 200:
+                    return response.status_code, str(response.url), ''
+                scanner = self._scanner(response.headers, response.encoding)
+                aborted = False
+                async for chunk in response.aiter_bytes(chunk_size):
+                    if scanner.feed(chunk):
+                        aborted = True
+                        break
+                return response.status_code, str(response.url), scanner.finish(aborted)
+
+        async with self._client.get(url, headers=headers) as response:
+            self._copy_headers(response.headers, response_headers)
+            if response.status != 200:
+                return response.status, str(response.url), ''
+            scanner = self._scanner(response.headers, response.charset)
+            aborted = False
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if scanner.feed(chunk):
+                    aborted = True
+                    # Okunmamış gövdeyle bağlantı havuza dönemez, kapatılır
+                    response.close()
+                    break
+            return response.status, str(response.url), scanner.finish(aborted)
+
+    @staticmethod
+    def _scanner(headers, encoding) -> StreamScanner:
+        # Sıkıştırılmış yanıtta Content-Length ağ baytıdır, çözülmüş gövdeyle karşılaştırılamaz
+        length = headers.get('Content-Length')
+        if headers.get('Content-Encoding') or not (length and length.isdigit()):
+            length = None
+        return StreamScanner(encoding or 'utf-8', int(length) if length else None)
+
+    async def close(self):
+        """Havuzdaki tüm bağlantıları kapatır"""
+        if not self._is_closed():
+            if self.http2:
+                await self._client.aclose()
+            else:
+                await self._client.close()
+        self._client = None
+
+
+_shared_pools = {}
+
+
+def get_shared_pool(verify_ssl: bool = True) -> AsyncHTTPPool:
+    """Süreç genelinde paylaşılan bağlantı havuzunu döndürür"""
+    pool = _shared_pools.get(verify_ssl)
+    if pool is None:
+        pool = AsyncHTTPPool(verify_ssl=verify_ssl)
+        _shared_pools[verify_ssl] = pool
+    return pool
+
+
+class AsyncTrendyolScraper(TrendyolScraper):
+    """
+    TrendyolScraper'ın asenkron sürümü
+    Ağ istekleri paylaşılan havuzdan yapılır, HTML ayrıştırma mevcut çıkarım
+    metodlarını kullanır ve event loop'u bloklamamak için thread'de çalışır;
+    parse_pool bağlıysa thread yalnızca worker sürecinin sonucunu bekler.
+    """
+
+    def __init__(self, use_proxy=False, verify_ssl=True, pool: AsyncHTTPPool = None):
+        super().__init__(use_proxy=use_proxy, verify_ssl=verify_ssl)
+        self.pool = pool or get_shared_pool(verify_ssl)
+
+    async def _get_full_url_async(self, url):
+        """Kısaltılmış linklerin yönlendirmesini önbellekten veya havuz üzerinden çözer"""
+        canonical = canonical_product_url(url)
+        if canonical:
+            metrics.incr('url.head_avoided')
+            return canonical
+        short = is_short_link(url)
+        if short:
+            cached = self.link_cache.get(url)
+            if cached:
+                return cached['canonical_url']
+        try:
+            await self.rate_limiter.acquire_async(url)
+            response_headers = {}
+            status, final_url, _ = await self.pool.request('HEAD', url, headers=HEAD_HEADERS,
+                                                           response_headers=response_headers)
+            self.rate_limiter.record(url, status, response_headers.get('Retry-After'))
+            if final_url != url:
+                logger.info(f"Link çözüldü: {url} -> {final_url}")
+            if short and not is_short_link(final_url):
+                return self.link_cache.put(url, final_url)['canonical_url']
+            return final_url
+        except Exception as e:
+            logger.error(f"Error following redirect for {url}: {e}")
+            return url
+
+    async def _scrape_page_async(self, url):
+        """_scrape_page'in asenkron karşılığı; aynı dict yapısını döndürür"""
+        # Yönlendirme bir kez çözülür; denemeler arasında değişmez
+        full_url = await self._get_full_url_async(url)
+        if not self.is_valid_url(full_url):
+            return {"error": "URL does not belong to Trendyol"}
+
+        product_id = product_id_from_url(full_url)
+        known = await asyncio.to_thread(self._known_page, product_id) if self.validators is not None else None
+        headers = self._page_headers(known)
+
+        last_error = None
+        for attempt in range(MAX_RETRIES):
+            try:
+                logger.info(f"Async scraping attempt {attempt + 1}/{MAX_RETRIES} for {full_url}")
+
+                if attempt > 0:
+                    await asyncio.sleep(BACKOFF_FACTOR ** attempt + random.uniform(1, 3))
+                await self.rate_limiter.acquire_async(full_url)
+
+                response_headers = {}
+                if STREAM_FETCH:
+                    status, _, html = await self.pool.stream(full_url, headers=headers,
+                                                             response_headers=response_headers)
+                else:
+                    status, _, html = await self.pool.request('GET', full_url, headers=headers,
+                                                              response_headers=response_headers)
+                self.rate_limiter.record(full_url, status, response_headers.get('Retry-After'))
+                if status == 304 and known:
+                    return self._unchanged_page(known, 'page.conditional_hit')
+                if status != 200:
+                    last_error = f"HTTP {status}"
+                    continue
+
+                return await asyncio.to_thread(self._parse_fetched, full_url, html, product_id, known,
+                                               response_headers)
+
+            except Exception as e:
+                last_error = f"Unexpected error: {str(e)}"
+                logger.warning(f"Unexpected error for {url}, attempt {attempt + 1}: {e}")
+
+        return {"error": f"Failed after {MAX_RETRIES} attempts. Last error: {last_error}"}
+
+    async def fetch_listing_async(self, url):
+        """fetch_listing'in asenkron karşılığı; liste sayfası HTML'i veya None"""
+        await self.rate_limiter.acquire_async(url)
+        response_headers = {}
+        status, _, html = await self.pool.request('GET', url, headers=PAGE_HEADERS, response_headers=response_headers)
+        self.rate_limiter.record(url, status, response_headers.get('Retry-After'))
+        if status != 200:
+            logger.warning(f"Liste sayfası HTTP {status} döndü: {url}")
+            return None
+        return html
+
+    async def scrape_product(self, url):
+        """
+        scrape_product'ın asenkron sürümü
+        Aynı çıktı formatını döndürür.
+        """
+        lookup_url = url
+        if is_short_link(url):
+            lookup_url = await self._get_full_url_async(url)
+
+        product_id = self.extract_product_id(lookup_url)
+        if not product_id:
+            logger.error(f"Could not extract product ID from URL: {url}")
+            return {'success': False, 'error': 'Invalid URL or Product ID', 'current_price': None}
+
+        product_url = f"https://www.trendyol.com/any-p-{product_id}" if url.isdigit() else url
+
+        scraped_data = await self._scrape_page_async(product_url)
+
+        if not scraped_data or scraped_data.get("error"):
+            return {'success': False, 'error': scraped_data.get("error", "Unknown error"), 'current_price': None}
+
+        return {
+            'product_id': product_id,
+            'name': scraped_data.get('product_name'),
+            'url': product_url,
+            'image_url': scraped_data.get('image_url'),
+            'current_price': scraped_data.get('price'),
+            'original_price': scraped_data.get('original_price', scraped_data.get('price')),
+            'unchanged': bool(scraped_data.get('unchanged')),
+            'success': True
+        }
+
+    async def close(self):
+        """Paylaşılan havuzu kapatır"""
+        await self.pool.close()
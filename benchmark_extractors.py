@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sayfa çıkarıcıları için çevrimdışı benchmark
+fixtures/pages altındaki kayıtlı ürün sayfalarını her çıkarıcıdan geçirir; sayfa/sn,
+p50/p99 ayrıştırma süresi, en yüksek bellek kullanımı ve fixtures/expected.json'a göre
+doğruluk raporlar. Sonuçlar JSON olarak kaydedilip başka bir commit'in sonucuyla
+karşılaştırılabilir:
+
+    python benchmark_extractors.py --output bench_yeni.json
+    python benchmark_extractors.py --compare bench_eski.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scraper import TrendyolScraper
+from scraper_alt import TrendyolScraperAlt
+from strategy_stats import StrategyStats
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIELDS = ('name', 'price', 'original_price', 'sold_out')
+PRICE_TOLERANCE = 0.01
+# Karşılaştırmada p50 bu orandan fazla yavaşlarsa gerileme sayılır
+DEFAULT_MAX_SLOWDOWN = 0.25
+
+
+class _Page:
+    """scraper_alt'ın beklediği response arayüzü (yalnızca .text)"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+def load_corpus(fixture_dir: str = FIXTURE_DIR):
+    """Beklenen sonuçları ve sayfa HTML'lerini yükler"""
+    with open(os.path.join(fixture_dir, 'expected.json'), encoding='utf-8') as f:
+        corpus = json.load(f)
+    for entry in corpus['pages']:
+        with open(os.path.join(fixture_dir, 'pages', entry['file']), encoding='utf-8') as f:
+            entry['html'] = f.read()
+    return corpus
+
+
+def build_extractors():
+    """
+    Çıkarıcı adı -> html alıp ortak alanları döndüren fonksiyon
+
+    scraper: katmanlı tam ayrıştırma (_parse_page)
+    scraper_dom: hızlı yol olmadan yalnızca DOM katmanı (derlenmiş çıkarım planı)
+    scraper_alt: TrendyolScraperAlt._extract_html_data
+    """
+    scraper = TrendyolScraper()
+    # Benchmark sayfaları botun kalıcı strateji istatistiklerine karışmasın
+    scraper.strategy_stats = StrategyStats(path=None)
+    alt = TrendyolScraperAlt(use_proxy=False)
+    no_fast = {'product_name': None, 'price': None, 'original_price': None, 'image_url': None, 'in_stock': None,
+               'price_source': None}
+
+    def from_scraper(result):
+        return {
+            'name': result.get('product_name'),
+            'price': result.get('price'),
+            'original_price': result.get('original_price'),
+            'sold_out': result.get('error') == 'Tükendi',
+        }
+
+    def run_alt(html):
+        result = alt._extract_html_data(_Page(html), 'https://www.trendyol.com/any-p-1', '1') or {}
+        return {
+            'name': result.get('name'),
+            'price': result.get('current_price'),
+            'original_price': result.get('original_price'),
+            'sold_out': False if result else None,
+        }
+
+    return {
+        'scraper': lambda html: from_scraper(scraper._parse_page(html)),
+        'scraper_dom': lambda html: from_scraper(scraper._parse_dom(html, no_fast)),
+        'scraper_alt': run_alt,
+    }
+
+
+def _matches(field, actual, expected):
+    if field in ('price', 'original_price'):
+        return actual is not None and abs(float(actual) - float(expected)) <= PRICE_TOLERANCE
+    return actual == expected
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[index]
+
+
+def bench_extractor(extract, pages, iterations: int) -> dict:
+    """Bir çıkarıcının hız, bellek ve doğruluk sonuçları"""
+    # Doğruluk ve bellek: tek geçiş (tracemalloc zamanlamayı bozduğu için ayrı)
+    field_hits, page_hits, misses = 0, 0, []
+    tracemalloc.start()
+    for entry in pages:
+        try:
+            actual = extract(entry['html'])
+        except Exception as e:
+            actual = {field: None for field in FIELDS}
+            actual['exception'] = repr(e)
+        wrong = [field for field in FIELDS if not _matches(field, actual.get(field), entry['expected'][field])]
+        field_hits += len(FIELDS) - len(wrong)
+        page_hits += not wrong
+        if wrong:
+            misses.append({'file': entry['file'], 'fields': wrong})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for entry in pages:
+            t0 = time.perf_counter()
+            try:
+                extract(entry['html'])
+            except Exception:
+                pass
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'pages_per_sec': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'field_accuracy': round(field_hits / (len(pages) * len(FIELDS)), 4),
+        'page_accuracy': round(page_hits / len(pages), 4),
+        'misses': misses,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(iterations: int = 20, extractors=None, fixture_dir: str = FIXTURE_DIR) -> dict:
+    """Tüm çıkarıcıları çalıştırır ve JSON'a yazılabilir sonuç döndürür"""
+    corpus = load_corpus(fixture_dir)
+    available = build_extractors()
+    names = extractors or list(available)
+    # Sayfa başına INFO log'ları ölçümü bozmasın
+    logging.disable(logging.INFO)
+    try:
+        results = {name: bench_extractor(available[name], corpus['pages'], iterations) for name in names}
+    finally:
+        logging.disable(logging.NOTSET)
+    return {
+        'corpus_version': corpus['version'],
+        'pages': len(corpus['pages']),
+        'iterations': iterations,
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'extractors': results,
+    }
+
+
+def compare(old: dict, new: dict, max_slowdown: float = DEFAULT_MAX_SLOWDOWN) -> list:
+    """İki sonuç arasındaki gerilemeleri (doğruluk düşüşü veya p50 yavaşlaması) listeler"""
+    regressions = []
+    if old.get('corpus_version') != new.get('corpus_version'):
+        regressions.append(f"Korpus sürümü farklı ({old.get('corpus_version')} -> {new.get('corpus_version')}), "
+                           f"sonuçlar karşılaştırılamaz")
+        return regressions
+    for name, result in new['extractors'].items():
+        before = old['extractors'].get(name)
+        if not before:
+            continue
+        for key in ('field_accuracy', 'page_accuracy'):
+            if result[key] < before[key]:
+                regressions.append(f"{name}: {key} {before[key]} -> {result[key]}")
+        if before['p50_ms'] and result['p50_ms'] > before['p50_ms'] * (1 + max_slowdown):
+            regressions.append(f"{name}: p50 {before['p50_ms']} ms -> {result['p50_ms']} ms")
+    return regressions
+
+
+def print_report(result: dict, old: dict = None):
+    print(f"📊 Korpus v{result['corpus_version']}, {result['pages']} sayfa x {result['iterations']} tekrar "
+          f"(commit {result['commit'] or '-'})")
+    print(f"{'çıkarıcı':<14}{'sayfa/sn':>10}{'p50 ms':>10}{'p99 ms':>10}{'bellek KB':>11}{'alan %':>9}{'sayfa %':>9}")
+    for name, r in result['extractors'].items():
+        print(f"{name:<14}{r['pages_per_sec']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['peak_memory_kb']:>11}"
+              f"{r['field_accuracy'] * 100:>9.1f}{r['page_accuracy'] * 100:>9.1f}")
+        if old and name in old.get('extractors', {}):
+            b = old['extractors'][name]
+            print(f"{'  önce':<14}{b['pages_per_sec']:>10}{b['p50_ms']:>10}{b['p99_ms']:>10}{b['peak_memory_kb']:>11}"
+                  f"{b['field_accuracy'] * 100:>9.1f}{b['page_accuracy'] * 100:>9.1f}")
+        for miss in r['misses']:
+            print(f"   ⚠️ {miss['file']}: {', '.join(miss['fields'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Çevrimdışı sayfa çıkarıcı benchmark')
+    parser.add_argument('--iterations', type=int, default=20, help='Her sayfanın kaç kez ayrıştırılacağı')
+    parser.add_argument('--extractor', action='append', help='Yalnızca bu çıkarıcıyı çalıştır (tekrarlanabilir)')
+    parser.add_argument('--output', help='Sonucu JSON olarak bu dosyaya yaz')
+    parser.add_argument('--compare', help='Önceki bir sonuç dosyasıyla karşılaştır; gerileme varsa çıkış kodu 1')
+    parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN,
+                        help='p50 için izin verilen en fazla yavaşlama oranı')
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.iterations, args.extractor)
+    old = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            old = json.load(f)
+    print_report(result, old)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 Sonuç kaydedildi: {args.output}")
+
+    if old:
+        regressions = compare(old, result, args.max_slowdown)
+        for line in regressions:
+            print(f"❌ Gerileme: {line}")
+        if regressions:
+            return 1
+        print("✅ Gerileme yok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite okuyucu/yazar eşzamanlılık benchmark'ı
+Geçici bir veritabanında bot benzeri yazarlar (fiyat güncelleme + fiyat geçmişi) ile web
+arayüzü benzeri okuyucuları (sunucu ürün listesi + fiyat geçmişi) aynı anda çalıştırır ve
+iki bağlantı stratejisini karşılaştırır:
+
+    eski:  rollback journal, her işlemde yeni bağlantı + CREATE TABLE IF NOT EXISTS (eski get_db)
+    havuz: WAL + ayarlı pragmalar, sqlite_pool üzerinden yeniden kullanılan bağlantılar
+
+    python benchmark_sqlite.py --seconds 5 --readers 4 --writers 2
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from migrations import migrate, MIGRATIONS, CORE
+from sqlite_pool import ConnectionPool
+
+GUILDS = 20
+PRODUCTS_PER_GUILD = 50
+HISTORY_PER_PRODUCT = 20
+
+READ_QUERIES = (
+    ("SELECT * FROM products WHERE guild_id = ? ORDER BY added_at DESC", lambda i: (f'g{i % GUILDS}',)),
+    ("SELECT price, date FROM price_history WHERE product_id = ? ORDER BY date DESC LIMIT 10",
+     lambda i: (str(i % (GUILDS * PRODUCTS_PER_GUILD)),)),
+)
+
+
+def seed(path: str):
+    """Sunucu başına ürün ve ürün başına fiyat geçmişi olan veritabanı oluşturur"""
+    conn = sqlite3.connect(path)
+    migrate(conn, CORE)
+    now = datetime.now().isoformat()
+    for i in range(GUILDS * PRODUCTS_PER_GUILD):
+        product_id = str(i)
+        conn.execute('INSERT INTO catalog_products (product_id, name, url, current_price, created_at) '
+                     'VALUES (?, ?, ?, 100.0, ?)', (product_id, f'Ürün {i}', f'https://www.trendyol.com/a-p-{i}', now))
+        conn.execute('INSERT INTO product_subscriptions (product_id, guild_id, user_id, channel_id, added_at) '
+                     'VALUES (?, ?, ?, ?, ?)', (product_id, f'g{i % GUILDS}', 'u', 'c', now))
+        conn.executemany('INSERT INTO price_history (product_id, price, date) VALUES (?, ?, ?)',
+                         [(product_id, 100.0 + n, now) for n in range(HISTORY_PER_PRODUCT)])
+    conn.commit()
+    conn.close()
+
+
+class LegacyConnections:
+    """Eski davranış: her işlemde bağlantı aç, tabloları oluştur, kapat"""
+
+    def __init__(self, path):
+        self.path = path
+        self.ddl = [step for step in MIGRATIONS[CORE][0][2] if isinstance(step, str)]
+
+    def acquire(self):
+        conn = sqlite3.connect(self.path)
+        for statement in self.ddl:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+
+class PooledConnections:
+    def __init__(self, path):
+        self.path = path
+        self.pool = ConnectionPool()
+
+    def acquire(self):
+        return self.pool.acquire(self.path)
+
+    def release(self, conn):
+        self.pool.release(conn)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run(strategy, seconds: float, readers: int, writers: int) -> dict:
+    """Okuyucu ve yazar thread'lerini süre boyunca çalıştırır, işlem sayısı ve gecikmeleri döndürür"""
+    stop = time.monotonic() + seconds
+    latencies = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+
+    def reader(n):
+        i = n
+        while time.monotonic() < stop:
+            start = time.monotonic()
+            try:
+                conn = strategy.acquire()
+                try:
+                    for query, params in READ_QUERIES:
+                        conn.execute(query, params(i)).fetchall()
+                finally:
+                    strategy.release(conn)
+            except sqlite3.OperationalError:
+                with lock:
+                    errors['read'] += 1
+                continue
+            with lock:
+                latencies['read'].append(time.monotonic() - start)
+            i += readers
+
+    def writer(n):
+        i = n
+        while time.monotonic() < stop:
+            start = time.monotonic()
+            product_id = str(i % (GUILDS * PRODUCTS_PER_GUILD))
+            now = datetime.now().isoformat()
+            try:
+                conn = strategy.acquire()
+                try:
+                    conn.execute('UPDATE catalog_products SET current_price = ?, last_checked = ? WHERE product_id = ?',
+                                 (90.0 + i % 10, now, product_id))
+                    conn.execute('INSERT INTO price_history (product_id, price, date) VALUES (?, ?, ?)',
+                                 (product_id, 90.0 + i % 10, now))
+                    conn.commit()
+                finally:
+                    strategy.release(conn)
+            except sqlite3.OperationalError:
+                with lock:
+                    errors['write'] += 1
+                continue
+            with lock:
+                latencies['write'].append(time.monotonic() - start)
+            i += writers
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = {}
+    for kind in ('read', 'write'):
+        values = latencies[kind]
+        result[kind] = {
+            'ops_per_sec': round(len(values) / seconds, 1),
+            'p50_ms': round(_percentile(values, 0.5) * 1000, 2),
+            'p99_ms': round(_percentile(values, 0.99) * 1000, 2),
+            'max_ms': round(max(values, default=0) * 1000, 2),
+            'locked_errors': errors[kind],
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SQLite okuyucu/yazar eşzamanlılık benchmark')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Her strateji için çalışma süresi')
+    parser.add_argument('--readers', type=int, default=4, help='Okuyucu thread sayısı')
+    parser.add_argument('--writers', type=int, default=2, help='Yazar thread sayısı')
+    parser.add_argument('--output', help='Sonucu JSON olarak bu dosyaya yaz')
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, strategy_class in (('eski', LegacyConnections), ('havuz', PooledConnections)):
+            path = os.path.join(tmp, f'{name}.sqlite')
+            seed(path)
+            strategy = strategy_class(path)
+            results[name] = run(strategy, args.seconds, args.readers, args.writers)
+            if isinstance(strategy, PooledConnections):
+                strategy.pool.close_all()
+
+    print(f"📊 {args.readers} okuyucu, {args.writers} yazar, strateji başına {args.seconds:g} sn")
+    print(f"{'strateji':<10}{'işlem':<7}{'işlem/sn':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'kilit hata':>12}")
+    for name, result in results.items():
+        for kind, label in (('read', 'okuma'), ('write', 'yazma')):
+            r = result[kind]
+            print(f"{name:<10}{label:<7}{r['ops_per_sec']:>10}{r['p50_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}"
+                  f"{r['locked_errors']:>12}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Sonuç kaydedildi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
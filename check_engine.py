@@ -0,0 +1,68 @@
+"""
+Eşzamanlı fiyat kontrol motoru
+Ürünleri sınırlı sayıda worker ile paralel çeker ve Discord event loop'unu bloklamaz
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CHECK_CONCURRENCY = int(os.getenv('CHECK_CONCURRENCY', 8))
+
+
+class PriceCheckEngine:
+    """
+    Sınırlı eşzamanlılıkla çalışan fiyat kontrol motoru
+
+    Ağ istekleri (bloklayan `fetch` fonksiyonu) ayrı bir thread havuzunda çalışır,
+    sonuç işleme (`on_result`) ise event loop üzerinde sırayla yapılır; böylece
+    veritabanı bağlantısı tek thread'den kullanılmaya devam eder.
+    """
+
+    def __init__(self, fetch, concurrency: int = CHECK_CONCURRENCY):
+        """
+        Args:
+            fetch: URL alıp ürün verisi dict'i döndüren fonksiyon (sync veya async)
+            concurrency: Aynı anda yapılacak en fazla kontrol sayısı
+        """
+        self.fetch = fetch
+        self.concurrency = max(1, concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='price-check')
+
+    async def _fetch(self, product: dict) -> dict:
+        """Ürün verisini event loop'u bloklamadan çeker"""
+        if asyncio.iscoroutinefunction(self.fetch):
+            return await self.fetch(product['url'])
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.fetch, product['url'])
+
+    async def check_one(self, product: dict, on_result) -> bool:
+        """Tek bir ürünü çeker ve sonucunu işler; sonuç işleyicinin başarı durumunu döndürür"""
+        fetch_start = time.monotonic()
+        try:
+            product_data = await self._fetch(product)
+        except Exception as e:
+            logger.error(f"Ürün çekilirken hata: {product.get('product_id', 'Bilinmeyen ID')} - {e}")
+            product_data = {'success': False, 'error': str(e)}
+        metrics.observe('check.fetch_seconds', time.monotonic() - fetch_start)
+        return await self.deliver(product, product_data, on_result)
+
+    async def deliver(self, product: dict, product_data: dict, on_result) -> bool:
+        """Başka yoldan (ör. liste sayfasından) alınmış ürün verisini sonuç işleyicisine verir"""
+        try:
+            handled = await on_result(product, product_data)
+        except Exception as e:
+            logger.error(f"Ürün sonucu işlenirken hata: {product.get('product_id', 'Bilinmeyen ID')} - {e}")
+            handled = False
+
+        metrics.incr('check.succeeded' if handled else 'check.failed')
+        return bool(handled)
+
+    def shutdown(self):
+        """Thread havuzunu kapatır"""
+        self._executor.shutdown(wait=False)
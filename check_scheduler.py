@@ -0,0 +1,352 @@
+"""
+Fiyat oynaklığına göre uyarlanan kontrol zamanlayıcısı
+Her ürünün bir sonraki kontrol zamanını fiyat geçmişindeki değişim sıklığı/büyüklüğü
+ve aktif fiyat hedeflerine yakınlığı ile hesaplar; `products.next_check_at` sütununda tutar.
+"""
+import os
+import math
+import zlib
+import asyncio
+import sqlite3
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from metrics import metrics
+from price_history import tail_points
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', 3600))
+CHECK_MIN_INTERVAL = int(os.getenv('CHECK_MIN_INTERVAL', 900))        # 15 dakika
+CHECK_MAX_INTERVAL = int(os.getenv('CHECK_MAX_INTERVAL', 24 * 3600))  # 1 gün
+# Oynaklık hesabında kullanılan son kontrol sayısı
+SCHEDULER_HISTORY_WINDOW = int(os.getenv('SCHEDULER_HISTORY_WINDOW', 30))
+# Fiyat hedefe bu orandan daha yakınsa kontrol sıklaştırılır (%5)
+TARGET_PROXIMITY = float(os.getenv('TARGET_PROXIMITY', 0.05))
+# Sürekli zamanlayıcının tık aralığı (saniye) ve saniyedeki en fazla kontrol başlatma hızı (0 = otomatik)
+CHECK_TICK = float(os.getenv('CHECK_TICK', 5))
+CHECK_RATE = float(os.getenv('CHECK_RATE', 0))
+# Otomatik hızda ürün sayısı / CHECK_INTERVAL üzerine eklenen pay (birikmiş işi eritmek için)
+CHECK_RATE_HEADROOM = 2.0
+# Özet log aralığı (saniye)
+SCHEDULER_REPORT_INTERVAL = int(os.getenv('SCHEDULER_REPORT_INTERVAL', 600))
+
+
+def slot_offset(product_id: str, interval: float) -> float:
+    """Ürünün aralık içindeki sabit kaydırması (yeniden başlatmalarda değişmez)"""
+    return zlib.crc32(str(product_id).encode('utf-8')) % max(1, int(interval))
+
+
+def aligned_next_check(product_id: str, now: datetime, interval: float) -> datetime:
+    """
+    Bir sonraki kontrol zamanını ürünün sabit slotuna hizalar
+
+    Zamanlar `offset + k * interval` biçimindedir; böylece ürünler aralık boyunca
+    dağılır ve geciken bir kontrol sonraki slotları kaydırmaz. Yarım aralıktan
+    yakın bir slot atlanır.
+    """
+    offset = slot_offset(product_id, interval)
+    ts = now.timestamp()
+    slot = (math.floor((ts - offset) / interval) + 1) * interval + offset
+    if slot - ts < interval / 2:
+        slot += interval
+    return datetime.fromtimestamp(slot)
+
+
+def compute_interval(history: List[Tuple[float, datetime]], current_price: Optional[float] = None,
+                     targets: List[Tuple[float, str]] = (), base_interval: int = CHECK_INTERVAL,
+                     min_interval: int = CHECK_MIN_INTERVAL, max_interval: int = CHECK_MAX_INTERVAL) -> float:
+    """
+    Bir ürün için kontrol aralığını (saniye) hesaplar
+
+    Args:
+        history: Eskiden yeniye (fiyat, tarih) listesi
+        current_price: Güncel fiyat (hedef yakınlığı için)
+        targets: Aktif (hedef fiyat, koşul) listesi
+    """
+    interval = float(base_interval)
+
+    if len(history) >= 2:
+        span = (history[-1][1] - history[0][1]).total_seconds()
+        changes = [abs(new - old) / old for (old, _), (new, _) in zip(history, history[1:]) if old and new != old]
+        if span > 0:
+            # Değişimler arası ortalama süre; hiç değişim yoksa gözlenen sürenin tamamı
+            mean_gap = span / (len(changes) + 1)
+            # Beklenen değişim başına iki kontrol, büyük sıçramalar daha sık kontrol gerektirir
+            magnitude = sum(changes) / len(changes) if changes else 0.0
+            interval = mean_gap / 2 / (1 + 10 * magnitude)
+            if not changes:
+                interval = max(interval, base_interval)
+
+    if current_price:
+        for target_price, condition in targets:
+            if condition == 'below' and current_price <= target_price:
+                continue
+            if condition == 'above' and current_price >= target_price:
+                continue
+            distance = abs(current_price - target_price) / current_price
+            if distance < TARGET_PROXIMITY:
+                interval = min(interval, base_interval * max(distance / TARGET_PROXIMITY, 0.1))
+
+    return max(min_interval, min(max_interval, interval))
+
+
+class CheckScheduler:
+    """
+    Ürün bazlı uyarlamalı kontrol zamanlayıcısı
+
+    Kalıcı öncelik kuyruğu `products.next_check_at` sütunudur: `due_products`
+    zamanı gelenleri en gecikmişten başlayarak döndürür, `reschedule` her kontrolden
+    sonra yeni zamanı yazar. Sabit aralıklı döngüye göre tasarruf `report` ile izlenir.
+    """
+
+    def __init__(self, db, base_interval: int = CHECK_INTERVAL,
+                 min_interval: int = CHECK_MIN_INTERVAL, max_interval: int = CHECK_MAX_INTERVAL):
+        self.db = db
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self._fixed_equivalent = 0.0
+        self._last_tick = None
+        self.checks = 0
+        self.total_products = 0
+
+    def _history(self, product_id: str) -> List[Tuple[float, datetime]]:
+        pending = []
+        writer = getattr(self.db, 'writer', None)
+        if writer is not None:
+            # Toplu yazıcıda bekleyen son kontroller de oynaklığa dahil edilir
+            pending = [(price, datetime.fromisoformat(date))
+                       for price, date in writer.pending_history(product_id)[-SCHEDULER_HISTORY_WINDOW:]]
+        # Her satır en az bir kontrol olduğundan pencere kadar satır yeterlidir
+        self.db.cursor.execute('''
+        SELECT price, date, COALESCE(last_seen, date), sample_count FROM price_history
+        WHERE product_id = ? ORDER BY date DESC LIMIT ?
+        ''', (product_id, SCHEDULER_HISTORY_WINDOW))
+        rows = tail_points(self.db.cursor.fetchall(), SCHEDULER_HISTORY_WINDOW - len(pending)) + pending
+        return [(price, date) for price, date in rows if price is not None]
+
+    def _targets(self, product_id: str) -> List[Tuple[float, str]]:
+        try:
+            self.db.cursor.execute('''
+            SELECT target_price, condition FROM price_targets
+            WHERE product_id = ? AND is_active = 1
+            ''', (product_id,))
+            return self.db.cursor.fetchall()
+        except sqlite3.OperationalError:
+            # Bildirim tabloları henüz oluşturulmamış
+            return []
+
+    def interval_for(self, product_id: str, current_price: Optional[float]) -> float:
+        """Ürünün geçmişine ve hedeflerine göre kontrol aralığını döndürür"""
+        return compute_interval(
+            self._history(product_id), current_price, self._targets(product_id),
+            self.base_interval, self.min_interval, self.max_interval
+        )
+
+    def due_products(self, now: datetime = None) -> List[dict]:
+        """Kontrol zamanı gelmiş ürünleri döndürür ve sabit döngü karşılaştırmasını günceller"""
+        now = now or datetime.now()
+        total = self.db.count_catalog_products()
+
+        tick = time.monotonic()
+        if self._last_tick is not None:
+            # Sabit döngü bu sürede her ürünü elapsed / CHECK_INTERVAL kez kontrol ederdi
+            self._fixed_equivalent += total * (tick - self._last_tick) / self.base_interval
+        else:
+            self._fixed_equivalent += total
+        self._last_tick = tick
+
+        self.total_products = total
+        due = self.db.get_due_products(now.isoformat())
+        metrics.incr('scheduler.due', len(due))
+        metrics.incr('scheduler.skipped', total - len(due))
+        return due
+
+    def reschedule(self, product: dict, success: bool = True, now: datetime = None) -> datetime:
+        """Kontrol sonrası bir sonraki zamanı hesaplar ve kaydeder; başarısızlar en kısa aralıkla denenir"""
+        now = now or datetime.now()
+        self.checks += 1
+        if success:
+            writer = getattr(self.db, 'writer', None)
+            price = writer.pending_price(product['product_id']) if writer is not None else None
+            if price is None:
+                price = (self.db.get_product(product['product_id']) or product).get('current_price')
+            interval = self.interval_for(product['product_id'], price)
+        else:
+            interval = self.min_interval
+        next_check = aligned_next_check(product['product_id'], now, interval)
+        self.db.set_next_check(product['product_id'], next_check.isoformat())
+        metrics.observe('scheduler.interval_seconds', interval)
+        return next_check
+
+    def report(self) -> dict:
+        """Sabit aralıklı döngüye göre yapılan ve tasarruf edilen istek sayıları"""
+        fixed = max(self._fixed_equivalent, self.checks)
+        return {
+            'checks': self.checks,
+            'fixed_loop_checks': round(fixed),
+            'saved': round(fixed - self.checks),
+            'savings_pct': round((1 - self.checks / fixed) * 100, 1) if fixed else 0.0,
+        }
+
+
+class RollingCheckRunner:
+    """
+    Kontrolleri aralık boyunca yayan sürekli (timing-wheel) çalıştırıcı
+
+    Her `tick` zamanı gelen ürünleri alır ve sabit bir hızla (saniyede `rate` kontrol)
+    fiyat kontrol motoruna verir. Tur kavramı yoktur: yetişemeyen ürünler bir sonraki
+    tıkta en gecikmiş olandan başlayarak işlenmeye devam eder, çalışmakta olan ürünler
+    tekrar başlatılmaz. Planlanan zamandan sapma `scheduler.lag_seconds` ile ölçülür.
+    """
+
+    def __init__(self, scheduler: CheckScheduler, engine, on_result,
+                 rate: float = CHECK_RATE, tick: float = CHECK_TICK, harvester=None):
+        self.scheduler = scheduler
+        self.engine = engine
+        self.on_result = on_result
+        # Opsiyonel ListingHarvester; aynı satıcı/markadan zamanı gelen ürünler tek liste sayfasıyla güncellenir
+        self.harvester = harvester
+        self.rate = rate
+        self.tick_seconds = tick
+        self.backlog = 0
+        self._in_flight = {}
+        # Liste sayfasında bulunamayan ürünler; sonraki tıklarda hız hakkıyla tek tek kontrol edilir
+        self._fallback = set()
+        self._allowance = 1.0
+        self._last_tick = None
+        self._semaphore = asyncio.Semaphore(engine.concurrency)
+        self._last_report = time.monotonic()
+        self._report_counters = metrics.counters()
+        # Son özet döneminde gerçekleşen kontrol hızı (kontrol/sn); `current_rate` yalnızca hedeftir
+        self.throughput = 0.0
+
+    @property
+    def current_rate(self) -> float:
+        """Saniyede başlatılabilecek kontrol sayısı"""
+        if self.rate > 0:
+            return self.rate
+        return max(self.scheduler.total_products, 1) / self.scheduler.base_interval * CHECK_RATE_HEADROOM
+
+    async def tick(self, now: datetime = None) -> int:
+        """Zamanı gelen ürünleri hız sınırı içinde başlatır; başlatılan kontrol sayısını döndürür"""
+        now = now or datetime.now()
+        writer = getattr(self.scheduler.db, 'writer', None)
+        if writer is not None:
+            # Biten kontrollerin sonraki kontrol zamanları yazılmadan zamanı gelenler okunmaz
+            await writer.flush_async()
+        due = [p for p in self.scheduler.due_products(now) if p['product_id'] not in self._in_flight]
+
+        tick = time.monotonic()
+        elapsed = tick - self._last_tick if self._last_tick is not None else self.tick_seconds
+        self._last_tick = tick
+        rate = self.current_rate
+        self._allowance = min(self._allowance + rate * elapsed, max(1.0, rate * self.tick_seconds))
+
+        pending = len(due)
+        batches = []
+        if self.harvester is not None:
+            # Bulunamayanlar tekrar gruplanmaz; en gecikmişler olarak önce başlatılır
+            self._fallback.intersection_update(p['product_id'] for p in due)
+            fallback = [p for p in due if p['product_id'] in self._fallback]
+            batches, due = self.harvester.plan([p for p in due if p['product_id'] not in self._fallback])
+            due = fallback + due
+
+        started = 0
+        # Liste sayfası grubu tek istek hakkı kullanır
+        for group, products in batches:
+            if self._allowance < 1:
+                break
+            self._allowance -= 1
+            started += len(products)
+            self._observe_lag(products, now)
+            task = asyncio.create_task(self._run_listing(group, products))
+            for product in products:
+                self._in_flight[product['product_id']] = task
+
+        for product in due:
+            if self._allowance < 1:
+                break
+            self._allowance -= 1
+            started += 1
+            self._fallback.discard(product['product_id'])
+            self._observe_lag([product], now)
+            self._in_flight[product['product_id']] = asyncio.create_task(self._run(product))
+
+        self.backlog = pending - started
+        metrics.observe('scheduler.backlog', self.backlog)
+        self._maybe_report()
+        return started
+
+    @staticmethod
+    def _observe_lag(products: list, now: datetime):
+        for product in products:
+            if product.get('next_check_at'):
+                lag = (now - datetime.fromisoformat(product['next_check_at'])).total_seconds()
+                metrics.observe('scheduler.lag_seconds', max(0.0, lag))
+
+    async def _check(self, product: dict):
+        async with self._semaphore:
+            await self.engine.check_one(product, self.on_result)
+
+    async def _run(self, product: dict):
+        try:
+            await self._check(product)
+        finally:
+            self._in_flight.pop(product['product_id'], None)
+
+    async def _run_listing(self, group, products: list):
+        """
+        Grubu liste sayfasından günceller
+
+        Sayfada bulunmayan ürünlerin kontrol zamanı değişmez; zamanı gelmiş olarak kalırlar ve sonraki
+        tıklarda diğer ürünler gibi hız hakkı kullanılarak tek tek kontrol edilirler.
+        """
+        try:
+            try:
+                async with self._semaphore:
+                    found = await self.harvester.harvest(group, products)
+            except Exception as e:
+                logger.error(f"Liste sayfası toplama hatası ({group}): {e}")
+                found = {}
+            for product in products:
+                product_data = found.get(product['product_id'])
+                if product_data:
+                    await self.engine.deliver(product, product_data, self.on_result)
+                else:
+                    self._fallback.add(product['product_id'])
+        finally:
+            for product in products:
+                self._in_flight.pop(product['product_id'], None)
+
+    async def drain(self):
+        """Çalışmakta olan kontrollerin bitmesini bekler"""
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+
+    def _maybe_report(self):
+        elapsed = time.monotonic() - self._last_report
+        if elapsed < SCHEDULER_REPORT_INTERVAL:
+            return
+        counters = metrics.counters()
+        period = metrics.diff(self._report_counters, counters)
+        self.throughput = (period.get('check.succeeded', 0) + period.get('check.failed', 0)) / elapsed
+        lag = {key: f"{value:.1f}" if value is not None else '-'
+               for key, value in metrics.summary('scheduler.lag_seconds').items()}
+        logger.info(
+            f"Zamanlayıcı: hedef hız {self.current_rate:.3f}, gerçekleşen {self.throughput:.3f} kontrol/sn "
+            f"({period.get('check.succeeded', 0):.0f} başarılı, {period.get('check.failed', 0):.0f} hatalı), "
+            f"bekleyen {self.backlog}, "
+            f"çalışan {len(self._in_flight)}, gecikme p50={lag['p50']} p99={lag['p99']} sn, "
+            f"sabit döngüye göre: {self.scheduler.report()}"
+        )
+        # Akış, sayfa doğrulayıcı, liste sayfası, hedge vb. kendi özetlerini metrics.add_report ile kaydeder
+        for line in metrics.reports(period).values():
+            logger.info(line)
+        if period:
+            logger.info(f"Dönem metrikleri: {period}")
+        self._report_counters = counters
+        self._last_report = time.monotonic()
@@ -0,0 +1,181 @@
+"""
+Kaynak bazlı devre kesici (circuit breaker) ve sağlık durumu
+Sürekli başarısız olan bir veri kaynağı (API endpoint'i, scraper) bekleme süresi
+boyunca atlanır; süre dolunca tek bir deneme isteğiyle (half-open) yeniden sınanır.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, List
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))  # Art arda hata sayısı
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', 300))                # İlk bekleme (saniye)
+BREAKER_MAX_COOLDOWN = float(os.getenv('BREAKER_MAX_COOLDOWN', 3600))       # Bekleme üst sınırı
+# Başarı oranı ve gecikme için üstel hareketli ortalama katsayısı
+EWMA_ALPHA = 0.2
+# Skor hesabında gecikmenin ağırlığı: bu kadar saniye gecikme skoru yarıya indirir
+LATENCY_SCALE = 5.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Tek bir kaynak için devre kesici
+
+    closed: istekler serbest; art arda `failure_threshold` hata devreyi açar.
+    open: `cooldown` süresince istek yapılmaz.
+    half_open: süre dolunca tek bir deneme isteğine izin verilir; başarılıysa devre kapanır,
+    başarısızsa bekleme süresi ikiye katlanarak (en fazla `max_cooldown`) tekrar açılır.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN, max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.success_rate = 1.0  # Yeni kaynaklar iyimser başlar, böylece en az bir kez denenir
+        self.latency = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Kaynağa istek yapılıp yapılamayacağını döndürür (half-open'da tek deneme)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+                logger.info(f"Devre yarı açık, deneme isteğine izin veriliyor: {self.name}")
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                metrics.incr(f'breaker.{self.name}.probe')
+                return True
+        metrics.incr(f'breaker.{self.name}.skipped')
+        return False
+
+    @property
+    def probe_due(self) -> bool:
+        """Bekleme süresi dolmuş ve deneme isteği bekleyen devre"""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown
+        return self.state == HALF_OPEN and not self._probe_in_flight
+
+    def release(self):
+        """Sonucu bilinmeden biten (iptal edilen) deneme isteğinin hakkını geri verir"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _update_stats(self, success: bool, latency: float):
+        self.success_rate = (1 - EWMA_ALPHA) * self.success_rate + EWMA_ALPHA * (1.0 if success else 0.0)
+        self.latency = latency if self.latency == 0 else (1 - EWMA_ALPHA) * self.latency + EWMA_ALPHA * latency
+        metrics.observe(f'source.{self.name}.seconds', latency)
+
+    def record_success(self, latency: float = 0.0):
+        with self._lock:
+            self._update_stats(True, latency)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Devre kapandı, kaynak tekrar sağlıklı: {self.name}")
+                metrics.incr(f'breaker.{self.name}.closed')
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+            self._probe_in_flight = False
+        metrics.incr(f'source.{self.name}.success')
+
+    def record_failure(self, latency: float = 0.0):
+        with self._lock:
+            self._update_stats(False, latency)
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+        metrics.incr(f'source.{self.name}.failure')
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        metrics.incr(f'breaker.{self.name}.opened')
+        logger.warning(f"Devre açıldı: {self.name} ({self.consecutive_failures} art arda hata), "
+                       f"{self.cooldown:.0f} sn boyunca atlanacak")
+
+    @property
+    def score(self) -> float:
+        """Yönlendirme skoru: yüksek başarı oranı ve düşük gecikme öne çıkar"""
+        return self.success_rate / (1 + self.latency / LATENCY_SCALE)
+
+    def snapshot(self) -> dict:
+        return {
+            'state': self.state,
+            'success_rate': round(self.success_rate, 3),
+            'latency': round(self.latency, 3),
+            'score': round(self.score, 3),
+            'consecutive_failures': self.consecutive_failures,
+            'cooldown': self.cooldown,
+        }
+
+
+class BreakerRegistry:
+    """İsimle erişilen devre kesiciler ve skor tabanlı kaynak sıralaması"""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN, max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._last_order = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = CircuitBreaker(name, self.failure_threshold, self.cooldown, self.max_cooldown)
+                    self._breakers[name] = breaker
+        return breaker
+
+    def rank(self, names: List[str], group: str = 'default') -> List[str]:
+        """
+        Kaynakları skora göre (en iyi önce) sıralar; eşit skorlarda verilen sıra korunur
+
+        Deneme zamanı gelmiş (half-open) kaynaklar başa alınır; aksi halde skoru düşük bir kaynak
+        daha iyi kaynak çalıştığı sürece hiç denenmez ve toparlandığı fark edilmezdi. Sıralama değiştiğinde log'a yazılır, ilk sıradaki kaynak `route.<grup>.<kaynak>` sayacına eklenir.
+        """
+        order = sorted(names, key=lambda name: (not self.get(name).probe_due, -self.get(name).score))
+        if order and order != self._last_order.get(group):
+            self._last_order[group] = order
+            details = ', '.join(
+                f"{name}({self.get(name).state}, başarı {self.get(name).success_rate:.2f}, {self.get(name).latency:.2f} sn)"
+                for name in order
+            )
+            logger.info(f"Kaynak sıralaması ({group}): {details}")
+        if order:
+            metrics.incr(f'route.{group}.{order[0]}')
+        return order
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Tüm devre kesicilerin sağlık durumu (izleme komutları için)"""
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+
+# Global devre kesici kayıt defteri
+breakers = BreakerRegistry()
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 import asyncio
 import logging
 from site_monitor import site_monitor
+from strategy_stats import strategy_stats
 from admin_utils import is_global_admin
 
 logger = logging.getLogger(__name__)
@@ -251,6 +252,49 @@ class MonitoringCommands(commands.Cog):
             )
             await message.edit(embed=embed)
 
+    @commands.command(name='strategy_stats', aliases=['strateji', 'extract_stats'])
+    async def strategy_distribution(self, ctx):
+        """Fiyat çıkarım stratejilerinin düzen bazlı dağılımı (sadece global adminler)"""
+        if not is_global_admin(ctx.author.id):
+            await ctx.send("❌ Bu komutu sadece global adminler kullanabilir.")
+            return
+        
+        try:
+            # Ayrıştırma süreçlerinin diske yazdığı sayımlar da görünsün
+            strategy_stats.load()
+            distribution = strategy_stats.distribution()
+            shifted = strategy_stats.shifted_layouts()
+            
+            embed = discord.Embed(
+                title="🧩 Fiyat Çıkarım Stratejileri",
+                description=f"{len(distribution)} sayfa düzeni, "
+                            f"{sum(info['pages'] for info in distribution.values())} sayfa",
+                color=0xe74c3c if shifted else 0x3498db
+            )
+            
+            for fingerprint, info in list(distribution.items())[:8]:
+                embed.add_field(
+                    name=f"📄 {fingerprint} ({info['pages']} sayfa)",
+                    value="\n".join(f"{name}: %{pct}" for name, pct in list(info['strategies'].items())[:5]),
+                    inline=True
+                )
+            
+            if shifted:
+                embed.add_field(
+                    name="⚠️ Olası Markup Değişikliği",
+                    value="Fiyatın sık bulunamadığı düzenler:\n" + "\n".join(shifted[:5]),
+                    inline=False
+                )
+            elif not distribution:
+                embed.add_field(name="ℹ️ Durum", value="Henüz istatistik yok.", inline=False)
+            
+            embed.set_footer(text="Stratejiler her düzende en çok kazanandan başlayarak denenir")
+            await ctx.send(embed=embed)
+            
+        except Exception as e:
+            logger.error(f"Strateji istatistikleri hatası: {e}")
+            await ctx.send(f"❌ İstatistikler alınırken hata oluştu: {str(e)}")
+
 async def setup(bot):
     """Cog'u bot'a ekle"""
     await bot.add_cog(MonitoringCommands(bot))
\ No newline at end of file
@@ -5,6 +5,7 @@ Fiyat hedefleri, uyarılar ve bildirim yönetimi
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import logging
 from notification_system import NotificationSystem
 
@@ -33,9 +34,10 @@ class NotificationCommands(commands.Cog):
         try:
             # URL'den product_id çıkar
             if 'trendyol.com' in product_id or 'ty.gl' in product_id:
-                from scraper import TrendyolScraper
-                scraper = TrendyolScraper()
-                extracted_id = scraper.extract_product_id(product_id)
+                # Paylaşılan istemci: kısa link çözümlemeleri önbellekten gelir, event loop bloklanmaz
+                extracted_id = await asyncio.to_thread(
+                    self.bot.trendyol.api_client.extract_product_id_from_url, product_id
+                )
                 if extracted_id:
                     product_id = extracted_id
                 else:
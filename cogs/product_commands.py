@@ -26,7 +26,7 @@ class ProductCommands(commands.Cog, name="Ürün Komutları"): # Cog'a isim verd
             return False, "❌ Geçersiz Trendyol URL'si. Lütfen geçerli bir Trendyol ürün linki girin."
 
         # API + fallback sistemi kullan
-        product_data = self.trendyol.get_product_info(url)
+        product_data = await self.trendyol.get_product_info_async(url)
         if not product_data or not product_data.get('success', False):
             error_msg = product_data.get('error', 'Bilinmeyen hata') if product_data else 'Ürün bilgileri alınamadı'
             return False, f"❌ Ürün bilgileri alınamadı: {error_msg}. Lütfen URL'yi kontrol edin veya daha sonra tekrar deneyin."
@@ -39,8 +39,8 @@ class ProductCommands(commands.Cog, name="Ürün Komutları"): # Cog'a isim verd
         else:
             # Bu ürün zaten takip listenizde olabilir veya veritabanı hatası olabilir.
             # get_product ile kontrol edip daha spesifik bir mesaj verilebilir.
-            existing_product = self.db.get_product(product_data['product_id'])
-            if existing_product and str(existing_product.get('guild_id')) == guild_id : # Aynı sunucuda mı?
+            existing_product = self.db.get_product(product_data['product_id'], guild_id=guild_id)
+            if existing_product: # Aynı sunucuda mı?
                  return False, "❌ Bu ürün zaten bu sunucuda takip listenizde bulunuyor!"
             return False, "❌ Ürün eklenirken bir hata oluştu veya bu ürün zaten genel takip listenizde mevcut."
 
@@ -67,7 +67,7 @@ class ProductCommands(commands.Cog, name="Ürün Komutları"): # Cog'a isim verd
         if not product:
             # Veritabanında yoksa ve geçerli bir URL ise, anlık çekmeyi dene
             if self.trendyol.api_client.is_valid_url(product_identifier):
-                scraped_data = self.trendyol.get_product_info(product_identifier)
+                scraped_data = await self.trendyol.get_product_info_async(product_identifier)
                 if scraped_data and scraped_data.get('success'):
                     return True, {"scraped_data": scraped_data, "not_tracked": True}
             return False, f"❌ ID'si `{product_id}` olan ürün veritabanında bulunamadı."
@@ -85,8 +85,9 @@ class ProductCommands(commands.Cog, name="Ürün Komutları"): # Cog'a isim verd
         if not product:
             return False, f"❌ ID'si `{product_id}` olan bir ürün takip listenizde bulunamadı."
 
-        # Silinecek ürünün bu sunucuya ait olup olmadığını kontrol et
-        if str(product.get('guild_id')) != guild_id:
+        # Silinecek ürünün bu sunucuda takip edilip edilmediğini kontrol et (abonelik satırı)
+        product = self.db.get_product(product_id, guild_id=guild_id)
+        if not product:
             return False, f"❌ ID'si `{product_id}` olan ürün bu sunucuda takip edilmiyor."
 
         product_owner_id = product.get('user_id')
@@ -119,7 +120,7 @@ class ProductCommands(commands.Cog, name="Ürün Komutları"): # Cog'a isim verd
         if not product_url:
             return False, f"❌ Ürünün (`{product_id}`) kayıtlı bir URL'si bulunamadı."
 
-        new_data = self.trendyol.get_product_info(product_url)
+        new_data = await self.trendyol.get_product_info_async(product_url)
         if not new_data or not new_data.get('success', False):
             error_msg = new_data.get('error', 'Bilinmeyen hata') if new_data else 'Veri alınamadı'
             return False, f"❌ Ürün (`{product_id}`) bilgileri alınamadı: {error_msg}"
@@ -33,4 +33,29 @@ TRENDYOL_URL_PATTERNS = [
 
 # Global Admin IDs (from environment or default)
 import os
-GLOBAL_ADMIN_IDS = os.getenv('GLOBAL_ADMIN_IDS', '992809942383870002,831185933117423656').split(',')
\ No newline at end of file
+GLOBAL_ADMIN_IDS = os.getenv('GLOBAL_ADMIN_IDS', '992809942383870002,831185933117423656').split(',')
+
+# HTTP bağlantı havuzu ayarları (keep-alive, tüm bot için paylaşılır)
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 100))            # Toplam açık bağlantı sınırı
+HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', 10))     # Host başına bağlantı sınırı
+HTTP_KEEPALIVE_TIMEOUT = int(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 30))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'False').lower() == 'true'  # httpx[http2] kuruluysa kullanılır
+
+# Ürün sayfası parça parça indirilir; ad, fiyat, orijinal fiyat ve görsel bulununca bağlantı kapatılır
+STREAM_FETCH = os.getenv('STREAM_FETCH', 'True').lower() == 'true'
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 16384))
+
+# HTML ayrıştırma süreç havuzu: ağ I/O'su ile aynı süreçte GIL'i paylaşmaması için ayrı süreçlerde çalışır
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', os.cpu_count() or 1))   # 0: ayrıştırma süreç içinde yapılır
+PARSE_QUEUE_SIZE = int(os.getenv('PARSE_QUEUE_SIZE', 0))               # Bekleyen+işlenen sayfa sınırı (0: 2 x worker)
+
+# Host başına istek hızı: (saniyede istek, patlama kapasitesi, en fazla jitter saniyesi)
+# Ortamdan ezmek için: RATE_LIMITS="trendyol.com=1:2:0.5,ty.gl=5:10:0"
+RATE_LIMITS = {
+    'trendyol.com': (1.0, 3, 0.5),
+    'public-mdc.trendyol.com': (3.0, 6, 0.2),
+    'api.trendyol.com': (3.0, 6, 0.2),
+    'ty.gl': (5.0, 10, 0.1),
+    'tyml.gl': (5.0, 10, 0.1),
+}
+RATE_LIMIT_DEFAULT = (1.0, 2, 0.5)  # Listede olmayan host'lar için
@@ -4,12 +4,20 @@ import os
 from datetime import datetime
 import logging
 
+from migrations import migrate, CORE
+from price_history import record_price
+from price_rollups import prune, PRICE_HISTORY_RETENTION_DAYS, PRICE_PRUNE_BATCH
+from sqlite_pool import acquire, release
+
 logger = logging.getLogger(__name__)
 
 class Database:
     def __init__(self, db_name="data/trendyol_tracker.sqlite"):
         """Veritabanı bağlantısını başlatır ve tabloları oluşturur."""
         self.db_name = db_name
+        # Opsiyonel toplu yazıcı (price_writer.PriceWriter); atanırsa kontrol döngüsünün yazmaları tamponlanır
+        self.writer = None
+        self.conn = None
         
         try:
             # Eğer data klasörü yoksa oluştur
@@ -25,46 +33,34 @@ class Database:
             else:
                 logger.error(f"HATA: Klasöre yazma izni yok: {os.path.dirname(abs_path)}")
             
-            # Veritabanı bağlantısı oluştur
-            self.conn = sqlite3.connect(db_name)
+            # Havuzdan bağlantı al (WAL, ayarlı pragmalar; bkz. sqlite_pool.py)
+            self.conn = acquire(db_name)
             self.cursor = self.conn.cursor()
             self.create_tables()
             logger.info(f"Veritabanı bağlantısı başarıyla kuruldu: {db_name}")
         except Exception as e:
             logger.error(f"Veritabanı bağlantısı oluşturulurken hata: {e}")
             logger.error(f"Veritabanı dosyası: {db_name}")
+            self.close()
             raise
 
+    def __enter__(self):
+        """`with Database() as db:` bloğu hata ile bitse de bağlantı havuza bırakılır."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def create_tables(self):
-        """Gerekli tabloları oluşturur."""
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id TEXT UNIQUE,
-            name TEXT,
-            url TEXT,
-            image_url TEXT,
-            current_price REAL,
-            original_price REAL,
-            added_at TIMESTAMP,
-            last_checked TIMESTAMP,
-            guild_id TEXT,
-            user_id TEXT,
-            channel_id TEXT
-        )
-        ''')
+        """
+        Gerekli tabloları oluşturur (bekleyen şema taşımalarını uygular, bkz. migrations.py).
 
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS price_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id TEXT,
-            price REAL,
-            date TIMESTAMP,
-            FOREIGN KEY(product_id) REFERENCES products(product_id)
-        )
-        ''')
-        
-        self.conn.commit()
+        Ürünler sunucu sayısından bağımsız olarak `catalog_products` tablosunda bir kez tutulur;
+        hangi sunucu/kullanıcının takip ettiği `product_subscriptions` tablosundadır.
+        `products` görünümü (view) eski tablo ile aynı sütunları abonelik başına bir satır
+        olarak sunar, okuma yapan kodlar değişmeden çalışır. Yazmalar temel tablolara yapılır.
+        """
+        migrate(self.conn, CORE)
 
     def add_product(self, product_data, guild_id, user_id, channel_id):
         """Ürün ekler ve ilk fiyat kaydını oluşturur."""
@@ -84,7 +80,7 @@ class Database:
             
             # Aynı ürünün bu sunucuda zaten var olup olmadığını kontrol et
             existing = self.cursor.execute('''
-                SELECT id FROM products 
+                SELECT id FROM product_subscriptions 
                 WHERE product_id = ? AND guild_id = ?
             ''', (product_data['product_id'], guild_id)).fetchone()
             
@@ -94,11 +90,11 @@ class Database:
             
             now = datetime.now().isoformat()
             
-            # Ürünü ekleme
+            # Ürün katalogda yoksa ekle (başka bir sunucu zaten takip ediyorsa mevcut kayıt kullanılır)
             self.cursor.execute('''
-            INSERT INTO products 
-            (product_id, name, url, image_url, current_price, original_price, added_at, last_checked, guild_id, user_id, channel_id) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT OR IGNORE INTO catalog_products 
+            (product_id, name, url, image_url, current_price, original_price, created_at, last_checked) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 product_data['product_id'],
                 product_data['name'],
@@ -107,23 +103,26 @@ class Database:
                 product_data['current_price'],
                 product_data.get('original_price', product_data['current_price']),
                 now,
-                now,
+                now
+            ))
+            is_new_product = self.cursor.rowcount > 0
+            
+            # Sunucu/kullanıcı aboneliği
+            self.cursor.execute('''
+            INSERT INTO product_subscriptions 
+            (product_id, guild_id, user_id, channel_id, added_at) 
+            VALUES (?, ?, ?, ?, ?)
+            ''', (
+                product_data['product_id'],
                 guild_id,
                 user_id,
-                channel_id
+                channel_id,
+                now
             ))
             
-            # Fiyat geçmişi kaydı ekleme
-            if product_data['current_price'] is not None:
-                self.cursor.execute('''
-                INSERT INTO price_history 
-                (product_id, price, date) 
-                VALUES (?, ?, ?)
-                ''', (
-                    product_data['product_id'],
-                    product_data['current_price'],
-                    now
-                ))
+            # İlk fiyat kaydı (ürün kataloğa yeni eklendiyse)
+            if is_new_product and product_data['current_price'] is not None:
+                record_price(self.cursor, product_data['product_id'], product_data['current_price'], now)
             
             self.conn.commit()
             logger.info(f"Ürün başarıyla eklendi: {product_data['name']} ({product_data['product_id']})")
@@ -137,11 +136,20 @@ class Database:
             self.conn.rollback()
             return False
 
-    def get_product(self, product_id):
-        """Belirli bir ürünün bilgilerini getirir."""
-        self.cursor.execute('''
-        SELECT * FROM products WHERE product_id = ?
-        ''', (product_id,))
+    def get_product(self, product_id, guild_id=None):
+        """
+        Belirli bir ürünün bilgilerini getirir.
+
+        guild_id verilirse o sunucudaki abonelik satırı döner; verilmezse ürünün ilk aboneliği.
+        """
+        if guild_id:
+            self.cursor.execute('''
+            SELECT * FROM products WHERE product_id = ? AND guild_id = ?
+            ''', (product_id, guild_id))
+        else:
+            self.cursor.execute('''
+            SELECT * FROM products WHERE product_id = ? ORDER BY added_at
+            ''', (product_id,))
         
         result = self.cursor.fetchone()
         if result:
@@ -219,14 +227,17 @@ class Database:
 
     def update_product_price(self, product_id, new_price):
         """Ürün fiyatını günceller ve fiyat geçmişine ekler."""
+        if self.writer is not None:
+            self.writer.update_price(product_id, new_price)
+            return True
         try:
             now = datetime.now().isoformat()
             
             logger.info(f"Ürün fiyatı güncelleniyor: {product_id} -> {new_price} TL")
             
-            # Ürün fiyatını güncelleme
+            # Ürün fiyatını güncelleme (katalogda tek satır, tüm aboneler görür)
             self.cursor.execute('''
-            UPDATE products 
+            UPDATE catalog_products 
             SET current_price = ?, last_checked = ? 
             WHERE product_id = ?
             ''', (new_price, now, product_id))
@@ -234,15 +245,11 @@ class Database:
             update_row_count = self.cursor.rowcount
             logger.info(f"Güncellenen satır sayısı: {update_row_count}")
             
-            # Fiyat geçmişi kaydı ekleme
-            self.cursor.execute('''
-            INSERT INTO price_history 
-            (product_id, price, date) 
-            VALUES (?, ?, ?)
-            ''', (product_id, new_price, now))
-            
-            insert_row_count = self.cursor.rowcount
-            logger.info(f"Eklenen fiyat geçmişi satır sayısı: {insert_row_count}")
+            # Fiyat geçmişi: fiyat değiştiyse yeni satır, değişmediyse son satır uzatılır
+            if record_price(self.cursor, product_id, new_price, now):
+                logger.info("Fiyat geçmişine yeni satır eklendi")
+            else:
+                logger.info("Fiyat değişmedi, fiyat geçmişinin son satırı uzatıldı")
             
             self.conn.commit()
             logger.info(f"İşlemler veritabanına kaydedildi (commit yapıldı)")
@@ -253,10 +260,83 @@ class Database:
             logger.error(f"İşlemler geri alındı (rollback yapıldı)")
             return False
 
+    def update_product_url(self, product_id, url):
+        """Ürünün kayıtlı URL'sini günceller (örn. kısaltılmış linki kanonik URL ile değiştirmek için)."""
+        try:
+            self.cursor.execute('''
+            UPDATE catalog_products SET url = ? WHERE product_id = ?
+            ''', (url, product_id))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Ürün URL'si güncellenirken hata: {e}")
+            self.conn.rollback()
+            return False
+
+    def get_due_products(self, now):
+        """
+        Kontrol zamanı gelmiş (veya hiç planlanmamış) ürünleri en gecikmişten başlayarak getirir.
+        Her ürün, kaç sunucuda takip edildiğinden bağımsız olarak bir kez döner.
+
+        `IS NULL OR <= ?` koşulu indeksi baştan sona taratır; iki aralık ayrı ayrı aranıp
+        (indeks sırasıyla) birleştirilir.
+        """
+        self.cursor.execute('''
+        SELECT * FROM (
+            SELECT * FROM catalog_products WHERE next_check_at IS NULL
+            UNION ALL
+            SELECT * FROM catalog_products WHERE next_check_at <= ?
+        ) c
+        WHERE EXISTS (SELECT 1 FROM product_subscriptions s WHERE s.product_id = c.product_id)
+        ORDER BY c.next_check_at
+        ''', (now,))
+        
+        results = self.cursor.fetchall()
+        columns = [desc[0] for desc in self.cursor.description]
+        return [dict(zip(columns, row)) for row in results]
+
+    def count_catalog_products(self):
+        """En az bir abonesi olan (takip edilen) farklı ürün sayısını döndürür."""
+        self.cursor.execute('''
+        SELECT COUNT(DISTINCT product_id) FROM product_subscriptions
+        ''')
+        return self.cursor.fetchone()[0]
+
+    def get_subscribers(self, product_id):
+        """Ürünü takip eden sunucu/kullanıcı/kanal kayıtlarını getirir."""
+        self.cursor.execute('''
+        SELECT guild_id, user_id, channel_id, added_at FROM product_subscriptions
+        WHERE product_id = ? ORDER BY added_at
+        ''', (product_id,))
+        
+        columns = [desc[0] for desc in self.cursor.description]
+        return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+
+    def set_next_check(self, product_id, next_check_at):
+        """Ürünün bir sonraki kontrol zamanını kaydeder."""
+        if self.writer is not None:
+            self.writer.set_next_check(product_id, next_check_at)
+            return True
+        try:
+            self.cursor.execute('''
+            UPDATE catalog_products SET next_check_at = ? WHERE product_id = ?
+            ''', (next_check_at, product_id))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Sonraki kontrol zamanı kaydedilirken hata: {e}")
+            self.conn.rollback()
+            return False
+
     def get_price_history(self, product_id, limit=10):
-        """Ürün fiyat geçmişini getirir."""
+        """
+        Ürün fiyat geçmişini yeniden eskiye getirir.
+
+        Her kayıt bir fiyat aralığıdır (bkz. price_history.py): `date` fiyatın ilk görüldüğü,
+        `last_seen` son görüldüğü kontrol, `sample_count` aradaki kontrol sayısı.
+        """
         self.cursor.execute('''
-        SELECT price, date FROM price_history 
+        SELECT price, date, COALESCE(last_seen, date), sample_count FROM price_history 
         WHERE product_id = ? 
         ORDER BY date DESC LIMIT ?
         ''', (product_id, limit))
@@ -266,12 +346,39 @@ class Database:
         
         if results:
             for row in results:
-                history.append({"price": row[0], "date": row[1]})
+                history.append({"price": row[0], "date": row[1], "last_seen": row[2], "sample_count": row[3]})
         
         return history
 
+    def prune_price_history(self, days=PRICE_HISTORY_RETENTION_DAYS, batch_size=PRICE_PRUNE_BATCH):
+        """
+        Saklama süresini aşan ham fiyat geçmişini siler (özetler kalır); silinen satır sayısı.
+
+        Satırlar `batch_size`'lık parçalarla, her parça ayrı commit ile silinir; yazma kilidi
+        parça başına kısa süre tutulur ve diğer yazarlar araya girebilir.
+        """
+        removed = 0
+        try:
+            while True:
+                count = prune(self.cursor, days, limit=batch_size)
+                self.conn.commit()
+                removed += count
+                if not batch_size or count < batch_size:
+                    break
+            if removed:
+                logger.info(f"Fiyat geçmişinden {removed} eski satır silindi ({days:g} günden eski)")
+            return removed
+        except Exception as e:
+            logger.error(f"Fiyat geçmişi temizlenirken hata: {e}")
+            self.conn.rollback()
+            return removed
+
     def delete_product(self, product_id, guild_id=None, user_id=None):
-        """Ürünü ve fiyat geçmişini siler."""
+        """
+        Ürün aboneliğini siler.
+
+        Ürünün başka abonesi kalmadıysa katalog kaydı, fiyat geçmişi ve özetleri de silinir.
+        """
         try:
             # Önce ürünün var olup olmadığını kontrol et
             existing_product = self.get_product(product_id)
@@ -285,33 +392,46 @@ class Database:
                 if user_id:
                     # Hem guild hem user kontrolü
                     self.cursor.execute('''
-                    DELETE FROM products 
+                    DELETE FROM product_subscriptions 
                     WHERE product_id = ? AND guild_id = ? AND user_id = ?
                     ''', (product_id, guild_id, user_id))
                 else:
                     # Sadece guild kontrolü
                     self.cursor.execute('''
-                    DELETE FROM products 
+                    DELETE FROM product_subscriptions 
                     WHERE product_id = ? AND guild_id = ?
                     ''', (product_id, guild_id))
             else:
                 # Tüm kayıtları sil (admin işlemi)
                 self.cursor.execute('''
-                DELETE FROM products 
+                DELETE FROM product_subscriptions 
                 WHERE product_id = ?
                 ''', (product_id,))
             
             deleted_rows = self.cursor.rowcount
             
             if deleted_rows > 0:
-                # İlişkili fiyat geçmişini silme
-                self.cursor.execute('''
-                DELETE FROM price_history 
-                WHERE product_id = ?
-                ''', (product_id,))
+                remaining = self.cursor.execute('''
+                SELECT COUNT(*) FROM product_subscriptions WHERE product_id = ?
+                ''', (product_id,)).fetchone()[0]
+                
+                if remaining == 0:
+                    # Son abone de ayrıldı: katalog kaydını, fiyat geçmişini ve özetlerini sil
+                    self.cursor.execute('''
+                    DELETE FROM catalog_products 
+                    WHERE product_id = ?
+                    ''', (product_id,))
+                    self.cursor.execute('''
+                    DELETE FROM price_history 
+                    WHERE product_id = ?
+                    ''', (product_id,))
+                    self.cursor.execute('''
+                    DELETE FROM price_rollups 
+                    WHERE product_id = ?
+                    ''', (product_id,))
                 
                 self.conn.commit()
-                logger.info(f"Ürün başarıyla silindi: {product_id} ({deleted_rows} kayıt)")
+                logger.info(f"Ürün başarıyla silindi: {product_id} ({deleted_rows} kayıt, kalan abone: {remaining})")
                 return True
             else:
                 logger.warning(f"Silinecek ürün bulunamadı veya yetki yok: {product_id}")
@@ -324,11 +444,17 @@ class Database:
 
     def check_price_changes(self):
         """Fiyat değişikliklerini kontrol eder ve değişen ürünleri döndürür."""
+        # Önceki kontrolün fiyatı: son geçmiş satırı birden çok kontrol içeriyorsa kendi fiyatı, yoksa bir önceki satır.
+        # `products` görünümü abonelik başına satır verir; satırlar eskisi gibi guild_id/user_id/channel_id taşır
         self.cursor.execute('''
         SELECT p.*, 
-            (SELECT price FROM price_history 
-             WHERE product_id = p.product_id 
-             ORDER BY date DESC LIMIT 1, 1) as previous_price
+            (SELECT CASE WHEN ph.sample_count > 1 THEN ph.price ELSE
+                (SELECT price FROM price_history 
+                 WHERE product_id = p.product_id 
+                 ORDER BY date DESC LIMIT 1, 1) END
+             FROM price_history ph
+             WHERE ph.product_id = p.product_id
+             ORDER BY ph.date DESC LIMIT 1) as previous_price
         FROM products p
         ''')
         
@@ -349,9 +475,10 @@ class Database:
         return changed_products
 
     def close(self):
-        """Veritabanı bağlantısını kapatır."""
+        """Veritabanı bağlantısını havuza geri bırakır (commit edilmemiş değişiklikler geri alınır)."""
         if self.conn:
-            self.conn.close()
+            release(self.conn)
+            self.conn = None
         
     def test_database(self):
         """Veritabanı bağlantısını ve işlemlerini test eder."""
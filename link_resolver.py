@@ -0,0 +1,170 @@
+"""
+Kısaltılmış link (ty.gl / tyml.gl) çözümleme önbelleği
+Kısa kod → tam URL → ürün ID eşlemesini ürün veritabanında kalıcı olarak tutar;
+önünde TTL'li bir LRU bellek önbelleği bulunur.
+"""
+import os
+import re
+import sqlite3
+import time
+import logging
+from datetime import datetime
+from typing import Optional
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from metrics import metrics
+from migrations import SHORT_LINKS
+from sqlite_cache import SQLiteLRUCache
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/trendyol_tracker.sqlite')
+SHORT_LINK_CACHE_SIZE = int(os.getenv('SHORT_LINK_CACHE_SIZE', 5000))
+SHORT_LINK_TTL = int(os.getenv('SHORT_LINK_TTL', 30 * 24 * 3600))  # 30 gün
+
+SHORT_LINK_HOSTS = ('ty.gl', 'tyml.gl')
+# Kanonik URL'de korunacak sorgu parametreleri (satıcıya özel fiyat için)
+CANONICAL_QUERY_PARAMS = ('merchantId',)
+
+PRODUCT_ID_PATTERN = re.compile(r'-p-(\d+)')
+CANONICAL_PRODUCT_URL_PATTERN = re.compile(r'^https?://(www\.)?trendyol\.com/[^?#]*-p-\d+', re.IGNORECASE)
+
+
+def is_short_link(url: str) -> bool:
+    """URL'nin ty.gl / tyml.gl kısaltılmış linki olup olmadığını kontrol eder"""
+    if not url or url.isdigit():
+        return False
+    netloc = urlparse(url).netloc.lower()
+    return netloc in SHORT_LINK_HOSTS or netloc.endswith(tuple('.' + host for host in SHORT_LINK_HOSTS))
+
+
+def short_code(url: str) -> str:
+    """Kısaltılmış link için önbellek anahtarı (host + yol) döndürür"""
+    parsed = urlparse(url.strip())
+    return f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+
+
+def canonicalize_product_url(url: str) -> str:
+    """İzleme parametrelerini atarak kalıcı ürün URL'si oluşturur"""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    kept = {key: query[key][0] for key in CANONICAL_QUERY_PARAMS if key in query}
+    canonical = f"{parsed.scheme or 'https'}://{parsed.netloc}{parsed.path}"
+    return f"{canonical}?{urlencode(kept)}" if kept else canonical
+
+
+def canonical_product_url(url_or_id: str) -> Optional[str]:
+    """
+    Yönlendirme çözmeye gerek olmayan girdiler için doğrudan ürün URL'si döndürür
+
+    Çıplak ürün ID'leri ve zaten /...-p-<id> biçimindeki Trendyol URL'leri kanoniktir;
+    diğer tüm girdiler (kısa linkler, arama linkleri) için None döner.
+    """
+    if not url_or_id:
+        return None
+    url_or_id = url_or_id.strip()
+    if url_or_id.isdigit():
+        return f"https://www.trendyol.com/any-p-{url_or_id}"
+    if CANONICAL_PRODUCT_URL_PATTERN.match(url_or_id):
+        return canonicalize_product_url(url_or_id)
+    return None
+
+
+def product_id_from_url(url: str) -> Optional[str]:
+    """Kanonik URL'deki -p-<id> kısmından ürün ID'sini çıkarır"""
+    match = PRODUCT_ID_PATTERN.search(urlparse(url).path)
+    return match.group(1) if match else None
+
+
+class ShortLinkCache(SQLiteLRUCache):
+    """
+    Kısaltılmış link çözümleme önbelleği
+
+    Bellekteki LRU katmanı en sık kullanılan linkleri tutar, SQLite katmanı
+    (`short_links` tablosu) ise yeniden başlatmalar arasında çözümlemeleri korur.
+    """
+
+    component = SHORT_LINKS
+
+    def __init__(self, db_path: str = DATABASE_PATH, max_size: int = SHORT_LINK_CACHE_SIZE,
+                 ttl: int = SHORT_LINK_TTL):
+        super().__init__(db_path, max_size)
+        self.ttl = ttl
+
+    def _is_fresh(self, resolved_ts: float) -> bool:
+        return self.ttl <= 0 or (time.time() - resolved_ts) < self.ttl
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Kısaltılmış linkin önbellekteki çözümlemesini döndürür
+
+        Returns:
+            {'canonical_url': ..., 'product_id': ...} veya None
+        """
+        code = short_code(url)
+        with self._lock:
+            entry = self._memory.get(code)
+            if entry and self._is_fresh(entry['resolved_ts']):
+                self._memory.move_to_end(code)
+                metrics.incr('short_link.memory_hit')
+                return entry
+
+            try:
+                row = self._get_conn().execute(
+                    'SELECT canonical_url, product_id, resolved_at FROM short_links WHERE short_code = ?',
+                    (code,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Kısa link önbelleği okunamadı: {e}")
+                row = None
+
+            if row:
+                resolved_ts = datetime.fromisoformat(row[2]).timestamp()
+                if self._is_fresh(resolved_ts):
+                    entry = {'canonical_url': row[0], 'product_id': row[1], 'resolved_ts': resolved_ts}
+                    self._remember(code, entry)
+                    metrics.incr('short_link.db_hit')
+                    return entry
+
+            metrics.incr('short_link.miss')
+            return None
+
+    def put(self, url: str, resolved_url: str, product_id: str = None) -> dict:
+        """Çözümlenen linki bellek ve veritabanı önbelleğine yazar"""
+        code = short_code(url)
+        canonical_url = canonicalize_product_url(resolved_url)
+        product_id = product_id or product_id_from_url(canonical_url)
+        now = datetime.now()
+        entry = {'canonical_url': canonical_url, 'product_id': product_id, 'resolved_ts': now.timestamp()}
+
+        with self._lock:
+            self._remember(code, entry)
+            try:
+                conn = self._get_conn()
+                conn.execute('''
+                    INSERT OR REPLACE INTO short_links (short_code, short_url, canonical_url, product_id, resolved_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (code, url, canonical_url, product_id, now.isoformat()))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Kısa link önbelleğe yazılamadı: {e}")
+        return entry
+
+    def resolve(self, url: str, resolver) -> str:
+        """
+        Kısaltılmış linki önbellekten veya verilen `resolver(url)` fonksiyonuyla çözer
+
+        Çözümleme başarısız olursa (resolver aynı linki döndürürse) önbelleğe yazılmaz.
+        """
+        cached = self.get(url)
+        if cached:
+            return cached['canonical_url']
+
+        resolved_url = resolver(url)
+        if not resolved_url or is_short_link(resolved_url):
+            return resolved_url or url
+        return self.put(url, resolved_url)['canonical_url']
+
+
+# Global önbellek instance'ı
+short_link_cache = ShortLinkCache()
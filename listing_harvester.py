@@ -0,0 +1,250 @@
+"""
+Liste sayfası toplayıcı
+Aynı satıcının veya markanın takip edilen ürünlerini tek tek indirmek yerine Trendyol
+arama/liste sayfasını çeker; sayfada görünen her takip edilen ürünün fiyatı tek istekle
+güncellenir. Liste sayfalarında bulunamayan ürünler normal ürün kontrolüne düşer.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlparse, parse_qs
+
+from link_resolver import PRODUCT_ID_PATTERN
+from metrics import metrics
+from selector_plan import parse_document
+
+logger = logging.getLogger(__name__)
+
+LISTING_HARVEST = os.getenv('LISTING_HARVEST', 'False').lower() == 'true'
+# Liste sayfası ancak bu kadar ürün aynı anda kontrol zamanı geldiyse çekilir
+LISTING_MIN_GROUP = int(os.getenv('LISTING_MIN_GROUP', 3))
+# Grup başına en fazla çekilecek liste sayfası
+LISTING_MAX_PAGES = int(os.getenv('LISTING_MAX_PAGES', 3))
+# Liste sayfalarında hiçbir ürünü bulunamayan grup bu süre boyunca tek tek kontrol edilir
+LISTING_RETRY_AFTER = int(os.getenv('LISTING_RETRY_AFTER', 24 * 3600))
+
+LISTING_URL = 'https://www.trendyol.com/sr'
+SITE_URL = 'https://www.trendyol.com'
+IMAGE_CDN_URL = 'https://cdn.dsmcdn.com'
+SEARCH_STATE_MARKER = '__SEARCH_APP_INITIAL_STATE__'
+
+GROUP_SELLER = 'seller'
+GROUP_BRAND = 'brand'
+# Marka adı olmayan ilk yol parçaları (ID ile eklenen ürünlerin yer tutucusu)
+NON_BRAND_SEGMENTS = ('any',)
+
+PRICE_NUMBER_RE = re.compile(r'(\d+[,.]\d+|\d+)')
+CARD_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' p-card-wrppr ')]"
+CARD_PRICE_CLASSES = ('prc-box-dscntd', 'prc-box-sllng')
+
+
+def listing_report(period: dict) -> Optional[str]:
+    """Dönemdeki liste sayfası özeti (dönemde liste sayfası çekilmediyse None)"""
+    if not period.get('listing.pages'):
+        return None
+    return (f"Liste sayfası: {period['listing.pages']:.0f} istekle {period.get('listing.found', 0):.0f} ürün "
+            f"({period.get('listing.fallback', 0):.0f} tek tek)")
+
+
+metrics.add_report('listing', listing_report)
+
+
+def listing_group(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Ürün URL'sinden liste grubunu çıkarır
+
+    Satıcıya özel linkler (merchantId) satıcı sayfasından, /<marka>/<ürün>-p-<id> biçimindeki
+    linkler marka aramasından güncellenir; diğerleri için None döner.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    merchant = parse_qs(parsed.query).get('merchantId')
+    if merchant and merchant[0].isdigit():
+        return GROUP_SELLER, merchant[0]
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if len(segments) == 2 and segments[0].lower() not in NON_BRAND_SEGMENTS and PRODUCT_ID_PATTERN.search(parsed.path):
+        return GROUP_BRAND, segments[0].lower()
+    return None
+
+
+def listing_url(group: Tuple[str, str], page: int = 1) -> str:
+    kind, key = group
+    params = {'mid': key} if kind == GROUP_SELLER else {'q': key.replace('-', ' ')}
+    if page > 1:
+        params['pi'] = page
+    return f"{LISTING_URL}?{urlencode(params)}"
+
+
+def _price(value) -> Optional[float]:
+    if isinstance(value, dict):
+        value = value.get('value')
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if 0.01 <= price <= 100000 else None
+
+
+def _text_price(text: Optional[str]) -> Optional[float]:
+    """'1.299,90 TL' biçimindeki metinden fiyat"""
+    if not text:
+        return None
+    match = PRICE_NUMBER_RE.search(text.strip().replace('.', '').replace(',', '.'))
+    return _price(match.group(1)) if match else None
+
+
+def _item(product_id, name, url, image_url, price, original_price) -> dict:
+    """scrape_product ile aynı yapıda ürün verisi"""
+    return {
+        'product_id': product_id,
+        'name': name,
+        'url': url,
+        'image_url': image_url,
+        'current_price': price,
+        'original_price': original_price or price,
+        'success': True,
+        'source': 'listing',
+    }
+
+
+def _state_products(html: str) -> Dict[str, dict]:
+    """Arama sayfasına gömülü state JSON'undaki ürünler"""
+    pos = html.find(SEARCH_STATE_MARKER)
+    start = html.find('{', pos) if pos != -1 else -1
+    if start == -1:
+        return {}
+    try:
+        state, _ = json.JSONDecoder().raw_decode(html, start)
+    except ValueError:
+        return {}
+    products = state.get('products') or (state.get('searchResult') or {}).get('products') or []
+    items = {}
+    for product in products:
+        if not isinstance(product, dict) or not product.get('id'):
+            continue
+        prices = product.get('price') or {}
+        price = _price(prices.get('sellingPrice')) or _price(prices.get('discountedPrice'))
+        if price is None:
+            continue
+        product_id = str(product['id'])
+        brand = product.get('brand')
+        brand = brand.get('name') if isinstance(brand, dict) else brand
+        name = ' '.join(part for part in (brand, product.get('name')) if part) or None
+        images = product.get('images') or []
+        items[product_id] = _item(
+            product_id, name, urljoin(SITE_URL, product.get('url') or f'/any-p-{product_id}'),
+            urljoin(IMAGE_CDN_URL, images[0]) if images else None,
+            price, _price(prices.get('originalPrice')),
+        )
+    return items
+
+
+def _dom_products(html: str) -> Dict[str, dict]:
+    """Ürün kartlarından (p-card-wrppr) ürünler; state JSON'u olmayan sayfalar için"""
+    items = {}
+    for card in parse_document(html).xpath(CARD_XPATH):
+        hrefs = card.xpath('.//a/@href')
+        match = PRODUCT_ID_PATTERN.search(hrefs[0]) if hrefs else None
+        if not match:
+            continue
+
+        def text(*classes):
+            for cls in classes:
+                nodes = card.xpath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]")
+                if nodes:
+                    return nodes[0].text_content().strip()
+            return None
+
+        price = _text_price(text(*CARD_PRICE_CLASSES))
+        if price is None:
+            continue
+        name = ' '.join(part for part in (text('prdct-desc-cntnr-ttl'), text('prdct-desc-cntnr-name')) if part)
+        images = card.xpath('.//img/@src')
+        items[match.group(1)] = _item(match.group(1), name or None, urljoin(SITE_URL, hrefs[0]),
+                                      images[0] if images else None, price, _text_price(text('prc-box-orgnl')))
+    return items
+
+
+def parse_listing(html: str) -> Dict[str, dict]:
+    """Liste/arama sayfasındaki ürünleri ürün ID'sine göre döndürür"""
+    if not html:
+        return {}
+    return _state_products(html) or _dom_products(html)
+
+
+class ListingHarvester:
+    """
+    Zamanı gelen ürünleri satıcı/marka gruplarına ayırır ve her grubu liste sayfasından günceller
+
+    `fetch(url)` liste sayfasının HTML'ini (başarısızsa None) döndüren sync veya async fonksiyondur.
+    """
+
+    def __init__(self, fetch, min_group: int = LISTING_MIN_GROUP, max_pages: int = LISTING_MAX_PAGES,
+                 retry_after: float = LISTING_RETRY_AFTER):
+        self.fetch = fetch
+        self.min_group = max(1, min_group)
+        self.max_pages = max(1, max_pages)
+        self.retry_after = retry_after
+        # Liste sayfasında hiç ürünü bulunamayan grupların son deneme zamanı
+        self._barren = {}
+
+    def _is_barren(self, group) -> bool:
+        tried = self._barren.get(group)
+        return tried is not None and time.monotonic() - tried < self.retry_after
+
+    def plan(self, products: List[dict]) -> Tuple[List[Tuple[Tuple[str, str], List[dict]]], List[dict]]:
+        """
+        Ürünleri liste sayfasından güncellenecek gruplar ve tek tek kontrol edilecekler olarak ayırır
+
+        Tek tek kontrol edilecekler gelen sırayı (en gecikmiş önce) korur.
+        """
+        grouped = defaultdict(list)
+        for product in products:
+            group = listing_group(product.get('url'))
+            if group and not self._is_barren(group):
+                grouped[group].append(product)
+
+        batches = [(group, members) for group, members in grouped.items() if len(members) >= self.min_group]
+        batched = {product['product_id'] for _, members in batches for product in members}
+        return batches, [product for product in products if product['product_id'] not in batched]
+
+    async def _fetch(self, url: str) -> Optional[str]:
+        if asyncio.iscoroutinefunction(self.fetch):
+            return await self.fetch(url)
+        return await asyncio.to_thread(self.fetch, url)
+
+    async def harvest(self, group: Tuple[str, str], products: List[dict]) -> Dict[str, dict]:
+        """Grubun liste sayfalarını çeker; bulunan takip edilen ürünlerin verisini döndürür"""
+        wanted = {product['product_id'] for product in products}
+        found = {}
+        pages = 0
+        for page in range(1, self.max_pages + 1):
+            try:
+                html = await self._fetch(listing_url(group, page))
+            except Exception as e:
+                logger.warning(f"Liste sayfası alınamadı ({group[0]} {group[1]}, sayfa {page}): {e}")
+                html = None
+            pages += 1
+            items = parse_listing(html)
+            if not items:
+                break
+            for product_id in wanted & items.keys():
+                found[product_id] = items[product_id]
+            if len(found) == len(wanted):
+                break
+
+        metrics.incr('listing.pages', pages)
+        metrics.incr('listing.found', len(found))
+        metrics.incr('listing.fallback', len(wanted) - len(found))
+        metrics.incr('listing.requests_saved', len(found) - pages)
+        if not found:
+            self._barren[group] = time.monotonic()
+            logger.info(f"Liste sayfasında takip edilen ürün bulunamadı ({group[0]} {group[1]}), "
+                        f"{self.retry_after / 3600:.0f} saat tek tek kontrol edilecek")
+        return found
@@ -12,6 +12,16 @@ import traceback
 from database import Database
 from scraper import TrendyolScraper
 from trendyol_api import TrendyolAPI, TrendyolAPIFallback
+from check_engine import PriceCheckEngine, CHECK_CONCURRENCY
+from check_scheduler import CheckScheduler, RollingCheckRunner, CHECK_MIN_INTERVAL, CHECK_MAX_INTERVAL, CHECK_TICK
+from notification_system import NotificationSystem
+from link_resolver import is_short_link
+from parse_pool import parse_pool
+from page_archive import page_archive, PAGE_ARCHIVE
+from page_validators import page_validators, CONDITIONAL_FETCH
+from listing_harvester import ListingHarvester, LISTING_HARVEST
+from price_writer import PriceWriter, BATCHED_WRITES
+from price_rollups import PRICE_HISTORY_RETENTION_DAYS
 
 dotenv.load_dotenv()
 
@@ -26,6 +36,7 @@ VERIFY_SSL = os.getenv('VERIFY_SSL', 'True').lower() == 'true'
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/trendyol_tracker.sqlite')
 TIMEOUT = int(os.getenv('TIMEOUT', 15))
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', 5))
+ASYNC_SCRAPER = os.getenv('ASYNC_SCRAPER', 'False').lower() == 'true'
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -35,6 +46,12 @@ bot = commands.Bot(command_prefix=PREFIX, intents=intents, case_insensitive=True
 # Database ve API/Scraper instance'larını bot objesine ata
 bot.db = Database(db_name=DATABASE_PATH)
 
+# Opsiyonel: kontrol döngüsünün fiyat/geçmiş/bildirim yazmaları toplu commit edilir
+price_writer = None
+if BATCHED_WRITES:
+    price_writer = PriceWriter(db_path=DATABASE_PATH)
+    bot.db.writer = price_writer
+
 # Trendyol API client'ı oluştur
 api_client = TrendyolAPI()
 
@@ -44,12 +61,39 @@ scraper = TrendyolScraper(
     verify_ssl=VERIFY_SSL
 )
 
+# Asenkron scraper (opsiyonel): tüm bot için tek, keep-alive bağlantı havuzu kullanır
+async_scraper = None
+if ASYNC_SCRAPER:
+    from async_scraper import AsyncTrendyolScraper
+    async_scraper = AsyncTrendyolScraper(use_proxy=PROXY_ENABLED, verify_ssl=VERIFY_SSL)
+
+# İndirilen sayfalar ayrı süreçlerde ayrıştırılır (PARSE_WORKERS=0 ise süreç içinde)
+for page_scraper in (scraper, async_scraper):
+    if page_scraper is not None:
+        page_scraper.parse_pool = parse_pool
+        # Opsiyonel: indirilen sayfalar replay için arşivlenir
+        if PAGE_ARCHIVE:
+            page_scraper.archive = page_archive
+        # Koşullu istek; değişmeyen sayfa yeniden ayrıştırılmaz
+        if CONDITIONAL_FETCH:
+            page_scraper.validators = page_validators
+
 # Fallback sistemi (önce API, sonra scraping)
-bot.trendyol = TrendyolAPIFallback(api_client=api_client, scraper=scraper)
+bot.trendyol = TrendyolAPIFallback(api_client=api_client, scraper=scraper, async_scraper=async_scraper)
 
 # Geriye uyumluluk için
 bot.scraper = scraper
 
+# Eşzamanlı fiyat kontrol motoru (istekler thread havuzunda, sonuçlar event loop'ta işlenir)
+check_engine = PriceCheckEngine(
+    fetch=bot.trendyol.get_product_info_async if ASYNC_SCRAPER else bot.trendyol.get_product_info,
+    concurrency=CHECK_CONCURRENCY
+)
+
+# Uyarlamalı zamanlayıcı: her ürün kendi aralığında, aralık içindeki sabit slotunda kontrol edilir
+check_scheduler = CheckScheduler(bot.db, base_interval=CHECK_INTERVAL)
+notification_system = NotificationSystem(bot.db)
+
 @bot.event
 async def on_ready():
     logger.info(f'Bot {bot.user.name} olarak giriş yaptı')
@@ -71,8 +115,13 @@ async def on_ready():
         traceback.print_exc()
 
     if not check_prices.is_running():
+        if price_writer is not None:
+            price_writer.start()
         check_prices.start()
-        logger.info(f"Fiyat kontrolü başlatıldı. Kontrol aralığı: {CHECK_INTERVAL} saniye")
+        logger.info(f"Fiyat kontrolü başlatıldı. Kontrol aralığı: {CHECK_MIN_INTERVAL}-{CHECK_MAX_INTERVAL} saniye "
+                    f"(varsayılan {CHECK_INTERVAL}), eşzamanlılık: {CHECK_CONCURRENCY}")
+    if PRICE_HISTORY_RETENTION_DAYS > 0 and not prune_price_history.is_running():
+        prune_price_history.start()
 
 async def load_cogs():
     cogs_dir = os.path.abspath("cogs")
@@ -117,136 +166,159 @@ async def load_cogs():
         logger.error(f"Site monitoring komutları yüklenirken hata: {e}")
         traceback.print_exc()
 
-@tasks.loop(seconds=CHECK_INTERVAL)
-async def check_prices():
-    logger.info("Fiyat kontrolü başlıyor...")
-    # bot.db üzerinden erişim
-    products = bot.db.get_all_products()
+async def handle_check_result(product, product_data, notification_system):
+    """Tek bir ürünün kontrol sonucunu işler: fiyatı kaydeder ve bildirimleri gönderir."""
+    if not product_data or not product_data.get('success', False):
+        error_msg = product_data.get('error', 'Bilinmeyen hata') if product_data else 'Veri alınamadı'
+        logger.warning(f"Ürün bilgileri alınamadı: {product.get('product_id','Bilinmeyen ID')} - {error_msg}")
+        return False
 
-    if not products:
-        logger.info("Takip edilen ürün bulunamadı.")
-        return
+    old_price = product['current_price']
+    new_price = product_data['current_price']
+
+    if new_price is None: # Scraper None dönebilir
+        logger.warning(f"Yeni fiyat bilgisi None geldi: {product.get('product_id','Bilinmeyen ID')}")
+        return False
 
-    logger.info(f"Toplam {len(products)} ürün kontrol edilecek.")
+    # Sayfa değişmemiş olsa da kontrol sayılır: aynı fiyat geçmişin son satırını uzatır (last_seen,
+    # sample_count), böylece zamanlayıcı aralığı açar ve özetler bu kontrolleri de içerir
+    bot.db.update_product_price(product['product_id'], new_price)
 
-    # Bildirim sistemi
-    from notification_system import NotificationSystem
-    notification_system = NotificationSystem(bot.db)
+    # Kısaltılmış linkle eklenmiş eski kayıtları kanonik URL'ye taşı (sonraki kontroller yönlendirme çözmez)
+    canonical_url = product_data.get('url')
+    if is_short_link(product.get('url')) and canonical_url and not is_short_link(canonical_url):
+        bot.db.update_product_url(product['product_id'], canonical_url)
 
-    for product in products:
+    # Fiyat hedeflerini kontrol et
+    triggered_targets = notification_system.check_price_targets(product['product_id'], new_price)
+
+    # Fiyat hedefi bildirimleri gönder
+    for target in triggered_targets:
         try:
-            # bot.trendyol üzerinden erişim (API + fallback)
-            product_data = bot.trendyol.get_product_info(product['url'])
-
-            if not product_data or not product_data.get('success', False):
-                error_msg = product_data.get('error', 'Bilinmeyen hata') if product_data else 'Veri alınamadı'
-                logger.warning(f"Ürün bilgileri alınamadı: {product.get('product_id','Bilinmeyen ID')} - {error_msg}")
-                continue
-
-            old_price = product['current_price']
-            new_price = product_data['current_price']
-
-            if new_price is None: # Scraper None dönebilir
-                logger.warning(f"Yeni fiyat bilgisi None geldi: {product.get('product_id','Bilinmeyen ID')}")
-                continue
-
-            bot.db.update_product_price(product['product_id'], new_price)
-
-            # Fiyat hedeflerini kontrol et
-            triggered_targets = notification_system.check_price_targets(product['product_id'], new_price)
-            
-            # Fiyat hedefi bildirimleri gönder
-            for target in triggered_targets:
-                try:
-                    channel = bot.get_channel(int(target['channel_id']))
-                    if channel:
-                        embed = discord.Embed(
-                            title="🎯 Fiyat Hedefi Gerçekleşti!",
-                            description=f"**{target['product_name'][:50]}...**",
-                            url=target['product_url'],
-                            color=discord.Color.gold()
-                        )
-                        
-                        condition_text = {
-                            'below': f"₺{target['target_price']:.2f} altına düştü",
-                            'above': f"₺{target['target_price']:.2f} üstüne çıktı"
-                        }
-                        
-                        embed.add_field(
-                            name="Hedef",
-                            value=condition_text.get(target['condition'], f"₺{target['target_price']:.2f}"),
-                            inline=True
-                        )
-                        
-                        embed.add_field(
-                            name="Mevcut Fiyat",
-                            value=f"₺{target['current_price']:.2f}",
-                            inline=True
-                        )
-                        
-                        embed.add_field(
-                            name="Durum",
-                            value="✅ Gerçekleşti",
-                            inline=True
-                        )
-                        
-                        if target.get('product_image'):
-                            embed.set_thumbnail(url=target['product_image'])
-                        
-                        user_mention = f"<@{target['user_id']}>"
-                        await channel.send(content=f"{user_mention} fiyat hedefiniz gerçekleşti!", embed=embed)
-                        logger.info(f"Fiyat hedefi bildirimi gönderildi: {target['product_name']}")
-                except Exception as e:
-                    logger.error(f"Fiyat hedefi bildirimi gönderilirken hata: {e}")
-
-            # Normal fiyat değişimi bildirimi
-            if old_price != new_price:
-                try:
-                    channel_id_str = product.get('channel_id')
-                    user_id_str = product.get('user_id')
-
-                    if not channel_id_str or not user_id_str:
-                        logger.warning(f"Ürün için channel_id veya user_id eksik: {product['product_id']}")
-                        continue
-                    
-                    channel = bot.get_channel(int(channel_id_str))
-                    if channel:
-                        embed = discord.Embed(
-                            title="💸 Fiyat Değişimi Bildirimi",
-                            url=product['url'],
-                            color=discord.Color.green() if new_price < old_price else discord.Color.red()
-                        )
-                        embed.set_author(name=product['name'])
-                        if product.get('image_url'):
-                            embed.set_thumbnail(url=product['image_url'])
-
-                        price_diff = new_price - old_price
-                        percentage = abs(price_diff / old_price * 100) if old_price != 0 else 0
-
-                        if price_diff < 0:
-                            change_text = f"🔽 **Fiyat Düştü!**\n{old_price:.2f} TL ➡️ {new_price:.2f} TL\n📉 {abs(price_diff):.2f} TL düşüş (-%{percentage:.1f})"
-                        else:
-                            change_text = f"🔼 **Fiyat Arttı!**\n{old_price:.2f} TL ➡️ {new_price:.2f} TL\n📈 {price_diff:.2f} TL artış (+%{percentage:.1f})"
-                        embed.description = change_text
-
-                        user_mention = f"<@{user_id_str}>"
-                        await channel.send(content=f"{user_mention} takip ettiğin ürünün fiyatı değişti!", embed=embed)
-                        logger.info(f"Fiyat değişimi bildirimi gönderildi: {product['name']}")
-                    else:
-                        logger.warning(f"Bildirim kanalı bulunamadı: {channel_id_str}")
-                except Exception as e:
-                    logger.error(f"Bildirim gönderilirken hata: {e} (Ürün: {product['product_id']})")
-            await asyncio.sleep(1)
+            channel = bot.get_channel(int(target['channel_id']))
+            if channel:
+                embed = discord.Embed(
+                    title="🎯 Fiyat Hedefi Gerçekleşti!",
+                    description=f"**{target['product_name'][:50]}...**",
+                    url=target['product_url'],
+                    color=discord.Color.gold()
+                )
+
+                condition_text = {
+                    'below': f"₺{target['target_price']:.2f} altına düştü",
+                    'above': f"₺{target['target_price']:.2f} üstüne çıktı"
+                }
+
+                embed.add_field(
+                    name="Hedef",
+                    value=condition_text.get(target['condition'], f"₺{target['target_price']:.2f}"),
+                    inline=True
+                )
+
+                embed.add_field(
+                    name="Mevcut Fiyat",
+                    value=f"₺{target['current_price']:.2f}",
+                    inline=True
+                )
+
+                embed.add_field(
+                    name="Durum",
+                    value="✅ Gerçekleşti",
+                    inline=True
+                )
+
+                if target.get('product_image'):
+                    embed.set_thumbnail(url=target['product_image'])
+
+                user_mention = f"<@{target['user_id']}>"
+                await channel.send(content=f"{user_mention} fiyat hedefiniz gerçekleşti!", embed=embed)
+                logger.info(f"Fiyat hedefi bildirimi gönderildi: {target['product_name']}")
         except Exception as e:
-            logger.error(f"Ürün kontrolünde hata: {product.get('product_id','Bilinmeyen ID')} - {e}")
-            traceback.print_exc()
-            continue
-    logger.info("Fiyat kontrolü tamamlandı.")
+            logger.error(f"Fiyat hedefi bildirimi gönderilirken hata: {e}")
+
+    # Normal fiyat değişimi bildirimi: ürün bir kez çekilir, sonucu tüm abonelere dağıtılır
+    if old_price != new_price:
+        subscribers = bot.db.get_subscribers(product['product_id'])
+        if not subscribers:
+            logger.warning(f"Ürünün abonesi bulunamadı: {product['product_id']}")
+            return True
+
+        embed = discord.Embed(
+            title="💸 Fiyat Değişimi Bildirimi",
+            url=product['url'],
+            color=discord.Color.green() if new_price < old_price else discord.Color.red()
+        )
+        embed.set_author(name=product['name'])
+        if product.get('image_url'):
+            embed.set_thumbnail(url=product['image_url'])
+
+        price_diff = new_price - old_price
+        percentage = abs(price_diff / old_price * 100) if old_price != 0 else 0
+
+        if price_diff < 0:
+            change_text = f"🔽 **Fiyat Düştü!**\n{old_price:.2f} TL ➡️ {new_price:.2f} TL\n📉 {abs(price_diff):.2f} TL düşüş (-%{percentage:.1f})"
+        else:
+            change_text = f"🔼 **Fiyat Arttı!**\n{old_price:.2f} TL ➡️ {new_price:.2f} TL\n📈 {price_diff:.2f} TL artış (+%{percentage:.1f})"
+        embed.description = change_text
+
+        for subscriber in subscribers:
+            try:
+                channel_id_str = subscriber.get('channel_id')
+                user_id_str = subscriber.get('user_id')
+
+                if not channel_id_str or not user_id_str:
+                    logger.warning(f"Abonelik için channel_id veya user_id eksik: {product['product_id']} (sunucu {subscriber.get('guild_id')})")
+                    continue
+
+                channel = bot.get_channel(int(channel_id_str))
+                if channel:
+                    user_mention = f"<@{user_id_str}>"
+                    await channel.send(content=f"{user_mention} takip ettiğin ürünün fiyatı değişti!", embed=embed)
+                    logger.info(f"Fiyat değişimi bildirimi gönderildi: {product['name']} (sunucu {subscriber.get('guild_id')})")
+                else:
+                    logger.warning(f"Bildirim kanalı bulunamadı: {channel_id_str}")
+            except Exception as e:
+                logger.error(f"Bildirim gönderilirken hata: {e} (Ürün: {product['product_id']})")
+    return True
+
+async def on_check_result(product, product_data):
+    """Kontrol sonucunu işler ve ürünün bir sonraki kontrolünü planlar."""
+    success = await handle_check_result(product, product_data, notification_system)
+    check_scheduler.reschedule(product, success)
+    return success
+
+# Opsiyonel: aynı satıcı/markadan zamanı gelen ürünler tek arama/liste sayfasıyla güncellenir
+listing_harvester = None
+if LISTING_HARVEST:
+    listing_harvester = ListingHarvester(
+        fetch=async_scraper.fetch_listing_async if ASYNC_SCRAPER else scraper.fetch_listing
+    )
+
+# Sürekli zamanlayıcı: kontroller tek seferde değil, aralık boyunca sabit hızla başlatılır
+check_runner = RollingCheckRunner(check_scheduler, check_engine, on_check_result, harvester=listing_harvester)
+
+@tasks.loop(seconds=CHECK_TICK)
+async def check_prices():
+    # Zamanı gelen ürünler hız sınırı içinde başlatılır; yetişemeyenler sonraki tıka devreder
+    started = await check_runner.tick()
+    if started:
+        logger.debug(f"{started} ürün kontrolü başlatıldı, bekleyen: {check_runner.backlog}")
 
 @check_prices.before_loop
 async def before_check_prices():
     await bot.wait_until_ready()
 
+def _prune_price_history():
+    # Thread'de çalışır: havuz bağlantısı thread'e aittir, bu yüzden bot.db yerine kendi bağlantısını alır
+    with Database(db_name=DATABASE_PATH) as db:
+        return db.prune_price_history(PRICE_HISTORY_RETENTION_DAYS)
+
+@tasks.loop(hours=1)
+async def prune_price_history():
+    # Saklama süresini aşan ham fiyat geçmişi parça parça silinir; saatlik/günlük özetler kalır.
+    # Silme event loop'u bloklamaz.
+    await asyncio.to_thread(_prune_price_history)
+
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.CommandNotFound):
@@ -311,8 +383,14 @@ if __name__ == "__main__":
     if not TOKEN:
         logger.error("Discord token bulunamadı! Lütfen .env dosyasına DISCORD_TOKEN ekleyin.")
         exit(1)
+    # Worker süreçleri discord ve kontrol thread'leri başlamadan oluşturulur
+    parse_pool.start()
     try:
         bot.run(TOKEN)
     except Exception as e:
         logger.error(f"Bot başlatılırken hata oluştu: {e}")
         traceback.print_exc()
+    finally:
+        if price_writer is not None:
+            price_writer.close()
+        parse_pool.shutdown()
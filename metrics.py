@@ -0,0 +1,95 @@
+"""
+Süreç içi metrik kayıt sistemi
+Sayaçlar ve gecikme gözlemleri (p50/p90/p99) için thread-safe yardımcılar
+"""
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Dict, List, Optional
+
+
+class Metrics:
+    """Sayaç ve örnek (gecikme vb.) tutan basit metrik kayıt defteri"""
+
+    def __init__(self, max_samples: int = 2000):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self._reports = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Sayacı artırır"""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Bir ölçüm değeri (örn. gecikme) kaydeder"""
+        with self._lock:
+            self._samples[name].append(value)
+
+    def counters(self) -> Dict[str, float]:
+        """Sayaçların anlık kopyasını döndürür"""
+        with self._lock:
+            return dict(self._counters)
+
+    def samples(self, name: str) -> List[float]:
+        """Kayıtlı örneklerin kopyasını döndürür (eskiden yeniye)"""
+        with self._lock:
+            return list(self._samples.get(name, ()))
+
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        """Kayıtlı örneklerin yüzdelik değerini döndürür (örnek yoksa None)"""
+        with self._lock:
+            values = sorted(self._samples.get(name, ()))
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+        return values[index]
+
+    def summary(self, name: str) -> Dict[str, Optional[float]]:
+        """Örnek sayısı ve p50/p90/p99/max özetini döndürür"""
+        with self._lock:
+            count = len(self._samples.get(name, ()))
+            maximum = max(self._samples[name]) if count else None
+        return {
+            'count': count,
+            'p50': self.percentile(name, 50),
+            'p90': self.percentile(name, 90),
+            'p99': self.percentile(name, 99),
+            'max': maximum
+        }
+
+    @staticmethod
+    def diff(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+        """İki sayaç görüntüsü arasındaki sıfır olmayan farkları döndürür"""
+        changes = {}
+        for name, value in after.items():
+            delta = value - before.get(name, 0)
+            if delta:
+                changes[name] = delta
+        return changes
+
+    def add_report(self, name: str, report: Callable[[Dict[str, float]], Optional[str]]):
+        """Alt sistemin dönem özeti fonksiyonunu kaydeder; `report(period)` log satırı ya da None döndürür"""
+        with self._lock:
+            self._reports[name] = report
+
+    def reports(self, period: Dict[str, float]) -> Dict[str, str]:
+        """Kayıtlı alt sistemlerin dönem özetleri (`diff` çıktısından); dönemde işi olmayanlar atlanır"""
+        with self._lock:
+            reports = list(self._reports.items())
+        lines = {}
+        for name, report in reports:
+            line = report(period)
+            if line:
+                lines[name] = line
+        return lines
+
+    def reset(self):
+        """Tüm sayaç ve örnekleri temizler"""
+        with self._lock:
+            self._counters.clear()
+            self._samples.clear()
+
+
+# Global metrik instance
+metrics = Metrics()
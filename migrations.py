@@ -0,0 +1,396 @@
+"""
+Sürümlü şema taşımaları
+Her bileşenin (bot veritabanı, bildirimler, kullanıcı tabloları, link/sayfa önbellekleri) şeması sıralı taşıma adımları
+olarak burada tanımlanır. Uygulanan son sürüm `schema_version` tablosunda bileşen başına tutulur;
+bağlantı açılırken yalnızca henüz uygulanmamış adımlar çalışır.
+
+Yeni şema değişikliği ilgili bileşenin listesine bir sonraki sürüm numarasıyla eklenir;
+mevcut adımlar değiştirilmez. İlk sürümler `IF NOT EXISTS` kullandığından `schema_version`
+tablosu olmayan eski veritabanları da aynı yoldan güncellenir.
+
+Bir dosyanın taşımaları süreç içinde bir kez kontrol edilir; web arayüzlerinin her istekte açtığı
+`Database` nesneleri tekrar DDL çalıştırmaz.
+"""
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Tuple, Union
+
+from price_history import compact as compact_price_history
+import price_rollups
+from sqlite_pool import database_identity
+
+logger = logging.getLogger(__name__)
+
+# Adım: tek bir SQL ifadesi ya da imleç alan fonksiyon
+Step = Union[str, Callable[[sqlite3.Cursor], None]]
+Migration = Tuple[int, str, List[Step]]
+
+CORE = 'core'
+NOTIFICATIONS = 'notifications'
+USER_AUTH = 'user_auth'
+USER_DATA = 'user_data'
+SHORT_LINKS = 'short_links'
+PAGE_VALIDATORS = 'page_validators'
+
+# Bu süreçte taşımaları tamamlanmış (dosya kimliği, bileşen) çiftleri
+_migrated = set()
+
+
+def _migrate_products_table(cursor: sqlite3.Cursor):
+    """Eski `products` tablosunu katalog + abonelik tablolarına taşır (bir kez çalışır)."""
+    row = cursor.execute("SELECT type FROM sqlite_master WHERE name = 'products'").fetchone()
+    if not row or row[0] != 'table':
+        return
+
+    columns = [column[1] for column in cursor.execute("PRAGMA table_info(products)").fetchall()]
+    next_check = 'next_check_at' if 'next_check_at' in columns else 'NULL'
+
+    logger.info("Eski products tablosu katalog/abonelik şemasına taşınıyor...")
+    # Aynı ürünün birden fazla satırı varsa en son kontrol edileni katalogda kalır
+    cursor.execute(f'''
+    INSERT OR IGNORE INTO catalog_products
+    (product_id, name, url, image_url, current_price, original_price, created_at, last_checked, next_check_at)
+    SELECT product_id, name, url, image_url, current_price, original_price, added_at, last_checked, {next_check}
+    FROM products
+    WHERE product_id IS NOT NULL
+    ORDER BY last_checked DESC
+    ''')
+    cursor.execute('''
+    INSERT OR IGNORE INTO product_subscriptions (product_id, guild_id, user_id, channel_id, added_at)
+    SELECT product_id, guild_id, user_id, channel_id, added_at
+    FROM products
+    WHERE product_id IS NOT NULL
+    ORDER BY added_at
+    ''')
+    migrated = cursor.rowcount
+    cursor.execute("DROP TABLE products")
+    logger.info(f"Taşıma tamamlandı: {migrated} abonelik")
+
+
+MIGRATIONS = {
+    # database.Database
+    CORE: [
+        (1, 'Katalog, abonelik ve fiyat geçmişi tabloları', [
+            '''
+            CREATE TABLE IF NOT EXISTS catalog_products (
+                product_id TEXT PRIMARY KEY,
+                name TEXT,
+                url TEXT,
+                image_url TEXT,
+                current_price REAL,
+                original_price REAL,
+                created_at TIMESTAMP,
+                last_checked TIMESTAMP,
+                next_check_at TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS product_subscriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id TEXT NOT NULL,
+                guild_id TEXT,
+                user_id TEXT,
+                channel_id TEXT,
+                added_at TIMESTAMP,
+                UNIQUE(product_id, guild_id),
+                FOREIGN KEY(product_id) REFERENCES catalog_products(product_id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS price_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id TEXT,
+                price REAL,
+                date TIMESTAMP,
+                FOREIGN KEY(product_id) REFERENCES catalog_products(product_id)
+            )
+            ''',
+            _migrate_products_table,
+            '''
+            CREATE VIEW IF NOT EXISTS products AS
+            SELECT s.id, c.product_id, c.name, c.url, c.image_url, c.current_price, c.original_price,
+                   s.added_at, c.last_checked, s.guild_id, s.user_id, s.channel_id, c.next_check_at
+            FROM product_subscriptions s
+            JOIN catalog_products c ON c.product_id = s.product_id
+            ''',
+        ]),
+        (2, 'Sık sorgular için indeksler', [
+            # Fiyat geçmişi ürün + tarihe göre okunur; price da indekste (tabloya dönmeden okunur)
+            'CREATE INDEX IF NOT EXISTS idx_price_history_product_date ON price_history(product_id, date, price)',
+            'CREATE INDEX IF NOT EXISTS idx_subscriptions_guild ON product_subscriptions(guild_id, added_at)',
+            'CREATE INDEX IF NOT EXISTS idx_catalog_next_check ON catalog_products(next_check_at)',
+        ]),
+        (3, 'Değişim bazlı fiyat geçmişi (bkz. price_history.py)', [
+            'ALTER TABLE price_history ADD COLUMN last_seen TIMESTAMP',
+            'ALTER TABLE price_history ADD COLUMN sample_count INTEGER NOT NULL DEFAULT 1',
+            compact_price_history,
+        ]),
+        (4, 'Saatlik/günlük fiyat özetleri (bkz. price_rollups.py)', [
+            price_rollups.CREATE_TABLE,
+            # Tetikleyicilerden önce: mevcut geçmiş bir kez sayılır
+            price_rollups.backfill,
+            *price_rollups.TRIGGERS,
+        ]),
+    ],
+    # notification_system.NotificationSystem
+    NOTIFICATIONS: [
+        (1, 'Fiyat hedefi ve bildirim tabloları', [
+            '''
+            CREATE TABLE IF NOT EXISTS price_targets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id TEXT,
+                user_id TEXT,
+                guild_id TEXT,
+                channel_id TEXT,
+                target_price REAL,
+                condition TEXT, -- 'below', 'above', 'exact'
+                is_active BOOLEAN DEFAULT 1,
+                created_at TIMESTAMP,
+                triggered_at TIMESTAMP,
+                FOREIGN KEY(product_id) REFERENCES products(product_id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS notification_settings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                guild_id TEXT,
+                notification_type TEXT,
+                is_enabled BOOLEAN DEFAULT 1,
+                settings TEXT, -- JSON format
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS notification_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                guild_id TEXT,
+                product_id TEXT,
+                notification_type TEXT,
+                message TEXT,
+                sent_at TIMESTAMP,
+                is_read BOOLEAN DEFAULT 0
+            )
+            ''',
+        ]),
+        (2, 'Sık sorgular için indeksler', [
+            'CREATE INDEX IF NOT EXISTS idx_price_targets_product ON price_targets(product_id, is_active)',
+            'CREATE INDEX IF NOT EXISTS idx_price_targets_user ON price_targets(user_id, is_active)',
+            'CREATE INDEX IF NOT EXISTS idx_notification_history_user ON notification_history(user_id, sent_at)',
+        ]),
+    ],
+    # user_auth.UserManager
+    USER_AUTH: [
+        (1, 'Kullanıcı, sunucu, oturum ve ürün tabloları', [
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                discord_id TEXT UNIQUE NOT NULL,
+                username TEXT NOT NULL,
+                discriminator TEXT,
+                avatar TEXT,
+                email TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_login TIMESTAMP,
+                is_active BOOLEAN DEFAULT 1,
+                encryption_key_hash TEXT,
+                settings TEXT  -- Şifrelenmiş kullanıcı ayarları
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS user_guilds (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                guild_id TEXT NOT NULL,
+                guild_name TEXT,
+                permissions INTEGER DEFAULT 0,
+                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                is_active BOOLEAN DEFAULT 1,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )
+            ''',
+            # session_token UNIQUE olduğundan oturum doğrulaması otomatik indeksi kullanır
+            '''
+            CREATE TABLE IF NOT EXISTS user_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                session_token TEXT UNIQUE NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                ip_address TEXT,
+                user_agent TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS user_products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                product_id TEXT NOT NULL,
+                encrypted_data TEXT NOT NULL,  -- Şifrelenmiş ürün verisi
+                guild_id TEXT,
+                channel_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id),
+                UNIQUE(user_id, product_id, guild_id)
+            )
+            ''',
+        ]),
+        (2, 'Sık sorgular için indeksler', [
+            'CREATE INDEX IF NOT EXISTS idx_user_guilds_user ON user_guilds(user_id, guild_id)',
+        ]),
+    ],
+    # user_database.UserDatabase
+    USER_DATA: [
+        (1, 'Şifrelenmiş kullanıcı verisi tabloları', [
+            '''
+            CREATE TABLE IF NOT EXISTS user_products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                product_id TEXT NOT NULL,
+                encrypted_data TEXT NOT NULL,
+                guild_id TEXT,
+                channel_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(user_id, product_id, guild_id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS user_price_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                product_id TEXT NOT NULL,
+                encrypted_price_data TEXT NOT NULL,
+                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS user_notifications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                encrypted_notification_data TEXT NOT NULL,
+                is_read BOOLEAN DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS user_price_targets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                product_id TEXT NOT NULL,
+                encrypted_target_data TEXT NOT NULL,
+                is_active BOOLEAN DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                triggered_at TIMESTAMP NULL
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS user_settings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER UNIQUE NOT NULL,
+                encrypted_settings TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+        ]),
+        (2, 'Sık sorgular için indeksler', [
+            'CREATE INDEX IF NOT EXISTS idx_user_price_history_user ON user_price_history(user_id, product_id, date)',
+            'CREATE INDEX IF NOT EXISTS idx_user_notifications_user ON user_notifications(user_id, created_at)',
+            'CREATE INDEX IF NOT EXISTS idx_user_price_targets_user ON user_price_targets(user_id, is_active)',
+        ]),
+    ],
+    # link_resolver.ShortLinkCache (ana veritabanında)
+    SHORT_LINKS: [
+        (1, 'Kısa link çözümleme tablosu', [
+            '''
+            CREATE TABLE IF NOT EXISTS short_links (
+                short_code TEXT PRIMARY KEY,
+                short_url TEXT,
+                canonical_url TEXT,
+                product_id TEXT,
+                resolved_at TIMESTAMP
+            )
+            ''',
+        ]),
+    ],
+    # page_validators.PageValidatorStore (ana veritabanında)
+    PAGE_VALIDATORS: [
+        (1, 'Sayfa doğrulayıcı tablosu', [
+            '''
+            CREATE TABLE IF NOT EXISTS page_validators (
+                product_id TEXT PRIMARY KEY,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                region_hash TEXT,
+                result TEXT,
+                checked_at TIMESTAMP
+            )
+            ''',
+        ]),
+    ],
+}
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        component TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        applied_at TIMESTAMP
+    )
+    ''')
+    conn.commit()
+
+
+def schema_version(conn: sqlite3.Connection, component: str) -> int:
+    """Bileşenin veritabanında uygulanmış son şema sürümü (hiç uygulanmadıysa 0)"""
+    _ensure_version_table(conn)
+    row = conn.execute('SELECT version FROM schema_version WHERE component = ?', (component,)).fetchone()
+    return row[0] if row else 0
+
+
+def migrate(conn: sqlite3.Connection, component: str) -> int:
+    """
+    Bileşenin bekleyen taşımalarını sırayla uygular, uygulanan adım sayısını döndürür
+
+    Her sürüm kendi transaction'ında çalışır; hata olursa o sürüm geri alınır ve hata yükseltilir,
+    önceki sürümler kayıtlı kalır.
+    """
+    identity = database_identity(conn)
+    if identity is not None and (identity, component) in _migrated:
+        return 0
+    current = schema_version(conn, component)
+    applied = 0
+    for version, description, steps in MIGRATIONS[component]:
+        if version <= current:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN')
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute('''
+            INSERT INTO schema_version (component, version, applied_at) VALUES (?, ?, ?)
+            ON CONFLICT(component) DO UPDATE SET version = excluded.version, applied_at = excluded.applied_at
+            ''', (component, version, datetime.now().isoformat()))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Şema taşıması başarısız ({component} v{version}: {description}): {e}")
+            raise
+        applied += 1
+        logger.info(f"Şema taşıması uygulandı: {component} v{version} - {description}")
+    if identity is not None:
+        _migrated.add((identity, component))
+    return applied
@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 import logging
 from enum import Enum
 
+from migrations import migrate, NOTIFICATIONS
+
 logger = logging.getLogger(__name__)
 
 class NotificationType(Enum):
@@ -23,49 +25,7 @@ class NotificationSystem:
     def create_notification_tables(self):
         """Bildirim tabloları oluştur"""
         try:
-            self.db.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS price_targets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id TEXT,
-                    user_id TEXT,
-                    guild_id TEXT,
-                    channel_id TEXT,
-                    target_price REAL,
-                    condition TEXT, -- 'below', 'above', 'exact'
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at TIMESTAMP,
-                    triggered_at TIMESTAMP,
-                    FOREIGN KEY(product_id) REFERENCES products(product_id)
-                )
-            ''')
-            
-            self.db.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notification_settings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    guild_id TEXT,
-                    notification_type TEXT,
-                    is_enabled BOOLEAN DEFAULT 1,
-                    settings TEXT, -- JSON format
-                    created_at TIMESTAMP,
-                    updated_at TIMESTAMP
-                )
-            ''')
-            
-            self.db.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notification_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    guild_id TEXT,
-                    product_id TEXT,
-                    notification_type TEXT,
-                    message TEXT,
-                    sent_at TIMESTAMP,
-                    is_read BOOLEAN DEFAULT 0
-                )
-            ''')
-            
-            self.db.conn.commit()
+            migrate(self.db.conn, NOTIFICATIONS)
             logger.info("Bildirim tabloları oluşturuldu")
             
         except Exception as e:
@@ -112,12 +72,14 @@ class NotificationSystem:
             self.db.cursor.execute('''
                 SELECT pt.*, p.name, p.url, p.image_url
                 FROM price_targets pt
-                JOIN products p ON pt.product_id = p.product_id
+                JOIN catalog_products p ON pt.product_id = p.product_id
                 WHERE pt.product_id = ? AND pt.is_active = 1
             ''', (product_id,))
             
             targets = self.db.cursor.fetchall()
             triggered_notifications = []
+            # Toplu yazıcı varsa hedef ve geçmiş yazmaları fiyat güncellemesiyle aynı commit'e girer
+            writer = getattr(self.db, 'writer', None)
             
             for target in targets:
                 target_id, product_id, user_id, guild_id, channel_id, target_price, condition, is_active, created_at, triggered_at, name, url, image_url = target
@@ -133,11 +95,14 @@ class NotificationSystem:
                 
                 if should_trigger:
                     # Hedefi tetiklenmiş olarak işaretle
-                    self.db.cursor.execute('''
-                        UPDATE price_targets 
-                        SET is_active = 0, triggered_at = ?
-                        WHERE id = ?
-                    ''', (datetime.now().isoformat(), target_id))
+                    if writer is not None:
+                        writer.trigger_target(target_id)
+                    else:
+                        self.db.cursor.execute('''
+                            UPDATE price_targets 
+                            SET is_active = 0, triggered_at = ?
+                            WHERE id = ?
+                        ''', (datetime.now().isoformat(), target_id))
                     
                     # Bildirim geçmişine ekle
                     message = f"Fiyat hedefi gerçekleşti! {name} ürünü ₺{target_price} {condition} hedefine ulaştı. Mevcut fiyat: ₺{current_price}"
@@ -157,7 +122,8 @@ class NotificationSystem:
                         'message': message
                     })
             
-            self.db.conn.commit()
+            if writer is None:
+                self.db.conn.commit()
             return triggered_notifications
             
         except Exception as e:
@@ -170,7 +136,7 @@ class NotificationSystem:
             query = '''
                 SELECT pt.*, p.name, p.current_price, p.url
                 FROM price_targets pt
-                JOIN products p ON pt.product_id = p.product_id
+                JOIN catalog_products p ON pt.product_id = p.product_id
                 WHERE pt.user_id = ? AND pt.is_active = 1
             '''
             params = [user_id]
@@ -221,6 +187,10 @@ class NotificationSystem:
     
     def add_notification_history(self, user_id, guild_id, product_id, notification_type, message):
         """Bildirim geçmişine ekle"""
+        writer = getattr(self.db, 'writer', None)
+        if writer is not None:
+            writer.add_notification(user_id, guild_id, product_id, notification_type, message)
+            return
         try:
             self.db.cursor.execute('''
                 INSERT INTO notification_history 
@@ -239,7 +209,7 @@ class NotificationSystem:
             query = '''
                 SELECT nh.*, p.name as product_name, p.url as product_url
                 FROM notification_history nh
-                LEFT JOIN products p ON nh.product_id = p.product_id
+                LEFT JOIN catalog_products p ON nh.product_id = p.product_id
                 WHERE nh.user_id = ?
             '''
             params = [user_id]
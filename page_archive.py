@@ -0,0 +1,259 @@
+"""
+İndirilen ürün sayfalarının sıkıştırılmış arşivi
+Sayfalar içerik özetiyle (sha256) adreslenir: aynı HTML bir kez saklanır. Hangi ürünün
+hangi sayfasının ne zaman indirildiği SQLite indeksinde tutulur. Çıkarıcı bozulduğunda
+sayfalar replay_archive.py ile yeniden işlenir. Eski kayıtlar saklama süresi ve toplam
+boyut sınırına göre silinir.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+try:
+    import zstandard  # Opsiyonel: daha iyi sıkıştırma oranı ve hız için
+except ImportError:
+    zstandard = None
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PAGE_ARCHIVE = os.getenv('PAGE_ARCHIVE', 'False').lower() == 'true'
+PAGE_ARCHIVE_DIR = os.getenv('PAGE_ARCHIVE_DIR', 'data/page_archive')
+PAGE_ARCHIVE_RETENTION_DAYS = float(os.getenv('PAGE_ARCHIVE_RETENTION_DAYS', 14))
+PAGE_ARCHIVE_MAX_MB = float(os.getenv('PAGE_ARCHIVE_MAX_MB', 500))
+# Saklama süresi ve boyut sınırı en fazla bu kadar saniyede bir uygulanır
+PAGE_ARCHIVE_PRUNE_INTERVAL = 3600
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+CODEC_ZSTD = 'zstd'
+CODEC_ZLIB = 'zlib'
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Arşivdeki sayfa zstd ile sıkıştırılmış, zstandard paketi kurulu değil")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def blob_path(directory: str, digest: str) -> str:
+    """İçerik özetinin arşivdeki dosya yolu (ilk iki karakter alt klasör)"""
+    return os.path.join(directory, 'blobs', digest[:2], digest)
+
+
+def read_blob(directory: str, digest: str, codec: str) -> str:
+    with open(blob_path(directory, digest), 'rb') as f:
+        return decompress(f.read(), codec).decode('utf-8')
+
+
+class PageArchive:
+    """
+    İçerik adresli sayfa deposu
+
+    blobs: özet -> sıkıştırılmış HTML (dosya), pages: ürün/URL/indirme zamanı -> özet.
+    """
+
+    def __init__(self, directory: str = PAGE_ARCHIVE_DIR, retention_days: float = PAGE_ARCHIVE_RETENTION_DAYS,
+                 max_mb: float = PAGE_ARCHIVE_MAX_MB, prune_interval: float = PAGE_ARCHIVE_PRUNE_INTERVAL):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.prune_interval = prune_interval
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        self._lock = threading.Lock()
+        self._conn = None
+        self._last_prune = time.monotonic()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+            conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                created_at TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id TEXT,
+                url TEXT,
+                fetched_at TIMESTAMP NOT NULL,
+                hash TEXT NOT NULL REFERENCES blobs(hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_product ON pages(product_id, fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_pages_fetched ON pages(fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_pages_hash ON pages(hash);
+            ''')
+            self._conn = conn
+        return self._conn
+
+    def store(self, url: str, html: str, product_id: Optional[str] = None,
+              fetched_at: Optional[datetime] = None) -> Optional[str]:
+        """
+        Sayfayı arşivler ve içerik özetini döndürür
+
+        Arşiv hatası taramayı durdurmaz; log'a yazılır ve None döner.
+        """
+        raw = html.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        fetched = (fetched_at or datetime.now()).isoformat()
+        try:
+            with self._lock:
+                conn = self._connection()
+                known = conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone()
+                if known:
+                    metrics.incr('archive.dedup')
+                else:
+                    blob = compress(raw, self.codec)
+                    path = blob_path(self.directory, digest)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(blob)
+                    os.replace(tmp_path, path)
+                    conn.execute('INSERT INTO blobs (hash, codec, size, stored_size, created_at) VALUES (?, ?, ?, ?, ?)',
+                                 (digest, self.codec, len(raw), len(blob), fetched))
+                    metrics.incr('archive.bytes_stored', len(blob))
+                conn.execute('INSERT INTO pages (product_id, url, fetched_at, hash) VALUES (?, ?, ?, ?)',
+                             (product_id, url, fetched, digest))
+                conn.commit()
+            metrics.incr('archive.pages')
+            metrics.incr('archive.bytes_raw', len(raw))
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Sayfa arşivlenemedi ({url}): {e}")
+            return None
+        if time.monotonic() - self._last_prune >= self.prune_interval:
+            self.prune()
+        return digest
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Saklama süresini aşan, sonra boyut sınırı aşıldıkça en eski kayıtları siler; silinen sayfa sayısı"""
+        self._last_prune = time.monotonic()
+        cutoff = ((now or datetime.now()) - timedelta(days=self.retention_days)).isoformat()
+        removed = 0
+        try:
+            with self._lock:
+                conn = self._connection()
+                removed += conn.execute('DELETE FROM pages WHERE fetched_at < ?', (cutoff,)).rowcount
+                self._drop_orphans(conn)
+                if self.max_bytes:
+                    removed += self._enforce_size(conn)
+                conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Sayfa arşivi temizlenemedi: {e}")
+            return removed
+        if removed:
+            metrics.incr('archive.pruned', removed)
+            logger.info(f"Sayfa arşivinden {removed} kayıt silindi")
+        return removed
+
+    def _enforce_size(self, conn) -> int:
+        """Toplam blob boyutu sınırın altına inene kadar en eski sayfa kayıtlarını siler"""
+        sizes = dict(conn.execute('SELECT hash, stored_size FROM blobs'))
+        excess = sum(sizes.values()) - self.max_bytes
+        if excess <= 0:
+            return 0
+        rows = conn.execute('SELECT id, hash FROM pages ORDER BY fetched_at, id').fetchall()
+        references = Counter(digest for _, digest in rows)
+        doomed, freed = [], 0
+        for page_id, digest in rows:
+            if freed >= excess:
+                break
+            doomed.append((page_id,))
+            references[digest] -= 1
+            # Blob yalnızca son kaydı da silinince yer açar
+            if references[digest] == 0:
+                freed += sizes.get(digest, 0)
+        conn.executemany('DELETE FROM pages WHERE id = ?', doomed)
+        self._drop_orphans(conn)
+        return len(doomed)
+
+    def _drop_orphans(self, conn):
+        """Hiçbir sayfa kaydının göstermediği blob'ları siler"""
+        orphans = [row[0] for row in conn.execute(
+            'SELECT hash FROM blobs WHERE hash NOT IN (SELECT hash FROM pages)'
+        )]
+        for digest in orphans:
+            try:
+                os.remove(blob_path(self.directory, digest))
+            except FileNotFoundError:
+                pass
+        conn.executemany('DELETE FROM blobs WHERE hash = ?', [(digest,) for digest in orphans])
+
+    def select(self, product_ids: Optional[List[str]] = None, since: Optional[str] = None,
+               until: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """Arşiv dilimi: (ürün, zaman aralığı) filtresine uyan sayfa kayıtları, eskiden yeniye"""
+        query = '''
+        SELECT pages.id, pages.product_id, pages.url, pages.fetched_at, pages.hash, blobs.codec
+        FROM pages JOIN blobs ON blobs.hash = pages.hash WHERE 1 = 1
+        '''
+        params = []
+        if product_ids:
+            query += f" AND pages.product_id IN ({', '.join('?' * len(product_ids))})"
+            params.extend(product_ids)
+        if since:
+            query += ' AND pages.fetched_at >= ?'
+            params.append(since)
+        if until:
+            query += ' AND pages.fetched_at < ?'
+            params.append(until)
+        query += ' ORDER BY pages.fetched_at'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._connection().execute(query, params).fetchall()
+        keys = ('id', 'product_id', 'url', 'fetched_at', 'hash', 'codec')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def read(self, digest: str) -> str:
+        with self._lock:
+            row = self._connection().execute('SELECT codec FROM blobs WHERE hash = ?', (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return read_blob(self.directory, digest, row[0])
+
+    def iter_pages(self, **filters) -> Iterator[dict]:
+        """Seçilen kayıtları HTML'leriyle birlikte döndürür (benchmark vb. için)"""
+        for entry in self.select(**filters):
+            entry['html'] = read_blob(self.directory, entry['hash'], entry['codec'])
+            yield entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            pages, first, last = conn.execute('SELECT COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM pages').fetchone()
+            blobs, raw, stored = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs'
+            ).fetchone()
+        return {'pages': pages, 'blobs': blobs, 'raw_bytes': raw, 'stored_bytes': stored,
+                'first': first, 'last': last, 'codec': self.codec}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global sayfa arşivi (PAGE_ARCHIVE=True ise main.py scraper'lara bağlar)
+page_archive = PageArchive()
@@ -0,0 +1,375 @@
+"""
+Ürün sayfası için DOM kurmadan çalışan hızlı çıkarım katmanı
+JSON-LD ve productDetail/winnerVariant state blob'u ham HTML üzerinde önceden derlenmiş
+regex'lerle taranır; BeautifulSoup ağacı yalnızca bu katman eksik kalırsa kurulur.
+"""
+import codecs
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import deque
+from typing import Optional
+
+from metrics import metrics
+from selector_plan import plan_store
+
+logger = logging.getLogger(__name__)
+
+# Kaç sayfada bir katman dağılımının log'a yazılacağı
+EXTRACT_REPORT_EVERY = 500
+
+TIERS = ('fast', 'dom', 'failed')
+
+# Boyutu bilinmeyen (chunked/sıkıştırılmış) yanıtlarda tasarrufu tahmin etmek için
+# her N akışta bir sayfa sonuna kadar okunur
+STREAM_CALIBRATE_EVERY = 50
+SCRIPT_END = '</script>'
+
+LD_JSON_RE = re.compile(
+    r'<script[^>]*type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+OG_IMAGE_RE = re.compile(
+    r'<meta[^>]*property\s*=\s*["\']og:image["\'][^>]*content\s*=\s*["\']([^"\']+)["\']',
+    re.IGNORECASE
+)
+# State blob fiyat/stok regex'leri çıkarım planından (site_structure.json) gelir
+STATE_MARKERS = ('winnerVariant', 'productDetail')
+
+# Düzen parmak izini oluşturan işaretler (ham HTML'de bulunup bulunmamaları)
+LAYOUT_MARKERS = (
+    ('ld', 'application/ld+json'),
+    ('state', 'winnerVariant'),
+    ('detail', 'productDetail'),
+    ('testid', 'data-testid="price"'),
+    ('pprice', 'price-price'),
+    ('prcdsc', 'prc-dsc'),
+    ('campaign', 'campaign-price'),
+    ('newbr', 'pr-new-br'),
+)
+
+# Fiyat bölgesi özeti: bu işaretlerden işaretli elemanın ilk metnine kadarki kısım
+# (ilk kapanış etiketi, en fazla REGION_WINDOW karakter) özete girer
+REGION_MARKERS = tuple(marker for name, marker in LAYOUT_MARKERS if name not in ('ld', 'state', 'detail')) + (
+    'product-name', 'add-to-cart', 'buy-now', 'og:image',
+)
+REGION_WINDOW = 512
+# Sayfanın herhangi bir yerindeki fiyat ve stok metinleri de özete girer; metin araması
+# kuralının bulabileceği bir fiyat değişirse özet de değişir
+REGION_TEXT_RE = re.compile(
+    r'\d[\d.,]*\s*(?:TL|₺)|tükendi|stok yok|mevcut değil|satışta değil|sepete ekle|şimdi al',
+    re.IGNORECASE
+)
+
+
+def _to_price(value) -> Optional[float]:
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if 0.01 <= price <= 100000 else None
+
+
+def _ld_objects(html: str):
+    """Sayfadaki JSON-LD bloklarını (liste ve @graph açılmış halde) döndürür"""
+    for match in LD_JSON_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except (json.JSONDecodeError, ValueError):
+            continue
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            if isinstance(item, dict):
+                yield from (obj for obj in item.get('@graph', [item]) if isinstance(obj, dict))
+
+
+def _ld_image(image) -> Optional[str]:
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if isinstance(image, dict):
+        image = image.get('contentUrl') or image.get('url')
+    return image if isinstance(image, str) else None
+
+
+def _state_scripts(html: str):
+    """productDetail/winnerVariant içeren script gövdelerini DOM kurmadan bulur"""
+    seen = set()
+    for marker in STATE_MARKERS:
+        pos = html.find(marker)
+        while pos != -1:
+            start = html.rfind('<script', 0, pos)
+            end = html.find('</script>', pos)
+            # İşaret bir script içinde değilse (ör. sayfa metni) atla
+            if start != -1 and end != -1 and html.rfind('</script>', start, pos) == -1:
+                if start not in seen:
+                    seen.add(start)
+                    yield html[start:end]
+                pos = html.find(marker, end)
+            else:
+                pos = html.find(marker, pos + len(marker))
+
+
+def region_hash(html: str) -> Optional[str]:
+    """
+    Sayfanın fiyat, stok, isim ve görselle ilgili bölgelerinin özeti
+
+    JSON-LD blokları, state script'leri, DOM işaretli elemanların ilk metni ve sayfadaki
+    tüm fiyat/stok metinleri özetlenir; reklam, öneri ve takip kodu gibi ilgisiz kısımlar
+    dışarıda kalır. Özet çıkarım planı sürümünü de içerir, plan değişince eski sonuçlar
+    geçersiz olur. Hiçbir bölge bulunamazsa None döner (sayfa her seferinde ayrıştırılır).
+    """
+    digest = hashlib.sha1()
+    found = False
+    for match in LD_JSON_RE.finditer(html):
+        digest.update(match.group(1).encode('utf-8', 'replace'))
+        found = True
+    for script in _state_scripts(html):
+        digest.update(script.encode('utf-8', 'replace'))
+        found = True
+    for marker in REGION_MARKERS:
+        pos = html.find(marker)
+        if pos != -1:
+            end = html.find('</', pos, pos + REGION_WINDOW)
+            digest.update(html[pos:end if end != -1 else pos + REGION_WINDOW].encode('utf-8', 'replace'))
+            found = True
+    for match in REGION_TEXT_RE.finditer(html):
+        digest.update(match.group(0).encode('utf-8', 'replace'))
+        found = True
+    if not found:
+        return None
+    digest.update(f"plan:{plan_store.current().version}".encode())
+    return digest.hexdigest()
+
+
+def layout_fingerprint(html: str) -> str:
+    """Sayfadaki bilinen düzen işaretlerinden okunabilir bir parmak izi üretir (ör. 'ld+testid')"""
+    present = [name for name, marker in LAYOUT_MARKERS if marker in html]
+    return '+'.join(present) or 'unknown'
+
+
+def fast_extract(html: str) -> dict:
+    """
+    Ham HTML'den JSON-LD ve state blob ile ürün bilgisi çıkarır
+
+    Returns:
+        product_name, price, original_price, image_url, in_stock (bilinmiyorsa None) ve fiyatı bulan
+        strateji (price_source: 'json_ld' / 'state_blob') anahtarlı dict; bulunamayan alanlar None'dır.
+    """
+    plan = plan_store.current()
+    data = _empty_fields()
+    for obj in _ld_objects(html):
+        _apply_ld(data, obj)
+    for script in _state_scripts(html):
+        _apply_state(data, script, plan)
+
+    if not data['image_url']:
+        match = OG_IMAGE_RE.search(html)
+        if match:
+            data['image_url'] = match.group(1)
+
+    if data['price'] and (not data['original_price'] or data['original_price'] < data['price']):
+        data['original_price'] = data['price']
+    return data
+
+
+def _empty_fields() -> dict:
+    return {'product_name': None, 'price': None, 'original_price': None, 'image_url': None, 'in_stock': None,
+            'price_source': None, 'original_found': False}
+
+
+def _apply_ld(data: dict, obj: dict):
+    """Tek JSON-LD nesnesinden henüz bulunmamış alanları doldurur"""
+    offers = obj.get('offers')
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    if not isinstance(offers, dict):
+        return
+    data['product_name'] = data['product_name'] or obj.get('name')
+    data['image_url'] = data['image_url'] or _ld_image(obj.get('image'))
+    if data['price'] is None:
+        data['price'] = _to_price(offers.get('price') or offers.get('lowPrice'))
+        data['price_source'] = 'json_ld' if data['price'] is not None else None
+    availability = offers.get('availability')
+    if isinstance(availability, str) and data['in_stock'] is None:
+        data['in_stock'] = 'instock' in availability.lower() and 'outofstock' not in availability.lower()
+
+
+def _apply_state(data: dict, script: str, plan):
+    """Tek state script'inden henüz bulunmamış alanları doldurur"""
+    # Orijinal fiyat state blob'da bulunur; blob'da yoksa ürün indirimsizdir
+    data['original_found'] = True
+    if data['price'] is None:
+        for pattern in plan.state_price:
+            match = pattern.search(script)
+            if match:
+                data['price'] = _to_price(match.group(1))
+                data['price_source'] = 'state_blob' if data['price'] is not None else None
+                break
+    if data['original_price'] is None:
+        for pattern in plan.state_original_price:
+            match = pattern.search(script)
+            if match:
+                data['original_price'] = _to_price(match.group(1))
+                break
+    if data['in_stock'] is None:
+        match = plan.state_in_stock.search(script) if plan.state_in_stock else None
+        if match:
+            data['in_stock'] = match.group(1) == 'true'
+        else:
+            match = plan.state_sold_out.search(script) if plan.state_sold_out else None
+            if match:
+                data['in_stock'] = match.group(1) == 'false'
+
+
+def is_complete(data: dict) -> bool:
+    """Hızlı katman DOM'a gerek bırakmayacak kadar bilgi buldu mu"""
+    if data['in_stock'] is False:
+        return bool(data['product_name'])
+    return bool(data['product_name']) and data['price'] is not None and data['in_stock'] is not None
+
+
+def stream_complete(data: dict) -> bool:
+    """Akışın kesilebilmesi için ad, fiyat, orijinal fiyat, görsel ve stok durumu bulundu mu"""
+    if data['in_stock'] is False:
+        return bool(data['product_name'])
+    return is_complete(data) and bool(data['image_url']) and data['original_found']
+
+
+_full_page_sizes = deque(maxlen=STREAM_CALIBRATE_EVERY)
+_streams_started = 0
+
+
+class StreamScanner:
+    """
+    Parça parça gelen sayfa gövdesini biriktirir ve hızlı yolu artımlı çalıştırır
+
+    `feed` gerekli alanların hepsi bulunduğunda True döner; çağıran bağlantıyı kapatır.
+    Her parçada yalnızca yeni kapanan script blokları ve og:image için henüz taranmamış metin
+    taranır. JSON-LD ve state alanları ayrı tutulup `fast_extract`'in önceliğiyle birleştirilir.
+    Boyut bilinmiyorsa (Content-Length yok) her STREAM_CALIBRATE_EVERY akıştan biri
+    tasarruf tahmini için sonuna kadar okunur.
+    """
+
+    def __init__(self, encoding: str = 'utf-8', content_length: Optional[int] = None):
+        global _streams_started
+        _streams_started += 1
+        self.content_length = content_length
+        self.calibrate = content_length is None and (
+            not _full_page_sizes or _streams_started % STREAM_CALIBRATE_EVERY == 0
+        )
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._text = ''
+        self._ld = _empty_fields()
+        self._state = _empty_fields()
+        self._og_image = None
+        self._scanned = 0       # Son işlenen script bloğunun sonu
+        self._search_from = 0   # Script sonu aramasının başlangıcı
+        self._og_from = 0       # og:image aramasının başlangıcı (kapanmamış ilk etiket)
+        self.bytes_read = 0
+        self.complete = False
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_read += len(chunk)
+        self._text += self._decoder.decode(chunk)
+        if not self.complete and self._scan():
+            self.complete = stream_complete(self._fields())
+        return self.complete and not self.calibrate
+
+    def _scan(self) -> bool:
+        """Son taramadan beri tamamlanan script bloklarını ve og:image etiketini işler; yeni bilgi geldiyse True"""
+        text = self._text
+        changed = False
+        end = text.find(SCRIPT_END, self._search_from)
+        if end != -1:
+            plan = plan_store.current()
+            while end != -1:
+                block_end = end + len(SCRIPT_END)
+                start = text.rfind('<script', self._scanned, end)
+                if start != -1:
+                    block = text[start:block_end]
+                    for obj in _ld_objects(block):
+                        _apply_ld(self._ld, obj)
+                    for script in _state_scripts(block):
+                        _apply_state(self._state, script, plan)
+                    changed = True
+                self._scanned = block_end
+                end = text.find(SCRIPT_END, block_end)
+        self._search_from = max(self._scanned, len(text) - len(SCRIPT_END) + 1)
+
+        if self._og_image is None and not self._ld['image_url']:
+            match = OG_IMAGE_RE.search(text, self._og_from)
+            if match:
+                self._og_image = match.group(1)
+                changed = True
+            else:
+                # Eşleşme tek etiket içinde kalır; kapanmış etiketler bir daha taranmaz
+                tag = text.rfind('<')
+                self._og_from = tag if tag > text.rfind('>') else len(text)
+        return changed
+
+    def _fields(self) -> dict:
+        """Şimdiye kadar okunan metin için `fast_extract`'in bulacağı alanlar (değer önceliği aynı)"""
+        data = {key: self._ld[key] if self._ld[key] is not None else self._state[key] for key in self._ld}
+        data['original_found'] = self._state['original_found']
+        data['image_url'] = data['image_url'] or self._og_image
+        return data
+
+    def finish(self, aborted: bool, bytes_read: Optional[int] = None) -> str:
+        """
+        Akış metriklerini kaydeder ve okunan metni döndürür
+
+        Args:
+            aborted: Bağlantı sayfa bitmeden kapatıldı mı
+            bytes_read: Content-Length ile aynı birimde (ağdan) okunan bayt; verilmezse çözülmüş gövde baytı
+        """
+        read = self.bytes_read if bytes_read is None else bytes_read
+        metrics.incr('stream.pages')
+        metrics.incr('stream.bytes_read', read)
+        if aborted:
+            metrics.incr('stream.aborted')
+            full_size = self.content_length
+            if full_size is None and _full_page_sizes:
+                full_size = sum(_full_page_sizes) / len(_full_page_sizes)
+            if full_size:
+                metrics.incr('stream.bytes_saved', max(0, full_size - read))
+        elif self.content_length is None:
+            _full_page_sizes.append(read)
+        return self._text + self._decoder.decode(b'', final=True)
+
+
+def stream_report(period: dict) -> Optional[str]:
+    """Dönemdeki akışlı indirme özeti (dönemde akışlı sayfa yoksa None)"""
+    if not period.get('stream.pages'):
+        return None
+    return (f"Akışlı indirme: indirilmeyen veri {period.get('stream.bytes_saved', 0) / 1024:.0f} KB "
+            f"({period.get('stream.aborted', 0):.0f}/{period['stream.pages']:.0f} sayfa erken kesildi)")
+
+
+metrics.add_report('stream', stream_report)
+
+
+def record_page(tier: str, cpu_start: float):
+    """Sayfanın hangi katmandan sunulduğunu ve harcanan CPU süresini kaydeder"""
+    metrics.incr(f'extract.tier.{tier}')
+    metrics.observe('extract.cpu_seconds', time.thread_time() - cpu_start)
+    counters = metrics.counters()
+    if sum(counters.get(f'extract.tier.{name}', 0) for name in TIERS) % EXTRACT_REPORT_EVERY == 0:
+        logger.info(f"Sayfa çıkarım katmanları: {tier_report()}")
+
+
+def tier_report() -> dict:
+    """Katman başına sayfa yüzdeleri ve sayfa başına CPU süresi (ms)"""
+    counters = metrics.counters()
+    counts = {tier: counters.get(f'extract.tier.{tier}', 0) for tier in TIERS}
+    pages = int(sum(counts.values()))
+    cpu = metrics.summary('extract.cpu_seconds')
+    report = {'pages': pages}
+    report.update({f'{tier}_pct': round(count / pages * 100, 1) if pages else 0.0 for tier, count in counts.items()})
+    report.update({f'cpu_ms_{key}': round(cpu[key] * 1000, 2) if cpu.get(key) is not None else None
+                   for key in ('p50', 'p90', 'p99')})
+    return report
@@ -0,0 +1,123 @@
+"""
+Ürün sayfası doğrulayıcı önbelleği
+Her ürün için son yanıtın ETag / Last-Modified başlıklarını, fiyatla ilgili sayfa
+bölgesinin özetini ve o sayfadan çıkarılan sonucu tutar. Sonraki kontrolde koşullu
+istek gönderilir; sunucu 304 dönerse ya da bölge özeti değişmemişse sayfa yeniden
+ayrıştırılmaz ve kayıtlı sonuç kullanılır.
+"""
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+from metrics import metrics
+from migrations import PAGE_VALIDATORS
+from sqlite_cache import SQLiteLRUCache
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/trendyol_tracker.sqlite')
+CONDITIONAL_FETCH = os.getenv('CONDITIONAL_FETCH', 'True').lower() == 'true'
+PAGE_VALIDATOR_CACHE_SIZE = int(os.getenv('PAGE_VALIDATOR_CACHE_SIZE', 20000))
+
+
+def page_report(period: dict) -> Optional[str]:
+    """Dönemde ayrıştırılmadan geçilen sayfalar ve kazanılan CPU (dönemde sayfa yoksa None)"""
+    # Ayrıştırılmayan her sayfa ortalama bir ayrıştırma kadar CPU kazandırır (p50 ile tahmin)
+    skipped = period.get('page.parse_skipped', 0) + period.get('page.conditional_hit', 0)
+    pages = skipped + period.get('page.parsed', 0)
+    if not pages:
+        return None
+    parse_cpu = metrics.summary('extract.cpu_seconds')['p50'] or 0
+    return (f"Sayfa doğrulayıcı: ayrıştırılmayan {skipped:.0f}/{pages:.0f} sayfa "
+            f"(304: {period.get('page.conditional_hit', 0):.0f}/{period.get('page.conditional_requests', 0):.0f}, "
+            f"~{skipped * parse_cpu:.1f} sn CPU)")
+
+
+metrics.add_report('page', page_report)
+
+
+def conditional_headers(entry: Optional[dict]) -> dict:
+    """Kayıtlı doğrulayıcılardan If-None-Match / If-Modified-Since başlıklarını üretir"""
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+class PageValidatorStore(SQLiteLRUCache):
+    """
+    Ürün başına sayfa doğrulayıcıları
+
+    Bellekteki LRU katmanı sık kontrol edilen ürünleri tutar, SQLite katmanı
+    (`page_validators` tablosu) ise yeniden başlatmalar arasında doğrulayıcıları korur.
+    """
+
+    component = PAGE_VALIDATORS
+
+    def __init__(self, db_path: str = DATABASE_PATH, max_size: int = PAGE_VALIDATOR_CACHE_SIZE):
+        super().__init__(db_path, max_size)
+
+    def get(self, product_id: str) -> Optional[dict]:
+        """Ürünün son sayfa doğrulayıcılarını döndürür (yoksa None)"""
+        with self._lock:
+            entry = self._memory.get(product_id)
+            if entry is not None:
+                self._memory.move_to_end(product_id)
+                return entry
+
+            try:
+                row = self._get_conn().execute('''
+                    SELECT url, etag, last_modified, region_hash, result
+                    FROM page_validators WHERE product_id = ?
+                ''', (product_id,)).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Sayfa doğrulayıcısı okunamadı: {e}")
+                return None
+            if not row:
+                return None
+            try:
+                result = json.loads(row[4]) if row[4] else None
+            except ValueError:
+                result = None
+            entry = {'url': row[0], 'etag': row[1], 'last_modified': row[2],
+                     'region_hash': row[3], 'result': result}
+            self._remember(product_id, entry)
+            return entry
+
+    def put(self, product_id: str, url: str, etag: Optional[str], last_modified: Optional[str],
+            region_hash: Optional[str], result: dict) -> dict:
+        """
+        Doğrulayıcıları ve sayfa sonucunu kaydeder
+
+        Değişmeyen sayfada yalnızca bellek güncellenir; veritabanına yazım atlanır.
+        """
+        entry = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                 'region_hash': region_hash, 'result': result}
+        with self._lock:
+            previous = self._memory.get(product_id)
+            self._remember(product_id, entry)
+            if previous == entry:
+                return entry
+            try:
+                conn = self._get_conn()
+                conn.execute('''
+                    INSERT OR REPLACE INTO page_validators
+                    (product_id, url, etag, last_modified, region_hash, result, checked_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (product_id, url, etag, last_modified, region_hash,
+                      json.dumps(result, ensure_ascii=False), datetime.now().isoformat()))
+                conn.commit()
+                metrics.incr('page.validators_saved')
+            except sqlite3.Error as e:
+                logger.error(f"Sayfa doğrulayıcısı yazılamadı: {e}")
+        return entry
+
+
+# Global doğrulayıcı deposu (CONDITIONAL_FETCH=True ise main.py scraper'lara bağlar)
+page_validators = PageValidatorStore()
@@ -0,0 +1,168 @@
+"""
+HTML ayrıştırma süreç havuzu
+İndirilen ürün sayfaları ağ I/O'sunu yapan süreçten ayrı worker süreçlerinde ayrıştırılır;
+böylece DOM kurma ve regex taraması event loop/indirme thread'leriyle GIL için yarışmaz.
+Havuzdaki iş sayısı sınırlıdır: sınır dolunca yeni sayfa bekletilir ve indiren taraf
+(fiyat kontrol motoru) yeni istek açmaz.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from config import PARSE_WORKERS, PARSE_QUEUE_SIZE
+from metrics import metrics
+from strategy_stats import STRATEGY_SAVE_INTERVAL, StrategyStats
+
+logger = logging.getLogger(__name__)
+
+# Worker sürecindeki scraper (yalnızca ayrıştırma metodları kullanılır)
+_worker_scraper = None
+_worker_loaded = 0.0
+
+
+def _init_worker():
+    """
+    Worker sürecini hazırlar
+
+    Worker strateji sayımlarını diske yazmaz: her sayfanın sayımları sonuçla birlikte ana sürece
+    döner ve orada kaydedilir (worker'lar süreç kapanışında atexit çalıştırmaz). Worker dosyayı
+    yalnızca sıralama için STRATEGY_SAVE_INTERVAL saniyede bir yeniden okur.
+    """
+    global _worker_scraper, _worker_loaded
+    from scraper import TrendyolScraper
+    _worker_scraper = TrendyolScraper()
+    _worker_scraper.strategy_stats = StrategyStats(save_interval=float('inf'))
+    _worker_loaded = time.monotonic()
+    metrics.reset()
+
+
+def _parse_in_worker(html: str):
+    """
+    Worker'da sayfayı ayrıştırır
+
+    Returns:
+        (sonuç dict'i, sayfa başına sayaç farkları, strateji sayımları, harcanan CPU süresi); sayaçlar
+        ana süreçte tekrar işlenir ki katman dağılımı ve akış istatistikleri tek yerde görünsün.
+    """
+    global _worker_loaded
+    stats = _worker_scraper.strategy_stats
+    if time.monotonic() - _worker_loaded >= STRATEGY_SAVE_INTERVAL:
+        stats.load()
+        _worker_loaded = time.monotonic()
+    before = metrics.counters()
+    cpu_start = time.thread_time()
+    result = _worker_scraper._parse_page(html)
+    cpu = time.thread_time() - cpu_start
+    return result, metrics.diff(before, metrics.counters()), stats.take_pending(), cpu
+
+
+class ParsePool:
+    """
+    Sınırlı kuyruklu ayrıştırma süreç havuzu
+
+    `parse` bloklar: havuzda `queue_size` sayfa (işlenen + sırada bekleyen) varken yeni
+    sayfa yer açılana kadar bekler. Havuz kapalıysa (workers=0) veya bozulduysa None döner;
+    çağıran sayfayı kendi sürecinde ayrıştırır.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, queue_size: int = PARSE_QUEUE_SIZE):
+        self.workers = max(0, workers)
+        self.queue_size = queue_size if queue_size > 0 else max(1, self.workers * 2)
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        # Worker sayımlarının işlendiği istatistikler; kapanışta kaydedilir
+        self._stats: Dict[int, StrategyStats] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+                logger.info(f"Ayrıştırma havuzu başlatıldı: {self.workers} süreç, kuyruk {self.queue_size}")
+            return self._executor
+
+    def start(self):
+        """
+        Worker süreçlerini hemen başlatır
+
+        Bot açılışında, diğer thread'ler oluşmadan çağrılmalıdır; süreçler ilk sayfada
+        başlatılırsa fork sırasında başka thread'lerin tuttuğu kilitler kopyalanabilir.
+        """
+        if self.enabled:
+            self._get_executor().submit(time.sleep, 0).result()
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Bozulan havuzu bırakır; sonraki sayfa için yenisi kurulur"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def parse(self, html: str, stats: Optional[StrategyStats] = None) -> Optional[dict]:
+        """
+        Sayfayı bir worker'da ayrıştırır; havuz kullanılamazsa None döner
+
+        Worker'ın strateji sayımları `stats`'a (çağıran scraper'ın istatistikleri) işlenir.
+        """
+        if not self.enabled:
+            return None
+        wait_start = time.monotonic()
+        with self._slots:
+            metrics.observe('parse.queue_wait_seconds', time.monotonic() - wait_start)
+            with self._lock:
+                self._in_flight += 1
+            start = time.monotonic()
+            executor = None
+            try:
+                executor = self._get_executor()
+                result, counters, strategies, cpu = executor.submit(_parse_in_worker, html).result()
+            except (BrokenProcessPool, OSError) as e:
+                logger.error(f"Ayrıştırma havuzu kullanılamadı, sayfa süreç içinde ayrıştırılacak: {e}")
+                metrics.incr('parse.pool_errors')
+                if executor is not None:
+                    self._discard(executor)
+                return None
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+            metrics.observe('parse.seconds', time.monotonic() - start)
+        metrics.incr('parse.pages')
+        for name, value in counters.items():
+            metrics.incr(name, value)
+        metrics.observe('extract.cpu_seconds', cpu)
+        if stats is not None:
+            with self._lock:
+                self._stats[id(stats)] = stats
+            stats.merge(strategies)
+        return result
+
+    def snapshot(self) -> dict:
+        """Havuz boyutu ve anlık doluluk (izleme için)"""
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': self._in_flight,
+            'running': self._executor is not None,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Worker'ları kapatır ve worker'lardan gelen, henüz yazılmamış strateji sayımlarını kaydeder"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            stats = list(self._stats.values())
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        for item in stats:
+            item.save()
+
+
+# Global ayrıştırma havuzu (main.py scraper'lara bağlar)
+parse_pool = ParsePool()
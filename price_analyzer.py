@@ -3,9 +3,10 @@ Fiyat analizi ve trend hesaplama modülü
 """
 import sqlite3
 from datetime import datetime, timedelta
-import statistics
 import logging
 
+from price_rollups import window_stats
+
 logger = logging.getLogger(__name__)
 
 class PriceAnalyzer:
@@ -23,40 +24,32 @@ class PriceAnalyzer:
                 'average_price': float,
                 'min_price': float,
                 'max_price': float,
-                'price_points': list
+                'price_points': int,
+                'price_history': list,  # (tarih, fiyat); 'resolution' ile seçilen çözünürlükte
+                'resolution': 'raw'|'hour'|'day'
             }
         """
         try:
-            # Son N günün fiyat verilerini al
-            cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-            
-            self.db.cursor.execute('''
-                SELECT price, date FROM price_history 
-                WHERE product_id = ? AND date >= ?
-                ORDER BY date ASC
-            ''', (product_id, cutoff_date))
+            # Son N günün fiyat özetini al: tam günler/saatler özet tablosundan, kısmi saat ham geçmişten
+            stats = window_stats(self.db.cursor, product_id, datetime.now() - timedelta(days=days))
+            price_points = stats['sample_count']
             
-            results = self.db.cursor.fetchall()
-            
-            if len(results) < 2:
+            if price_points < 2:
                 return {
                     'trend': 'insufficient_data',
                     'change_percentage': 0,
-                    'average_price': results[0][0] if results else 0,
-                    'min_price': results[0][0] if results else 0,
-                    'max_price': results[0][0] if results else 0,
-                    'price_points': len(results)
+                    'average_price': stats['first_price'] or 0,
+                    'min_price': stats['first_price'] or 0,
+                    'max_price': stats['first_price'] or 0,
+                    'price_points': price_points
                 }
             
-            prices = [row[0] for row in results]
-            dates = [row[1] for row in results]
-            
             # Temel istatistikler
-            first_price = prices[0]
-            last_price = prices[-1]
-            avg_price = statistics.mean(prices)
-            min_price = min(prices)
-            max_price = max(prices)
+            first_price = stats['first_price']
+            last_price = stats['last_price']
+            avg_price = stats['price_sum'] / price_points
+            min_price = stats['min_price']
+            max_price = stats['max_price']
             
             # Trend hesaplama
             change_percentage = ((last_price - first_price) / first_price) * 100
@@ -74,10 +67,11 @@ class PriceAnalyzer:
                 'average_price': round(avg_price, 2),
                 'min_price': min_price,
                 'max_price': max_price,
-                'price_points': len(prices),
+                'price_points': price_points,
                 'first_price': first_price,
                 'last_price': last_price,
-                'price_history': list(zip(dates, prices))
+                'price_history': stats['series'],
+                'resolution': stats['resolution']
             }
             
         except Exception as e:
@@ -94,13 +88,13 @@ class PriceAnalyzer:
                         WHERE ph1.product_id = p.product_id 
                         AND ph1.date >= date('now', '-7 days')
                         ORDER BY ph1.date ASC LIMIT 1) as week_ago_price
-                FROM products p
+                FROM catalog_products p
                 WHERE p.current_price IS NOT NULL
             '''
             
             params = []
             if guild_id:
-                query += ' AND p.guild_id = ?'
+                query += ' AND p.product_id IN (SELECT product_id FROM product_subscriptions WHERE guild_id = ?)'
                 params.append(guild_id)
             
             self.db.cursor.execute(query, params)
@@ -131,21 +125,26 @@ class PriceAnalyzer:
     def get_price_alerts(self, guild_id=None, threshold=10):
         """Belirli eşiği aşan fiyat değişikliklerini bulur"""
         try:
+            # Önceki kontrol: son satır birden çok kontrol içeriyorsa kendisi, yoksa bir önceki satır
             query = '''
-                SELECT p.product_id, p.name, p.current_price, p.url,
-                       ph.price as previous_price, ph.date as previous_date
-                FROM products p
+                SELECT p.product_id, p.name, p.current_price, p.url, ph.previous_price
+                FROM catalog_products p
                 JOIN (
-                    SELECT product_id, price, date,
-                           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY date DESC) as rn
-                    FROM price_history
-                ) ph ON p.product_id = ph.product_id AND ph.rn = 2
+                    SELECT product_id, rn,
+                           CASE WHEN sample_count > 1 THEN price ELSE older_price END as previous_price
+                    FROM (
+                        SELECT product_id, price, sample_count,
+                               LEAD(price) OVER (PARTITION BY product_id ORDER BY date DESC) as older_price,
+                               ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY date DESC) as rn
+                        FROM price_history
+                    )
+                ) ph ON p.product_id = ph.product_id AND ph.rn = 1 AND ph.previous_price IS NOT NULL
                 WHERE p.current_price IS NOT NULL
             '''
             
             params = []
             if guild_id:
-                query += ' AND p.guild_id = ?'
+                query += ' AND p.product_id IN (SELECT product_id FROM product_subscriptions WHERE guild_id = ?)'
                 params.append(guild_id)
             
             self.db.cursor.execute(query, params)
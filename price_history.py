@@ -0,0 +1,113 @@
+"""
+Değişim bazlı (run-length) fiyat geçmişi
+`price_history` her kontrol için bir satır yerine fiyatın değiştiği her an için bir satır tutar:
+
+    date          fiyatın geçerli olmaya başladığı ilk kontrol (valid_from)
+    last_seen     aynı fiyatın görüldüğü son kontrol
+    sample_count  bu aralıktaki kontrol sayısı
+
+Aynı fiyat gün değişince yeni satırla devam eder; böylece gün bazlı sorgular (`DATE(date) = ?`,
+bkz. NotificationSystem.get_daily_summary) eskisiyle aynı cevabı verir ve bir pencere sınırını en
+fazla bir satır keser. `last_seen` boş satırlar (elle ya da eski kodla eklenmiş) tek kontrol sayılır.
+`date` sütunu eski sorgular ve araçlar bozulmasın diye yeniden adlandırılmadı. Saatlik/günlük
+özetler ve ham geçmişin saklama süresi için bkz. price_rollups.py.
+"""
+import os
+import logging
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# False: her kontrol yeni satır ekler (eski davranış); okuyucular iki biçimi de aynı yorumlar
+PRICE_HISTORY_CHANGES_ONLY = os.getenv('PRICE_HISTORY_CHANGES_ONLY', 'True').lower() == 'true'
+
+
+def record_price(cursor, product_id: str, price: float, at: str, changes_only: bool = None) -> bool:
+    """
+    Kontrolde görülen fiyatı geçmişe yazar
+
+    Son satır aynı gün ve aynı fiyattaysa yalnızca `last_seen`/`sample_count` güncellenir.
+    Yeni satır eklendiyse True döner. Commit çağırana aittir.
+    """
+    if changes_only is None:
+        changes_only = PRICE_HISTORY_CHANGES_ONLY
+    if changes_only:
+        cursor.execute('''
+        UPDATE price_history SET last_seen = ?, sample_count = sample_count + 1
+        WHERE id = (SELECT id FROM price_history WHERE product_id = ? ORDER BY date DESC, id DESC LIMIT 1)
+        AND price IS ? AND substr(date, 1, 10) = substr(?, 1, 10) AND COALESCE(last_seen, date) <= ?
+        ''', (at, product_id, price, at, at))
+        if cursor.rowcount > 0:
+            return False
+    cursor.execute('''
+    INSERT INTO price_history (product_id, price, date, last_seen, sample_count)
+    VALUES (?, ?, ?, ?, 1)
+    ''', (product_id, price, at, at))
+    return True
+
+
+def compact(cursor):
+    """Mevcut geçmişte art arda gelen aynı gün/aynı fiyat satırlarını tek satırda birleştirir (taşıma adımı)"""
+    rows = cursor.execute('''
+    SELECT id, product_id, price, date, COALESCE(last_seen, date), sample_count
+    FROM price_history ORDER BY product_id, date, id
+    ''').fetchall()
+
+    runs, merged = [], []
+    for row_id, product_id, price, date, last_seen, count in rows:
+        run = runs[-1] if runs else None
+        if (run and run[1] == product_id and run[2] == price and date and run[3]
+                and str(run[3])[:10] == str(date)[:10]):
+            run[4] = last_seen
+            run[5] += count or 1
+            merged.append((row_id,))
+        else:
+            runs.append([row_id, product_id, price, date, last_seen, count or 1])
+
+    cursor.executemany('UPDATE price_history SET last_seen = ?, sample_count = ? WHERE id = ?',
+                       [(last_seen, count, row_id) for row_id, _, _, _, last_seen, count in runs])
+    cursor.executemany('DELETE FROM price_history WHERE id = ?', merged)
+    if merged:
+        logger.info(f"Fiyat geçmişi sıkıştırıldı: {len(rows)} satır -> {len(runs)} satır")
+
+
+def sample_times(valid_from: str, last_seen: str, count: int) -> List[str]:
+    """
+    Satırdaki kontrollerin zamanları (ISO), eskiden yeniye
+
+    Ara kontrollerin zamanı saklanmaz; kontrollerin `valid_from` ile `last_seen` arasına eşit
+    aralıklı dağıldığı varsayılır. Uç noktalar saklanan değerlerin aynısıdır.
+    """
+    if count <= 1 or valid_from == last_seen:
+        return [valid_from] * max(count, 1)
+    start = datetime.fromisoformat(valid_from)
+    step = (datetime.fromisoformat(last_seen) - start) / (count - 1)
+    return [valid_from] + [(start + step * k).isoformat() for k in range(1, count - 1)] + [last_seen]
+
+
+def tail_points(runs: Sequence[Tuple[float, str, str, int]], limit: int) -> List[Tuple[float, datetime]]:
+    """
+    Son `limit` kontrolü kapsayan (fiyat, zaman) uç noktaları, eskiden yeniye
+
+    `runs` yeniden eskiye (fiyat, valid_from, last_seen, sample_count) satırlarıdır. Her satır ilk
+    ve son kontrolüyle temsil edilir; fiyat değişimleri ve kapsanan süre her kontrolün ayrı satır
+    olduğu geçmişle aynıdır.
+    """
+    points = []
+    remaining = limit
+    for price, valid_from, last_seen, count in runs:
+        if remaining <= 0:
+            break
+        count = count or 1
+        take = min(count, remaining)
+        end = datetime.fromisoformat(last_seen)
+        points.append((price, end))
+        if take > 1:
+            start = datetime.fromisoformat(valid_from)
+            if take < count:
+                start = end - (end - start) / (count - 1) * (take - 1)
+            points.append((price, start))
+        remaining -= take
+    points.reverse()
+    return points
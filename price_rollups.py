@@ -0,0 +1,240 @@
+"""
+Fiyat geçmişi için saatlik/günlük özetler (rollup) ve ham geçmişin saklama süresi
+`price_rollups` ürün başına saatlik ve günlük kovalarda kontrol sayısı, fiyat toplamı, en düşük/en
+yüksek ve ilk/son fiyatı tutar. Tablo `price_history` üzerindeki tetikleyicilerle yazma anında
+güncellenir: yeni satır ya da son satırın uzatılması (bkz. price_history.record_price) ilgili iki kovaya
+eklenir. Yazmanın hangi yoldan geldiği (Database, toplu yazıcı, elle SQL) fark etmez.
+
+`window_stats` pencereyi en kaba kovalara böler: tam günler günlük, kalan tam saatler saatlik
+kovalardan, pencerenin başındaki kısmi saat ham geçmişten okunur. `PRICE_HISTORY_RETENTION_DAYS`
+günden eski ham satırlar `prune` ile silinebilir (ürünün son satırı kalır); kovalar silinmez.
+"""
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from price_history import sample_times
+
+logger = logging.getLogger(__name__)
+
+# Ham fiyat geçmişinin saklanacağı gün sayısı (0 = silinmez); özetler her zaman kalır
+PRICE_HISTORY_RETENTION_DAYS = float(os.getenv('PRICE_HISTORY_RETENTION_DAYS', 0))
+# Eski satırlar bu büyüklükte parçalarla silinir; her parça ayrı transaction'dır, yazma kilidi kısa tutulur
+PRICE_PRUNE_BATCH = int(os.getenv('PRICE_PRUNE_BATCH', 5000))
+# Trend serisinde en az bu kadar nokta kalacak en kaba çözünürlük seçilir
+PRICE_TREND_MIN_POINTS = int(os.getenv('PRICE_TREND_MIN_POINTS', 24))
+
+RAW = 'raw'
+HOUR = 'hour'
+DAY = 'day'
+_BUCKET_FORMATS = {HOUR: '%Y-%m-%dT%H:00:00', DAY: '%Y-%m-%dT00:00:00'}
+
+CREATE_TABLE = '''
+CREATE TABLE IF NOT EXISTS price_rollups (
+    product_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    sample_count INTEGER NOT NULL,
+    price_sum REAL NOT NULL,
+    min_price REAL,
+    max_price REAL,
+    first_price REAL,
+    first_at TIMESTAMP,
+    last_price REAL,
+    last_at TIMESTAMP,
+    PRIMARY KEY (product_id, period, bucket)
+)
+'''
+
+
+def _upsert(values: str) -> str:
+    """Bir kovaya kontrol(ler) ekleyen INSERT ... ON CONFLICT ifadesi"""
+    return f'''
+    INSERT INTO price_rollups
+    (product_id, period, bucket, sample_count, price_sum, min_price, max_price, first_price, first_at, last_price, last_at)
+    {values}
+    ON CONFLICT (product_id, period, bucket) DO UPDATE SET
+        sample_count = sample_count + excluded.sample_count,
+        price_sum = price_sum + excluded.price_sum,
+        min_price = MIN(min_price, excluded.min_price),
+        max_price = MAX(max_price, excluded.max_price),
+        first_price = CASE WHEN excluded.first_at < first_at THEN excluded.first_price ELSE first_price END,
+        first_at = MIN(first_at, excluded.first_at),
+        last_price = CASE WHEN excluded.last_at >= last_at THEN excluded.last_price ELSE last_price END,
+        last_at = MAX(last_at, excluded.last_at)
+    '''
+
+
+def _trigger_upserts(at: str, count: str) -> str:
+    return ''.join(
+        _upsert(f"SELECT NEW.product_id, '{period}', strftime('{fmt}', {at}), {count}, NEW.price * {count}, "
+                f"NEW.price, NEW.price, NEW.price, {at}, NEW.price, {at} WHERE 1") + ';'
+        for period, fmt in _BUCKET_FORMATS.items()
+    )
+
+
+# Yeni satır: satırdaki kontroller `date` kovasına; uzatma: eklenen kontroller `last_seen` kovasına
+TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS price_rollups_insert AFTER INSERT ON price_history
+    WHEN NEW.price IS NOT NULL AND NEW.date IS NOT NULL
+    BEGIN {_trigger_upserts('NEW.date', 'NEW.sample_count')} END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS price_rollups_extend AFTER UPDATE OF sample_count ON price_history
+    WHEN NEW.price IS NOT NULL AND NEW.last_seen IS NOT NULL AND NEW.sample_count > OLD.sample_count
+    BEGIN {_trigger_upserts('NEW.last_seen', '(NEW.sample_count - OLD.sample_count)')} END
+    ''',
+]
+
+
+def bucket(at: datetime, period: str) -> str:
+    """Zamanın düştüğü kovanın başlangıcı (ISO)"""
+    return at.strftime(_BUCKET_FORMATS[period])
+
+
+def backfill(cursor):
+    """Mevcut fiyat geçmişinden özetleri oluşturur (taşıma adımı)"""
+    totals = {}
+    rows = cursor.execute('''
+    SELECT product_id, price, date, COALESCE(last_seen, date), sample_count FROM price_history
+    WHERE price IS NOT NULL AND date IS NOT NULL
+    ''').fetchall()
+    for product_id, price, valid_from, last_seen, count in rows:
+        for at in sample_times(valid_from, last_seen, count or 1):
+            moment = datetime.fromisoformat(at)
+            for period in _BUCKET_FORMATS:
+                key = (product_id, period, bucket(moment, period))
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = [1, price, price, price, price, at, price, at]
+                    continue
+                total[0] += 1
+                total[1] += price
+                total[2] = min(total[2], price)
+                total[3] = max(total[3], price)
+                if at < total[5]:
+                    total[4], total[5] = price, at
+                if at >= total[7]:
+                    total[6], total[7] = price, at
+    cursor.executemany(_upsert('VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'),
+                       [key + tuple(total) for key, total in totals.items()])
+    if totals:
+        logger.info(f"Fiyat özetleri oluşturuldu: {len(rows)} geçmiş satırından {len(totals)} kova")
+
+
+def rebuild(cursor):
+    """Özetleri fiyat geçmişinden yeniden hesaplar"""
+    cursor.execute('DELETE FROM price_rollups')
+    backfill(cursor)
+
+
+def prune(cursor, days: float = PRICE_HISTORY_RETENTION_DAYS, now: Optional[datetime] = None,
+          limit: Optional[int] = None) -> int:
+    """
+    `days` günden eski ham fiyat geçmişi satırlarını (en fazla `limit` tanesini) siler; silinen satır sayısı
+
+    Ürünün son satırı (son fiyat ve önceki kontrol karşılaştırmaları için) silinmez, özetler kalır.
+    `limit` verilirse çağıran, dönen sayı `limit`'ten küçük olana kadar tekrar çağırır.
+    Commit çağırana aittir.
+    """
+    if not days or days <= 0:
+        return 0
+    cutoff = ((now or datetime.now()) - timedelta(days=days)).isoformat()
+    cursor.execute(f'''
+    DELETE FROM price_history WHERE id IN (
+        SELECT id FROM price_history
+        WHERE COALESCE(last_seen, date) < ?
+        AND date < (SELECT MAX(latest.date) FROM price_history latest WHERE latest.product_id = price_history.product_id)
+        {'LIMIT ?' if limit else ''}
+    )
+    ''', (cutoff,) + ((limit,) if limit else ()))
+    return cursor.rowcount
+
+
+def series_period(cutoff: datetime, now: datetime) -> str:
+    """Pencerede en az PRICE_TREND_MIN_POINTS kova kalacak en kaba çözünürlük"""
+    span = (now - cutoff).total_seconds()
+    if span >= PRICE_TREND_MIN_POINTS * 86400:
+        return DAY
+    if span >= PRICE_TREND_MIN_POINTS * 3600:
+        return HOUR
+    return RAW
+
+
+def window_stats(cursor, product_id: str, cutoff: datetime, now: Optional[datetime] = None,
+                 retention_days: float = PRICE_HISTORY_RETENTION_DAYS) -> dict:
+    """
+    `cutoff` ile şimdi arasındaki kontrollerin sayısı, toplamı, en düşük/en yüksek ve ilk/son fiyatı
+
+    Tam günler günlük, kalan tam saatler saatlik kovalardan, `cutoff`'un düştüğü kısmi saat ham
+    geçmişten okunur. Ham geçmiş saklama süresi dışında kalıyorsa kısmi saat kovanın tamamıyla sayılır.
+    `series` trend grafiği için (tarih, fiyat) listesidir; çözünürlüğü `series_period` ile seçilir ve
+    kovalarda kovanın son fiyatı kullanılır.
+    """
+    now = now or datetime.now()
+    hour_start = cutoff.replace(minute=0, second=0, microsecond=0)
+    day_start = hour_start.replace(hour=0)
+    full_hours = hour_start if hour_start == cutoff else hour_start + timedelta(hours=1)
+    full_days = day_start if day_start == cutoff else day_start + timedelta(days=1)
+    if retention_days and retention_days > 0 and cutoff < now - timedelta(days=retention_days):
+        full_hours = hour_start
+
+    # (kontrol sayısı, toplam, en düşük, en yüksek, ilk fiyat, son fiyat), eskiden yeniye
+    parts = []
+    if full_hours > cutoff:
+        # Satırlar gün içinde kalır: kısmi saati kesen satır en fazla bir gün önce başlar
+        cursor.execute('''
+        SELECT price, date, COALESCE(last_seen, date), sample_count FROM price_history
+        WHERE product_id = ? AND date >= ? AND date < ? AND COALESCE(last_seen, date) >= ? AND price IS NOT NULL
+        ORDER BY date ASC
+        ''', (product_id, (cutoff - timedelta(days=1)).isoformat(), full_hours.isoformat(), cutoff.isoformat()))
+        start, end = cutoff.isoformat(), full_hours.isoformat()
+        for price, valid_from, last_seen, count in cursor.fetchall():
+            inside = sum(1 for at in sample_times(valid_from, last_seen, count or 1) if start <= at < end)
+            if inside:
+                parts.append((inside, price * inside, price, price, price, price))
+
+    period = series_period(cutoff, now)
+    hours_until = None if period == HOUR else bucket(full_days, DAY)
+    cursor.execute(f'''
+    SELECT bucket, sample_count, price_sum, min_price, max_price, first_price, last_price FROM price_rollups
+    WHERE product_id = ? AND period = ? AND bucket >= ? {'AND bucket < ?' if hours_until else ''}
+    ORDER BY bucket ASC
+    ''', (product_id, HOUR, bucket(hour_start, HOUR)) + ((hours_until,) if hours_until else ()))
+    hours = cursor.fetchall()
+    parts += [row[1:] for row in hours if full_hours.isoformat() <= row[0] < bucket(full_days, DAY)]
+
+    days = []
+    if full_days <= now or period == DAY:
+        cursor.execute('''
+        SELECT bucket, sample_count, price_sum, min_price, max_price, first_price, last_price FROM price_rollups
+        WHERE product_id = ? AND period = ? AND bucket >= ?
+        ORDER BY bucket ASC
+        ''', (product_id, DAY, bucket(day_start, DAY)))
+        days = cursor.fetchall()
+        parts += [row[1:] for row in days if row[0] >= bucket(full_days, DAY)]
+
+    if period == DAY:
+        series = [(row[0], row[6]) for row in days]
+    elif period == HOUR:
+        series = [(row[0], row[6]) for row in hours]
+    else:
+        cursor.execute('''
+        SELECT date, price FROM price_history
+        WHERE product_id = ? AND date >= ? AND COALESCE(last_seen, date) >= ?
+        ORDER BY date ASC
+        ''', (product_id, (cutoff - timedelta(days=1)).isoformat(), cutoff.isoformat()))
+        series = cursor.fetchall()
+
+    return {
+        'sample_count': sum(part[0] for part in parts),
+        'price_sum': sum(part[1] for part in parts),
+        'min_price': min((part[2] for part in parts), default=None),
+        'max_price': max((part[3] for part in parts), default=None),
+        'first_price': parts[0][4] if parts else None,
+        'last_price': parts[-1][5] if parts else None,
+        'resolution': period,
+        'series': series,
+    }
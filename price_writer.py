@@ -0,0 +1,291 @@
+"""
+Toplu (group-commit) fiyat yazıcısı
+Kontrol döngüsünün yazmalarını (fiyat güncellemesi, fiyat geçmişi satırı, son kontrol ve sonraki
+kontrol zamanı, tetiklenen fiyat hedefi, bildirim geçmişi) bellekte biriktirir ve `PRICE_WRITE_BATCH`
+kayıtta ya da en geç `PRICE_WRITE_FLUSH_MS` milisaniyede bir, tek transaction içinde `executemany`
+ile yazar. Ürün başına bir UPDATE + INSERT + commit yerine her toplu yazmada bir commit yapılır.
+Fiyat geçmişi satırları `price_history.record_price` ile yazılır (değişmeyen fiyat son satırı uzatır).
+
+`Database.writer` atanmışsa (BATCHED_WRITES=True, bkz. main.py) `update_product_price`,
+`set_next_check` ve bildirim sisteminin hedef/geçmiş yazmaları buraya yönlenir.
+
+Çökme durumunda dayanıklılık:
+- Commit edilmiş toplu yazmalar SQLite'ın garantisiyle korunur (WAL + synchronous=NORMAL'da
+  elektrik kesintisinde yalnızca son commit'ler geri alınabilir, veritabanı bozulmaz).
+- Henüz yazılmamış tampon (en fazla PRICE_WRITE_BATCH kayıt / PRICE_WRITE_FLUSH_MS) süreç
+  çökerse kaybolur. Kaybın etkisi: ürünün fiyatı ve sonraki kontrol zamanı eski kalır, ürün yeniden
+  başlatmada tekrar kontrol edilir; Discord'a gönderilmiş fiyat değişimi veya hedef bildirimi
+  bu yüzden bir kez daha gönderilebilir. Veri tutarsızlığı oluşmaz, yalnızca son kontroller tekrarlanır.
+- Kilitli/dolu veritabanında tampon tekrar denenir; aynı kayıtlar art arda `PRICE_WRITE_MAX_RETRIES`
+  kez yazılamazsa hata kaydıyla atılır (etkisi çökmedeki ile aynıdır), böylece tampon sınırsız büyümez.
+- Normal kapanışta `close()` tamponu yazar.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from metrics import metrics
+from price_history import record_price
+from sqlite_pool import open_connection
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/trendyol_tracker.sqlite')
+BATCHED_WRITES = os.getenv('BATCHED_WRITES', 'False').lower() == 'true'
+# Bu kadar kayıt birikince beklemeden yazılır
+PRICE_WRITE_BATCH = int(os.getenv('PRICE_WRITE_BATCH', 500))
+# Bir kaydın tamponda bekleyebileceği en uzun süre (ms)
+PRICE_WRITE_FLUSH_MS = int(os.getenv('PRICE_WRITE_FLUSH_MS', 1000))
+# Yazılamayan kayıtların atılmadan önce tekrar deneneceği toplu yazma sayısı
+PRICE_WRITE_MAX_RETRIES = int(os.getenv('PRICE_WRITE_MAX_RETRIES', 5))
+
+
+class _Batch:
+    """Tek transaction'da yazılacak kayıtlar"""
+
+    def __init__(self):
+        self.prices = {}         # product_id -> (fiyat, last_checked)
+        self.checked = {}        # product_id -> last_checked
+        self.next_checks = {}    # product_id -> next_check_at
+        self.history = []        # (product_id, fiyat, tarih)
+        self.targets = []        # (triggered_at, target_id)
+        self.notifications = []  # (user_id, guild_id, product_id, tür, mesaj, sent_at)
+        self.attempts = 0        # Başarısız yazma denemeleri
+
+    def __len__(self):
+        return (len(self.prices) + len(self.checked) + len(self.next_checks) + len(self.history)
+                + len(self.targets) + len(self.notifications))
+
+    def merge_newer(self, newer: '_Batch'):
+        """
+        Yazılamayan tamponu geri alırken sonradan gelen kayıtları üstüne ekler
+
+        Aynı ürün için son kontrol ve sonraki kontrol zamanlarının en geç olanı kalır.
+        """
+        for product_id, (price, checked) in newer.prices.items():
+            current = self.prices.get(product_id)
+            if current is None or current[1] <= checked:
+                self.prices[product_id] = (price, checked)
+        for product_id, checked in newer.checked.items():
+            self.checked[product_id] = max(checked, self.checked.get(product_id, checked))
+        for product_id, next_check in newer.next_checks.items():
+            self.next_checks[product_id] = max(next_check, self.next_checks.get(product_id, next_check))
+        self.history.extend(newer.history)
+        self.targets.extend(newer.targets)
+        self.notifications.extend(newer.notifications)
+
+
+class PriceWriter:
+    """
+    Fiyat kontrolü yazmalarını tamponlayıp toplu commit eden yazıcı
+
+    Kayıt ekleyen metotlar thread-safe'tir ve beklemez. `start()` event loop içinde çağrılınca
+    arka plan görevi tamponu süre/boyut sınırında `asyncio.to_thread` ile yazar; `start` edilmemiş
+    yazıcı boyut sınırına ulaşıldığında çağıran thread'de yazar.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH, batch_size: int = PRICE_WRITE_BATCH,
+                 flush_ms: int = PRICE_WRITE_FLUSH_MS, max_retries: int = PRICE_WRITE_MAX_RETRIES):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.flush_ms = max(1, flush_ms)
+        self.max_retries = max(1, max_retries)
+        self._batch = _Batch()
+        self._writing = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._conn = None
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+    # ---- kayıt ekleme ----
+
+    def update_price(self, product_id: str, price: float, checked_at: str = None):
+        """Katalog fiyatını ve son kontrol zamanını günceller, fiyat geçmişine satır ekler"""
+        checked_at = checked_at or datetime.now().isoformat()
+        with self._lock:
+            self._batch.prices[product_id] = (price, checked_at)
+            self._batch.checked.pop(product_id, None)
+            self._batch.history.append((product_id, price, checked_at))
+        self._added()
+
+    def mark_checked(self, product_id: str, checked_at: str = None):
+        """Yalnızca son kontrol zamanını günceller"""
+        checked_at = checked_at or datetime.now().isoformat()
+        with self._lock:
+            if product_id in self._batch.prices:
+                self._batch.prices[product_id] = (self._batch.prices[product_id][0], checked_at)
+            else:
+                self._batch.checked[product_id] = checked_at
+        self._added()
+
+    def set_next_check(self, product_id: str, next_check_at: str):
+        with self._lock:
+            self._batch.next_checks[product_id] = next_check_at
+        self._added()
+
+    def trigger_target(self, target_id: int, triggered_at: str = None):
+        """Fiyat hedefini tetiklenmiş (pasif) olarak işaretler"""
+        with self._lock:
+            self._batch.targets.append((triggered_at or datetime.now().isoformat(), target_id))
+        self._added()
+
+    def add_notification(self, user_id, guild_id, product_id, notification_type: str, message: str):
+        with self._lock:
+            self._batch.notifications.append(
+                (user_id, guild_id, product_id, notification_type, message, datetime.now().isoformat())
+            )
+        self._added()
+
+    def _added(self):
+        if len(self._batch) < self.batch_size:
+            return
+        if self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+                return
+            except RuntimeError:
+                # Event loop kapanmış
+                pass
+        self.flush()
+
+    # ---- henüz yazılmamış kayıtlar ----
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._batch) + (len(self._writing) if self._writing else 0)
+
+    def pending_history(self, product_id: str) -> List[Tuple[float, str]]:
+        """Ürünün tampondaki (veya yazılmakta olan) fiyat geçmişi satırları, eskiden yeniye"""
+        with self._lock:
+            batches = [b for b in (self._writing, self._batch) if b is not None]
+            return [(price, date) for batch in batches for pid, price, date in batch.history if pid == product_id]
+
+    def pending_price(self, product_id: str) -> Optional[float]:
+        """Ürünün henüz yazılmamış son fiyatı (yoksa None)"""
+        with self._lock:
+            for batch in (self._batch, self._writing):
+                if batch is not None and product_id in batch.prices:
+                    return batch.prices[product_id][0]
+        return None
+
+    # ---- yazma ----
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    def flush(self) -> int:
+        """Tamponu tek transaction'da yazar; yazılan kayıt sayısını döndürür"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._batch
+                if not len(batch):
+                    return 0
+                self._batch = _Batch()
+                self._writing = batch
+
+            start = time.monotonic()
+            try:
+                conn = self._get_conn()
+                with conn:
+                    conn.executemany('UPDATE catalog_products SET current_price = ?, last_checked = ? WHERE product_id = ?',
+                                     [(price, checked, pid) for pid, (price, checked) in batch.prices.items()])
+                    conn.executemany('UPDATE catalog_products SET last_checked = ? WHERE product_id = ?',
+                                     [(checked, pid) for pid, checked in batch.checked.items()])
+                    # record_price son satırı uzatıp uzatmayacağına satır satır karar verir (executemany ile
+                    # yazılamaz); ifadeler hazırlanmış olarak önbellekten gelir ve aynı transaction'dadır
+                    cursor = conn.cursor()
+                    for product_id, price, checked in batch.history:
+                        record_price(cursor, product_id, price, checked)
+                    conn.executemany('UPDATE catalog_products SET next_check_at = ? WHERE product_id = ?',
+                                     [(next_check, pid) for pid, next_check in batch.next_checks.items()])
+                    # Bildirim tabloları NotificationSystem ile oluşturulur; kayıt yoksa sorguya gerek yok
+                    if batch.targets:
+                        conn.executemany('UPDATE price_targets SET is_active = 0, triggered_at = ? WHERE id = ?',
+                                         batch.targets)
+                    if batch.notifications:
+                        conn.executemany('''
+                            INSERT INTO notification_history
+                            (user_id, guild_id, product_id, notification_type, message, sent_at)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', batch.notifications)
+            except sqlite3.OperationalError as e:
+                # Kilit/disk hatası genelde geçicidir: kayıtlar sonraki yazmada tekrar denenir
+                metrics.incr('price_writer.flush_failed')
+                batch.attempts += 1
+                with self._lock:
+                    self._writing = None
+                    if batch.attempts >= self.max_retries:
+                        metrics.incr('price_writer.dropped', len(batch))
+                        logger.error(f"Toplu yazma {batch.attempts} kez başarısız, {len(batch)} kayıt atıldı: {e}")
+                        return 0
+                    batch.merge_newer(self._batch)
+                    self._batch = batch
+                logger.warning(f"Toplu yazma başarısız, {len(batch)} kayıt tekrar denenecek: {e}")
+                return 0
+            except Exception as e:
+                metrics.incr('price_writer.flush_failed')
+                logger.error(f"Toplu yazma başarısız, {len(batch)} kayıt atlandı: {e}")
+                with self._lock:
+                    self._writing = None
+                return 0
+
+            with self._lock:
+                self._writing = None
+            metrics.incr('price_writer.flushes')
+            metrics.incr('price_writer.items', len(batch))
+            metrics.observe('price_writer.batch_size', len(batch))
+            metrics.observe('price_writer.flush_seconds', time.monotonic() - start)
+            return len(batch)
+
+    # ---- asenkron arayüz ----
+
+    def start(self):
+        """Arka plan yazma görevini çalışan event loop'ta başlatır"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self.pending:
+                await self.flush_async()
+
+    async def flush_async(self) -> int:
+        """Tamponu event loop'u bloklamadan yazar"""
+        return await asyncio.to_thread(self.flush)
+
+    async def stop(self):
+        """Arka plan görevini durdurur ve kalan kayıtları yazar"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        await self.flush_async()
+
+    def close(self):
+        """Kalan kayıtları yazar ve bağlantıyı kapatır"""
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
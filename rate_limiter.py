@@ -0,0 +1,167 @@
+"""
+Host başına token bucket hız sınırlayıcı
+Scraper, API istemcisi ve site izleyici tüm istekleri buradan geçirir.
+Thread ve asyncio güvenlidir: kilit yalnızca jeton ayırırken tutulur,
+bekleme kilidin dışında (time.sleep / asyncio.sleep) yapılır.
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import RATE_LIMITS, RATE_LIMIT_DEFAULT
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 429/503 sonrası hız bu orana kadar düşürülebilir
+RATE_LIMIT_MIN_FACTOR = float(os.getenv('RATE_LIMIT_MIN_FACTOR', 0.1))
+# Her başarılı yanıtta hız çarpanına eklenen pay (toplamsal artış, çarpımsal azalış)
+RATE_LIMIT_RECOVERY_STEP = float(os.getenv('RATE_LIMIT_RECOVERY_STEP', 0.05))
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int, float]]:
+    """
+    "host=rate:burst:jitter,host2=rate:burst:jitter" biçimindeki ayarı çözümler
+
+    Hatalı girdiler uyarı verilerek atlanır.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        try:
+            host, values = item.split('=', 1)
+            parts = values.split(':')
+            rate, burst, jitter = parts[0], parts[1] if len(parts) > 1 else 1, parts[2] if len(parts) > 2 else 0
+            limits[host.strip().lower()] = (float(rate), int(burst), float(jitter))
+        except ValueError:
+            logger.warning(f"Geçersiz hız sınırı ayarı atlandı: {item}")
+    return limits
+
+
+# config.py varsayılanları, RATE_LIMITS ortam değişkeniyle host bazında ezilebilir
+DEFAULT_LIMITS = dict(RATE_LIMITS, **parse_rate_limits(os.getenv('RATE_LIMITS', '')))
+
+
+class TokenBucket:
+    """
+    Tek bir host için token bucket
+
+    `rate` saniyede üretilen jeton, `burst` biriktirilebilecek en fazla jeton,
+    `jitter` her isteğe eklenen en fazla rastgele gecikmedir (saniye).
+    """
+
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self.factor = 1.0
+        self.blocked_until = 0.0
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def effective_rate(self) -> float:
+        return self.rate * self.factor
+
+    def reserve(self) -> float:
+        """Bir jeton ayırır ve çağıranın beklemesi gereken süreyi döndürür"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.effective_rate)
+            self._last = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.effective_rate
+            wait = max(wait, self.blocked_until - now)
+        if self.jitter:
+            wait += random.uniform(0, self.jitter)
+        return wait
+
+    def slow_down(self, retry_after: Optional[float] = None):
+        """429/503 görüldüğünde hızı yarıya indirir, varsa Retry-After süresince durdurur"""
+        with self._lock:
+            self.factor = max(RATE_LIMIT_MIN_FACTOR, self.factor / 2)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def recover(self):
+        """Başarılı yanıtlarda hızı kademeli olarak normale döndürür"""
+        if self.factor < 1.0:
+            with self._lock:
+                self.factor = min(1.0, self.factor + RATE_LIMIT_RECOVERY_STEP)
+
+
+class RateLimiter:
+    """Host adına göre token bucket seçen paylaşılan hız sınırlayıcı"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int, float]] = None,
+                 default: Tuple[float, int, float] = RATE_LIMIT_DEFAULT):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.default = default
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _config_key(self, host: str) -> Optional[str]:
+        """Host için en uzun eşleşen yapılandırma anahtarını bulur (www.trendyol.com → trendyol.com)"""
+        matches = [key for key in self.limits if host == key or host.endswith('.' + key)]
+        return max(matches, key=len) if matches else None
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        """URL'nin host'una ait bucket'ı döndürür, gerekirse oluşturur"""
+        host = urlparse(url).netloc.lower().split(':')[0]
+        key = self._config_key(host) or host
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(*self.limits.get(key, self.default))
+                    self._buckets[key] = bucket
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """İstek öncesi gerekirse bekler (bloklayan sürüm); beklenen süreyi döndürür"""
+        wait = self.bucket_for(url).reserve()
+        metrics.observe('rate_limit.wait_seconds', wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url: str) -> float:
+        """acquire'ın event loop'u bloklamayan sürümü"""
+        wait = self.bucket_for(url).reserve()
+        metrics.observe('rate_limit.wait_seconds', wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record(self, url: str, status: int, retry_after: Optional[str] = None):
+        """Yanıt durumunu bildirir; 429/503 host'u yavaşlatır, başarılar hızı geri kazandırır"""
+        bucket = self.bucket_for(url)
+        if status in THROTTLE_STATUSES:
+            try:
+                delay = float(retry_after) if retry_after else None
+            except ValueError:
+                delay = None
+            bucket.slow_down(delay)
+            metrics.incr('rate_limit.throttled')
+            logger.warning(f"{urlparse(url).netloc} {status} döndürdü, hız {bucket.effective_rate:.2f} istek/sn'ye düşürüldü")
+        elif status and status < 400:
+            bucket.recover()
+
+    def stats(self) -> Dict[str, dict]:
+        """Host başına güncel hız bilgisi (izleme komutları için)"""
+        return {
+            host: {'rate': bucket.rate, 'effective_rate': round(bucket.effective_rate, 3),
+                   'burst': bucket.burst, 'jitter': bucket.jitter}
+            for host, bucket in self._buckets.items()
+        }
+
+
+# Global rate limiter instance'ı
+rate_limiter = RateLimiter()
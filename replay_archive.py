@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sayfa arşivini güncel çıkarıcıyla yeniden işler
+Arşivden seçilen sayfalar tüm çekirdeklerde TrendyolScraper._parse_page ile ayrıştırılır ve
+bulunan fiyat, sayfanın indirildiği kontrolde price_history'ye yazılan fiyatla karşılaştırılır:
+
+    python replay_archive.py --since 2025-01-01 --product 123456789
+    python replay_archive.py --limit 500 --output replay.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from page_archive import PageArchive, PAGE_ARCHIVE_DIR, read_blob
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/trendyol_tracker.sqlite')
+PRICE_TOLERANCE = 0.01
+# Kontrol sonucu sayfa indirildikten en fazla bu kadar saniye sonra price_history'ye yazılır
+HISTORY_MATCH_SECONDS = 300
+
+MATCH = 'match'
+MISMATCH = 'mismatch'
+FAILED = 'failed'
+SOLD_OUT = 'sold_out'
+NO_HISTORY = 'no_history'
+
+_scraper = None
+
+
+def _init_worker():
+    global _scraper
+    from scraper import TrendyolScraper
+    from strategy_stats import StrategyStats
+    logging.disable(logging.INFO)
+    _scraper = TrendyolScraper()
+    # Replay botun strateji istatistiklerini değiştirmesin
+    _scraper.strategy_stats = StrategyStats(path=None)
+
+
+def _extract(job):
+    """Worker'da bir arşiv sayfasını okur ve ayrıştırır"""
+    directory, entry = job
+    try:
+        result = _scraper._parse_page(read_blob(directory, entry['hash'], entry['codec']))
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    return dict(entry, price=result.get('price'), original_price=result.get('original_price'),
+                product_name=result.get('product_name'), error=result.get('error'))
+
+
+def stored_price(conn, product_id, fetched_at, window=HISTORY_MATCH_SECONDS):
+    """Sayfanın indirildiği ana en yakın price_history fiyatı (pencere içinde yoksa None)"""
+    fetched = datetime.fromisoformat(fetched_at)
+    # Satırlar fiyat aralığıdır (date..last_seen); indirme anı aralığın içindeyse uzaklık sıfırdır
+    row = conn.execute('''
+    SELECT price FROM price_history
+    WHERE product_id = ? AND date <= ? AND COALESCE(last_seen, date) >= ?
+    ORDER BY MAX(julianday(date) - julianday(?), julianday(?) - julianday(COALESCE(last_seen, date)), 0) LIMIT 1
+    ''', (product_id, (fetched + timedelta(seconds=window)).isoformat(),
+          (fetched - timedelta(seconds=window)).isoformat(), fetched_at, fetched_at)).fetchone()
+    return row[0] if row else None
+
+
+def classify(result: dict, stored) -> str:
+    if result['error'] == 'Tükendi':
+        return SOLD_OUT
+    if result['error'] or result['price'] is None:
+        return FAILED
+    if stored is None:
+        return NO_HISTORY
+    return MATCH if abs(float(result['price']) - float(stored)) <= PRICE_TOLERANCE else MISMATCH
+
+
+def replay(archive: PageArchive, db_path: str = DATABASE_PATH, workers: int = None, **filters) -> dict:
+    """Seçilen arşiv dilimini paralel olarak yeniden işler ve price_history ile karşılaştırır"""
+    entries = archive.select(**filters)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        results = list(executor.map(_extract, [(archive.directory, entry) for entry in entries],
+                                    chunksize=max(1, len(entries) // (workers * 4))))
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) if os.path.exists(db_path) else None
+    try:
+        for result in results:
+            result['stored_price'] = (stored_price(conn, result['product_id'], result['fetched_at'])
+                                      if conn and result['product_id'] else None)
+            result['status'] = classify(result, result['stored_price'])
+    finally:
+        if conn:
+            conn.close()
+
+    return {
+        'pages': len(results),
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'pages_per_sec': round(len(results) / elapsed, 1) if elapsed and results else None,
+        'statuses': dict(Counter(result['status'] for result in results)),
+        'results': results,
+    }
+
+
+def print_report(report: dict, show: int = 20):
+    print(f"📦 {report['pages']} sayfa, {report['workers']} süreç, {report['seconds']} sn "
+          f"({report['pages_per_sec'] or '-'} sayfa/sn)")
+    for status, count in sorted(report['statuses'].items(), key=lambda item: -item[1]):
+        print(f"   {status:<12}{count:>8}")
+    problems = [r for r in report['results'] if r['status'] in (MISMATCH, FAILED)]
+    for result in problems[:show]:
+        detail = (f"çıkarılan {result['price']} / kayıtlı {result['stored_price']}"
+                  if result['status'] == MISMATCH else result['error'])
+        print(f"   ⚠️ {result['product_id']} {result['fetched_at']} [{result['hash'][:12]}]: {detail}")
+    if len(problems) > show:
+        print(f"   ... {len(problems) - show} sorunlu sayfa daha")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sayfa arşivini güncel çıkarıcıyla yeniden işle')
+    parser.add_argument('--archive-dir', default=PAGE_ARCHIVE_DIR, help='Arşiv klasörü')
+    parser.add_argument('--db', default=DATABASE_PATH, help='price_history içeren veritabanı')
+    parser.add_argument('--product', action='append', help='Yalnızca bu ürün (tekrarlanabilir)')
+    parser.add_argument('--since', help='Bu tarihten (ISO) sonra indirilen sayfalar')
+    parser.add_argument('--until', help='Bu tarihten (ISO) önce indirilen sayfalar')
+    parser.add_argument('--limit', type=int, help='En fazla sayfa sayısı')
+    parser.add_argument('--workers', type=int, help='Süreç sayısı (varsayılan: çekirdek sayısı)')
+    parser.add_argument('--show', type=int, default=20, help='Listelenecek sorunlu sayfa sayısı')
+    parser.add_argument('--output', help='Tüm sonuçları JSON olarak bu dosyaya yaz')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.archive_dir, 'index.sqlite')):
+        print(f"❌ Arşiv bulunamadı: {args.archive_dir} (PAGE_ARCHIVE=True ile toplanır)")
+        return 1
+    archive = PageArchive(directory=args.archive_dir)
+    report = replay(archive, args.db, args.workers, product_ids=args.product, since=args.since,
+                    until=args.until, limit=args.limit)
+    print_report(report, args.show)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Sonuç kaydedildi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
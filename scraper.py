@@ -1,11 +1,18 @@
 import requests
-from bs4 import BeautifulSoup
 import re
-from config import USER_AGENT
+from config import USER_AGENT, HTTP_POOL_PER_HOST, STREAM_FETCH, STREAM_CHUNK_SIZE
+from link_resolver import short_link_cache, is_short_link, canonical_product_url, product_id_from_url
+from metrics import metrics
+from rate_limiter import rate_limiter
+from page_extractor import StreamScanner, fast_extract, is_complete, layout_fingerprint, record_page, region_hash
+from page_validators import conditional_headers
+from selector_plan import DEFAULT_PLAN, parse_document, plan_store
+from strategy_stats import strategy_stats, MISS
 import logging
 import json
 import time
 import random
+import threading
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from urllib.parse import urlparse, parse_qs
@@ -21,8 +28,21 @@ logger = logging.getLogger(__name__)
 MAX_RETRIES = 3
 BACKOFF_FACTOR = 2
 TIMEOUT = 15
-MIN_DELAY = 1
-MAX_DELAY = 3
+
+HEAD_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'tr-TR,tr;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+PAGE_HEADERS = dict(HEAD_HEADERS, **{'Cache-Control': 'no-cache', 'Pragma': 'no-cache'})
+
+# DOM price strategies of the default extraction plan; reordered per layout by hit rate.
+# Fallback rules (the general TL/₺ text search) always run last.
+PRICE_STRATEGIES = tuple(DEFAULT_PLAN.rule_ids('price'))
+PRICE_NUMBER_RE = re.compile(r'(\d+[,.]\d+|\d+)')
 
 class TrendyolScraper:
     def __init__(self, use_proxy=False, verify_ssl=True):
@@ -31,6 +51,18 @@ class TrendyolScraper:
         Proxy functionality has been removed in favor of a more robust session management.
         """
         self.verify_ssl = verify_ssl
+        self._local = threading.local()
+        self.link_cache = short_link_cache
+        self.rate_limiter = rate_limiter
+        self.strategy_stats = strategy_stats
+        self.plans = plan_store
+        # Optional ParsePool; when set, pages are parsed in worker processes
+        self.parse_pool = None
+        # Optional PageArchive; when set, every downloaded page is archived before parsing
+        self.archive = None
+        # Optional PageValidatorStore; when set, pages are fetched conditionally and
+        # unchanged pages are not parsed again
+        self.validators = None
 
     # --- Core Request and Session Logic (from new code) ---
 
@@ -41,51 +73,63 @@ class TrendyolScraper:
         
         retry_strategy = Retry(
             total=MAX_RETRIES,
-            status_forcelist=[429, 500, 502, 503, 504],
+            # 429/503 are left to the rate limiter so it can slow the host down
+            status_forcelist=[500, 502, 504],
             backoff_factor=BACKOFF_FACTOR,
             allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
 
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=HTTP_POOL_PER_HOST)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
         return session
 
-    def _add_random_delay(self):
-        """Add random delay between requests to avoid rate limiting."""
-        delay = random.uniform(MIN_DELAY, MAX_DELAY)
-        time.sleep(delay)
-        logger.debug(f"Added {delay:.2f}s delay")
+    def _get_session(self):
+        """Return this thread's long-lived session so keep-alive connections are reused."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._create_session()
+            self._local.session = session
+        return session
 
     def _get_full_url(self, url):
-        """Follow redirects to get the full URL if it's a shortened link."""
+        """
+        Follow redirects to get the full URL if it's a shortened link.
+        Short links are answered from the persistent resolution cache when possible,
+        and already-canonical product URLs (or bare IDs) skip the HEAD round-trip entirely.
+        """
+        canonical = canonical_product_url(url)
+        if canonical:
+            metrics.incr('url.head_avoided')
+            return canonical
+        if is_short_link(url):
+            return self.link_cache.resolve(url, self._follow_redirects)
+        return self._follow_redirects(url)
+
+    def _follow_redirects(self, url):
+        """Issue a HEAD request and return the final URL after redirects."""
         try:
             # Kısaltılmış link kontrolü
             if 'ty.gl' in url or 'tyml.gl' in url:
                 logger.info(f"Kısaltılmış link tespit edildi: {url}")
                 
-            self._add_random_delay()
-            headers = {
-                'User-Agent': USER_AGENT,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'tr-TR,tr;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            }
-            session = self._create_session()
+            self.rate_limiter.acquire(url)
+            headers = HEAD_HEADERS
+            session = self._get_session()
             
             # Kısaltılmış linkler için özel işlem
             if 'ty.gl' in url or 'tyml.gl' in url:
                 # HEAD request ile redirect'i takip et
                 response = session.head(url, headers=headers, allow_redirects=True, timeout=TIMEOUT)
+                self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
                 final_url = response.url
                 logger.info(f"Kısaltılmış link çözüldü: {url} -> {final_url}")
                 return final_url
             else:
                 # Normal URL için
                 response = session.head(url, headers=headers, allow_redirects=True, timeout=TIMEOUT)
+                self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
                 return response.url
                 
         except Exception as e:
@@ -173,6 +217,8 @@ class TrendyolScraper:
             'image_url': scraped_data.get('image_url'),
             'current_price': scraped_data.get('price'),
             'original_price': scraped_data.get('original_price', scraped_data.get('price')), # Fallback
+            # True when the page was not parsed again (304 or same price region as last check)
+            'unchanged': bool(scraped_data.get('unchanged')),
             'success': True
         }
         return final_data
@@ -182,54 +228,38 @@ class TrendyolScraper:
         Performs the actual page scraping, integrating all logic from the new code.
         Returns a dictionary with scraped information.
         """
+        # Resolve once; redirects do not change between retry attempts
+        full_url = self._get_full_url(url)
+        if not self.is_valid_url(full_url):
+            return {"error": "URL does not belong to Trendyol"}
+
+        product_id = product_id_from_url(full_url)
+        known = self._known_page(product_id)
+        headers = self._page_headers(known)
+
         last_error = None
         for attempt in range(MAX_RETRIES):
             try:
-                logger.info(f"Scraping attempt {attempt + 1}/{MAX_RETRIES} for {url}")
-                full_url = self._get_full_url(url)
-
-                if not self.is_valid_url(full_url):
-                    return {"error": "URL does not belong to Trendyol"}
+                logger.info(f"Scraping attempt {attempt + 1}/{MAX_RETRIES} for {full_url}")
 
                 if attempt > 0:
                     delay = BACKOFF_FACTOR ** attempt + random.uniform(1, 3)
                     time.sleep(delay)
-                else:
-                    self._add_random_delay()
+                self.rate_limiter.acquire(full_url)
 
-                headers = {'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8', 'Accept-Language': 'tr-TR,tr;q=0.8,en-US;q=0.5,en;q=0.3', 'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive', 'Upgrade-Insecure-Requests': '1', 'Cache-Control': 'no-cache', 'Pragma': 'no-cache'}
-                session = self._create_session()
-                response = session.get(full_url, headers=headers, timeout=TIMEOUT)
+                session = self._get_session()
+                response = session.get(full_url, headers=headers, timeout=TIMEOUT, stream=STREAM_FETCH)
+                self.rate_limiter.record(full_url, response.status_code, response.headers.get('Retry-After'))
 
+                if response.status_code == 304 and known:
+                    response.close()
+                    return self._unchanged_page(known, 'page.conditional_hit')
                 if response.status_code != 200:
+                    response.close()
                     last_error = f"HTTP {response.status_code}"
                     continue
 
-                soup = BeautifulSoup(response.text, 'lxml')
-                
-                # --- All extraction logic is now called from here ---
-                product_name = self._extract_product_name(soup)
-                
-                if self._is_sold_out(soup):
-                    logger.info(f"Product is sold out: {product_name}")
-                    return {"product_name": product_name, "price": 0, "original_price": 0, "error": "Tükendi"}
-
-                price, original_price = self._extract_prices(soup)
-                image_url = self._extract_image_url(soup)
-
-                if not product_name:
-                    return {"error": "Could not extract product name"}
-                if price is None:
-                    return {"product_name": product_name, "error": "Could not extract price"}
-
-                logger.info(f"Successfully scraped - Product: {product_name}, Price: {price} TL")
-                return {
-                    "product_name": product_name,
-                    "price": price,
-                    "original_price": original_price,
-                    "image_url": image_url,
-                    "error": None
-                }
+                return self._parse_fetched(full_url, self._read_page(response), product_id, known, response.headers)
 
             except Exception as e:
                 last_error = f"Unexpected error: {str(e)}"
@@ -237,130 +267,202 @@ class TrendyolScraper:
         
         return {"error": f"Failed after {MAX_RETRIES} attempts. Last error: {last_error}"}
 
+    def fetch_listing(self, url):
+        """
+        Downloads a search/listing page for the listing harvester.
+        Single attempt: products missing from the listing fall back to their own pages.
+        """
+        self.rate_limiter.acquire(url)
+        try:
+            response = self._get_session().get(url, headers=PAGE_HEADERS, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            logger.warning(f"Listing page request failed for {url}: {e}")
+            return None
+        self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
+        if response.status_code != 200:
+            logger.warning(f"Listing page returned HTTP {response.status_code}: {url}")
+            return None
+        return response.text
+
+    def _read_page(self, response):
+        """
+        Reads the page body. In streaming mode chunks are scanned as they arrive and
+        the connection is closed once name, price, original price and image are known.
+        """
+        if not STREAM_FETCH:
+            return response.text
+
+        content_length = response.headers.get('Content-Length')
+        content_length = int(content_length) if content_length and content_length.isdigit() else None
+        scanner = StreamScanner(response.encoding or 'utf-8', content_length)
+        aborted = False
+        try:
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                if scanner.feed(chunk):
+                    aborted = True
+                    break
+        finally:
+            response.close()
+        # Content-Length counts wire bytes (possibly gzip), so compare against raw bytes read
+        wire_read = getattr(response.raw, 'tell', None) if content_length is not None else None
+        return scanner.finish(aborted, wire_read() if wire_read else None)
+
+    def _known_page(self, product_id):
+        """Returns the stored validators and last result for a product, if any."""
+        if self.validators is None or not product_id:
+            return None
+        known = self.validators.get(product_id)
+        return known if known and known.get('result') else None
+
+    def _page_headers(self, known):
+        """Page request headers, made conditional when the product's validators are known."""
+        conditional = conditional_headers(known)
+        if not conditional:
+            return PAGE_HEADERS
+        metrics.incr('page.conditional_requests')
+        return dict(PAGE_HEADERS, **conditional)
+
+    def _unchanged_page(self, known, counter):
+        """Reuses the stored result of a page that has not changed since the last check."""
+        metrics.incr(counter)
+        return dict(known['result'], unchanged=True)
+
+    def _parse_fetched(self, url, html, product_id=None, known=None, response_headers=None):
+        """
+        Parses a fetched page unless its price-relevant region hashes the same as last time,
+        then stores the response validators and result for the next check.
+        """
+        if self.validators is None or not product_id:
+            return self._parse_html(html, url)
+
+        response_headers = response_headers or {}
+        etag, last_modified = response_headers.get('ETag'), response_headers.get('Last-Modified')
+        region = region_hash(html)
+        if known and region and region == known.get('region_hash'):
+            self.validators.put(product_id, url, etag, last_modified, region, known['result'])
+            return self._unchanged_page(known, 'page.parse_skipped')
+
+        result = self._parse_html(html, url)
+        metrics.incr('page.parsed')
+        # Only priced (or sold-out, price 0) results are reused; failed pages are parsed again next time
+        if region and result.get('price') is not None:
+            self.validators.put(product_id, url, etag, last_modified, region, result)
+        return result
+
+    def _parse_html(self, html, url=None):
+        """
+        Parses a downloaded page in the parse pool if one is attached, otherwise in-process.
+        Blocks while the pool queue is full, which holds back new fetches.
+        """
+        if self.archive is not None and url:
+            self.archive.store(url, html, self.extract_product_id(url))
+        if self.parse_pool is not None:
+            result = self.parse_pool.parse(html, self.strategy_stats)
+            if result is not None:
+                return result
+        return self._parse_page(html)
+
+    def _parse_page(self, html):
+        """
+        Runs all extraction logic over a downloaded product page.
+        Returns the same dictionary shape as _scrape_page.
+
+        Extraction is tiered: JSON-LD and the embedded state blob are read from the
+        raw HTML first, and an lxml tree is built only for the fields that tier
+        could not supply; those are read with the compiled extraction plan.
+        """
+        cpu_start = time.thread_time()
+        tier = 'failed'
+        try:
+            fast = fast_extract(html)
+            fingerprint = layout_fingerprint(html)
+            if is_complete(fast):
+                tier = 'fast'
+                sold_out = fast['in_stock'] is False
+                if not sold_out:
+                    self.strategy_stats.record(fingerprint, fast['price_source'])
+                result = self._build_result(fast['product_name'], sold_out, fast['price'],
+                                            fast['original_price'], fast['image_url'])
+            else:
+                tier = 'dom'
+                result = self._parse_dom(html, fast, fingerprint)
+            if result.get('error') and result.get('error') != 'Tükendi':
+                tier = 'failed'
+            return result
+        finally:
+            record_page(tier, cpu_start)
+
+    def _parse_dom(self, html, fast, fingerprint='unknown'):
+        """DOM fallback; fields already found by the fast path are kept."""
+        plan = self.plans.current()
+        doc = parse_document(html)
+
+        product_name = fast['product_name'] or plan.first('name', doc)[1]
+        sold_out = not fast['in_stock'] if fast['in_stock'] is not None else plan.sold_out(doc)
+        price, original_price = fast['price'], fast['original_price']
+        if price is not None and not sold_out:
+            self.strategy_stats.record(fingerprint, fast['price_source'])
+        elif price is None and not sold_out:
+            price, original_price = self._extract_prices(doc, fingerprint, plan)
+        image_url = fast['image_url'] or plan.first('image', doc)[1]
+        return self._build_result(product_name, sold_out, price, original_price, image_url)
+
+    def _build_result(self, product_name, sold_out, price, original_price, image_url):
+        if sold_out:
+            logger.info(f"Product is sold out: {product_name}")
+            return {"product_name": product_name, "price": 0, "original_price": 0, "error": "Tükendi"}
+        if not product_name:
+            return {"error": "Could not extract product name"}
+        if price is None:
+            return {"product_name": product_name, "error": "Could not extract price"}
+
+        logger.info(f"Successfully scraped - Product: {product_name}, Price: {price} TL")
+        return {
+            "product_name": product_name,
+            "price": price,
+            "original_price": original_price,
+            "image_url": image_url,
+            "error": None
+        }
+
     # --- Granular Extraction Methods (from new code, made into class methods) ---
 
     def _extract_price_from_text(self, text):
         """Helper to extract numeric price value from text."""
         if not text: return None
         price_text = text.strip().replace('.', '').replace(',', '.')
-        match = re.search(r'(\d+[,.]\d+|\d+)', price_text)
+        match = PRICE_NUMBER_RE.search(price_text)
         if match:
             price = float(match.group(1).replace(',', '.'))
             if 0.01 <= price <= 100000: return price
         return None
 
-    def _extract_product_name(self, soup):
-        """Extract product name using various methods."""
-        h1_tag = soup.find('h1', attrs={'data-testid': 'product-name'})
-        if h1_tag: return h1_tag.text.strip()
-        if soup.find('h1'): return soup.find('h1').text.strip()
-        if soup.find('title'): return soup.find('title').text.split('-')[0].strip()
-        return None
+    def _extract_prices(self, doc, fingerprint='unknown', plan=None):
+        """
+        Extract both current and original prices using the plan's price rules.
 
-    def _is_sold_out(self, soup):
-        """Check if the product is sold out using various methods."""
-        # Method 1: Add to cart button
-        add_to_cart_btn = soup.find('button', attrs={'data-testid': 'add-to-cart-button'})
-        if add_to_cart_btn:
-            btn_text = add_to_cart_btn.get_text().strip()
-            if 'Sepete Ekle' in btn_text: return False
-            if 'Tükendi' in btn_text or 'Stok Yok' in btn_text or 'Mevcut Değil' in btn_text: return True
-
-        # Method 2: Buy now button
-        buy_now_btn = soup.find('button', class_='buy-now-button')
-        if buy_now_btn and 'Şimdi Al' in buy_now_btn.get_text().strip(): return False
-
-        # Method 3: Disabled button
-        disabled_buttons = soup.find_all('button', disabled=True)
-        for btn in disabled_buttons:
-            if any('add-to-cart' in c or 'sepete-ekle' in c for c in btn.get('class', [])): return True
-
-        # Method 4: General out of stock messages
-        visible_elements = soup.find_all(['div', 'span', 'p'], class_=lambda x: x and 'stock' in ' '.join(x).lower())
-        for element in visible_elements:
-            text = element.get_text().strip().lower()
-            if any(phrase in text for phrase in ['tükendi', 'stok yok', 'mevcut değil', 'satışta değil']):
-                if len(text) < 100 and not any(js_indicator in text for js_indicator in ['window', 'function', 'var ']): return True
-        return False
-
-    def _extract_prices(self, soup):
-        """Extract both current and original prices using all available methods."""
+        Rules are tried in the order that has won most often for this page
+        layout, with fallback rules last; the winner (or a miss) is recorded in
+        the strategy stats.
+        """
+        plan = plan or self.plans.current()
         price, original_price = None, None
-
-        # Method 1: New - data-testid price search
-        price_container = soup.find('div', attrs={'data-testid': 'price'})
-        if price_container:
-            discounted_span = price_container.find('span', class_='price-view-discounted')
-            original_span = price_container.find('span', class_='price-view-original')
-            if discounted_span: price = self._extract_price_from_text(discounted_span.text)
-            if original_span: original_price = self._extract_price_from_text(original_span.text)
-            if not price and original_span: price = original_price # No discount, original is current
-            if not price: # Fallback to any span in the container
-                for span in price_container.find_all('span'):
-                    extracted = self._extract_price_from_text(span.get_text())
-                    if extracted: price = extracted; break
-
-        # Method 2 & 3: price-price or prc-dsc
-        if not price:
-            price_tag = soup.find('div', class_=lambda x: x and 'price-price' in ' '.join(x)) or soup.find('span', class_='prc-dsc')
-            if price_tag: price = self._extract_price_from_text(price_tag.text)
-
-        # Method 4: Old structure - campaign-price
-        if not price:
-            price_tag = soup.find('p', class_='campaign-price')
-            if price_tag: price = self._extract_price_from_text(price_tag.text)
-
-        # Method 5: JSON-LD
-        if not price:
-            for script in soup.find_all('script', type='application/ld+json'):
-                try:
-                    data = json.loads(script.string)
-                    offers = data.get('offers')
-                    if isinstance(offers, dict): price = float(offers.get('price'))
-                    elif isinstance(offers, list) and offers: price = float(offers[0].get('price'))
-                    if price: logger.info(f"Found price via JSON-LD: {price}"); break
-                except (json.JSONDecodeError, AttributeError, TypeError): continue
-
-        # Method 6: JavaScript variables
-        if not price:
-            for script in soup.find_all('script'):
-                if not script.string: continue
-                if 'winnerVariant' in script.string or 'productDetail' in script.string:
-                    for pattern in [r'"price":\s*{\s*[^}]*"value":\s*([0-9.]+)', r'"price":\s*([0-9.]+)', r'"currentPrice":\s*([0-9.]+)', r'"sellingPrice":\s*([0-9.]+)' ]:
-                        match = re.search(pattern, script.string)
-                        if match: price = float(match.group(1)); logger.info(f"Found price via JavaScript: {price}"); break
-                if price: break
-
-        # Method 7: General TL/₺ search
-        if not price:
-            for element in soup.find_all(string=re.compile(r'\d+[,.]?\d*\s*(TL|₺)')):
-                if element.parent.name == 'script': continue
-                extracted = self._extract_price_from_text(element)
-                if extracted: price = extracted; logger.info(f"Found price via general TL search: {price}"); break
+        strategies = self.strategy_stats.order(fingerprint, plan.rule_ids('price')) + plan.fallback_ids('price')
+        for name in strategies:
+            price, original_price = self._price_strategy(plan, name, doc)
+            if price:
+                self.strategy_stats.record(fingerprint, name)
+                break
+        else:
+            self.strategy_stats.record(fingerprint, MISS)
+            price, original_price = None, None
 
         if not original_price: original_price = price
         return price, original_price
 
-    def _extract_image_url(self, soup):
-        """Extract product image URL using multiple methods."""
-        try:
-            # Method 1: Try to get from 'og:image' meta tag (most reliable)
-            og_image = soup.find('meta', property='og:image')
-            if og_image and og_image.get('content'):
-                return og_image['content']
-
-            # Method 2: New gallery image selector
-            gallery_img = soup.select_one('.product-image-gallery-container img')
-            if gallery_img and gallery_img.get('src'):
-                image_url = gallery_img.get('src')
-                return image_url if image_url.startswith('http') else 'https:' + image_url
-
-            # Method 3: Fallback to old selector
-            img_tag = soup.select_one('img.ph-gl-img, .product-slide img')
-            if img_tag and img_tag.get('src'):
-                image_url = img_tag.get('src')
-                return image_url if image_url.startswith('http') else 'https:' + image_url
-        except Exception as e:
-            logger.error(f"Error extracting image URL: {e}")
-            return None
-        return None
+    def _price_strategy(self, plan, name, doc):
+        """Runs one price rule; the original price comes from rules tied to it."""
+        price = plan.run('price', name, doc, self._extract_price_from_text)
+        if price is None:
+            return None, None
+        return price, plan.original_for(name, doc, self._extract_price_from_text)
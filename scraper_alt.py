@@ -9,6 +9,7 @@ import logging
 import time
 import ssl
 import urllib3
+from rate_limiter import rate_limiter
 
 # SSL uyarılarını devre dışı bırak
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -16,6 +17,10 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# JS state içindeki ad/fiyat kalıpları (her sayfada yeniden derlenmesin)
+JS_NAME_RE = re.compile(r'"name"\s*:\s*"([^"]+)"')
+JS_PRICE_RE = re.compile(r'"price"\s*:\s*(\d+\.?\d*)')
+
 class TrendyolScraperAlt:
     def __init__(self, use_proxy=True, timeout=10, max_retries=3, verify_ssl=False):
         """
@@ -48,9 +53,18 @@ class TrendyolScraperAlt:
             'Connection': 'keep-alive'
         }
         
+        self.rate_limiter = rate_limiter
+        
         if use_proxy:
             self.load_proxies()
     
+    def _get(self, session, url):
+        """İsteği host'un hız sınırından geçirerek GET yapar."""
+        self.rate_limiter.acquire(url)
+        response = session.get(url, timeout=self.timeout, verify=self.verify_ssl)
+        self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
+        return response
+    
     def load_proxies(self):
         """Proxy'leri proxies.txt dosyasından yükler."""
         try:
@@ -146,7 +160,7 @@ class TrendyolScraperAlt:
         for api_url in api_urls:
             try:
                 logger.info(f"API endpoint deneniyor: {api_url}")
-                response = session.get(api_url, timeout=self.timeout, verify=self.verify_ssl)
+                response = self._get(session, api_url)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -225,19 +239,16 @@ class TrendyolScraperAlt:
                 # Ana sayfaya git (bot korumasını aşmak için)
                 if attempt == 0:
                     try:
-                        session.get("https://www.trendyol.com", timeout=self.timeout, verify=self.verify_ssl)
-                        time.sleep(1)
+                        self._get(session, "https://www.trendyol.com")
                     except:
                         pass
                 
-                response = session.get(product_url, timeout=self.timeout, verify=self.verify_ssl)
+                response = self._get(session, product_url)
                 response.raise_for_status()
                 
                 result = self._extract_html_data(response, product_url, product_id)
                 if result and result.get('success'):
                     return result
-                    
-                time.sleep(2)
                 
             except requests.exceptions.RequestException as e:
                 logger.error(f"HTML scraping hatası (Deneme {attempt + 1}): {e}")
@@ -276,8 +287,8 @@ class TrendyolScraperAlt:
                         # Şimdilik basit regex ile dene
                         
                         # Ürün adı
-                        name_match = re.search(r'"name"\s*:\s*"([^"]+)"', script_content)
-                        price_match = re.search(r'"price"\s*:\s*(\d+\.?\d*)', script_content)
+                        name_match = JS_NAME_RE.search(script_content)
+                        price_match = JS_PRICE_RE.search(script_content)
                         
                         if name_match and price_match:
                             return {
@@ -0,0 +1,339 @@
+"""
+Bildirime dayalı (declarative) çıkarım planı
+Ürün adı, fiyat, orijinal fiyat, görsel ve stok için sıralı XPath/regex kuralları
+site_structure.json içindeki "extraction" anahtarında tutulur. Plan bir kez lxml XPath
+ve derlenmiş regex nesnelerine çevrilir; dosya değiştiğinde (elle düzenleme veya
+SiteMonitor kaydı) yeniden yüklenir, kod dağıtımı gerekmez.
+
+Kural alanları:
+    id        Kuralın adı (fiyat kurallarında strateji istatistiklerindeki ad)
+    xpath     Sırayla denenen XPath ifadesi veya listesi; ilk kullanılabilir değer alınır
+    match     Düğüm metni bu regex'e uymuyorsa atlanır
+    regex     Değer bu regex'in ilk grubundan (grup yoksa tüm eşleşmeden) alınır
+    absolute  Görsel adresi 'http' ile başlamıyorsa 'https:' eklenir
+    fallback  Fiyat kuralı istatistiğe göre sıralanmaz, her zaman en son denenir
+    with      Orijinal fiyat kuralı yalnızca bu fiyat kuralı kazandığında kullanılır
+    in_stock / sold_out   Stok kuralında düğüm metninde aranan ifadeler
+    found     Stok kuralında düğümün varlığı tek başına sonuçtur ('sold_out' / 'in_stock')
+    lowercase, max_length, exclude   Stok metni ön işlemleri
+"""
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SITE_STRUCTURE_PATH = os.getenv('SITE_STRUCTURE_PATH', 'site_structure.json')
+# Dosya değişikliği en fazla bu kadar saniyede bir kontrol edilir
+PLAN_CHECK_INTERVAL = 5.0
+
+FIELDS = ('name', 'price', 'original_price', 'image', 'stock')
+# SiteMonitor'ün test sayfalarında bulunmasını beklediği alanlar
+REQUIRED_FIELDS = ('name', 'price', 'image')
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+DEFAULT_SPEC = {
+    'version': 1,
+    'state_patterns': {
+        # productDetail/winnerVariant script'leri; eski DOM stratejisindeki JavaScript kalıplarıyla aynı sıra
+        'price': [
+            r'"price":\s*{\s*[^}]*"value":\s*([0-9.]+)',
+            r'"price":\s*([0-9.]+)',
+            r'"currentPrice":\s*([0-9.]+)',
+            r'"sellingPrice":\s*([0-9.]+)',
+        ],
+        'original_price': [
+            r'"originalPrice":\s*{\s*[^}]*"value":\s*([0-9.]+)',
+            r'"originalPrice":\s*([0-9.]+)',
+        ],
+        'in_stock': r'"inStock":\s*(true|false)',
+        'sold_out': r'"(?:isSoldOut|soldOut)":\s*(true|false)',
+    },
+    'fields': {
+        'name': [
+            {'id': 'testid_name', 'xpath': "//h1[@data-testid='product-name']"},
+            {'id': 'h1', 'xpath': '//h1'},
+            {'id': 'title', 'xpath': '//title', 'regex': r'^([^-]*)'},
+        ],
+        'price': [
+            {'id': 'testid_price', 'xpath': [
+                f"//div[@data-testid='price']//span[{_has_class('price-view-discounted')}]",
+                f"//div[@data-testid='price']//span[{_has_class('price-view-original')}]",
+                "//div[@data-testid='price']//span",
+            ]},
+            {'id': 'price_price', 'xpath': "//div[contains(@class, 'price-price')]"},
+            {'id': 'prc_dsc', 'xpath': f"//span[{_has_class('prc-dsc')}]"},
+            {'id': 'campaign_price', 'xpath': f"//p[{_has_class('campaign-price')}]"},
+            # Genel TL/₺ araması en az kesin ve en pahalı kural
+            {'id': 'text_search', 'xpath': '//body//text()[not(parent::script) and not(parent::style)]',
+             'match': r'\d+[,.]?\d*\s*(TL|₺)', 'fallback': True},
+        ],
+        'original_price': [
+            {'id': 'testid_original', 'with': 'testid_price',
+             'xpath': f"//div[@data-testid='price']//span[{_has_class('price-view-original')}]"},
+        ],
+        'image': [
+            {'id': 'og_image', 'xpath': "//meta[@property='og:image']/@content"},
+            {'id': 'gallery', 'xpath': f"//*[{_has_class('product-image-gallery-container')}]//img/@src",
+             'absolute': True},
+            {'id': 'legacy_gallery', 'xpath': f"//img[{_has_class('ph-gl-img')}]/@src | "
+                                              f"//*[{_has_class('product-slide')}]//img/@src",
+             'absolute': True},
+        ],
+        'stock': [
+            {'id': 'add_to_cart', 'xpath': "//button[@data-testid='add-to-cart-button']",
+             'in_stock': ['Sepete Ekle'], 'sold_out': ['Tükendi', 'Stok Yok', 'Mevcut Değil']},
+            {'id': 'buy_now', 'xpath': f"//button[{_has_class('buy-now-button')}]", 'in_stock': ['Şimdi Al']},
+            {'id': 'disabled_cart', 'xpath': "//button[@disabled][contains(@class, 'add-to-cart') "
+                                             "or contains(@class, 'sepete-ekle')]",
+             'found': 'sold_out'},
+            {'id': 'stock_message',
+             'xpath': "//*[self::div or self::span or self::p]"
+                      "[contains(translate(@class, 'STOCK', 'stock'), 'stock')]",
+             'lowercase': True, 'max_length': 100, 'exclude': ['window', 'function', 'var '],
+             'sold_out': ['tükendi', 'stok yok', 'mevcut değil', 'satışta değil']},
+        ],
+    },
+}
+
+
+def parse_document(html: str):
+    """HTML'den lxml belge ağacı kurar; boş veya bozuk sayfada boş belge döner"""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # Kodlama bildirimi içeren str girdileri lxml kabul etmez
+        try:
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+        except etree.ParserError:
+            pass
+    except etree.ParserError:
+        pass
+    return lxml.html.document_fromstring('<html></html>')
+
+
+class CompiledRule:
+    """Derlenmiş tek kural"""
+
+    def __init__(self, field: str, spec: dict):
+        if not spec.get('id'):
+            raise ValueError(f"{field}: id'siz kural")
+        self.id = spec['id']
+        paths = spec.get('xpath') or []
+        paths = [paths] if isinstance(paths, str) else paths
+        if not paths:
+            raise ValueError(f"{field}.{self.id}: xpath tanımlı değil")
+        try:
+            self.paths = [etree.XPath(path) for path in paths]
+            self.match = re.compile(spec['match']) if spec.get('match') else None
+            self.regex = re.compile(spec['regex']) if spec.get('regex') else None
+        except (etree.XPathSyntaxError, re.error) as e:
+            raise ValueError(f"{field}.{self.id}: {e}") from e
+        self.absolute = bool(spec.get('absolute'))
+        self.fallback = bool(spec.get('fallback'))
+        self.with_rule = spec.get('with')
+        self.in_stock = list(spec.get('in_stock', []))
+        self.sold_out = list(spec.get('sold_out', []))
+        self.found = spec.get('found')
+        self.lowercase = bool(spec.get('lowercase'))
+        self.max_length = spec.get('max_length')
+        self.exclude = list(spec.get('exclude', []))
+
+    def _nodes(self, doc):
+        for path in self.paths:
+            result = path(doc)
+            yield from (result if isinstance(result, list) else [result])
+
+    @staticmethod
+    def _text(node) -> str:
+        if isinstance(node, str):
+            return str(node)
+        return node.text_content() if hasattr(node, 'text_content') else (node.text or '')
+
+    def values(self, doc):
+        """Kuralın belgedeki adayları (ilk geçerli değer kullanılır)"""
+        for node in self._nodes(doc):
+            text = self._text(node)
+            if self.match and not self.match.search(text):
+                continue
+            if self.regex:
+                found = self.regex.search(text)
+                if not found:
+                    continue
+                text = found.group(1) if found.groups() else found.group(0)
+            text = text.strip()
+            if not text:
+                continue
+            if self.absolute and not text.startswith('http'):
+                text = 'https:' + text
+            yield text
+
+    def stock_state(self, doc) -> Optional[bool]:
+        """Stok kuralı: tükendi ise True, stokta ise False, karar verilemezse None"""
+        for node in self._nodes(doc):
+            if self.found:
+                return self.found == 'sold_out'
+            text = self._text(node).strip()
+            if self.lowercase:
+                text = text.lower()
+            if self.max_length and len(text) >= self.max_length:
+                continue
+            if any(word in text for word in self.exclude):
+                continue
+            if any(phrase in text for phrase in self.in_stock):
+                return False
+            if any(phrase in text for phrase in self.sold_out):
+                return True
+        return None
+
+
+class CompiledPlan:
+    """Alan -> sıralı derlenmiş kurallar ve state blob regex'leri"""
+
+    def __init__(self, spec: dict):
+        if not isinstance(spec, dict) or not isinstance(spec.get('fields'), dict):
+            raise ValueError("Çıkarım planında 'fields' bulunamadı")
+        self.version = spec.get('version')
+        self.rules = {field: [CompiledRule(field, rule) for rule in spec['fields'].get(field, [])]
+                      for field in FIELDS}
+        self._by_id = {field: {rule.id: rule for rule in rules} for field, rules in self.rules.items()}
+        state = spec.get('state_patterns', DEFAULT_SPEC['state_patterns'])
+        try:
+            self.state_price = [re.compile(pattern) for pattern in state.get('price', [])]
+            self.state_original_price = [re.compile(pattern) for pattern in state.get('original_price', [])]
+            self.state_in_stock = re.compile(state['in_stock']) if state.get('in_stock') else None
+            self.state_sold_out = re.compile(state['sold_out']) if state.get('sold_out') else None
+        except re.error as e:
+            raise ValueError(f"state_patterns: {e}") from e
+
+    def rule_ids(self, field: str) -> List[str]:
+        """İstatistiğe göre sıralanabilen kuralların adları (plan sırasıyla)"""
+        return [rule.id for rule in self.rules[field] if not rule.fallback]
+
+    def fallback_ids(self, field: str) -> List[str]:
+        return [rule.id for rule in self.rules[field] if rule.fallback]
+
+    def run(self, field: str, rule_id: str, doc, convert: Callable = None):
+        """Tek bir kuralı çalıştırır; değer bulunamazsa (veya kural yoksa) None döner"""
+        rule = self._by_id[field].get(rule_id)
+        if rule is None:
+            return None
+        for text in rule.values(doc):
+            value = convert(text) if convert else text
+            if value is not None:
+                return value
+        return None
+
+    def first(self, field: str, doc, convert: Callable = None) -> Tuple[Optional[str], Optional[str]]:
+        """Kuralları plan sırasıyla dener; (kazanan kural, değer) döndürür"""
+        for rule in self.rules[field]:
+            value = self.run(field, rule.id, doc, convert)
+            if value is not None:
+                return rule.id, value
+        return None, None
+
+    def original_for(self, price_rule: str, doc, convert: Callable = None):
+        """Kazanan fiyat kuralına ait (veya genel) orijinal fiyat"""
+        for rule in self.rules['original_price']:
+            if rule.with_rule in (None, price_rule):
+                value = self.run('original_price', rule.id, doc, convert)
+                if value is not None:
+                    return value
+        return None
+
+    def sold_out(self, doc) -> bool:
+        for rule in self.rules['stock']:
+            state = rule.stock_state(doc)
+            if state is not None:
+                return state
+        return False
+
+    def missing_fields(self, doc) -> List[str]:
+        """Planın bu sayfada bulamadığı zorunlu alanlar"""
+        return [field for field in REQUIRED_FIELDS if self.first(field, doc)[1] is None]
+
+
+DEFAULT_PLAN = CompiledPlan(DEFAULT_SPEC)
+
+
+class PlanStore:
+    """site_structure.json'daki planı derleyip tutar, dosya değişince yeniden yükler"""
+
+    def __init__(self, path: str = SITE_STRUCTURE_PATH, check_interval: float = PLAN_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._plan = DEFAULT_PLAN
+        self._mtime = None
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def current(self) -> CompiledPlan:
+        """Güncel plan; dosya değiştiyse önce yeniden yüklenir"""
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            if self._stat() != self._mtime:
+                self.reload()
+        return self._plan
+
+    def reload(self) -> bool:
+        """
+        Planı dosyadan derler
+
+        Dosyada plan yoksa varsayılan plan kullanılır. Derlenemeyen (hatalı XPath/regex)
+        plan yüklenmez, önceki plan kullanılmaya devam eder ve False döner.
+        """
+        with self._lock:
+            self._mtime = self._stat()
+            spec = None
+            if self._mtime is not None:
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        spec = json.load(f).get('extraction')
+                except (OSError, ValueError) as e:
+                    logger.error(f"Çıkarım planı okunamadı ({self.path}): {e}")
+                    return False
+            if spec is None:
+                self._plan = DEFAULT_PLAN
+                return True
+            try:
+                plan = CompiledPlan(spec)
+            except ValueError as e:
+                metrics.incr('plan.errors')
+                logger.error(f"Çıkarım planı derlenemedi, önceki plan kullanılıyor: {e}")
+                return False
+            self._plan = plan
+        metrics.incr('plan.reloads')
+        logger.info(f"Çıkarım planı yüklendi: v{plan.version}, "
+                    f"{sum(len(rules) for rules in plan.rules.values())} kural")
+        return True
+
+
+def default_spec() -> dict:
+    """Varsayılan planın düzenlenebilir kopyası"""
+    return copy.deepcopy(DEFAULT_SPEC)
+
+
+# Global plan deposu
+plan_store = PlanStore()
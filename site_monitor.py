@@ -13,8 +13,10 @@ from typing import Dict, List, Optional, Tuple
 import re
 from bs4 import BeautifulSoup
 import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from config import GLOBAL_ADMIN_IDS
+from rate_limiter import rate_limiter
+from selector_plan import SITE_STRUCTURE_PATH, parse_document, plan_store
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
@@ -30,12 +32,17 @@ class SiteStructure:
     api_endpoints: List[str]
     page_structure_hash: str
     last_check: str
+    # Çıkarım planının test sayfalarında bulamadığı alanlar
+    plan_missing: List[str] = field(default_factory=list)
+    # Bildirime dayalı çıkarım planı (selector_plan); elle düzenlenir, analizde korunur
+    extraction: Optional[dict] = None
     
 class SiteMonitor:
     """Trendyol site yapısını izleyen sınıf"""
     
     def __init__(self):
-        self.monitor_file = "site_structure.json"
+        self.monitor_file = SITE_STRUCTURE_PATH
+        self.plans = plan_store
         self.test_urls = [
             "https://ty.gl/reii1wcijhbf1",  # Gerçek test edilmiş mobil link
             "https://www.trendyol.com/apple/iphone-15-128-gb-p-773358088",
@@ -62,17 +69,24 @@ class SiteMonitor:
         return None
     
     def save_structure(self, structure: SiteStructure):
-        """Site yapısını kaydet"""
+        """Site yapısını kaydet; dosyadaki çıkarım planı korunur ve yeniden yüklenir"""
         try:
+            if structure.extraction is None and os.path.exists(self.monitor_file):
+                with open(self.monitor_file, 'r', encoding='utf-8') as f:
+                    structure.extraction = json.load(f).get('extraction')
             with open(self.monitor_file, 'w', encoding='utf-8') as f:
                 json.dump(asdict(structure), f, indent=2, ensure_ascii=False)
         except Exception as e:
             logger.error(f"Yapı kaydedilirken hata: {e}")
+            return
+        self.plans.reload()
     
     def analyze_page_structure(self, url: str) -> Dict:
         """Sayfa yapısını analiz et"""
         try:
+            rate_limiter.acquire(url)
             response = requests.get(url, headers=self.headers, timeout=30)
+            rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -124,12 +138,16 @@ class SiteMonitor:
             structure_text = ''.join([str(elem) for elem in important_elements[:50]])  # İlk 50 element
             page_hash = hashlib.md5(structure_text.encode()).hexdigest()
             
+            # Çıkarım planı bu sayfada hangi alanları bulamıyor
+            plan_missing = self.plans.current().missing_fields(parse_document(response.text))
+            
             return {
                 'json_ld_present': json_ld_present,
                 'price_selectors': price_selectors,
                 'title_selectors': title_selectors,
                 'image_selectors': image_selectors,
                 'page_structure_hash': page_hash,
+                'plan_missing': plan_missing,
                 'success': True
             }
             
@@ -152,7 +170,9 @@ class SiteMonitor:
             try:
                 # Test product ID ile kontrol
                 test_url = f"{endpoint}123456" if endpoint.endswith('/') else f"{endpoint}?q=test"
+                rate_limiter.acquire(test_url)
                 response = requests.head(test_url, headers=self.headers, timeout=10)
+                rate_limiter.record(test_url, response.status_code, response.headers.get('Retry-After'))
                 
                 # 404 değil ise endpoint aktif
                 if response.status_code != 404:
@@ -172,6 +192,7 @@ class SiteMonitor:
         all_image_selectors = set()
         json_ld_count = 0
         all_hashes = []
+        plan_missing = set()
         
         # Test URL'lerini analiz et
         for url in self.test_urls:
@@ -186,10 +207,7 @@ class SiteMonitor:
                 all_title_selectors.update(result.get('title_selectors', []))
                 all_image_selectors.update(result.get('image_selectors', []))
                 all_hashes.append(result.get('page_structure_hash', ''))
-            
-            # Rate limiting
-            import time
-            time.sleep(2)
+                plan_missing.update(result.get('plan_missing', []))
         
         # API endpoint'lerini kontrol et
         api_endpoints = self.check_api_endpoints()
@@ -204,7 +222,8 @@ class SiteMonitor:
             image_selectors=list(all_image_selectors),
             api_endpoints=api_endpoints,
             page_structure_hash=combined_hash,
-            last_check=datetime.now().isoformat()
+            last_check=datetime.now().isoformat(),
+            plan_missing=sorted(plan_missing)
         )
     
     def compare_structures(self, old: SiteStructure, new: SiteStructure) -> Dict:
@@ -271,6 +290,16 @@ class SiteMonitor:
                 changes['improvements'].append(f"Yeni API endpoint'leri: {list(added_api)}")
                 changes['has_changes'] = True
         
+        # Çıkarım planı
+        newly_missing = set(new.plan_missing) - set(old.plan_missing)
+        recovered = set(old.plan_missing) - set(new.plan_missing)
+        if newly_missing:
+            changes['critical_changes'].append(f"Çıkarım planı bu alanları bulamıyor: {sorted(newly_missing)}")
+            changes['has_changes'] = True
+        if recovered:
+            changes['improvements'].append(f"Çıkarım planı bu alanları tekrar buluyor: {sorted(recovered)}")
+            changes['has_changes'] = True
+        
         # Sayfa yapısı hash'i
         if old.page_structure_hash != new.page_structure_hash:
             changes['minor_changes'].append("Sayfa yapısında değişiklik tespit edildi")
@@ -286,6 +315,7 @@ class SiteMonitor:
             suggestions.append("🚨 KRİTİK: Scraper kodunu güncellemeniz gerekiyor!")
             suggestions.append("📝 Önerilen aksiyonlar:")
             suggestions.append("  - scraper.py dosyasını kontrol edin")
+            suggestions.append("  - site_structure.json içindeki 'extraction' planını güncelleyin (yeniden başlatma gerekmez)")
             suggestions.append("  - Yeni selektörleri test edin")
             suggestions.append("  - Fallback mekanizmalarını aktifleştirin")
         
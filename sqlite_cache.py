@@ -0,0 +1,62 @@
+"""
+Bellek LRU katmanlı SQLite önbellek tabanı
+Kısa link önbelleği ve sayfa doğrulayıcıları aynı yapıyı kullanır: sık kullanılan kayıtlar
+bellekteki LRU katmanında, tüm kayıtlar yeniden başlatmalar arasında korunmak üzere ana
+veritabanındaki bir tabloda tutulur. Tablo şeması migrations.py'de bileşenin sürümlü taşımalarıyla
+tanımlıdır; bağlantı ilk kullanımda açılırken bekleyen taşımalar uygulanır.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from migrations import migrate
+from sqlite_pool import open_connection
+
+
+class SQLiteLRUCache:
+    """
+    Bellek LRU + SQLite tablosu önbelleği
+
+    Alt sınıf `component` ile tablosunun taşıma bileşenini belirtir. `_memory`, `_remember` ve
+    `_get_conn` yalnızca `_lock` tutulurken kullanılır.
+    """
+
+    component = None
+
+    def __init__(self, db_path: str, max_size: int):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Veritabanı bağlantısını ilk kullanımda açar ve tablonun taşımalarını uygular"""
+        if self._conn is None:
+            conn = open_connection(self.db_path)
+            try:
+                migrate(conn, self.component)
+            except Exception:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, entry: dict):
+        """Bellek önbelleğine ekler, kapasite aşılırsa en eskiyi atar"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def clear_memory(self):
+        """Bellek katmanını temizler (veritabanı kayıtları korunur)"""
+        with self._lock:
+            self._memory.clear()
+
+    def close(self):
+        """Veritabanı bağlantısını kapatır; sonraki kullanımda yeniden açılır"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
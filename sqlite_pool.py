@@ -0,0 +1,267 @@
+"""
+SQLite bağlantı fabrikası ve havuzu
+Bot, web arayüzleri ve kullanıcı veritabanı aynı SQLite dosyasını kullanır. Bağlantılar WAL
+modunda ve ayarlı pragmalarla açılır; böylece okuyucular yazarı, yazar okuyucuları beklemez ve
+kısa kilit çakışmaları "database is locked" hatası yerine busy_timeout ile beklenir.
+
+`acquire(path)` bağlantıyı havuzdan alır: aynı thread aynı dosyayı tekrar isterse elindeki
+bağlantı paylaşılır, `release(conn)` ile bırakılan bağlantı boşta bekletilir ve sonraki isteğe
+(başka thread dahil) yeniden verilir. Her HTTP isteğinde bağlantı açıp kapatma maliyeti ortadan kalkar.
+Bağlantılar `check_same_thread=False` ile açıldığı için sahiplik havuzda denetlenir: kiralanan
+bağlantı ve imleçleri yalnızca kiralayan thread kullanabilir, bırakılmış bağlantının kullanımı
+da hata verir (sqlite3.ProgrammingError).
+Uzun ömürlü tekil nesneler (link önbelleği, sayfa doğrulayıcıları) havuz yerine
+`open_connection` ile kendi bağlantılarını açar.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SQLITE_WAL = os.getenv('SQLITE_WAL', 'True').lower() == 'true'
+# Kilit çakışmasında hata vermeden önce beklenecek süre (ms)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 16384))
+SQLITE_MMAP_SIZE_MB = int(os.getenv('SQLITE_MMAP_SIZE_MB', 128))
+# Dosya başına boşta bekletilecek en fazla bağlantı
+SQLITE_POOL_MAX_IDLE = int(os.getenv('SQLITE_POOL_MAX_IDLE', 4))
+
+MEMORY_PATHS = ('', ':memory:')
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+    """Dosya silinip yeniden oluşturulduysa değişen kimlik (cihaz, inode)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def database_identity(conn: sqlite3.Connection) -> Optional[tuple]:
+    """Bağlantının ana veritabanı dosyası ve kimliği; bellek içi veritabanı için None"""
+    row = conn.execute('PRAGMA database_list').fetchone()
+    path = row[2] if row else ''
+    if not path:
+        return None
+    identity = _file_identity(path)
+    return (path,) + identity if identity else None
+
+
+def configure(conn: sqlite3.Connection, wal: bool = SQLITE_WAL) -> sqlite3.Connection:
+    """Bağlantıya WAL ve performans pragmalarını uygular"""
+    conn.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}')
+    if wal and conn.execute('PRAGMA journal_mode = WAL').fetchone()[0].lower() == 'wal':
+        # WAL'da NORMAL, commit başına fsync'i checkpoint'e erteler; elektrik kesintisinde yalnızca
+        # son commit'ler kaybolabilir, veritabanı bozulmaz. Rollback journal'da varsayılan (FULL) kalır.
+        conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size = {SQLITE_MMAP_SIZE_MB * 1024 * 1024}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+def open_connection(path: str, wal: bool = SQLITE_WAL, factory=sqlite3.Connection) -> sqlite3.Connection:
+    """Ayarlı yeni bağlantı açar (havuz dışı); thread'ler arasında kullanılabilir"""
+    if path not in MEMORY_PATHS:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=False, factory=factory)
+    metrics.incr('sqlite.connections_opened')
+    return configure(conn, wal=wal and path not in MEMORY_PATHS)
+
+
+# Boştaki havuz bağlantısının sahibi: hiçbir thread kullanamaz
+_IDLE = 0
+
+
+class PooledCursor(sqlite3.Cursor):
+    """Sahiplik denetimli imleç (bkz. PooledConnection)"""
+
+    def execute(self, *args):
+        self.connection.check_owner()
+        return super().execute(*args)
+
+    def executemany(self, *args):
+        self.connection.check_owner()
+        return super().executemany(*args)
+
+    def executescript(self, *args):
+        self.connection.check_owner()
+        return super().executescript(*args)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Havuz bağlantısı; kiralayan thread dışındaki kullanım hata verir"""
+
+    owner = None  # Kiralayan thread (threading.get_ident); açılış sırasında None
+
+    def check_owner(self):
+        owner = self.owner
+        if owner is not None and owner != threading.get_ident():
+            metrics.incr('sqlite.pool.foreign_use')
+            raise sqlite3.ProgrammingError(
+                'Havuz bağlantısı bırakılmış' if owner == _IDLE else
+                f'Havuz bağlantısı başka bir thread\'e ait (thread {owner})'
+            )
+
+    def cursor(self, factory=PooledCursor):
+        self.check_owner()
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        self.check_owner()
+        return super().execute(*args)
+
+    def executemany(self, *args):
+        self.check_owner()
+        return super().executemany(*args)
+
+    def executescript(self, *args):
+        self.check_owner()
+        return super().executescript(*args)
+
+    def commit(self):
+        self.check_owner()
+        return super().commit()
+
+    def rollback(self):
+        self.check_owner()
+        return super().rollback()
+
+
+class _Lease:
+    """Havuzdaki bir bağlantı ve onu tutan thread'in referans sayısı"""
+    __slots__ = ('conn', 'key', 'identity', 'refs', 'held')
+
+    def __init__(self, conn, key, identity):
+        self.conn = conn
+        self.key = key
+        self.identity = identity
+        self.refs = 0
+        self.held = None
+
+
+class ConnectionPool:
+    """Dosya yolu başına bağlantı havuzu; kullanımdaki bağlantı thread'e bağlıdır"""
+
+    def __init__(self, max_idle: int = SQLITE_POOL_MAX_IDLE, wal: bool = SQLITE_WAL):
+        self.max_idle = max_idle
+        self.wal = wal
+        self._idle = defaultdict(list)
+        self._leases = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _held(self) -> dict:
+        held = getattr(self._local, 'held', None)
+        if held is None:
+            held = self._local.held = {}
+        return held
+
+    def _take_idle(self, key: str) -> Optional[_Lease]:
+        """Boştaki bağlantılardan dosyası değişmemiş olanı alır, eskimişleri kapatır"""
+        identity = _file_identity(key)
+        stale = []
+        found = None
+        with self._lock:
+            idle = self._idle.get(key) or []
+            while idle:
+                lease = idle.pop()
+                if lease.identity == identity:
+                    found = lease
+                    break
+                stale.append(lease)
+                self._leases.pop(id(lease.conn), None)
+        for lease in stale:
+            lease.conn.close()
+        return found
+
+    def acquire(self, path: str) -> sqlite3.Connection:
+        """Bu thread için bağlantı verir; iş bitince `release` ile bırakılmalıdır"""
+        if path in MEMORY_PATHS:
+            # Bellek içi veritabanı her bağlantıda ayrıdır, paylaşılmaz
+            lease = _Lease(open_connection(path, wal=False, factory=PooledConnection), None, None)
+        else:
+            key = os.path.abspath(path)
+            held = self._held()
+            lease = held.get(key)
+            if lease is not None:
+                lease.refs += 1
+                metrics.incr('sqlite.pool.shared')
+                return lease.conn
+            lease = self._take_idle(key)
+            if lease is None:
+                conn = open_connection(key, wal=self.wal, factory=PooledConnection)
+                lease = _Lease(conn, key, _file_identity(key))
+            else:
+                metrics.incr('sqlite.pool.reused')
+            lease.held = held
+            held[key] = lease
+
+        lease.refs = 1
+        lease.conn.owner = threading.get_ident()
+        with self._lock:
+            self._leases[id(lease.conn)] = lease
+        return lease.conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Bağlantıyı bırakır; son referanssa açık transaction geri alınır ve bağlantı havuza döner"""
+        with self._lock:
+            lease = self._leases.get(id(conn))
+        if lease is None or lease.conn is not conn:
+            conn.close()
+            return
+        # Kiralanan bağlantı yalnızca kiralayan thread'de bırakılabilir (sayaç ve `held` o thread'indir)
+        conn.check_owner()
+        lease.refs -= 1
+        if lease.refs > 0:
+            return
+        if lease.held is not None:
+            lease.held.pop(lease.key, None)
+            lease.held = None
+
+        reusable = lease.key is not None
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Havuza dönen bağlantı geri alınamadı, kapatılıyor: {e}")
+            reusable = False
+        conn.owner = _IDLE
+
+        with self._lock:
+            if reusable and len(self._idle[lease.key]) < self.max_idle:
+                self._idle[lease.key].append(lease)
+                return
+            self._leases.pop(id(conn), None)
+        conn.close()
+
+    def close_all(self):
+        """Boştaki tüm bağlantıları kapatır (kullanımdakiler bırakıldığında havuza döner)"""
+        with self._lock:
+            idle = [lease for leases in self._idle.values() for lease in leases]
+            self._idle.clear()
+            for lease in idle:
+                self._leases.pop(id(lease.conn), None)
+        for lease in idle:
+            lease.conn.close()
+
+
+# Süreç genelinde paylaşılan havuz
+pool = ConnectionPool()
+
+
+def acquire(path: str) -> sqlite3.Connection:
+    return pool.acquire(path)
+
+
+def release(conn: sqlite3.Connection):
+    pool.release(conn)
@@ -0,0 +1,149 @@
+"""
+Fiyat çıkarım stratejilerinin sayfa düzenine göre başarı istatistikleri
+Her sayfada fiyatı hangi stratejinin bulduğu düzen parmak izi (layout fingerprint) bazında
+sayılır; scraper stratejileri bu sayılara göre sıralar. Sayılar JSON dosyasında kalıcıdır,
+bot ve web arayüzü aynı dosyayı birleştirerek (merge) günceller.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_STATS_PATH = os.getenv('STRATEGY_STATS_PATH', 'data/strategy_stats.json')
+# Bir düzen için sıralama bu kadar sayfadan sonra istatistiğe göre yapılır
+STRATEGY_MIN_SAMPLES = int(os.getenv('STRATEGY_MIN_SAMPLES', 5))
+# Bekleyen sayımlar en geç bu kadar saniyede bir diske yazılır
+STRATEGY_SAVE_INTERVAL = 60
+# Fiyat bulunamayan sayfalar bu isimle sayılır (markup değişikliğinin işareti)
+MISS = 'none'
+# Bir düzende fiyat bulunamayan sayfa oranı bu yüzdeyi aşarsa uyarı verilir
+STRATEGY_MISS_ALERT = 20.0
+
+
+class StrategyStats:
+    """Düzen parmak izi -> strateji -> başarı sayısı"""
+
+    def __init__(self, path: str = STRATEGY_STATS_PATH, min_samples: int = STRATEGY_MIN_SAMPLES,
+                 save_interval: float = STRATEGY_SAVE_INTERVAL):
+        self.path = path
+        self.min_samples = min_samples
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: defaultdict(int))
+        self._pending = defaultdict(lambda: defaultdict(int))
+        self._last_save = time.monotonic()
+        self.load()
+
+    def _read_file(self) -> Dict[str, Dict[str, int]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get('layouts', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Strateji istatistikleri okunamadı ({self.path}): {e}")
+            return {}
+
+    def load(self):
+        """Diskteki sayıları yükler; henüz yazılmamış yerel sayımlar korunur"""
+        stored = self._read_file()
+        with self._lock:
+            self._counts = defaultdict(lambda: defaultdict(int))
+            for layouts in (stored, self._pending):
+                for fingerprint, strategies in layouts.items():
+                    for strategy, count in strategies.items():
+                        self._counts[fingerprint][strategy] += count
+
+    def save(self):
+        """Bekleyen sayımları dosyadaki güncel sayılarla birleştirip atomik olarak yazar"""
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+            self._last_save = time.monotonic()
+        if not pending:
+            return
+        merged = self._read_file()
+        for fingerprint, strategies in pending.items():
+            target = merged.setdefault(fingerprint, {})
+            for strategy, count in strategies.items():
+                target[strategy] = target.get(strategy, 0) + count
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'layouts': merged}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Strateji istatistikleri yazılamadı ({self.path}): {e}")
+            return
+        # Diğer süreçlerin yazdıklarını da görmek için birleşik hali yükle
+        self.load()
+
+    def record(self, fingerprint: str, strategy: str):
+        """Sayfada fiyatı bulan stratejiyi (bulunamadıysa MISS) kaydeder"""
+        with self._lock:
+            self._counts[fingerprint][strategy] += 1
+            self._pending[fingerprint][strategy] += 1
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def take_pending(self) -> Dict[str, Dict[str, int]]:
+        """Henüz yazılmamış sayımları alır ve sıfırlar (başka süreçte kaydedilmeleri için)"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        return {fingerprint: dict(strategies) for fingerprint, strategies in pending.items()}
+
+    def merge(self, counts: Dict[str, Dict[str, int]]):
+        """Başka süreçte yapılmış sayımları ekler; diğer kayıtlar gibi diske yazılır"""
+        if not counts:
+            return
+        with self._lock:
+            for fingerprint, strategies in counts.items():
+                for strategy, count in strategies.items():
+                    self._counts[fingerprint][strategy] += count
+                    self._pending[fingerprint][strategy] += count
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def order(self, fingerprint: str, strategies: Sequence[str]) -> List[str]:
+        """
+        Stratejileri bu düzende en çok kazanandan başlayarak sıralar
+
+        Yeterli örnek yoksa verilen (varsayılan) sıra döner; eşitlikte varsayılan sıra korunur.
+        """
+        with self._lock:
+            counts = dict(self._counts.get(fingerprint, {}))
+        if sum(count for name, count in counts.items() if name != MISS) < self.min_samples:
+            return list(strategies)
+        return sorted(strategies, key=lambda name: -counts.get(name, 0))
+
+    def distribution(self) -> Dict[str, dict]:
+        """Düzen başına sayfa sayısı ve strateji yüzdeleri (en çok görülen düzen önce)"""
+        with self._lock:
+            layouts = {fp: dict(strategies) for fp, strategies in self._counts.items()}
+        result = {}
+        for fingerprint, strategies in sorted(layouts.items(), key=lambda item: -sum(item[1].values())):
+            pages = sum(strategies.values())
+            result[fingerprint] = {
+                'pages': pages,
+                'strategies': {name: round(count / pages * 100, 1)
+                               for name, count in sorted(strategies.items(), key=lambda item: -item[1])},
+            }
+        return result
+
+    def shifted_layouts(self, threshold: float = STRATEGY_MISS_ALERT) -> List[str]:
+        """Fiyatın sık bulunamadığı (markup'ı değişmiş olabilecek) düzenleri döndürür"""
+        return [fingerprint for fingerprint, info in self.distribution().items()
+                if info['pages'] >= self.min_samples and info['strategies'].get(MISS, 0) > threshold]
+
+
+# Global strateji istatistikleri
+strategy_stats = StrategyStats()
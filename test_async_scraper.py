@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Asenkron scraper ve paylaşılan bağlantı havuzu test dosyası
+Yerel bir aiohttp sunucusu kullanır, Trendyol'a istek atmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import time
+from aiohttp import web
+from async_scraper import AsyncHTTPPool, AsyncTrendyolScraper
+from metrics import metrics
+from rate_limiter import RateLimiter
+
+PRODUCT_PAGE = """
+<html><head><title>Test Ürün - Trendyol</title>
+<meta property="og:image" content="https://cdn.dsmcdn.com/test.jpg"></head>
+<body><h1 data-testid="product-name">Test Ürün</h1>
+<div data-testid="price"><span class="price-view-original">1.299,90 TL</span>
+<span class="price-view-discounted">999,90 TL</span></div>
+<button data-testid="add-to-cart-button">Sepete Ekle</button></body></html>
+"""
+
+
+async def _run_pool_test():
+    async def handler(request):
+        return web.Response(text=PRODUCT_PAGE, content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/urun-p-1', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    pool = AsyncHTTPPool(pool_size=10, per_host=2)
+    scraper = AsyncTrendyolScraper(pool=pool)
+    before = metrics.counters()
+    try:
+        url = f'http://127.0.0.1:{port}/urun-p-1'
+        responses = [await pool.request('GET', url) for _ in range(5)]
+        status, _, html = responses[-1]
+        parsed = await asyncio.to_thread(scraper._parse_page, html)
+    finally:
+        await scraper.close()
+        await runner.cleanup()
+
+    return status, parsed, metrics.diff(before, metrics.counters())
+
+
+def test_shared_pool_reuses_connections():
+    """Ardışık istekler aynı keep-alive bağlantısını kullanmalı"""
+    print("🔍 Paylaşılan bağlantı havuzu test ediliyor...")
+    status, parsed, counters = asyncio.run(_run_pool_test())
+
+    print(f"✅ Sayaçlar: {counters}")
+    assert status == 200
+    assert counters.get('http.requests') == 5
+    assert counters.get('http.connections_created') == 1
+    assert counters.get('http.connections_reused') == 4
+
+    assert parsed['product_name'] == 'Test Ürün'
+    assert parsed['price'] == 999.90
+    assert parsed['original_price'] == 1299.90
+    assert parsed['error'] is None
+
+
+async def _run_throttled_test():
+    async def handler(request):
+        return web.Response(status=429, text='', headers={'Retry-After': '30'})
+
+    app = web.Application()
+    app.router.add_get('/sr', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    scraper = AsyncTrendyolScraper(pool=AsyncHTTPPool(pool_size=2, per_host=1))
+    scraper.rate_limiter = RateLimiter(limits={})
+    try:
+        url = f'http://127.0.0.1:{port}/sr'
+        html = await scraper.fetch_listing_async(url)
+        response_headers = {}
+        status, _, _ = await scraper.pool.stream(url, response_headers=response_headers)
+    finally:
+        await scraper.close()
+        await runner.cleanup()
+    return html, status, response_headers, scraper.rate_limiter.bucket_for(url)
+
+
+def test_async_paths_honor_retry_after():
+    """Asenkron yollar 429 yanıtının Retry-After süresini hız sınırlayıcıya iletmeli"""
+    print("⏳ Asenkron Retry-After test ediliyor...")
+    html, status, response_headers, bucket = asyncio.run(_run_throttled_test())
+    assert html is None and status == 429
+    assert response_headers['Retry-After'] == '30'
+    assert bucket.blocked_until - time.monotonic() > 25
+    print("✅ Host 30 sn durduruldu")
+
+
+if __name__ == "__main__":
+    test_shared_pool_reuses_connections()
+    test_async_paths_honor_retry_after()
+    print("🎉 Test tamamlandı!")
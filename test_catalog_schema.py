@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Katalog / abonelik şeması ve eski products tablosundan taşıma test dosyası
+Geçici veritabanı kullanır.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+from datetime import datetime
+from database import Database
+from notification_system import NotificationSystem
+
+PRODUCT = {'product_id': '773358088', 'name': 'iPhone 15', 'url': 'https://www.trendyol.com/x-p-773358088',
+           'image_url': None, 'current_price': 100.0, 'original_price': 120.0}
+
+
+def _create_legacy_db(path):
+    """Eski (sunucu başına satır, product_id UNIQUE) şemayla veritabanı oluşturur"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, product_id TEXT UNIQUE, name TEXT, url TEXT,
+            image_url TEXT, current_price REAL, original_price REAL, added_at TIMESTAMP,
+            last_checked TIMESTAMP, guild_id TEXT, user_id TEXT, channel_id TEXT
+        );
+        CREATE TABLE price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, product_id TEXT, price REAL, date TIMESTAMP);
+    ''')
+    now = datetime.now().isoformat()
+    conn.execute('INSERT INTO products VALUES (NULL, ?, ?, ?, NULL, 100.0, 120.0, ?, ?, ?, ?, ?)',
+                 ('1', 'Eski Ürün', 'https://www.trendyol.com/a-p-1', now, now, 'g1', 'u1', 'c1'))
+    conn.execute('INSERT INTO price_history VALUES (NULL, ?, 100.0, ?)', ('1', now))
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_migration():
+    """Eski products tablosu katalog + aboneliklere taşınmalı, görünüm aynı sütunları vermeli"""
+    print("🔍 Şema taşıma test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'legacy.sqlite')
+        _create_legacy_db(path)
+
+        db = Database(db_name=path)
+        kind = db.cursor.execute("SELECT type FROM sqlite_master WHERE name = 'products'").fetchone()[0]
+        assert kind == 'view'
+        product = db.get_product('1')
+        assert product['name'] == 'Eski Ürün' and product['guild_id'] == 'g1' and product['channel_id'] == 'c1'
+        assert db.get_price_history('1')[0]['price'] == 100.0
+        db.close()
+
+        # İkinci açılış taşımayı tekrarlamamalı
+        db = Database(db_name=path)
+        assert len(db.get_all_products(is_admin=True)) == 1
+        db.close()
+    print("✅ Taşıma doğrulandı")
+
+
+def test_product_shared_across_guilds():
+    """Aynı ürün birden çok sunucuda takip edilebilmeli, ancak bir kez çekilmeli"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(db_name=os.path.join(tmp, 'test.sqlite'))
+        notifications = NotificationSystem(db)
+
+        assert db.add_product(PRODUCT, 'g1', 'u1', 'c1')
+        assert db.add_product(PRODUCT, 'g2', 'u2', 'c2')
+        assert not db.add_product(PRODUCT, 'g1', 'u3', 'c3')
+
+        assert len(db.get_all_products(is_admin=True)) == 2
+        assert db.get_guild_product_count('g2') == 1
+        assert len(db.get_due_products(datetime.now().isoformat())) == 1
+        assert db.count_catalog_products() == 1
+        assert [s['channel_id'] for s in db.get_subscribers(PRODUCT['product_id'])] == ['c1', 'c2']
+        assert len(db.get_price_history(PRODUCT['product_id'])) == 1
+
+        # Tek güncelleme tüm aboneler için geçerli, tek geçmiş satırı
+        db.update_product_price(PRODUCT['product_id'], 90.0)
+        assert {p['current_price'] for p in db.get_all_products(is_admin=True)} == {90.0}
+        assert len(db.get_price_history(PRODUCT['product_id'])) == 2
+        changes = db.check_price_changes()
+        assert sorted((p['guild_id'], p['user_id'], p['channel_id'], p['previous_price']) for p in changes) == \
+            [('g1', 'u1', 'c1', 100.0), ('g2', 'u2', 'c2', 100.0)]
+
+        # Fiyat hedefleri abonelik sayısı kadar çoğalmamalı
+        notifications.add_price_target(PRODUCT['product_id'], 'u1', 'g1', 'c1', 95.0, 'below')
+        assert len(notifications.check_price_targets(PRODUCT['product_id'], 90.0)) == 1
+
+        # Son abone ayrılınca katalog ve geçmiş silinmeli
+        assert db.delete_product(PRODUCT['product_id'], guild_id='g1')
+        assert db.get_product(PRODUCT['product_id'], guild_id='g1') is None
+        assert db.get_product(PRODUCT['product_id'])['guild_id'] == 'g2'
+        assert db.delete_product(PRODUCT['product_id'], guild_id='g2')
+        assert db.get_price_history(PRODUCT['product_id']) == []
+        assert db.count_catalog_products() == 0
+        db.close()
+
+
+if __name__ == "__main__":
+    test_legacy_migration()
+    test_product_shared_across_guilds()
+    print("🎉 Test tamamlandı!")
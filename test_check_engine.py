@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Eşzamanlı fiyat kontrol motoru test dosyası
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import threading
+import time
+from check_engine import PriceCheckEngine
+from metrics import metrics
+
+
+def test_check_engine_concurrency():
+    """Motor ürünleri paralel ama thread havuzu kadar eşzamanlılıkla kontrol etmeli"""
+    print("🔍 Kontrol motoru test ediliyor...")
+
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def fake_fetch(url):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.05)
+        with lock:
+            state['active'] -= 1
+        if url.endswith('bad'):
+            raise RuntimeError('test')
+        return {'success': True, 'current_price': 10.0}
+
+    products = [{'product_id': str(i), 'url': f'https://www.trendyol.com/x-p-{i}'} for i in range(20)]
+    products.append({'product_id': 'bad', 'url': 'bad'})
+
+    results = []
+
+    async def on_result(product, product_data):
+        results.append(product['product_id'])
+        return product_data.get('success', False)
+
+    engine = PriceCheckEngine(fetch=fake_fetch, concurrency=4)
+    before = metrics.counters()
+    start = time.monotonic()
+
+    async def run():
+        return await asyncio.gather(*(engine.check_one(product, on_result) for product in products))
+
+    handled = asyncio.run(run())
+    elapsed = time.monotonic() - start
+    engine.shutdown()
+    counters = metrics.diff(before, metrics.counters())
+
+    print(f"✅ {sum(handled)} başarılı, {len(handled) - sum(handled)} hatalı, zirve eşzamanlılık: {state['peak']}, süre: {elapsed:.2f} sn")
+    assert handled.count(True) == 20
+    assert counters['check.succeeded'] == 20
+    assert counters['check.failed'] == 1
+    assert len(results) == 21
+    assert state['peak'] <= 4
+    # 21 ürün * 0.05 sn sıralı ~1.05 sn sürerdi
+    assert elapsed < 0.8
+
+
+if __name__ == "__main__":
+    test_check_engine_concurrency()
+    print("🎉 Test tamamlandı!")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Uyarlamalı kontrol zamanlayıcısı test dosyası
+Geçici bir veritabanı kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from database import Database
+from notification_system import NotificationSystem
+import time
+from check_scheduler import (CheckScheduler, RollingCheckRunner, compute_interval, aligned_next_check, slot_offset,
+                             SCHEDULER_REPORT_INTERVAL)
+from metrics import Metrics, metrics
+
+HOUR = 3600
+BOUNDS = dict(base_interval=HOUR, min_interval=900, max_interval=24 * HOUR)
+
+
+def _history(prices, step_hours=1):
+    start = datetime(2024, 1, 1)
+    return [(price, start + timedelta(hours=i * step_hours)) for i, price in enumerate(prices)]
+
+
+def test_compute_interval():
+    """Durağan ürünler seyrek, oynak ve hedefe yakın ürünler sık kontrol edilmeli"""
+    print("🔍 Kontrol aralığı hesabı test ediliyor...")
+    stable = compute_interval(_history([100.0] * 30, step_hours=24), **BOUNDS)
+    volatile = compute_interval(_history([100, 90, 100, 85, 100, 95, 100]), **BOUNDS)
+    unknown = compute_interval([], **BOUNDS)
+    near_target = compute_interval([], 101.0, [(100.0, 'below')], **BOUNDS)
+    reached_target = compute_interval([], 99.0, [(100.0, 'below')], **BOUNDS)
+
+    assert stable == 24 * HOUR
+    assert volatile == 900
+    assert unknown == HOUR
+    assert near_target < HOUR
+    assert reached_target == HOUR
+    print(f"✅ Aralıklar: durağan={stable}, oynak={volatile}, hedefe yakın={near_target:.0f}")
+
+
+def _make_db(tmp, count):
+    db = Database(db_name=os.path.join(tmp, 'test.sqlite'))
+    NotificationSystem(db)
+    for i in range(1, count + 1):
+        db.add_product({'product_id': str(i), 'name': f'Ürün {i}',
+                        'url': f'https://www.trendyol.com/x-p-{i}',
+                        'current_price': 100.0, 'original_price': 100.0},
+                       'guild', 'user', 'channel')
+    return db
+
+
+def test_aligned_slots():
+    """Slotlar ürün ID'sine göre sabit olmalı, geç kontrol sonraki slotu kaydırmamalı"""
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    first = aligned_next_check('773358088', now, HOUR)
+    late = aligned_next_check('773358088', first + timedelta(minutes=10), HOUR)
+    assert (first.timestamp() - slot_offset('773358088', HOUR)) % HOUR == 0
+    assert late - first == timedelta(hours=1)
+    assert first - now >= timedelta(minutes=30)
+
+    offsets = {slot_offset(str(i), HOUR) for i in range(100)}
+    assert len(offsets) > 90
+
+
+def test_scheduler_due_and_savings():
+    """Sadece zamanı gelen ürünler dönmeli, tasarruf raporlanmalı"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _make_db(tmp, 2)
+        scheduler = CheckScheduler(db, **BOUNDS)
+        now = datetime.now()
+        due = scheduler.due_products(now)
+        assert [p['product_id'] for p in due] == ['1', '2']
+
+        next_check = scheduler.reschedule(due[0], success=True, now=now)
+        scheduler.reschedule(due[1], success=False, now=now)
+        assert next_check >= now + timedelta(seconds=900)
+
+        assert scheduler.due_products(now) == []
+        later = scheduler.due_products(now + timedelta(seconds=1500))
+        assert [p['product_id'] for p in later] == ['2']
+
+        report = scheduler.report()
+        assert report['checks'] == 2
+        assert report['saved'] >= 0
+        db.close()
+
+
+class _FakeEngine:
+    concurrency = 4
+
+    def __init__(self):
+        self.checked = []
+
+    async def check_one(self, product, on_result):
+        self.checked.append(product['product_id'])
+        return await on_result(product, {'success': True})
+
+
+async def _run_rolling(db):
+    scheduler = CheckScheduler(db, **BOUNDS)
+    engine = _FakeEngine()
+
+    async def on_result(product, product_data):
+        scheduler.reschedule(product, product_data['success'])
+        return True
+
+    runner = RollingCheckRunner(scheduler, engine, on_result, rate=2.0, tick=1.0)
+    before = metrics.counters()
+    started = [await runner.tick()]
+    backlog = runner.backlog
+    await runner.drain()
+    for _ in range(4):
+        runner._last_tick -= 1.0  # bir saniye geçmiş gibi
+        started.append(await runner.tick())
+        await runner.drain()
+    return started, backlog, engine.checked, metrics.diff(before, metrics.counters())
+
+
+def test_rolling_runner_paces_and_carries_backlog():
+    """Sürekli zamanlayıcı sabit hızla başlatmalı, kalan işi sonraki tıklara devretmeli"""
+    print("🔍 Sürekli zamanlayıcı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _make_db(tmp, 6)
+        started, backlog, checked, counters = asyncio.run(_run_rolling(db))
+        assert started[0] == 2
+        assert backlog == 4
+        assert sum(started) == 6
+        assert sorted(checked) == [str(i) for i in range(1, 7)]
+        assert counters.get('scheduler.due', 0) >= 6
+        db.close()
+    print(f"✅ Tık başına başlatılan: {started}")
+
+
+def test_runner_reports_achieved_throughput():
+    """Özet, hedef hızın yanında dönemde gerçekleşen kontrol/sn değerini vermeli"""
+    print("📈 Gerçekleşen hız test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _make_db(tmp, 1)
+        runner = RollingCheckRunner(CheckScheduler(db, **BOUNDS), _FakeEngine(), None, rate=2.0, tick=1.0)
+        period = SCHEDULER_REPORT_INTERVAL * 2
+        runner._last_report = time.monotonic() - period
+        metrics.incr('check.succeeded', 30)
+        metrics.incr('check.failed', 10)
+        runner._maybe_report()
+        assert abs(runner.throughput - 40 / period) < 40 / period * 0.01
+        assert runner.current_rate == 2.0
+
+        # Kontrol yapılmayan dönem sıfır hız verir
+        runner._last_report = time.monotonic() - period
+        runner._maybe_report()
+        assert runner.throughput == 0.0
+        db.close()
+    print(f"✅ {40 / period:.4f} kontrol/sn ölçüldü")
+
+def test_subsystem_reports():
+    """Her alt sistem dönem özetini kendisi vermeli; dönemde işi olmayan alt sistem atlanmalı"""
+    print("📝 Alt sistem özetleri test ediliyor...")
+    registry = Metrics()
+    registry.add_report('a', lambda period: f"A: {period['a.count']:.0f}" if period.get('a.count') else None)
+    registry.add_report('b', lambda period: f"B: {period['b.count']:.0f}" if period.get('b.count') else None)
+    assert registry.reports({'a.count': 3}) == {'a': 'A: 3'}
+    assert registry.reports({'a.count': 1, 'b.count': 2}) == {'a': 'A: 1', 'b': 'B: 2'}
+    assert registry.reports({}) == {}
+    print("✅ Yalnızca işi olan alt sistemler özet verdi")
+
+
+if __name__ == "__main__":
+    test_compute_interval()
+    test_aligned_slots()
+    test_scheduler_due_and_savings()
+    test_rolling_runner_paces_and_carries_backlog()
+    test_runner_reports_achieved_throughput()
+    test_subsystem_reports()
+    print("🎉 Test tamamlandı!")
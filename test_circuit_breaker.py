@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Kaynak devre kesici ve skor tabanlı yönlendirme test dosyası
+Sahte API/scraper kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+import asyncio
+from circuit_breaker import CircuitBreaker, BreakerRegistry, CLOSED, OPEN, HALF_OPEN
+from trendyol_api import TrendyolAPI, TrendyolAPIFallback, SingleFlightCache
+
+URL = "https://www.trendyol.com/apple/iphone-15-128-gb-p-773358088"
+
+
+class FakeSource:
+    """Başarılı/başarısız yanıtı ayarlanabilen ve çağrıları sayan sahte kaynak"""
+
+    def __init__(self, success=True, delay=0.0):
+        self.success = success
+        self.delay = delay
+        self.calls = 0
+
+    def _result(self, url):
+        self.calls += 1
+        time.sleep(self.delay)
+        if not self.success:
+            return {'success': False, 'error': 'Failed after 3 attempts. Last error: HTTP 503', 'current_price': None}
+        return {'success': True, 'product_id': '773358088', 'name': 'iPhone 15', 'url': url,
+                'current_price': 49999.0, 'original_price': 49999.0}
+
+    def get_product_info(self, url):
+        return self._result(url)
+
+    def scrape_product(self, url):
+        return self._result(url)
+
+
+def make_fallback(api, scraper, registry):
+    # TTL 0: her sorgu kaynağa gider
+    return TrendyolAPIFallback(api_client=api, scraper=scraper, cache=SingleFlightCache(ttl=0),
+                               breaker_registry=registry)
+
+
+def test_breaker_state_machine():
+    """Art arda hatalar devreyi açmalı, bekleme sonrası tek deneme ile kapanmalı"""
+    print("🔌 Devre kesici durum geçişleri test ediliyor...")
+    breaker = CircuitBreaker('test', failure_threshold=3, cooldown=0.1, max_cooldown=1.0)
+    for _ in range(2):
+        breaker.record_failure(0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.12)
+    assert breaker.allow()               # Deneme isteği
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()           # Aynı anda ikinci deneme yok
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN and breaker.cooldown == 0.2
+
+    time.sleep(0.22)
+    assert breaker.allow()
+    breaker.record_success(0.05)
+    assert breaker.state == CLOSED and breaker.cooldown == 0.1
+    print("✅ Durum geçişleri doğru")
+
+
+def test_failing_source_is_demoted_and_skipped():
+    """Başarısız API geriye düşmeli; devresi açıkken hiç çağrılmamalı"""
+    print("🔀 Başarısız kaynağın geri plana atılması test ediliyor...")
+    registry = BreakerRegistry(failure_threshold=3, cooldown=60)
+    api, scraper = FakeSource(success=False), FakeSource()
+    fallback = make_fallback(api, scraper, registry)
+
+    for _ in range(10):
+        assert fallback.get_product_info(URL)['success']
+    # Tek hatadan sonra skor düşer, scraper önce denenir
+    assert api.calls == 1 and scraper.calls == 10
+
+    scraper.success = False
+    for _ in range(5):
+        assert not fallback.get_product_info(URL)['success']
+    assert registry.get('api').state == OPEN
+    assert api.calls == 3   # Eşiğe ulaşınca API artık denenmez
+    print(f"✅ API {api.calls} kez denendi, devre açıldı")
+
+
+def test_product_errors_do_not_open_breaker():
+    """Tükenen, kaldırılan veya fiyatı okunamayan ürünler kaynağın devresini açmamalı"""
+    print("🏷️ Ürün düzeyindeki hatalar test ediliyor...")
+    registry = BreakerRegistry(failure_threshold=3, cooldown=60)
+    outcomes = [
+        {'success': False, 'error': 'Tükendi', 'current_price': None},
+        {'success': False, 'error': 'Could not extract price', 'current_price': None},
+        {'success': False, 'error': 'Invalid URL or Product ID', 'current_price': None},
+        {'success': False, 'error': 'Failed after 3 attempts. Last error: HTTP 404', 'current_price': None},
+    ]
+
+    class ProductScraper:
+        def __init__(self):
+            self.calls = 0
+
+        def scrape_product(self, url):
+            self.calls += 1
+            return outcomes[self.calls % len(outcomes)] if self.calls > 20 else outcomes[0]
+
+    scraper = ProductScraper()
+    fallback = make_fallback(None, scraper, registry)
+    for _ in range(40):
+        assert not fallback.get_product_info(URL)['success']
+    breaker = registry.get('scraper')
+    assert scraper.calls == 40
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+
+    # Zaman aşımı ve 429/5xx ise kaynak arızasıdır
+    outcomes[:] = [{'success': False, 'error': 'Failed after 3 attempts. Last error: Unexpected error: timed out'},
+                   {'success': False, 'error': 'Failed after 3 attempts. Last error: HTTP 429'}]
+    for _ in range(3):
+        fallback.get_product_info(URL)
+    assert breaker.state == OPEN and scraper.calls == 43
+    print("✅ 40 ürün hatası devreyi açmadı, 3 zaman aşımı/429 açtı")
+
+
+def test_routing_prefers_faster_source():
+    """İki kaynak da başarılıyken daha hızlı olan öne alınmalı"""
+    print("⚡ Gecikmeye göre yönlendirme test ediliyor...")
+    registry = BreakerRegistry()
+    api, scraper = FakeSource(delay=0.05), FakeSource()
+    fallback = make_fallback(api, scraper, registry)
+
+    registry.get('api').record_success(8.0)
+    registry.get('scraper').record_success(0.5)
+    assert fallback._route() == ['scraper', 'api']
+
+    result = fallback.get_product_info(URL)
+    assert result['success'] and result['source'] == 'scraping'
+    assert api.calls == 0
+    print("✅ Hızlı kaynak öne alındı")
+
+
+def test_async_routing_and_probe_recovery():
+    """Asenkron yol da açık devreyi atlamalı; bekleme sonrası başarılı deneme devreyi kapatmalı"""
+    print("🔁 Asenkron yönlendirme test ediliyor...")
+    registry = BreakerRegistry(failure_threshold=1, cooldown=0.1)
+    api, scraper = FakeSource(success=False), FakeSource()
+    fallback = make_fallback(api, scraper, registry)
+
+    async def run():
+        assert (await fallback.get_product_info_async(URL))['success']
+        assert registry.get('api').state == OPEN
+        calls = api.calls
+        assert (await fallback.get_product_info_async(URL))['success']
+        assert api.calls == calls
+
+        # Bekleme dolunca API, skoru düşük olsa da deneme için başa alınır
+        api.success = True
+        await asyncio.sleep(0.12)
+        assert fallback._route(async_mode=True)[0] == 'api'
+        assert (await fallback.get_product_info_async(URL)).get('source') != 'scraping'
+        assert api.calls == calls + 1
+
+    asyncio.run(run())
+    assert registry.get('api').state == CLOSED
+    print("✅ Deneme isteği sonrası devre kapandı")
+
+
+def test_api_sub_endpoints_are_guarded():
+    """Başarısız public endpoint'ler devre açıldıktan sonra istenmemeli"""
+    print("🧭 API alt endpoint devre kesicileri test ediliyor...")
+    client = TrendyolAPI(api_key='', api_secret='', supplier_id='')
+    client.breakers = BreakerRegistry(failure_threshold=2, cooldown=60)
+    requested = []
+
+    client.search_products = lambda query, limit=10: None
+
+    def public_request(endpoint):
+        requested.append(endpoint)
+        return None
+
+    client._make_public_request = public_request
+
+    for _ in range(5):
+        assert client.get_product_by_id('773358088') is None
+
+    # Her endpoint en fazla eşik kadar denenir
+    assert len(requested) == 3 * 2
+    assert all(b['state'] == OPEN for b in client.breakers.snapshot().values())
+    print("✅ Alt endpoint'ler atlandı")
+
+
+if __name__ == "__main__":
+    print("🚀 Devre kesici testleri başlatılıyor...\n")
+    test_breaker_state_machine()
+    test_failing_source_is_demoted_and_skipped()
+    test_product_errors_do_not_open_breaker()
+    test_routing_prefers_faster_source()
+    test_async_routing_and_probe_recovery()
+    test_api_sub_endpoints_are_guarded()
+    print("\n🎉 Tüm devre kesici testleri başarılı!")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Kayıtlı sayfa korpusu (fixtures/) ve çıkarıcı benchmark test dosyası
+Ağ isteği yapmaz; fixtures/expected.json'daki beklenen sonuçları doğrular.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import copy
+from benchmark_extractors import load_corpus, build_extractors, run_benchmark, compare, FIELDS, _matches
+
+
+def test_corpus_covers_layouts():
+    """Korpus stokta, tükendi, indirimli, varyantlı ve eski düzen sayfalarını içermeli"""
+    print("📚 Korpus kapsamı test ediliyor...")
+    corpus = load_corpus()
+    layouts = {entry['layout'] for entry in corpus['pages']}
+    assert {'modern_jsonld', 'modern_dom', 'variant_state', 'legacy'} <= layouts
+    expected = [entry['expected'] for entry in corpus['pages']]
+    assert any(e['sold_out'] for e in expected)
+    assert any(e['original_price'] > e['price'] for e in expected)
+    print(f"✅ {len(corpus['pages'])} sayfa, düzenler: {sorted(layouts)}")
+
+
+def test_scraper_matches_expected():
+    """Ana scraper tüm korpus sayfalarında beklenen sonucu vermeli"""
+    print("🎯 Scraper doğruluğu test ediliyor...")
+    extract = build_extractors()['scraper']
+    for entry in load_corpus()['pages']:
+        actual = extract(entry['html'])
+        wrong = [field for field in FIELDS if not _matches(field, actual[field], entry['expected'][field])]
+        assert not wrong, f"{entry['file']}: {wrong} -> {actual}"
+    print("✅ Tüm sayfalar doğru")
+
+
+def test_benchmark_and_compare():
+    """Benchmark sonucu üretmeli; doğruluk düşüşü ve yavaşlama gerileme sayılmalı"""
+    print("⏱️ Benchmark ve karşılaştırma test ediliyor...")
+    result = run_benchmark(iterations=1, extractors=['scraper'])
+    stats = result['extractors']['scraper']
+    assert stats['page_accuracy'] == 1.0
+    assert stats['pages_per_sec'] > 0 and stats['p99_ms'] >= stats['p50_ms'] > 0
+    assert stats['peak_memory_kb'] > 0
+    assert compare(result, result) == []
+
+    worse = copy.deepcopy(result)
+    worse['extractors']['scraper']['page_accuracy'] = 0.5
+    worse['extractors']['scraper']['p50_ms'] = stats['p50_ms'] * 2
+    regressions = compare(result, worse)
+    assert len(regressions) == 2
+
+    worse['corpus_version'] = result['corpus_version'] + 1
+    assert 'Korpus' in compare(result, worse)[0]
+    print("✅ Gerilemeler yakalandı")
+
+
+if __name__ == "__main__":
+    print("🚀 Korpus ve benchmark testleri başlatılıyor...\n")
+    test_corpus_covers_layouts()
+    test_scraper_matches_expected()
+    test_benchmark_and_compare()
+    print("\n🎉 Tüm korpus testleri başarılı!")
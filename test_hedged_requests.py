@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+API/scraping hedge modu test dosyası
+Gecikmesi ayarlanabilen sahte kaynaklar kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import time
+from circuit_breaker import BreakerRegistry
+from metrics import metrics
+from trendyol_api import TrendyolAPIFallback, SingleFlightCache, HEDGE_DEFAULT_DELAY, hedge_report
+from test_circuit_breaker import FakeSource, URL
+
+
+class FakeAsyncScraper:
+    """Asenkron scrape_product'ı olan, iptal edildiğini kaydeden sahte scraper"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.cancelled = 0
+
+    async def scrape_product(self, url):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {'success': True, 'product_id': '773358088', 'name': 'iPhone 15', 'url': url,
+                'current_price': 48999.0, 'original_price': 49999.0}
+
+
+def make_hedged(api, scraper=None, async_scraper=None, delay=0.1):
+    fallback = TrendyolAPIFallback(api_client=api, scraper=scraper, async_scraper=async_scraper,
+                                   cache=SingleFlightCache(ttl=0), breaker_registry=BreakerRegistry(),
+                                   hedged=True)
+    # Gecikme örnekleri diğer testlerle paylaşılıyor; bekleme süresi sabitlenir
+    fallback.hedge_delay = lambda source: delay
+    return fallback
+
+
+def test_hedge_delay_follows_p90():
+    """Bekleme süresi yeterli örnek yokken varsayılan, sonra birincil kaynağın p90'ı olmalı"""
+    print("⏱️ Hedge bekleme süresi test ediliyor...")
+    fallback = TrendyolAPIFallback(hedged=True)
+    assert fallback.hedge_delay('hedge_test') == HEDGE_DEFAULT_DELAY
+    for i in range(1, 101):
+        metrics.observe('source.hedge_test.seconds', i / 100)
+    assert abs(fallback.hedge_delay('hedge_test') - 0.9) < 0.02
+    print(f"✅ p90 bekleme: {fallback.hedge_delay('hedge_test'):.2f} sn")
+
+
+def test_sync_hedge_takes_faster_source():
+    """Yavaş API'de scraping paralel başlamalı ve ilk başarılı sonuç dönmeli"""
+    print("🏁 Senkron hedge test ediliyor...")
+    before = metrics.counters()
+    api, scraper = FakeSource(delay=0.5), FakeSource(delay=0.05)
+    fallback = make_hedged(api, scraper)
+    start = time.monotonic()
+    result = fallback.get_product_info(URL)
+    elapsed = time.monotonic() - start
+    assert result['success'] and result['source'] == 'scraping'
+    assert elapsed < 0.4, elapsed
+
+    # Hızlı API'de ikinci kaynak hiç başlatılmamalı
+    fast = make_hedged(FakeSource(delay=0.0), FakeSource())
+    assert 'source' not in fast.get_product_info(URL)
+    assert fast.scraper.calls == 0
+
+    counters = metrics.diff(before, metrics.counters())
+    assert counters['hedge.requests'] == 2
+    assert counters['hedge.fired'] == 1
+    assert counters['hedge.won.secondary'] == 1
+    assert counters['hedge.abandoned'] == 1
+    print(f"✅ {elapsed:.2f} sn'de scraping sonucu alındı (API 0.5 sn)")
+
+
+def test_async_hedge_cancels_loser():
+    """Asenkron hedge kazanan bulununca diğer denemeyi iptal etmeli, devre hakkı korunmalı"""
+    print("🛑 Asenkron hedge ve iptal test ediliyor...")
+    before = metrics.counters()
+
+    async def run():
+        # Birincil scraper yavaş (iptal edilebilir), API hızlı
+        scraper = FakeAsyncScraper(delay=1.0)
+        fallback = make_hedged(FakeSource(delay=0.05), scraper=FakeSource(), async_scraper=scraper)
+        fallback._route = lambda async_mode=False: ['scraper', 'api']
+        start = time.monotonic()
+        result = await fallback.get_product_info_async(URL)
+        return result, time.monotonic() - start, scraper, fallback
+
+    result, elapsed, scraper, fallback = asyncio.run(run())
+    assert result['success'] and 'source' not in result
+    assert elapsed < 0.5, elapsed
+    assert scraper.cancelled == 1
+    # İptal edilen deneme hata sayılmaz
+    assert fallback.breakers.get('scraper').consecutive_failures == 0
+    counters = metrics.diff(before, metrics.counters())
+    assert counters['hedge.fired'] == 1 and counters['hedge.cancelled'] == 1
+    assert counters['hedge.won.secondary'] == 1
+    print(f"✅ {elapsed:.2f} sn'de API sonucu alındı, yavaş scraper iptal edildi")
+
+
+def test_hedge_report():
+    """Hedge özeti dönemde yedek istek atılan ve ikincil kaynağın kazandığı istekleri vermeli"""
+    print("📝 Hedge özeti test ediliyor...")
+    period = {'hedge.requests': 5, 'hedge.fired': 2, 'hedge.won.secondary': 1}
+    assert hedge_report(period).startswith('Hedge: 2/5 istek (ikincil kaynak kazandı 1, ')
+    assert hedge_report({}) is None
+    assert 'hedge' in metrics.reports(period)
+    print("✅ Hedge özeti kayıtlı")
+
+
+if __name__ == "__main__":
+    print("🚀 Hedge testleri başlatılıyor...\n")
+    test_hedge_delay_follows_p90()
+    test_sync_hedge_takes_faster_source()
+    test_async_hedge_cancels_loser()
+    test_hedge_report()
+    print("\n🎉 Tüm hedge testleri başarılı!")
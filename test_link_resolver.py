@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Kısaltılmış link çözümleme önbelleği test dosyası
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+from link_resolver import ShortLinkCache, is_short_link, canonicalize_product_url, canonical_product_url
+from metrics import metrics
+from migrations import SHORT_LINKS, schema_version
+from rate_limiter import RateLimiter
+from scraper import TrendyolScraper
+from trendyol_api import TrendyolAPI
+
+SHORT_URL = "https://ty.gl/reii1wcijhbf1"
+RESOLVED_URL = "https://www.trendyol.com/apple/iphone-15-128-gb-p-773358088?boutiqueId=61&merchantId=968&utm_source=share"
+
+
+def test_short_link_helpers():
+    """Kısa link tespiti ve URL kanonikleştirme"""
+    assert is_short_link(SHORT_URL)
+    assert is_short_link("https://tyml.gl/abc123")
+    assert not is_short_link("https://www.trendyol.com/x-p-1")
+    assert not is_short_link("773358088")
+    assert canonicalize_product_url(RESOLVED_URL) == \
+        "https://www.trendyol.com/apple/iphone-15-128-gb-p-773358088?merchantId=968"
+
+
+def test_canonical_product_url():
+    """Kanonik URL'ler ve çıplak ID'ler tanınmalı, diğerleri çözümlemeye bırakılmalı"""
+    assert canonical_product_url(RESOLVED_URL) == \
+        "https://www.trendyol.com/apple/iphone-15-128-gb-p-773358088?merchantId=968"
+    assert canonical_product_url("773358088") == "https://www.trendyol.com/any-p-773358088"
+    assert canonical_product_url(SHORT_URL) is None
+    assert canonical_product_url("https://www.trendyol.com/sr?q=iphone") is None
+    assert canonical_product_url("https://example.com/x-p-1") is None
+
+
+class _FakeResponse:
+    status_code = 200
+    headers = {}
+    encoding = 'utf-8'
+    text = "<html><h1 data-testid='product-name'>Test</h1><span class='prc-dsc'>99,90 TL</span></html>"
+
+    def iter_content(self, chunk_size=1):
+        yield self.text.encode('utf-8')
+
+    def close(self):
+        pass
+
+
+def test_scrape_page_skips_head_for_canonical_url():
+    """Kanonik URL'ler HEAD isteği yapmadan tek GET ile çekilmeli"""
+    print("🔍 Kanonik URL hızlı yolu test ediliyor...")
+    scraper = TrendyolScraper()
+    scraper.rate_limiter = RateLimiter(limits={}, default=(1000.0, 10, 0.0))
+    scraper._follow_redirects = lambda url: (_ for _ in ()).throw(AssertionError("HEAD yapılmamalı"))
+    requested = []
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            requested.append(url)
+            return _FakeResponse()
+
+    scraper._get_session = lambda: FakeSession()
+    before = metrics.counters()
+    result = scraper._scrape_page(RESOLVED_URL)
+    counters = metrics.diff(before, metrics.counters())
+
+    assert result['product_name'] == 'Test'
+    assert requested == [canonical_product_url(RESOLVED_URL)]
+    assert counters.get('url.head_avoided') == 1
+    print(f"✅ Sayaçlar: {counters}")
+
+
+def test_short_link_cache_persistence_and_lru():
+    """Çözümlemeler kalıcı olmalı, bellek katmanı LRU ile sınırlanmalı"""
+    print("🔍 Kısa link önbelleği test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'cache.sqlite')
+        calls = []
+
+        def resolver(url):
+            calls.append(url)
+            return RESOLVED_URL
+
+        cache = ShortLinkCache(db_path=db_path, max_size=2)
+        first = cache.resolve(SHORT_URL, resolver)
+        second = cache.resolve(SHORT_URL, resolver)
+        assert first == second
+        assert len(calls) == 1
+        assert cache.get(SHORT_URL)['product_id'] == '773358088'
+
+        # LRU kapasitesi
+        cache.put("https://ty.gl/a", "https://www.trendyol.com/a-p-1")
+        cache.put("https://ty.gl/b", "https://www.trendyol.com/b-p-2")
+        assert len(cache._memory) == 2
+
+        # Yeni instance (yeniden başlatma) veritabanından okumalı
+        restarted = ShortLinkCache(db_path=db_path)
+        assert restarted.resolve(SHORT_URL, resolver) == first
+        assert len(calls) == 1
+        conn = sqlite3.connect(db_path)
+        assert schema_version(conn, SHORT_LINKS) == 1
+        conn.close()
+
+        # Süresi dolan kayıtlar tekrar çözülmeli
+        expired = ShortLinkCache(db_path=db_path, ttl=1e-6)
+        expired.resolve(SHORT_URL, resolver)
+        assert len(calls) == 2
+    print("✅ Önbellek kalıcılığı ve LRU doğrulandı")
+
+
+def test_scraper_and_api_use_cache():
+    """Scraper ve API önbellekteki linkler için ağ isteği yapmamalı"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ShortLinkCache(db_path=os.path.join(tmp, 'cache.sqlite'))
+        cache.put(SHORT_URL, RESOLVED_URL)
+
+        scraper = TrendyolScraper()
+        scraper.link_cache = cache
+        scraper._follow_redirects = lambda url: (_ for _ in ()).throw(AssertionError("HEAD yapılmamalı"))
+        assert scraper.extract_product_id(SHORT_URL) == '773358088'
+
+        api = TrendyolAPI()
+        api.link_cache = cache
+        api._follow_redirects = scraper._follow_redirects
+        assert api.extract_product_id_from_url(SHORT_URL) == '773358088'
+
+
+if __name__ == "__main__":
+    test_short_link_helpers()
+    test_canonical_product_url()
+    test_scrape_page_skips_head_for_canonical_url()
+    test_short_link_cache_persistence_and_lru()
+    test_scraper_and_api_use_cache()
+    print("🎉 Test tamamlandı!")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Liste sayfası toplayıcı test dosyası
+Sentetik arama sayfaları ve geçici veritabanı kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+import tempfile
+from check_engine import PriceCheckEngine
+from check_scheduler import CheckScheduler, RollingCheckRunner
+from database import Database
+from listing_harvester import ListingHarvester, listing_group, listing_report, listing_url, parse_listing
+from metrics import metrics
+from notification_system import NotificationSystem
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages', 'instock_jsonld.html')
+
+
+def _search_page(prices: dict) -> str:
+    """Arama sayfası: gömülü state JSON'unda verilen ürünler"""
+    state = {'products': [
+        {'id': int(product_id), 'name': f'Ürün {product_id}', 'brand': {'name': 'Marka'},
+         'url': f'/marka/urun-{product_id}-p-{product_id}', 'images': [f'/ty1/{product_id}.jpg'],
+         'price': {'sellingPrice': price, 'originalPrice': price + 10}}
+        for product_id, price in prices.items()
+    ]}
+    return (f'<html><head></head><body><div id="search-app"></div><script>'
+            f'window.__SEARCH_APP_INITIAL_STATE__={json.dumps(state)};</script></body></html>')
+
+
+def test_groups_and_urls():
+    """Satıcıya özel linkler satıcı, marka yolundaki linkler marka grubuna düşmeli"""
+    print("🏷️ Liste grupları test ediliyor...")
+    assert listing_group('https://www.trendyol.com/apple/iphone-15-p-1?merchantId=968') == ('seller', '968')
+    assert listing_group('https://www.trendyol.com/apple/iphone-15-p-1') == ('brand', 'apple')
+    assert listing_group('https://www.trendyol.com/any-p-1') is None
+    assert listing_group('https://ty.gl/abc') is None
+    assert listing_url(('seller', '968')) == 'https://www.trendyol.com/sr?mid=968'
+    assert listing_url(('brand', 'tommy-hilfiger'), 2) == 'https://www.trendyol.com/sr?q=tommy+hilfiger&pi=2'
+    print("✅ Gruplar doğru")
+
+
+def test_parse_listing_state_and_cards():
+    """Ürünler state JSON'undan, yoksa ürün kartlarından okunmalı"""
+    print("📄 Liste sayfası ayrıştırma test ediliyor...")
+    items = parse_listing(_search_page({'11': 199.9, '12': 1299.0}))
+    assert items['11']['current_price'] == 199.9 and items['11']['original_price'] == 209.9
+    assert items['12']['url'] == 'https://www.trendyol.com/marka/urun-12-p-12'
+    assert items['12']['name'] == 'Marka Ürün 12' and items['12']['source'] == 'listing'
+
+    with open(FIXTURE, encoding='utf-8') as f:
+        cards = parse_listing(f.read())
+    assert len(cards) == 24
+    assert cards['1000']['current_price'] == 99.99 and cards['1023']['current_price'] == 122.99
+    assert parse_listing('<html><body>boş</body></html>') == {}
+    print(f"✅ {len(items)} ürün state'ten, {len(cards)} ürün karttan okundu")
+
+
+def _make_db(tmp):
+    db = Database(db_name=os.path.join(tmp, 'test.sqlite'))
+    NotificationSystem(db)
+    urls = {str(i): f'https://www.trendyol.com/marka/urun-{i}-p-{i}' for i in range(1, 5)}
+    urls['9'] = 'https://www.trendyol.com/any-p-9'
+    for product_id, url in urls.items():
+        db.add_product({'product_id': product_id, 'name': f'Ürün {product_id}', 'url': url,
+                        'current_price': 100.0, 'original_price': 100.0}, 'guild', 'user', 'channel')
+    return db
+
+
+async def _run_harvest(db, listing, rate=10.0, ticks=2):
+    scheduler = CheckScheduler(db, base_interval=3600, min_interval=900, max_interval=24 * 3600)
+    fetched, single = [], []
+
+    def fetch_listing(url):
+        fetched.append(url)
+        return listing
+
+    def fetch_product(url):
+        single.append(url)
+        return {'success': True, 'current_price': 100.0}
+
+    results = {}
+
+    async def on_result(product, product_data):
+        results[product['product_id']] = product_data
+        scheduler.reschedule(product, True)
+        return True
+
+    engine = PriceCheckEngine(fetch=fetch_product, concurrency=2)
+    harvester = ListingHarvester(fetch=fetch_listing, min_group=3, max_pages=2)
+    runner = RollingCheckRunner(scheduler, engine, on_result, rate=rate, tick=1.0, harvester=harvester)
+    before = metrics.counters()
+    started = []
+    for _ in range(ticks):
+        if runner._last_tick is not None:
+            runner._last_tick -= 1.0  # bir saniye geçmiş gibi
+        started.append(await runner.tick())
+        await runner.drain()
+    engine.shutdown()
+    return started, fetched, single, results, harvester, metrics.diff(before, metrics.counters())
+
+
+def test_runner_harvests_group_and_falls_back():
+    """Aynı markanın ürünleri liste sayfasından güncellenmeli, sayfada olmayanlar tek tek kontrol edilmeli"""
+    print("🧺 Liste sayfasıyla toplu güncelleme test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _make_db(tmp)
+        listing = _search_page({'1': 90.0, '2': 80.0, '3': 70.0, '500': 10.0})
+        started, fetched, single, results, _, counters = asyncio.run(_run_harvest(db, listing))
+
+        # Sayfada olmayan ürün sonraki tıkta tek tek başlatılır
+        assert started == [5, 1]
+        # Sayfa 1'de 4 numaralı ürün yok, sayfa 2'de de yok (aynı içerik): 2 liste isteği
+        assert fetched == ['https://www.trendyol.com/sr?q=marka', 'https://www.trendyol.com/sr?q=marka&pi=2']
+        assert {product_id: data.get('current_price') for product_id, data in results.items()
+                if data.get('source') == 'listing'} == {'1': 90.0, '2': 80.0, '3': 70.0}
+        assert sorted(single) == ['https://www.trendyol.com/any-p-9', 'https://www.trendyol.com/marka/urun-4-p-4']
+        assert counters['listing.found'] == 3 and counters['listing.fallback'] == 1
+        assert counters['check.succeeded'] == 5
+        db.close()
+    print(f"✅ 5 üründen 3'ü {len(fetched)} liste isteğiyle güncellendi")
+
+
+def test_barren_group_checked_individually():
+    """Liste sayfasında hiç ürün bulunamayan grup bir süre tek tek kontrol edilmeli"""
+    print("🚫 Sonuçsuz liste grubu test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _make_db(tmp)
+        started, fetched, single, results, harvester, _ = asyncio.run(_run_harvest(db, None, rate=2.0, ticks=3))
+        # Bulunamayan 4 ürün aynı anda değil, saniyede 2 kontrol hızıyla başlatılır
+        assert started == [5, 2, 2]
+        assert len(fetched) == 1 and len(single) == 5 and len(results) == 5
+        batches, rest = harvester.plan(db.get_due_products('9999-01-01'))
+        assert batches == [] and len(rest) == 5
+        db.close()
+    print("✅ Sonuçsuz grup tek tek kontrole düştü")
+
+
+def test_listing_report():
+    """Liste sayfası özeti istek ve bulunan ürün sayısını vermeli"""
+    print("📝 Liste sayfası özeti test ediliyor...")
+    period = {'listing.pages': 2, 'listing.found': 9, 'listing.fallback': 1}
+    assert listing_report(period) == 'Liste sayfası: 2 istekle 9 ürün (1 tek tek)'
+    assert listing_report({}) is None
+    assert metrics.reports(period)['listing'] == listing_report(period)
+    print("✅ Liste sayfası özeti kayıtlı")
+
+
+if __name__ == "__main__":
+    print("🚀 Liste sayfası toplayıcı testleri başlatılıyor...\n")
+    test_groups_and_urls()
+    test_parse_listing_state_and_cards()
+    test_runner_harvests_group_and_falls_back()
+    test_barren_group_checked_individually()
+    test_listing_report()
+    print("\n🎉 Tüm liste sayfası testleri başarılı!")
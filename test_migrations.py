@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sürümlü şema taşımaları ve sık sorguların indeks kullanımı test dosyası
+Geçici veritabanı kullanır. Sık sorgulardan biri tablo taramasına (SCAN) düşerse test başarısız olur.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+import migrations
+from database import Database
+from migrations import (migrate, schema_version, MIGRATIONS, CORE, NOTIFICATIONS, USER_AUTH, USER_DATA,
+                        SHORT_LINKS, PAGE_VALIDATORS)
+from notification_system import NotificationSystem
+
+# Koddaki sorguların aynısı (kaynak: ilgili metot)
+HOT_QUERIES = {
+    'Database.get_price_history': '''
+        SELECT price, date, COALESCE(last_seen, date), sample_count FROM price_history
+        WHERE product_id = ? ORDER BY date DESC LIMIT ?''',
+    'price_history.record_price': '''
+        UPDATE price_history SET last_seen = ?, sample_count = sample_count + 1
+        WHERE id = (SELECT id FROM price_history WHERE product_id = ? ORDER BY date DESC, id DESC LIMIT 1)
+        AND price IS ? AND substr(date, 1, 10) = substr(?, 1, 10) AND COALESCE(last_seen, date) <= ?''',
+    'PriceAnalyzer.get_price_trend': '''
+        SELECT price, date, COALESCE(last_seen, date), sample_count FROM price_history
+        WHERE product_id = ? AND date >= ? AND COALESCE(last_seen, date) >= ? ORDER BY date ASC''',
+    'price_rollups.window_stats': '''
+        SELECT bucket, sample_count, price_sum, min_price, max_price, first_price, last_price FROM price_rollups
+        WHERE product_id = ? AND period = ? AND bucket >= ? AND bucket < ? ORDER BY bucket ASC''',
+    'Database.get_all_products': '''
+        SELECT * FROM products WHERE guild_id = ? AND user_id = ? ORDER BY added_at DESC''',
+    'Database.get_guild_product_count': '''
+        SELECT COUNT(*) FROM products WHERE guild_id = ?''',
+    'Database.get_due_products': '''
+        SELECT * FROM (
+            SELECT * FROM catalog_products WHERE next_check_at IS NULL
+            UNION ALL
+            SELECT * FROM catalog_products WHERE next_check_at <= ?
+        ) c
+        WHERE EXISTS (SELECT 1 FROM product_subscriptions s WHERE s.product_id = c.product_id)
+        ORDER BY c.next_check_at''',
+    'NotificationSystem.check_price_targets': '''
+        SELECT pt.*, p.name, p.url, p.image_url FROM price_targets pt
+        JOIN catalog_products p ON pt.product_id = p.product_id
+        WHERE pt.product_id = ? AND pt.is_active = 1''',
+    'NotificationSystem.get_user_price_targets': '''
+        SELECT pt.*, p.name, p.current_price, p.url FROM price_targets pt
+        JOIN catalog_products p ON pt.product_id = p.product_id
+        WHERE pt.user_id = ? AND pt.is_active = 1 ORDER BY pt.created_at DESC''',
+    'NotificationSystem.get_notification_history': '''
+        SELECT nh.*, p.name as product_name, p.url as product_url FROM notification_history nh
+        LEFT JOIN catalog_products p ON nh.product_id = p.product_id
+        WHERE nh.user_id = ? ORDER BY nh.sent_at DESC LIMIT ?''',
+    'UserManager.validate_session': '''
+        SELECT u.id, u.discord_id, u.username, u.encryption_key_hash, s.expires_at, u.avatar
+        FROM users u JOIN user_sessions s ON u.id = s.user_id
+        WHERE s.session_token = ? AND s.expires_at > ? AND u.is_active = 1''',
+    'UserManager.get_user_guilds': '''
+        SELECT guild_id, guild_name, permissions FROM user_guilds
+        WHERE user_id = ? AND is_active = 1 ORDER BY guild_name''',
+    'UserDatabase.get_user_price_history': '''
+        SELECT encrypted_price_data, date FROM user_price_history
+        WHERE user_id = ? AND product_id = ? ORDER BY date DESC LIMIT ?''',
+    'UserDatabase.get_user_notifications': '''
+        SELECT id, encrypted_notification_data, is_read, created_at FROM user_notifications
+        WHERE user_id = ? ORDER BY created_at DESC LIMIT ?''',
+    'ShortLinkCache.get': '''
+        SELECT canonical_url, product_id, resolved_at FROM short_links WHERE short_code = ?''',
+    'PageValidatorStore.get': '''
+        SELECT url, etag, last_modified, region_hash, result FROM page_validators WHERE product_id = ?''',
+}
+
+
+def _full_db(path):
+    """Tüm bileşenlerin tablolarını içeren veritabanı"""
+    db = Database(db_name=path)
+    NotificationSystem(db)
+    # UserManager/UserDatabase şifreleme anahtarı oluşturur; tablolar doğrudan taşımayla kurulur
+    migrate(db.conn, USER_AUTH)
+    migrate(db.conn, USER_DATA)
+    migrate(db.conn, SHORT_LINKS)
+    migrate(db.conn, PAGE_VALIDATORS)
+    return db
+
+
+def test_hot_queries_use_indexes():
+    """Sık sorguların hiçbiri tablo taraması yapmamalı"""
+    print("🔎 Sorgu planları test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _full_db(os.path.join(tmp, 'test.sqlite'))
+        scans = {}
+        for name, query in HOT_QUERIES.items():
+            plan = [row[3] for row in db.conn.execute(f'EXPLAIN QUERY PLAN {query}', [None] * query.count('?'))]
+            full = [detail for detail in plan if detail.startswith('SCAN')]
+            if full:
+                scans[name] = full
+        db.close()
+    assert not scans, f"Tablo taraması yapan sorgular: {scans}"
+    print(f"✅ {len(HOT_QUERIES)} sorgunun hepsi indeks kullanıyor")
+
+
+def test_versions_recorded_once():
+    """Her bileşenin sürümü kaydedilmeli, ikinci açılışta taşıma tekrar çalışmamalı"""
+    print("🔢 Şema sürümleri test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        _full_db(path).close()
+
+        conn = sqlite3.connect(path)
+        for component in (CORE, NOTIFICATIONS, USER_AUTH, USER_DATA, SHORT_LINKS, PAGE_VALIDATORS):
+            assert schema_version(conn, component) == MIGRATIONS[component][-1][0]
+            assert migrate(conn, component) == 0
+        conn.close()
+    print("✅ Sürümler kayıtlı, tekrar açılışta taşıma yok")
+
+
+def test_unversioned_db_gets_indexes():
+    """schema_version tablosu olmayan eski veritabanı verisini koruyarak indeksleri almalı"""
+    print("🧱 Sürümsüz veritabanı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'old.sqlite')
+        conn = sqlite3.connect(path)
+        # Sürüm 1 tabloları, taşıma kaydı olmadan (eski create_tables)
+        for step in MIGRATIONS[CORE][0][2]:
+            if callable(step):
+                step(conn.cursor())
+            else:
+                conn.execute(step)
+        conn.execute("INSERT INTO catalog_products (product_id, name) VALUES ('1', 'Ürün')")
+        conn.execute("INSERT INTO price_history (product_id, price, date) VALUES ('1', 10.0, '2025-01-01')")
+        conn.commit()
+
+        assert migrate(conn, CORE) == len(MIGRATIONS[CORE])
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_price_history_product_date' in indexes
+        assert conn.execute('SELECT COUNT(*) FROM price_history').fetchone()[0] == 1
+        conn.close()
+    print("✅ Eski veritabanı güncellendi, veri korundu")
+
+
+def test_failed_migration_rolls_back():
+    """Hatalı sürüm geri alınmalı, önceki sürümler kayıtlı kalmalı"""
+    print("↩️ Hatalı taşıma test ediliyor...")
+    component = 'test_component'
+    migrations.MIGRATIONS[component] = [
+        (1, 'tablo', ['CREATE TABLE t (id INTEGER PRIMARY KEY)']),
+        (2, 'hatalı', ['CREATE TABLE u (id INTEGER)', 'INSERT INTO yok VALUES (1)']),
+    ]
+    try:
+        conn = sqlite3.connect(':memory:')
+        try:
+            migrate(conn, component)
+            assert False, "hata yükseltilmeliydi"
+        except sqlite3.OperationalError:
+            pass
+        assert schema_version(conn, component) == 1
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert 't' in tables and 'u' not in tables
+        conn.close()
+    finally:
+        del migrations.MIGRATIONS[component]
+    print("✅ Hatalı sürüm geri alındı")
+
+
+if __name__ == "__main__":
+    print("🚀 Şema taşıma testleri başlatılıyor...\n")
+    test_hot_queries_use_indexes()
+    test_versions_recorded_once()
+    test_unversioned_db_gets_indexes()
+    test_failed_migration_rolls_back()
+    print("\n🎉 Tüm şema taşıma testleri başarılı!")
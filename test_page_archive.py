@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sayfa arşivi ve replay test dosyası
+Geçici klasörde arşiv ve price_history veritabanı kurar, fixtures/pages sayfalarını kullanır.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from benchmark_extractors import load_corpus
+from page_archive import PageArchive, blob_path
+from replay_archive import replay, MATCH, MISMATCH, SOLD_OUT, NO_HISTORY
+from scraper import TrendyolScraper
+from strategy_stats import StrategyStats
+
+
+def _pages():
+    return {entry['file']: entry for entry in load_corpus()['pages']}
+
+
+def test_store_dedup_and_read():
+    """Aynı sayfa bir kez saklanmalı, her indirme ayrı kayıt olmalı"""
+    print("🗄️ İçerik adresli arşiv test ediliyor...")
+    html = _pages()['instock_jsonld.html']['html']
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PageArchive(directory=tmp)
+        first = archive.store('https://www.trendyol.com/a-p-1', html, '1')
+        second = archive.store('https://www.trendyol.com/a-p-1', html, '1')
+        assert first == second and os.path.exists(blob_path(tmp, first))
+        stats = archive.stats()
+        assert stats['pages'] == 2 and stats['blobs'] == 1
+        assert stats['stored_bytes'] < stats['raw_bytes'] / 3
+        assert archive.read(first) == html
+        assert [entry['product_id'] for entry in archive.select(product_ids=['1'])] == ['1', '1']
+        archive.close()
+    print(f"✅ {stats['raw_bytes']} bayt -> {stats['stored_bytes']} bayt ({stats['codec']})")
+
+
+def test_prune_retention_and_size_cap():
+    """Süresi dolan kayıtlar ve boyut sınırını aşan en eski kayıtlar blob'larıyla silinmeli"""
+    print("🧹 Arşiv temizliği test ediliyor...")
+    pages = list(_pages().values())
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PageArchive(directory=tmp, retention_days=7)
+        old_hash = archive.store('https://www.trendyol.com/eski-p-1', pages[0]['html'], '1',
+                                 fetched_at=now - timedelta(days=8))
+        for i, entry in enumerate(pages[1:], start=2):
+            archive.store(f'https://www.trendyol.com/u-p-{i}', entry['html'], str(i),
+                          fetched_at=now - timedelta(hours=len(pages) - i))
+        assert archive.prune(now) == 1
+        assert not os.path.exists(blob_path(tmp, old_hash))
+
+        per_blob = archive.stats()['stored_bytes'] / archive.stats()['blobs']
+        archive.max_bytes = int(per_blob * 3.5)
+        archive.prune(now)
+        remaining = archive.select()
+        assert archive.stats()['stored_bytes'] <= archive.max_bytes
+        # En yeniler kalır
+        assert remaining and remaining[-1]['product_id'] == str(len(pages))
+        archive.close()
+    print(f"✅ Kalan kayıt: {len(remaining)}")
+
+
+def test_scraper_archives_pages():
+    """Arşiv bağlı scraper indirdiği sayfayı ürün ID'siyle saklamalı"""
+    print("🔗 Scraper arşiv entegrasyonu test ediliyor...")
+    html = _pages()['discounted_dom.html']['html']
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = TrendyolScraper()
+        scraper.strategy_stats = StrategyStats(path=None)
+        scraper.archive = PageArchive(directory=tmp)
+        result = scraper._parse_html(html, 'https://www.trendyol.com/marka/urun-p-555')
+        assert result['price'] is not None
+        assert [entry['product_id'] for entry in scraper.archive.select()] == ['555']
+        scraper.archive.close()
+    print("✅ Sayfa arşivlendi")
+
+
+def test_replay_diffs_against_price_history():
+    """Replay arşivdeki sayfaları yeniden ayrıştırıp price_history ile karşılaştırmalı"""
+    print("🔁 Arşiv replay test ediliyor...")
+    pages = _pages()
+    fetched = datetime(2025, 3, 1, 12, 0, 0)
+    cases = {
+        'instock_jsonld.html': ('10', 0),        # aynı fiyat kayıtlı
+        'discounted_dom.html': ('20', 1.0),      # farklı fiyat kayıtlı
+        'soldout_button.html': ('30', None),
+        'campaign_price.html': ('40', None),     # kayıt yok
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PageArchive(directory=os.path.join(tmp, 'archive'))
+        db_path = os.path.join(tmp, 'tracker.sqlite')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE price_history (id INTEGER PRIMARY KEY, product_id TEXT, price REAL, date TIMESTAMP, '
+                     'last_seen TIMESTAMP, sample_count INTEGER NOT NULL DEFAULT 1)')
+        for file, (product_id, offset) in cases.items():
+            entry = pages[file]
+            archive.store(f'https://www.trendyol.com/u-p-{product_id}', entry['html'], product_id, fetched_at=fetched)
+            if offset is not None:
+                conn.execute('INSERT INTO price_history (product_id, price, date) VALUES (?, ?, ?)',
+                             (product_id, entry['expected']['price'] + offset,
+                              (fetched + timedelta(seconds=5)).isoformat()))
+        conn.commit()
+        conn.close()
+
+        report = replay(archive, db_path, workers=2)
+        statuses = {r['product_id']: r['status'] for r in report['results']}
+        assert statuses == {'10': MATCH, '20': MISMATCH, '30': SOLD_OUT, '40': NO_HISTORY}
+        assert report['statuses'][MATCH] == 1
+        archive.close()
+    print(f"✅ Replay sonucu: {report['statuses']}")
+
+
+if __name__ == "__main__":
+    print("🚀 Sayfa arşivi testleri başlatılıyor...\n")
+    test_store_dedup_and_read()
+    test_prune_retention_and_size_cap()
+    test_scraper_archives_pages()
+    test_replay_diffs_against_price_history()
+    print("\n🎉 Tüm sayfa arşivi testleri başarılı!")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Katmanlı sayfa çıkarımı (JSON-LD / state blob hızlı yolu ve DOM yedeği) test dosyası
+Sentetik HTML kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import metrics
+from page_extractor import fast_extract, is_complete, tier_report
+from scraper import TrendyolScraper
+
+LD_PAGE = """<html><head><title>iPhone 15 - Trendyol</title>
+<script type="application/ld+json">{"@context": "https://schema.org", "@type": "Product",
+ "name": "Apple iPhone 15 128 GB", "image": ["https://cdn.dsmcdn.com/iphone.jpg"],
+ "offers": {"@type": "Offer", "price": "49999.00", "priceCurrency": "TRY",
+            "availability": "https://schema.org/InStock"}}</script>
+<script>window.__PRODUCT_DETAIL_APP_INITIAL_STATE__ = {"productDetail": {"originalPrice": {"value": 54999}}}</script>
+</head><body><h1 data-testid="product-name">Apple iPhone 15 128 GB</h1></body></html>"""
+
+STATE_PAGE = """<html><head><title>Kulaklık - Trendyol</title></head><body>
+<h1 data-testid="product-name">Kablosuz Kulaklık</h1>
+<script>window.state = {"product": {"winnerVariant": {"price": {"discountedPrice": {"value": 899.9}, "value": 899.9},
+ "inStock": true}}}</script></body></html>"""
+
+DOM_PAGE = """<html><head><title>Kupa - Trendyol</title>
+<meta property="og:image" content="https://cdn.dsmcdn.com/kupa.jpg"></head><body>
+<h1 data-testid="product-name">Seramik Kupa</h1>
+<div data-testid="price"><span class="price-view-discounted">149,90 TL</span>
+<span class="price-view-original">199,90 TL</span></div>
+<button data-testid="add-to-cart-button">Sepete Ekle</button>
+<svg><path d="M0 0"/></svg></body></html>"""
+
+SOLD_OUT_PAGE = LD_PAGE.replace("InStock", "OutOfStock")
+
+
+class NoDomScraper(TrendyolScraper):
+    """DOM kurulursa hata veren scraper (hızlı yolun DOM'a dokunmadığını doğrular)"""
+
+    def _parse_dom(self, html, fast):
+        raise AssertionError("DOM kurulmamalıydı")
+
+
+def test_fast_extract_reads_json_ld_and_state_blob():
+    """JSON-LD fiyat/ad/görseli, state blob orijinal fiyatı vermeli"""
+    print("⚡ JSON-LD hızlı yolu test ediliyor...")
+    data = fast_extract(LD_PAGE)
+    assert data['product_name'] == 'Apple iPhone 15 128 GB'
+    assert data['price'] == 49999.0
+    assert data['original_price'] == 54999.0
+    assert data['image_url'] == 'https://cdn.dsmcdn.com/iphone.jpg'
+    assert data['in_stock'] is True
+    assert is_complete(data)
+
+    state = fast_extract(STATE_PAGE)
+    assert state['price'] == 899.9 and state['in_stock'] is True
+    # Ad yalnızca h1'de: DOM gerekli
+    assert not is_complete(state)
+    print("✅ Hızlı yol doğru")
+
+
+def test_fast_tier_skips_dom():
+    """Tam JSON-LD içeren sayfa DOM kurulmadan ayrıştırılmalı"""
+    print("🚀 DOM'suz ayrıştırma test ediliyor...")
+    scraper = NoDomScraper()
+    result = scraper._parse_page(LD_PAGE)
+    assert result['error'] is None
+    assert result['price'] == 49999.0 and result['original_price'] == 54999.0
+
+    sold_out = scraper._parse_page(SOLD_OUT_PAGE)
+    assert sold_out['error'] == 'Tükendi'
+    print("✅ Hızlı katman DOM kurmadı")
+
+
+def test_dom_fallback_and_tier_report():
+    """Hızlı yolun eksik kaldığı sayfalar DOM'dan tamamlanmalı, katman yüzdeleri raporlanmalı"""
+    print("🌳 DOM yedeği ve katman raporu test ediliyor...")
+    metrics.reset()
+    scraper = TrendyolScraper()
+
+    state = scraper._parse_page(STATE_PAGE)
+    assert state['product_name'] == 'Kablosuz Kulaklık' and state['price'] == 899.9
+
+    dom = scraper._parse_page(DOM_PAGE)
+    assert dom['product_name'] == 'Seramik Kupa'
+    assert dom['price'] == 149.9 and dom['original_price'] == 199.9
+    assert dom['image_url'] == 'https://cdn.dsmcdn.com/kupa.jpg'
+
+    scraper._parse_page(LD_PAGE)
+    scraper._parse_page("<html><body>boş sayfa</body></html>")
+
+    report = tier_report()
+    assert report['pages'] == 4
+    assert report['fast_pct'] == 25.0 and report['dom_pct'] == 50.0 and report['failed_pct'] == 25.0
+    assert report['cpu_ms_p50'] is not None
+    print(f"✅ Katman raporu: {report}")
+
+
+if __name__ == "__main__":
+    print("🚀 Sayfa çıkarım testleri başlatılıyor...\n")
+    test_fast_extract_reads_json_ld_and_state_blob()
+    test_fast_tier_skips_dom()
+    test_dom_fallback_and_tier_report()
+    print("\n🎉 Tüm sayfa çıkarım testleri başarılı!")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Koşullu istek ve değişmeyen sayfa atlama test dosyası
+Geçici veritabanı ve ETag/304 destekli yerel HTTP sunucusu kullanır, Trendyol'a istek atmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import metrics
+from migrations import PAGE_VALIDATORS, schema_version
+from page_extractor import region_hash
+from page_validators import PageValidatorStore, conditional_headers, page_report
+from scraper import TrendyolScraper
+from strategy_stats import StrategyStats
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages', 'instock_jsonld.html')
+with open(FIXTURE, encoding='utf-8') as f:
+    HEAD_PART = f.read().split('<section class="recommendation">')[0]
+
+
+def _page(tail='Yorum 1', price='49999'):
+    """Fiyat bölgesi + yorum kısmı; price JSON-LD ve state blob fiyatını değiştirir"""
+    return f'{HEAD_PART.replace("49999", price)}<div class="comment">{tail}</div></body></html>'
+
+
+class _Server:
+    """ETag destekli yerel sunucu; sayfa ve ETag testte değiştirilir"""
+
+    def __init__(self):
+        state = self
+        self.page = _page()
+        self.etag = '"v1"'
+        self.requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                state.requests.append(self.headers.get('If-None-Match'))
+                if state.etag and self.headers.get('If-None-Match') == state.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = state.page.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if state.etag:
+                    self.send_header('ETag', state.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/urun-p-773358088'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+def test_store_roundtrip():
+    """Doğrulayıcılar yeniden başlatmadan sonra veritabanından okunabilmeli"""
+    print("💾 Doğrulayıcı deposu test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tracker.sqlite')
+        store = PageValidatorStore(db_path=path)
+        store.put('1', 'https://www.trendyol.com/a-p-1', '"abc"', 'Mon, 03 Mar 2025 10:00:00 GMT', 'h1',
+                  {'product_name': 'Ürün', 'price': 10.5, 'error': None})
+        store.close()
+        # Tablo sürümlü taşımayla oluşturulur
+        conn = sqlite3.connect(path)
+        assert schema_version(conn, PAGE_VALIDATORS) == 1
+        conn.close()
+
+        entry = PageValidatorStore(db_path=path).get('1')
+        assert entry['result'] == {'product_name': 'Ürün', 'price': 10.5, 'error': None}
+        assert conditional_headers(entry) == {'If-None-Match': '"abc"',
+                                              'If-Modified-Since': 'Mon, 03 Mar 2025 10:00:00 GMT'}
+        assert conditional_headers(None) == {}
+    print("✅ Doğrulayıcılar korundu")
+
+
+def test_region_hash_ignores_unrelated_parts():
+    """Özet yorum/öneri değişikliğinden etkilenmemeli, fiyat değişince değişmeli"""
+    print("#️⃣ Fiyat bölgesi özeti test ediliyor...")
+    base = region_hash(_page())
+    assert base and base == region_hash(_page(tail='Yorum 2: yeni yorum'))
+    assert base != region_hash(_page(price='45999'))
+    assert base != region_hash(_page(tail='<span>Sepette 44.999 TL</span>'))
+    assert region_hash('<html><body><p>merhaba</p></body></html>') is None
+    print("✅ Özet yalnızca fiyat bölgesine bağlı")
+
+
+def test_scraper_conditional_fetch_and_skip():
+    """304 ve aynı bölge özeti ayrıştırmayı atlamalı, fiyat değişince sayfa ayrıştırılmalı"""
+    print("🔁 Koşullu indirme test ediliyor...")
+    server = _Server()
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = TrendyolScraper()
+        scraper.strategy_stats = StrategyStats(path=None)
+        scraper.validators = PageValidatorStore(db_path=os.path.join(tmp, 'tracker.sqlite'))
+        # Yerel sunucu Trendyol alan adı değil; URL doğrulaması bu test için atlanır
+        scraper.is_valid_url = lambda url: True
+        scraper._get_full_url = lambda url: url
+        try:
+            before = metrics.counters()
+            first = scraper._scrape_page(server.url)
+            assert first['price'] == 49999.0 and not first.get('unchanged')
+
+            # Sunucu ETag'i tanıyor: 304
+            second = scraper._scrape_page(server.url)
+            assert second['unchanged'] and second['price'] == 49999.0
+            assert server.requests[-1] == '"v1"'
+
+            # Koşullu isteği desteklemeyen sunucu, yalnızca yorumlar değişti: ayrıştırma atlanır
+            server.etag = None
+            server.page = _page(tail='Yorum 2')
+            third = scraper._scrape_page(server.url)
+            assert third['unchanged'] and third['price'] == 49999.0
+
+            # Fiyat değişti: sayfa yeniden ayrıştırılır
+            server.page = _page(price='45999')
+            fourth = scraper._scrape_page(server.url)
+            assert fourth['price'] == 45999.0 and not fourth.get('unchanged')
+            counters = metrics.diff(before, metrics.counters())
+        finally:
+            server.httpd.shutdown()
+            scraper.validators.close()
+
+    assert counters['page.conditional_hit'] == 1
+    assert counters['page.parse_skipped'] == 1
+    assert counters['page.parsed'] == 2
+    # Üçüncü yanıtta ETag yoktu, dördüncü istek koşulsuz gider
+    assert counters['page.conditional_requests'] == 2
+    print("✅ 4 kontrolde 2 ayrıştırma atlandı (304: 1, aynı özet: 1)")
+
+
+def test_page_report():
+    """Sayfa özeti ayrıştırılmadan geçilen sayfaları ve 304 oranını vermeli"""
+    print("📝 Sayfa özeti test ediliyor...")
+    period = {'page.parsed': 6, 'page.parse_skipped': 3, 'page.conditional_hit': 1, 'page.conditional_requests': 2}
+    assert page_report(period).startswith('Sayfa doğrulayıcı: ayrıştırılmayan 4/10 sayfa (304: 1/2, ')
+    assert page_report({'stream.pages': 1}) is None
+    assert 'page' in metrics.reports(period)
+    print("✅ Sayfa özeti kayıtlı")
+
+
+if __name__ == "__main__":
+    print("🚀 Koşullu indirme testleri başlatılıyor...\n")
+    test_store_roundtrip()
+    test_region_hash_ignores_unrelated_parts()
+    test_scraper_conditional_fetch_and_skip()
+    test_page_report()
+    print("\n🎉 Tüm koşullu indirme testleri başarılı!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ayrıştırma süreç havuzu test dosyası
+fixtures/pages altındaki kayıtlı sayfaları worker süreçlerinde ayrıştırır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+import threading
+import time
+from benchmark_extractors import load_corpus
+from metrics import metrics
+from parse_pool import ParsePool
+from scraper import TrendyolScraper
+from strategy_stats import StrategyStats
+
+
+def _scraper(pool):
+    scraper = TrendyolScraper()
+    scraper.strategy_stats = StrategyStats(path=None)
+    scraper.parse_pool = pool
+    return scraper
+
+
+def test_pool_matches_in_process_parse():
+    """Worker'da ayrıştırılan sayfa süreç içindekiyle aynı sonucu vermeli, sayaçlar ana sürece gelmeli"""
+    print("🧵 Süreç havuzunda ayrıştırma test ediliyor...")
+    pages = load_corpus()['pages']
+    pool = ParsePool(workers=2)
+    try:
+        pooled = _scraper(pool)
+        inline = _scraper(None)
+        before = metrics.counters()
+        for entry in pages:
+            assert pooled._parse_html(entry['html']) == inline._parse_html(entry['html']), entry['file']
+        changes = metrics.diff(before, metrics.counters())
+        assert changes['parse.pages'] == len(pages)
+        # Katman sayaçları hem worker'dan hem süreç içi ayrıştırmadan gelir
+        tiers = sum(changes.get(f'extract.tier.{tier}', 0) for tier in ('fast', 'dom', 'failed'))
+        assert tiers == 2 * len(pages)
+        assert pool.snapshot()['in_flight'] == 0
+    finally:
+        pool.shutdown()
+    print(f"✅ {len(pages)} sayfa havuzda ayrıştırıldı")
+
+
+def test_full_queue_blocks_new_pages():
+    """Kuyruk doluyken yeni sayfa yer açılana kadar beklemeli"""
+    print("⏳ Kuyruk sınırı (back-pressure) test ediliyor...")
+    html = load_corpus()['pages'][0]['html']
+    pool = ParsePool(workers=1, queue_size=1)
+    try:
+        pool.start()
+        results = []
+        pool._slots.acquire()
+        worker = threading.Thread(target=lambda: results.append(pool.parse(html)))
+        worker.start()
+        time.sleep(0.3)
+        assert worker.is_alive() and not results
+        pool._slots.release()
+        worker.join(timeout=30)
+        assert results and results[0]['price'] is not None
+        assert metrics.summary('parse.queue_wait_seconds')['max'] >= 0.3
+    finally:
+        pool.shutdown()
+    print("✅ Kuyruk dolunca sayfa bekletildi")
+
+
+def test_disabled_pool_parses_in_process():
+    """PARSE_WORKERS=0 ile havuz None döner ve scraper sayfayı kendisi ayrıştırır"""
+    print("🔁 Kapalı havuz test ediliyor...")
+    html = load_corpus()['pages'][0]['html']
+    pool = ParsePool(workers=0)
+    assert not pool.enabled and pool.parse(html) is None
+    assert _scraper(pool)._parse_html(html)['price'] is not None
+    print("✅ Sayfa süreç içinde ayrıştırıldı")
+
+
+def test_worker_strategy_counts_saved_by_parent():
+    """Worker'ların strateji sayımları ana sürecin istatistiklerine işlenmeli ve kapanışta kaydedilmeli"""
+    print("📊 Worker strateji sayımları test ediliyor...")
+    pages = load_corpus()['pages']
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'strategy_stats.json')
+        pool = ParsePool(workers=2)
+        try:
+            pooled = _scraper(pool)
+            pooled.strategy_stats = StrategyStats(path=path, save_interval=3600)
+            inline = _scraper(None)
+            for entry in pages:
+                pooled._parse_html(entry['html'])
+                inline._parse_html(entry['html'])
+            assert pooled.strategy_stats.distribution() == inline.strategy_stats.distribution()
+            assert not os.path.exists(path)
+        finally:
+            pool.shutdown()
+        assert StrategyStats(path=path).distribution() == inline.strategy_stats.distribution()
+    print("✅ Sayımlar ana süreçte birleşti ve kapanışta yazıldı")
+
+
+if __name__ == "__main__":
+    print("🚀 Ayrıştırma havuzu testleri başlatılıyor...\n")
+    test_pool_matches_in_process_parse()
+    test_full_queue_blocks_new_pages()
+    test_disabled_pool_parses_in_process()
+    test_worker_strategy_counts_saved_by_parent()
+    print("\n🎉 Tüm ayrıştırma havuzu testleri başarılı!")
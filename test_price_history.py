@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Değişim bazlı (run-length) fiyat geçmişi test dosyası
+Geçici veritabanı kullanır. Her kontrolün ayrı satır olduğu geçmiş ile sıkıştırılmış geçmişin
+analiz sorgularına aynı cevabı verdiği doğrulanır.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import itertools
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from check_scheduler import CheckScheduler, compute_interval
+from database import Database
+from notification_system import NotificationSystem
+from price_analyzer import PriceAnalyzer
+from price_history import compact, record_price
+from price_rollups import rebuild
+from price_writer import PriceWriter
+
+# Her zaman geçmişte kalır; add_product'ın şimdiki zamanlı kaydı fikstürde silinebilsin
+NOW = (datetime.now() - timedelta(hours=1)).replace(minute=17, second=0, microsecond=0)
+
+# product_id -> (kontrol aralığı saat, fiyat(k. kontrol, yeniden eskiye))
+SERIES = {
+    '1': (1, lambda k: 90.0 if k < 10 else 100.0 + 5 * ((k // 50) % 4)),
+    '2': (2, lambda k: 250.0 if k % 90 < 45 else 249.99),
+    '3': (3, lambda k: 44.0 if k == 0 else 40.0),
+}
+
+
+def _raw_db(path):
+    """40 günlük, her kontrolün ayrı satır olduğu geçmişle veritabanı"""
+    db = Database(db_name=path)
+    NotificationSystem(db)
+    for product_id, (hours, price) in SERIES.items():
+        db.add_product({'product_id': product_id, 'name': f'Ürün {product_id}', 'url': f'https://www.trendyol.com/a-p-{product_id}',
+                        'current_price': price(0), 'original_price': None}, 'g1', 'u1', 'c1')
+        samples = [(product_id, price(k), (NOW - timedelta(hours=k * hours)).isoformat())
+                   for k in range(40 * 24 // hours)]
+        db.cursor.executemany('INSERT INTO price_history (product_id, price, date) VALUES (?, ?, ?)', samples)
+    # add_product'ın ilk kaydı yerine yalnızca üretilen kontroller kalsın
+    db.cursor.execute('DELETE FROM price_history WHERE date > ?', (NOW.isoformat(),))
+    rebuild(db.cursor)
+    db.conn.commit()
+    return db
+
+
+def _answers(db):
+    analyzer = PriceAnalyzer(db)
+    scheduler = CheckScheduler(db)
+    answers = {
+        'summary': NotificationSystem(db).get_daily_summary('g1'),
+        'deals': analyzer.get_best_deals(),
+        'alerts': analyzer.get_price_alerts(threshold=1),
+        'changes': [(p['product_id'], p['previous_price']) for p in db.check_price_changes()],
+    }
+    for product_id in SERIES:
+        for days in (1, 3, 7, 30, 60):
+            trend = analyzer.get_price_trend(product_id, days=days)
+            trend.pop('price_history', None)
+            answers[f'trend {product_id} {days}'] = trend
+        answers[f'interval {product_id}'] = round(compute_interval(scheduler._history(product_id)), 6)
+    return answers
+
+
+def _runs(history):
+    """Her kontrolün ayrı satır olduğu geçmişi aynı gün/aynı fiyat aralıklarına indirger"""
+    return [(price, list(group)[-1]['date'])
+            for (price, _), group in itertools.groupby(history, key=lambda h: (h['price'], h['date'][:10]))]
+
+
+def test_compacted_history_same_answers():
+    """Sıkıştırılmış geçmiş trend, günlük özet, fırsat/uyarı ve zamanlayıcıya aynı cevabı vermeli"""
+    print("🗜️ Sıkıştırılmış geçmiş test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = _raw_db(os.path.join(tmp, 'raw.sqlite'))
+        compacted = _raw_db(os.path.join(tmp, 'compacted.sqlite'))
+        compact(compacted.cursor)
+        # Sıkıştırma taşıma adımıdır; özet tetikleyicilerinden önce çalışır
+        rebuild(compacted.cursor)
+        compacted.conn.commit()
+
+        raw_rows = raw.cursor.execute('SELECT COUNT(*) FROM price_history').fetchone()[0]
+        rows = compacted.cursor.execute('SELECT COUNT(*) FROM price_history').fetchone()[0]
+        assert rows * 5 < raw_rows, (rows, raw_rows)
+
+        expected = _answers(raw)
+        assert expected['summary']['price_changes_yesterday'] == 3
+        assert expected['summary']['biggest_drops'] and expected['alerts']
+        assert _answers(compacted) == expected
+
+        for product_id in SERIES:
+            full = raw.get_price_history(product_id, limit=10000)
+            runs = compacted.get_price_history(product_id, limit=10000)
+            assert sum(run['sample_count'] for run in runs) == len(full)
+            assert [(run['price'], run['date']) for run in runs] == _runs(full)
+        raw.close()
+        compacted.close()
+    print(f"✅ {raw_rows} satır yerine {rows} satır, cevaplar aynı")
+
+
+def test_unchanged_price_extends_last_row():
+    """Aynı fiyat son satırı uzatmalı; değişen fiyat veya yeni gün yeni satır açmalı"""
+    print("➕ Fiyat kaydı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        db = Database(db_name=path)
+        db.add_product({'product_id': '1', 'name': 'Ürün', 'url': 'https://www.trendyol.com/a-p-1',
+                        'current_price': 100.0, 'original_price': 100.0}, 'g1', 'u1', 'c1')
+        for _ in range(3):
+            db.update_product_price('1', 100.0)
+        db.update_product_price('1', 90.0)
+        history = db.get_price_history('1')
+        assert [(h['price'], h['sample_count']) for h in history] == [(90.0, 1), (100.0, 4)]
+        assert history[1]['last_seen'] > history[1]['date']
+
+        # Toplu yazıcı da aynı kuralı uygular
+        writer = PriceWriter(db_path=path, batch_size=1000, flush_ms=60000)
+        writer.update_price('1', 90.0)
+        writer.update_price('1', 90.0)
+        writer.close()
+        assert db.get_price_history('1')[0]['sample_count'] == 3
+
+        tomorrow = (datetime.now() + timedelta(days=1)).isoformat()
+        assert record_price(db.cursor, '1', 90.0, tomorrow)
+        assert record_price(db.cursor, '1', 90.0, tomorrow, changes_only=False)
+        db.conn.commit()
+        assert len(db.get_price_history('1')) == 4
+        db.close()
+    print("✅ Değişmeyen fiyat yeni satır açmadı")
+
+
+def test_migration_compacts_existing_history():
+    """Eski (kontrol başına satır) geçmiş taşımada sıkıştırılmalı"""
+    print("🧱 Geçmiş taşıması test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'legacy.sqlite')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, product_id TEXT, price REAL, date TIMESTAMP)')
+        day = datetime(2025, 3, 1, 8, 0, 0)
+        samples = [100.0] * 5 + [95.0] + [100.0] * 2
+        conn.executemany('INSERT INTO price_history (product_id, price, date) VALUES (?, ?, ?)',
+                         [('1', price, (day + timedelta(hours=i)).isoformat()) for i, price in enumerate(samples)])
+        conn.commit()
+        conn.close()
+
+        db = Database(db_name=path)
+        history = db.get_price_history('1')
+        assert [(h['price'], h['sample_count']) for h in history] == [(100.0, 2), (95.0, 1), (100.0, 5)]
+        assert history[2]['date'] == day.isoformat()
+        assert history[2]['last_seen'] == (day + timedelta(hours=4)).isoformat()
+        db.close()
+    print("✅ 8 satır 3 satıra indirildi")
+
+
+if __name__ == "__main__":
+    print("🚀 Fiyat geçmişi testleri başlatılıyor...\n")
+    test_compacted_history_same_answers()
+    test_unchanged_price_extends_last_row()
+    test_migration_compacts_existing_history()
+    print("\n🎉 Tüm fiyat geçmişi testleri başarılı!")
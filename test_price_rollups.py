@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Saatlik/günlük fiyat özetleri ve ham geçmiş saklama süresi test dosyası
+Geçici veritabanı kullanır.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from database import Database
+from price_analyzer import PriceAnalyzer
+from price_history import record_price
+from price_rollups import window_stats, DAY, HOUR, RAW
+from price_writer import PriceWriter
+
+NOW = datetime.now().replace(second=0, microsecond=0) - timedelta(minutes=1)
+PRODUCT = {'product_id': '1', 'name': 'Ürün', 'url': 'https://www.trendyol.com/a-p-1',
+           'current_price': 100.0, 'original_price': 100.0}
+
+
+def _price(k):
+    return [100.0, 100.0, 104.5, 98.25, 98.25, 120.0][(k // 7) % 6]
+
+
+def _samples(days=60, minutes=40):
+    """`minutes` dakikada bir yapılmış kontrollerin (fiyat, tarih) listesi, eskiden yeniye"""
+    count = days * 24 * 60 // minutes
+    return [(_price(k), (NOW - timedelta(minutes=minutes * (count - 1 - k))).isoformat()) for k in range(count)]
+
+
+def _db(path, samples):
+    """Kontrolleri Database'in kullandığı record_price ile (yazma anında özetlenerek) yazar"""
+    db = Database(db_name=path)
+    db.add_product(PRODUCT, 'g1', 'u1', 'c1')
+    db.cursor.execute('DELETE FROM price_history')
+    db.cursor.execute('DELETE FROM price_rollups')
+    for price, at in samples:
+        record_price(db.cursor, PRODUCT['product_id'], price, at)
+    db.conn.commit()
+    return db
+
+
+def _expected(samples, cutoff):
+    window = [price for price, at in samples if at >= cutoff.isoformat()]
+    return {'sample_count': len(window), 'min_price': min(window), 'max_price': max(window),
+            'first_price': window[0], 'last_price': window[-1], 'average': sum(window) / len(window)}
+
+
+def _check(stats, expected):
+    for key in ('sample_count', 'min_price', 'max_price', 'first_price', 'last_price'):
+        assert stats[key] == expected[key], (key, stats[key], expected[key])
+    assert abs(stats['price_sum'] / stats['sample_count'] - expected['average']) < 1e-9
+
+
+def test_window_matches_raw_history():
+    """Özetlerden okunan pencere istatistikleri ham kontrollerle aynı olmalı"""
+    print("🧮 Özet pencereleri test ediliyor...")
+    samples = _samples()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(os.path.join(tmp, 'test.sqlite'), samples)
+        raw_rows = db.cursor.execute('SELECT COUNT(*) FROM price_history').fetchone()[0]
+        for days, resolution in ((0.5, RAW), (1, HOUR), (3, HOUR), (30, DAY), (45.3, DAY)):
+            cutoff = NOW - timedelta(days=days, minutes=7)
+            stats = window_stats(db.cursor, PRODUCT['product_id'], cutoff, now=NOW)
+            _check(stats, _expected(samples, cutoff))
+            assert stats['resolution'] == resolution
+        # 30 günlük seri günlük kovalardan gelir
+        assert len(stats['series']) in (46, 47)
+
+        trend = PriceAnalyzer(db).get_price_trend(PRODUCT['product_id'], days=30)
+        assert trend['resolution'] == DAY and trend['price_points'] == 30 * 24 * 60 // 40
+        assert trend['last_price'] == samples[-1][0]
+        db.close()
+    print(f"✅ {len(samples)} kontrol, {raw_rows} ham satır; ham ve özet cevapları aynı")
+
+
+def test_rollups_follow_all_writers():
+    """Database, toplu yazıcı ve elle eklenen satırlar özetlere yansımalı; taşıma mevcut geçmişi özetlemeli"""
+    print("✍️ Yazma anında özetleme test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, product_id TEXT, price REAL, date TIMESTAMP)')
+        conn.executemany('INSERT INTO price_history (product_id, price, date) VALUES (?, ?, ?)',
+                         [('1', 10.0, '2025-03-01T08:05:00'), ('1', 10.0, '2025-03-01T08:35:00'),
+                          ('1', 12.0, '2025-03-01T09:05:00')])
+        conn.commit()
+        conn.close()
+
+        db = Database(db_name=path)
+        hour = db.cursor.execute('''
+            SELECT sample_count, price_sum, min_price, max_price, first_price, last_price FROM price_rollups
+            WHERE product_id = '1' AND period = 'hour' AND bucket = '2025-03-01T08:00:00'
+        ''').fetchone()
+        assert hour == (2, 20.0, 10.0, 10.0, 10.0, 10.0)
+        day = db.cursor.execute('''
+            SELECT sample_count, min_price, max_price, first_price, last_price FROM price_rollups
+            WHERE product_id = '1' AND period = 'day' AND bucket = '2025-03-01T00:00:00'
+        ''').fetchone()
+        assert day == (3, 10.0, 12.0, 10.0, 12.0)
+
+        db.add_product(dict(PRODUCT, product_id='2'), 'g1', 'u1', 'c1')
+        db.update_product_price('2', 100.0)
+        writer = PriceWriter(db_path=path, batch_size=1000, flush_ms=60000)
+        writer.update_price('2', 100.0)
+        writer.update_price('2', 80.0)
+        writer.close()
+        assert db.cursor.execute('''
+            SELECT SUM(sample_count), MIN(min_price) FROM price_rollups WHERE product_id = '2' AND period = 'day'
+        ''').fetchone() == (4, 80.0)
+
+        assert db.delete_product('2')
+        assert db.cursor.execute("SELECT COUNT(*) FROM price_rollups WHERE product_id = '2'").fetchone()[0] == 0
+        db.close()
+    print("✅ Özetler tüm yazma yollarında güncel")
+
+
+def test_retention_keeps_rollups():
+    """Saklama süresi ham satırları silmeli, özetler ve ürünün son satırı kalmalı"""
+    print("🧹 Saklama süresi test ediliyor...")
+    samples = _samples(days=40)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = _db(os.path.join(tmp, 'test.sqlite'), samples)
+        cutoff = (NOW - timedelta(days=30)).replace(minute=0)
+        before = window_stats(db.cursor, PRODUCT['product_id'], cutoff, now=NOW)
+        rows = db.cursor.execute('SELECT COUNT(*) FROM price_history').fetchone()[0]
+
+        removed = db.prune_price_history(days=7, batch_size=100)
+        assert removed > 100
+        oldest = db.cursor.execute('SELECT MIN(COALESCE(last_seen, date)) FROM price_history').fetchone()[0]
+        assert oldest >= (datetime.now() - timedelta(days=7)).isoformat()
+        assert db.cursor.execute('SELECT COUNT(*) FROM price_history').fetchone()[0] == rows - removed
+
+        after = window_stats(db.cursor, PRODUCT['product_id'], cutoff, now=NOW, retention_days=7)
+        assert after == before
+        _check(after, _expected(samples, cutoff))
+
+        # Uzun süredir kontrol edilmeyen ürünün son satırı silinmez
+        record_price(db.cursor, '2', 50.0, '2020-01-01T08:00:00')
+        record_price(db.cursor, '2', 55.0, '2020-01-02T08:00:00')
+        db.prune_price_history(days=7)
+        assert [h['price'] for h in db.get_price_history('2')] == [55.0]
+        db.close()
+    print(f"✅ {removed} ham satır silindi, 30 günlük özet değişmedi")
+
+
+if __name__ == "__main__":
+    print("🚀 Fiyat özeti testleri başlatılıyor...\n")
+    test_window_matches_raw_history()
+    test_rollups_follow_all_writers()
+    test_retention_keeps_rollups()
+    print("\n🎉 Tüm fiyat özeti testleri başarılı!")
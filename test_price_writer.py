@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Toplu (group-commit) fiyat yazıcısı test dosyası
+Geçici veritabanı kullanır.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import sqlite3
+import tempfile
+from check_scheduler import CheckScheduler
+from database import Database
+from metrics import metrics
+from notification_system import NotificationSystem
+from price_writer import PriceWriter, _Batch
+
+
+def _make_db(tmp, count=3):
+    path = os.path.join(tmp, 'test.sqlite')
+    db = Database(db_name=path)
+    notifications = NotificationSystem(db)
+    for i in range(count):
+        db.add_product({'product_id': str(i), 'name': f'Ürün {i}', 'url': f'https://www.trendyol.com/a-p-{i}',
+                        'current_price': 100.0, 'original_price': 100.0}, 'g1', 'u1', 'c1')
+    return path, db, notifications
+
+
+def _count(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_flushes_by_batch_size():
+    """Boyut sınırına ulaşınca tek commit ile yazılmalı, sınırın altındakiler tamponda kalmalı"""
+    print("📦 Boyut sınırında yazma test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path, db, _ = _make_db(tmp)
+        writer = PriceWriter(db_path=path, batch_size=10, flush_ms=60000)
+        before = metrics.counters()
+        # Her kontrol: fiyat + geçmiş satırı (2 kayıt) ve sonraki kontrol zamanı (1 kayıt);
+        # aynı ürünün fiyatı/sonraki kontrolü tamponda tek kayıtta birleşir, 10. kayıtta yazılır
+        for i in range(4):
+            writer.update_price(str(i % 3), 90.0 + i)
+            writer.set_next_check(str(i % 3), '2030-01-01T00:00:00')
+        counters = metrics.diff(before, metrics.counters())
+        assert counters['price_writer.flushes'] == 1
+        assert _count(path, 'price_history') == 3 + 4
+
+        # 4. kontrolün sonraki kontrol zamanı bir sonraki tampona kaldı
+        writer.update_price('0', 50.0)
+        assert writer.pending == 3 and _count(path, 'price_history') == 7
+        writer.close()
+        assert _count(path, 'price_history') == 8
+        assert db.get_product('0')['current_price'] == 50.0
+        assert db.get_product('2')['next_check_at'] == '2030-01-01T00:00:00'
+        db.close()
+    print("✅ 10 kayıtta bir commit")
+
+
+def test_async_flush_by_time():
+    """Başlatılan yazıcı süre sınırında kendiliğinden yazmalı"""
+    print("⏱️ Süre sınırında yazma test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path, db, _ = _make_db(tmp)
+        writer = PriceWriter(db_path=path, batch_size=1000, flush_ms=50)
+
+        async def run():
+            writer.start()
+            writer.update_price('1', 75.0)
+            writer.mark_checked('2')
+            assert _count(path, 'price_history') == 3
+            await asyncio.sleep(0.3)
+            written = _count(path, 'price_history')
+            await writer.stop()
+            return written
+
+        assert asyncio.run(run()) == 4
+        assert db.get_product('1')['current_price'] == 75.0
+        writer.close()
+        db.close()
+    print("✅ Tampon 50 ms içinde yazıldı")
+
+
+def test_database_and_notifications_use_writer():
+    """Database ve bildirim sistemi yazmaları aynı toplu commit'e girmeli, zamanlayıcı bekleyenleri görmeli"""
+    print("🔗 Database/bildirim entegrasyonu test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path, db, notifications = _make_db(tmp)
+        assert notifications.add_price_target('1', 'u1', 'g1', 'c1', 80.0, 'below')
+        writer = PriceWriter(db_path=path, batch_size=1000, flush_ms=60000)
+        db.writer = writer
+
+        db.update_product_price('1', 70.0)
+        triggered = notifications.check_price_targets('1', 70.0)
+        assert len(triggered) == 1
+        scheduler = CheckScheduler(db, base_interval=3600, min_interval=900, max_interval=24 * 3600)
+        scheduler.reschedule(db.get_product('1'), True)
+        # Henüz hiçbiri yazılmadı, ama zamanlayıcı yeni fiyatı ve geçmiş satırını kullanır
+        assert _count(path, 'notification_history') == 0
+        assert scheduler._history('1')[-1][0] == 70.0
+        assert writer.pending_price('1') == 70.0
+
+        assert writer.flush() == 5
+        assert db.get_product('1')['current_price'] == 70.0
+        assert db.get_product('1')['next_check_at'] is not None
+        assert _count(path, 'notification_history') == 1
+        assert notifications.check_price_targets('1', 60.0) == []
+        writer.close()
+        db.close()
+    print("✅ Fiyat, hedef, bildirim ve sonraki kontrol tek commit'te yazıldı")
+
+
+def test_locked_database_retries():
+    """Veritabanı kilitliyse kayıtlar sonraki yazmada tekrar denenmeli, deneme sınırında atılmalı"""
+    print("🔒 Kilitli veritabanı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path, db, _ = _make_db(tmp)
+        writer = PriceWriter(db_path=path, batch_size=1000, flush_ms=60000)
+        writer._get_conn().execute('PRAGMA busy_timeout = 50')
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+
+        writer.update_price('0', 10.0)
+        assert writer.flush() == 0
+        writer.update_price('1', 20.0)
+        assert writer.pending == 4
+
+        blocker.execute('COMMIT')
+        assert writer.flush() == 4
+        assert db.get_product('0')['current_price'] == 10.0 and db.get_product('1')['current_price'] == 20.0
+
+        # Kilit kalkmazsa kayıtlar deneme sınırından sonra atılır, tampon büyümez
+        writer.max_retries = 2
+        blocker.execute('BEGIN IMMEDIATE')
+        writer.update_price('2', 30.0)
+        assert writer.flush() == 0 and writer.pending == 2
+        assert writer.flush() == 0 and writer.pending == 0
+        blocker.execute('COMMIT')
+        blocker.close()
+        assert db.get_product('2')['current_price'] == 100.0
+        writer.close()
+        db.close()
+    print("✅ Kilit kalkınca bekleyen kayıtlar yazıldı, kalkmayınca sınırda atıldı")
+
+
+def test_requeued_batch_keeps_latest_times():
+    """Yazılamayan tampon yeni kayıtlarla birleşince en geç kontrol zamanları kalmalı"""
+    print("🕒 Tampon birleştirme test ediliyor...")
+    failed, newer = _Batch(), _Batch()
+    failed.prices['1'] = (90.0, '2030-01-01T10:00:00')
+    failed.checked['2'] = '2030-01-01T10:00:00'
+    failed.next_checks['1'] = '2030-01-01T14:00:00'
+    newer.prices['1'] = (95.0, '2030-01-01T09:00:00')
+    newer.prices['3'] = (10.0, '2030-01-01T09:00:00')
+    newer.checked['2'] = '2030-01-01T11:00:00'
+    newer.next_checks['1'] = '2030-01-01T12:00:00'
+    newer.next_checks['2'] = '2030-01-01T13:00:00'
+
+    failed.merge_newer(newer)
+    assert failed.prices == {'1': (90.0, '2030-01-01T10:00:00'), '3': (10.0, '2030-01-01T09:00:00')}
+    assert failed.checked == {'2': '2030-01-01T11:00:00'}
+    assert failed.next_checks == {'1': '2030-01-01T14:00:00', '2': '2030-01-01T13:00:00'}
+    print("✅ En geç zamanlar korundu")
+
+
+if __name__ == "__main__":
+    print("🚀 Toplu yazıcı testleri başlatılıyor...\n")
+    test_flushes_by_batch_size()
+    test_async_flush_by_time()
+    test_database_and_notifications_use_writer()
+    test_locked_database_retries()
+    test_requeued_batch_keeps_latest_times()
+    print("\n🎉 Tüm toplu yazıcı testleri başarılı!")
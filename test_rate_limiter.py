@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Host başına token bucket hız sınırlayıcı test dosyası
+Ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import threading
+from rate_limiter import RateLimiter, TokenBucket, parse_rate_limits
+
+LIMITS = {
+    'trendyol.com': (10.0, 2, 0.0),
+    'public-mdc.trendyol.com': (50.0, 5, 0.0),
+}
+
+
+def test_parse_rate_limits():
+    """Ortam değişkeni biçimi çözümlenmeli, hatalı girdiler atlanmalı"""
+    limits = parse_rate_limits("trendyol.com=2:4:0.5, ty.gl=5, bozuk")
+    assert limits['trendyol.com'] == (2.0, 4, 0.5)
+    assert limits['ty.gl'] == (5.0, 1, 0.0)
+    assert 'bozuk' not in limits
+
+
+def test_host_matching():
+    """En uzun eşleşen host yapılandırması seçilmeli"""
+    limiter = RateLimiter(limits=LIMITS, default=(1.0, 1, 0.0))
+    assert limiter.bucket_for("https://www.trendyol.com/x-p-1").rate == 10.0
+    assert limiter.bucket_for("https://public-mdc.trendyol.com/api").rate == 50.0
+    assert limiter.bucket_for("https://example.com/").rate == 1.0
+    assert limiter.bucket_for("https://www.trendyol.com/a") is limiter.bucket_for("https://trendyol.com/b")
+
+
+def test_burst_then_rate():
+    """Burst kadar istek beklemeden geçmeli, sonrakiler hıza göre beklemeli"""
+    print("🔍 Token bucket test ediliyor...")
+    bucket = TokenBucket(rate=10.0, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[0] == 0 and waits[1] == 0
+    assert 0.09 < waits[2] <= 0.11
+    assert 0.19 < waits[3] <= 0.21
+    print(f"✅ Bekleme süreleri: {[round(w, 3) for w in waits]}")
+
+
+def test_thread_safety():
+    """Eşzamanlı thread'ler aynı jetonu iki kez alamamalı"""
+    bucket = TokenBucket(rate=100.0, burst=1)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        wait = bucket.reserve()
+        with lock:
+            waits.append(wait)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Her rezervasyon bir öncekinden ~10ms sonraya düşmeli
+    waits.sort()
+    assert waits[0] == 0
+    assert waits[-1] >= 0.18
+
+
+def test_adaptive_slowdown_and_recovery():
+    """429/503 hızı yarıya indirmeli, başarılı yanıtlar kademeli geri kazandırmalı"""
+    limiter = RateLimiter(limits=LIMITS)
+    url = "https://www.trendyol.com/x-p-1"
+    bucket = limiter.bucket_for(url)
+
+    limiter.record(url, 429)
+    assert bucket.effective_rate == 5.0
+    limiter.record(url, 503)
+    assert bucket.effective_rate == 2.5
+    limiter.record(url, 404)
+    assert bucket.effective_rate == 2.5
+
+    for _ in range(100):
+        limiter.record(url, 200)
+    assert bucket.effective_rate == 10.0
+
+    limiter.record(url, 429, retry_after="0.5")
+    assert bucket.reserve() >= 0.4
+
+
+def test_async_acquire():
+    """Asenkron acquire event loop'u bloklamadan beklemeli"""
+    limiter = RateLimiter(limits={'trendyol.com': (20.0, 1, 0.0)})
+
+    async def run():
+        return await asyncio.gather(*(limiter.acquire_async("https://www.trendyol.com/") for _ in range(3)))
+
+    waits = sorted(asyncio.run(run()))
+    assert waits[0] == 0
+    assert 0.09 < waits[-1] <= 0.11
+
+
+if __name__ == "__main__":
+    test_parse_rate_limits()
+    test_host_matching()
+    test_burst_then_rate()
+    test_thread_safety()
+    test_adaptive_slowdown_and_recovery()
+    test_async_acquire()
+    print("🎉 Test tamamlandı!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bildirime dayalı çıkarım planı test dosyası
+Geçici site_structure.json dosyaları ve sentetik HTML kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import tempfile
+from metrics import metrics
+from scraper import TrendyolScraper
+from selector_plan import CompiledPlan, DEFAULT_SPEC, PlanStore, default_spec, parse_document
+from site_monitor import SiteMonitor, SiteStructure
+from strategy_stats import StrategyStats
+
+NEW_LAYOUT_PAGE = """<html><head><title>Lamba - Trendyol</title></head><body>
+<h2 class="urun-adi">Masa Lambası</h2><div class="fiyat-kutu"><b class="yeni-fiyat">349,90</b></div>
+<button data-testid="add-to-cart-button">Sepete Ekle</button></body></html>"""
+
+
+def _write_spec(path, spec):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'last_check': '2025-01-01T00:00:00', 'extraction': spec}, f, ensure_ascii=False)
+    # Aynı saniye içindeki iki yazım da değişiklik olarak algılansın
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def _scraper(store):
+    scraper = TrendyolScraper()
+    scraper.strategy_stats = StrategyStats(path=None)
+    scraper.plans = store
+    return scraper
+
+
+def test_repository_plan_matches_default():
+    """Depodaki site_structure.json planı derlenebilmeli ve varsayılanla aynı olmalı"""
+    print("📄 site_structure.json planı test ediliyor...")
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_structure.json')
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)['extraction']
+    assert spec == DEFAULT_SPEC
+    plan = CompiledPlan(spec)
+    assert plan.rule_ids('price') == ['testid_price', 'price_price', 'prc_dsc', 'campaign_price']
+    assert plan.fallback_ids('price') == ['text_search']
+    print("✅ Plan derlendi")
+
+
+def test_plan_hot_reload():
+    """Dosyadaki plan değişince yeni kurallar yeniden başlatmadan kullanılmalı, hatalı plan yüklenmemeli"""
+    print("🔄 Planın yeniden yüklenmesi test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'site_structure.json')
+        _write_spec(path, default_spec())
+        store = PlanStore(path=path, check_interval=0)
+        scraper = _scraper(store)
+
+        before = scraper._parse_page(NEW_LAYOUT_PAGE)
+        assert before['product_name'] == 'Lamba' and before['error'] == 'Could not extract price'
+
+        spec = default_spec()
+        spec['version'] = 2
+        spec['fields']['name'].insert(0, {'id': 'urun_adi', 'xpath': "//h2[@class='urun-adi']"})
+        spec['fields']['price'].insert(0, {'id': 'yeni_fiyat', 'xpath': "//b[@class='yeni-fiyat']"})
+        _write_spec(path, spec)
+        after = scraper._parse_page(NEW_LAYOUT_PAGE)
+        assert after['product_name'] == 'Masa Lambası' and after['price'] == 349.9
+        assert store.current().version == 2
+
+        errors = metrics.counters().get('plan.errors', 0)
+        spec['fields']['price'][0]['xpath'] = '//b[@class='
+        _write_spec(path, spec)
+        assert store.current().version == 2
+        assert metrics.counters().get('plan.errors', 0) == errors + 1
+        assert scraper._parse_page(NEW_LAYOUT_PAGE)['price'] == 349.9
+    print("✅ Yeni plan kod değişmeden uygulandı, hatalı plan reddedildi")
+
+
+def test_stock_rules():
+    """Stok kuralları buton metninden ve devre dışı butondan karar vermeli"""
+    print("📦 Stok kuralları test ediliyor...")
+    plan = CompiledPlan(DEFAULT_SPEC)
+    sold_out = parse_document('<html><body><button data-testid="add-to-cart-button">Tükendi</button></body></html>')
+    disabled = parse_document('<html><body><button class="add-to-cart" disabled>Sepete</button></body></html>')
+    in_stock = parse_document(NEW_LAYOUT_PAGE)
+    assert plan.sold_out(sold_out) is True
+    assert plan.sold_out(disabled) is True
+    assert plan.sold_out(in_stock) is False
+    assert plan.sold_out(parse_document('')) is False
+    print("✅ Stok durumu doğru")
+
+
+def test_site_monitor_keeps_plan_and_reports_misses():
+    """SiteMonitor kaydı planı silmemeli, planın bulamadığı alanları kritik değişiklik saymalı"""
+    print("🔍 SiteMonitor entegrasyonu test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'site_structure.json')
+        _write_spec(path, default_spec())
+        monitor = SiteMonitor()
+        monitor.monitor_file = path
+        monitor.plans = PlanStore(path=path, check_interval=0)
+
+        old = SiteStructure(True, [], [], [], [], 'a', '2025-01-01T00:00:00')
+        new = SiteStructure(True, [], [], [], [], 'a', '2025-01-03T00:00:00', plan_missing=['price'])
+        monitor.save_structure(new)
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['extraction'] == DEFAULT_SPEC and saved['plan_missing'] == ['price']
+
+        changes = monitor.compare_structures(old, new)
+        assert changes['has_changes']
+        assert any('price' in change for change in changes['critical_changes'])
+    print("✅ Plan korundu, eksik alan bildirildi")
+
+
+if __name__ == "__main__":
+    print("🚀 Çıkarım planı testleri başlatılıyor...\n")
+    test_repository_plan_matches_default()
+    test_plan_hot_reload()
+    test_stock_rules()
+    test_site_monitor_keeps_plan_and_reports_misses()
+    print("\n🎉 Tüm çıkarım planı testleri başarılı!")
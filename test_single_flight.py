@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ürün sorgusu tekil uçuş (single-flight) ve kısa süreli önbellek test dosyası
+Sahte API/scraper kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+import asyncio
+import threading
+from trendyol_api import TrendyolAPIFallback, SingleFlightCache, product_key
+
+URL = "https://www.trendyol.com/apple/iphone-15-128-gb-p-773358088?boutiqueId=61"
+
+
+class SlowScraper:
+    """Her çağrıyı sayan ve yavaş yanıt veren sahte scraper"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def scrape_product(self, url):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {'success': True, 'product_id': '773358088', 'name': 'iPhone 15', 'url': url,
+                'current_price': 49999.0, 'original_price': 49999.0}
+
+
+def test_product_key():
+    """URL, ID ve kanonik URL aynı anahtarı üretmeli"""
+    assert product_key(URL) == '773358088'
+    assert product_key('773358088') == '773358088'
+    assert product_key('https://www.trendyol.com/sr?q=iphone') == 'https://www.trendyol.com/sr?q=iphone'
+
+
+def test_concurrent_sync_callers_share_one_fetch():
+    """Eşzamanlı thread'ler tek bir scrape'i paylaşmalı, tekrar sorgular önbellekten gelmeli"""
+    print("🔍 Tekil uçuş (sync) test ediliyor...")
+    scraper = SlowScraper()
+    fallback = TrendyolAPIFallback(scraper=scraper, cache=SingleFlightCache(ttl=60))
+    results = []
+
+    def call(identifier):
+        results.append(fallback.get_product_info(identifier))
+
+    threads = [threading.Thread(target=call, args=(URL if i % 2 else '773358088',)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert scraper.calls == 1
+    assert len(results) == 8 and all(r['success'] for r in results)
+
+    # Sonuçlar kopya olmalı: bir çağıranın değişikliği diğerini etkilememeli
+    results[0]['name'] = 'değişti'
+    assert fallback.get_product_info(URL)['name'] == 'iPhone 15'
+    assert scraper.calls == 1
+    print("✅ 8 eşzamanlı çağrı, 1 scrape")
+
+
+def test_async_callers_and_ttl():
+    """Async çağıranlar birleştirilmeli, TTL dolunca yeniden çekilmeli"""
+    scraper = SlowScraper(delay=0.1)
+    fallback = TrendyolAPIFallback(scraper=scraper, cache=SingleFlightCache(ttl=0.3))
+
+    async def run():
+        return await asyncio.gather(*(fallback.get_product_info_async(URL) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert scraper.calls == 1
+    assert all(r['current_price'] == 49999.0 for r in results)
+
+    time.sleep(0.35)
+    fallback.get_product_info(URL)
+    assert scraper.calls == 2
+
+
+def test_failures_are_not_cached():
+    """Başarısız sonuçlar önbelleğe alınmamalı"""
+
+    class FailingScraper(SlowScraper):
+        def scrape_product(self, url):
+            self.calls += 1
+            return {'success': False, 'error': 'HTTP 503'}
+
+    scraper = FailingScraper()
+    fallback = TrendyolAPIFallback(scraper=scraper, cache=SingleFlightCache(ttl=60))
+    assert not fallback.get_product_info(URL)['success']
+    assert not fallback.get_product_info(URL)['success']
+    assert scraper.calls == 2
+
+
+if __name__ == "__main__":
+    test_product_key()
+    test_concurrent_sync_callers_share_one_fetch()
+    test_async_callers_and_ttl()
+    test_failures_are_not_cached()
+    print("🎉 Test tamamlandı!")
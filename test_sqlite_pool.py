@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite bağlantı havuzu test dosyası
+Geçici veritabanı kullanır.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+import tempfile
+import threading
+import time
+from database import Database
+from sqlite_pool import ConnectionPool, pool
+
+PRODUCT = {'product_id': '773358088', 'name': 'iPhone 15', 'url': 'https://www.trendyol.com/x-p-773358088',
+           'image_url': None, 'current_price': 100.0, 'original_price': 120.0}
+
+
+def test_pragmas():
+    """Bağlantılar WAL, synchronous=NORMAL ve busy_timeout ile açılmalı"""
+    print("⚙️ Pragmalar test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_pool = ConnectionPool()
+        conn = test_pool.acquire(os.path.join(tmp, 'test.sqlite'))
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] > 0
+        test_pool.release(conn)
+        test_pool.close_all()
+    print("✅ WAL ve pragmalar etkin")
+
+
+def test_reuse_and_thread_isolation():
+    """Bırakılan bağlantı yeniden verilmeli, aynı anda iki thread ayrı bağlantı almalı"""
+    print("♻️ Bağlantı yeniden kullanımı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        test_pool = ConnectionPool()
+        first = test_pool.acquire(path)
+        # Aynı thread içinde tekrar istenirse aynı bağlantı paylaşılır
+        assert test_pool.acquire(path) is first
+        test_pool.release(first)
+
+        other = {}
+        ready, done = threading.Event(), threading.Event()
+
+        def worker():
+            other['conn'] = test_pool.acquire(path)
+            ready.set()
+            done.wait(5)
+            test_pool.release(other['conn'])
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        ready.wait(5)
+        assert other['conn'] is not first
+        test_pool.release(first)
+        done.set()
+        thread.join()
+
+        # İstek başına açılan bağlantı yerine boştaki bağlantılardan biri verilir
+        assert test_pool.acquire(path) in (first, other['conn'])
+        test_pool.close_all()
+    print("✅ Bağlantılar yeniden kullanılıyor, thread'ler arasında paylaşılmıyor")
+
+
+def test_release_rolls_back_and_skips_replaced_file():
+    """Bırakılan bağlantının açık transaction'ı geri alınmalı; dosya değiştiyse eski bağlantı verilmemeli"""
+    print("↩️ Geri alma ve dosya değişimi test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        test_pool = ConnectionPool()
+        conn = test_pool.acquire(path)
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.execute('INSERT INTO t VALUES (1)')
+        test_pool.release(conn)
+        conn = test_pool.acquire(path)
+        assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+        test_pool.release(conn)
+
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        fresh = test_pool.acquire(path)
+        assert fresh is not conn
+        assert fresh.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 't'").fetchone()[0] == 0
+        test_pool.release(fresh)
+        test_pool.close_all()
+    print("✅ Transaction geri alındı, değişen dosya için yeni bağlantı açıldı")
+
+
+def test_reader_not_blocked_by_writer():
+    """Yazma transaction'ı açıkken okuma beklemeden tamamlanmalı"""
+    print("📖 Okuyucu/yazar eşzamanlılığı test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        writer = Database(db_name=path)
+        writer.add_product(PRODUCT, 'g1', 'u1', 'c1')
+        writer.cursor.execute('UPDATE catalog_products SET current_price = 90.0')
+
+        result = {}
+
+        def read():
+            reader = Database(db_name=path)
+            start = time.monotonic()
+            result['products'] = reader.get_all_products(guild_id='g1')
+            result['elapsed'] = time.monotonic() - start
+            reader.close()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(5)
+        assert result['elapsed'] < 0.5, result
+        # Okuyucu commit edilmemiş değişikliği görmez
+        assert result['products'][0]['current_price'] == 100.0
+        writer.conn.commit()
+        writer.close()
+    print(f"✅ Okuma {result['elapsed'] * 1000:.1f} ms'de tamamlandı")
+
+
+def test_database_reopen_skips_ddl():
+    """Aynı dosya için ikinci Database açılışı DDL çalıştırmamalı"""
+    print("🧱 Tekrar açılışta DDL test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.sqlite')
+        db = Database(db_name=path)
+        conn = db.conn
+        db.close()
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            db = Database(db_name=path)
+            assert db.conn is conn
+            db.close()
+        finally:
+            conn.set_trace_callback(None)
+        assert not [s for s in statements if 'CREATE' in s.upper()], statements
+    pool.close_all()
+    print("✅ Şema bu süreçte bir kez kontrol edildi")
+
+
+def test_lease_ownership():
+    """Kiralanan bağlantı başka thread'de, bırakılan bağlantı hiçbir yerde kullanılamamalı"""
+    print("🔐 Bağlantı sahipliği test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_pool = ConnectionPool()
+        conn = test_pool.acquire(os.path.join(tmp, 'test.sqlite'))
+        cursor = conn.cursor()
+        errors = []
+
+        def worker():
+            for use in (lambda: conn.execute('SELECT 1'), lambda: cursor.execute('SELECT 1'),
+                        conn.commit, lambda: test_pool.release(conn)):
+                try:
+                    use()
+                except sqlite3.ProgrammingError:
+                    errors.append(use)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert len(errors) == 4
+        assert cursor.execute('SELECT 1').fetchone() == (1,)
+
+        test_pool.release(conn)
+        try:
+            cursor.execute('SELECT 1')
+            assert False, "bırakılan bağlantı kullanılabildi"
+        except sqlite3.ProgrammingError:
+            pass
+        test_pool.close_all()
+    print("✅ Başka thread'in ve bırakılmış bağlantının kullanımı engellendi")
+
+
+def test_web_request_releases_on_error():
+    """Hata veren web isteğinde db.close() çalışmasa da bağlantı istek sonunda bırakılmalı"""
+    print("🌐 Web isteği sonunda bağlantı bırakma test ediliyor...")
+    import web_ui
+    dbs = []
+    try:
+        with web_ui.app.app_context():
+            dbs.append(web_ui.get_db())
+            dbs.append(web_ui.get_db())
+            raise RuntimeError('handler hatası')
+    except RuntimeError:
+        pass
+    assert all(db.conn is None for db in dbs)
+
+    # Context manager da hata durumunda bırakır
+    try:
+        with Database() as db:
+            raise RuntimeError('hata')
+    except RuntimeError:
+        pass
+    assert db.conn is None
+    pool.close_all()
+    print("✅ Bağlantılar havuza döndü")
+
+
+if __name__ == "__main__":
+    print("🚀 SQLite havuzu testleri başlatılıyor...\n")
+    test_pragmas()
+    test_reuse_and_thread_isolation()
+    test_release_rolls_back_and_skips_replaced_file()
+    test_reader_not_blocked_by_writer()
+    test_database_reopen_skips_ddl()
+    test_lease_ownership()
+    test_web_request_releases_on_error()
+    print("\n🎉 Tüm SQLite havuzu testleri başarılı!")
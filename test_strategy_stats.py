@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Düzen bazlı fiyat stratejisi istatistikleri ve dinamik sıralama test dosyası
+Geçici JSON dosyası ve sentetik HTML kullanır, ağ isteği yapmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tempfile
+from page_extractor import layout_fingerprint
+from scraper import TrendyolScraper, PRICE_STRATEGIES
+from strategy_stats import StrategyStats, MISS
+
+CAMPAIGN_PAGE = """<html><head><title>Boya - Trendyol</title></head><body>
+<h1 class="pr-new-br">Faber-Castell 24 Renk Kuru Boya</h1>
+<div class="pr-bx-w"><p class="campaign-price">89,90 TL</p></div></body></html>"""
+
+BROKEN_PAGE = """<html><head><title>Yeni - Trendyol</title></head><body>
+<h1 data-testid="product-name">Yeni Düzen Ürünü</h1><div class="yeni-fiyat">fiyat yok</div></body></html>"""
+
+
+class CountingScraper(TrendyolScraper):
+    """Hangi fiyat stratejilerinin denendiğini kaydeden scraper"""
+
+    def __init__(self, stats):
+        super().__init__()
+        self.strategy_stats = stats
+        self.tried = []
+
+    def _price_strategy(self, plan, name, doc):
+        self.tried.append(name)
+        return super()._price_strategy(plan, name, doc)
+
+
+def test_winning_strategy_moves_first():
+    """Bir düzende sürekli kazanan strateji yeterli örnekten sonra ilk denenmeli"""
+    print("🧩 Dinamik strateji sıralaması test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = StrategyStats(path=os.path.join(tmp, 'stats.json'), min_samples=3)
+        scraper = CountingScraper(stats)
+        fingerprint = layout_fingerprint(CAMPAIGN_PAGE)
+        assert fingerprint == 'campaign+newbr'
+
+        for _ in range(3):
+            scraper.tried.clear()
+            result = scraper._parse_page(CAMPAIGN_PAGE)
+            assert result['price'] == 89.9
+        # Varsayılan sırada campaign_price dördüncü
+        assert scraper.tried == list(PRICE_STRATEGIES)
+
+        scraper.tried.clear()
+        assert scraper._parse_page(CAMPAIGN_PAGE)['price'] == 89.9
+        assert scraper.tried == ['campaign_price']
+        print(f"✅ Denenen strateji sayısı {len(PRICE_STRATEGIES)} -> 1")
+
+
+def test_stats_persist_and_merge():
+    """Sayılar diske yazılmalı, yeni örnek ve başka süreçlerin sayıları birleşmeli"""
+    print("💾 Kalıcılık test ediliyor...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stats.json')
+        first, second = StrategyStats(path=path), StrategyStats(path=path)
+        for _ in range(4):
+            first.record('ld+testid', 'json_ld')
+        second.record('ld+testid', 'testid_price')
+        first.save()
+        second.save()
+
+        reloaded = StrategyStats(path=path)
+        layout = reloaded.distribution()['ld+testid']
+        assert layout['pages'] == 5
+        assert layout['strategies'] == {'json_ld': 80.0, 'testid_price': 20.0}
+        print("✅ İki sürecin sayıları birleşti")
+
+
+def test_miss_rate_flags_markup_shift():
+    """Fiyatın bulunamadığı düzen uyarı listesine girmeli"""
+    print("⚠️ Markup değişikliği uyarısı test ediliyor...")
+    stats = StrategyStats(path=None, min_samples=3)
+    scraper = TrendyolScraper()
+    scraper.strategy_stats = stats
+    for _ in range(3):
+        assert scraper._parse_page(BROKEN_PAGE)['error'] == 'Could not extract price'
+    fingerprint = layout_fingerprint(BROKEN_PAGE)
+    assert stats.distribution()[fingerprint]['strategies'] == {MISS: 100.0}
+    assert stats.shifted_layouts() == [fingerprint]
+    print(f"✅ Uyarı verilen düzen: {fingerprint}")
+
+
+if __name__ == "__main__":
+    print("🚀 Strateji istatistik testleri başlatılıyor...\n")
+    test_winning_strategy_moves_first()
+    test_stats_persist_and_merge()
+    test_miss_rate_flags_markup_shift()
+    print("\n🎉 Tüm strateji istatistik testleri başarılı!")
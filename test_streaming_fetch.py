@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Akışlı sayfa indirme ve erken kesme test dosyası
+Yerel HTTP sunucuları kullanır, Trendyol'a istek atmaz.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from aiohttp import web
+
+import page_extractor
+from async_scraper import AsyncHTTPPool
+from metrics import metrics
+from page_extractor import StreamScanner
+from scraper import TrendyolScraper
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages', 'instock_jsonld.html')
+with open(FIXTURE, encoding='utf-8') as f:
+    HEAD_PART = f.read().split('<section class="recommendation">')[0]
+# Yorumlar ve öneriler: fiyat bilgisinden sonra gelen, indirilmesi gereksiz kısım
+TAIL = ''.join(f'<div class="comment">Yorum {i}: Ürün çok güzel, hızlı kargo. ' + 'x' * 200 + '</div>'
+               for i in range(1000))
+PAGE = (HEAD_PART + TAIL + '</body></html>').encode('utf-8')
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        try:
+            for i in range(0, len(PAGE), 4096):
+                self.wfile.write(PAGE[i:i + 4096])
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # İstemci sayfa bitmeden kapattı
+
+    def log_message(self, *args):
+        pass
+
+
+def test_scanner_stops_after_required_fields():
+    """Tarayıcı gerekli alanlar gelince durmalı, eksik sayfada devam etmeli"""
+    print("🔎 Artımlı tarayıcı test ediliyor...")
+    scanner = StreamScanner(content_length=len(PAGE))
+    stopped_at = None
+    for i in range(0, len(PAGE), 4096):
+        if scanner.feed(PAGE[i:i + 4096]):
+            stopped_at = i + 4096
+            break
+    assert stopped_at is not None and stopped_at < len(PAGE) / 4
+    text = scanner.finish(aborted=True)
+    assert '"originalPrice"' in text and 'Yorum 999' not in text
+
+    # Orijinal fiyatın geleceği state blob yoksa sonuna kadar okunmalı
+    partial = StreamScanner(content_length=len(PAGE))
+    no_state = PAGE.replace(b'productDetail', b'other')
+    assert not any(partial.feed(no_state[i:i + 4096]) for i in range(0, len(no_state), 4096))
+    print(f"✅ {len(PAGE)} baytlık sayfada {stopped_at} baytta duruldu")
+
+
+def test_scanner_matches_full_extraction():
+    """Artımlı tarama her parçada tüm metni baştan tarayan hızlı yolla aynı kararı vermeli"""
+    print("🧩 Artımlı tarama doğruluğu test ediliyor...")
+    pages_dir = os.path.dirname(FIXTURE)
+    checked = 0
+    for name in sorted(os.listdir(pages_dir)):
+        with open(os.path.join(pages_dir, name), encoding='utf-8') as f:
+            page = f.read().encode('utf-8')
+        for size in (7, 64, 1000):
+            scanner = StreamScanner(content_length=len(page))
+            for i in range(0, len(page), size):
+                scanner.feed(page[i:i + size])
+                prefix = page[:i + size].decode('utf-8', 'ignore')
+                assert scanner.complete == page_extractor.stream_complete(page_extractor.fast_extract(prefix)), (name, i)
+                checked += 1
+                if scanner.complete:
+                    break
+    print(f"✅ {checked} parçada aynı karar")
+
+
+def test_sync_stream_aborts_and_reports_savings():
+    """requests ile akışlı okuma bağlantıyı erken kapatmalı ve tasarrufu yazmalı"""
+    print("📉 Senkron akışlı indirme test ediliyor...")
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scraper = TrendyolScraper()
+        before = metrics.counters()
+        response = requests.get(f'http://127.0.0.1:{server.server_port}/urun-p-773358088', stream=True, timeout=5)
+        html = scraper._read_page(response)
+        counters = metrics.diff(before, metrics.counters())
+    finally:
+        server.shutdown()
+
+    parsed = scraper._parse_page(html)
+    assert parsed['price'] == 49999.0 and parsed['original_price'] == 54999.0
+    assert parsed['image_url'] and parsed['error'] is None
+    assert counters['stream.aborted'] == 1
+    assert counters['stream.bytes_read'] < len(PAGE) / 2
+    assert counters['stream.bytes_saved'] == len(PAGE) - counters['stream.bytes_read']
+    print(f"✅ {counters['stream.bytes_saved']:.0f} bayt indirilmedi")
+
+
+async def _run_async_stream():
+    async def handler(request):
+        response = web.StreamResponse(headers={'Content-Type': 'text/html; charset=utf-8'})
+        await response.prepare(request)
+        try:
+            for i in range(0, len(PAGE), 4096):
+                await response.write(PAGE[i:i + 4096])
+                await asyncio.sleep(0)
+        except (ConnectionResetError, RuntimeError):
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_get('/urun-p-1', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    pool = AsyncHTTPPool(pool_size=4, per_host=2)
+    page_extractor._full_page_sizes.clear()
+    url = f'http://127.0.0.1:{port}/urun-p-1'
+    try:
+        # İlk akış boyut bilinmediği için sonuna kadar okunur (tahmin için), ikincisi kesilir
+        first = await pool.stream(url, chunk_size=4096)
+        before = metrics.counters()
+        second = await pool.stream(url, chunk_size=4096)
+        counters = metrics.diff(before, metrics.counters())
+    finally:
+        await pool.close()
+        await runner.cleanup()
+    return first, second, counters
+
+
+def test_async_stream_calibrates_then_aborts():
+    """Chunked yanıtta ilk sayfa tam okunmalı, sonrakiler erken kesilip tahmini tasarruf yazılmalı"""
+    print("⚡ Asenkron akışlı indirme test ediliyor...")
+    first, second, counters = asyncio.run(_run_async_stream())
+    assert first[0] == 200 and len(first[2].encode('utf-8')) == len(PAGE)
+    assert second[0] == 200 and len(second[2]) < len(first[2]) / 2
+    assert counters['stream.aborted'] == 1
+    assert counters['stream.bytes_saved'] > len(PAGE) / 2
+    parsed = TrendyolScraper()._parse_page(second[2])
+    assert parsed['price'] == 49999.0 and parsed['original_price'] == 54999.0
+    print(f"✅ Tahmini tasarruf {counters['stream.bytes_saved']:.0f} bayt")
+
+
+def test_stream_report():
+    """Akış özeti dönemdeki erken kesilen sayfaları ve indirilmeyen veriyi vermeli"""
+    print("📝 Akış özeti test ediliyor...")
+    period = {'stream.pages': 10, 'stream.aborted': 4, 'stream.bytes_saved': 4096}
+    assert page_extractor.stream_report(period) == \
+        'Akışlı indirme: indirilmeyen veri 4 KB (4/10 sayfa erken kesildi)'
+    assert page_extractor.stream_report({}) is None
+    assert metrics.reports(period)['stream'] == page_extractor.stream_report(period)
+    print("✅ Akış özeti kayıtlı")
+
+
+if __name__ == "__main__":
+    print("🚀 Akışlı indirme testleri başlatılıyor...\n")
+    test_scanner_stops_after_required_fields()
+    test_scanner_matches_full_extraction()
+    test_sync_stream_aborts_and_reports_savings()
+    test_async_stream_calibrates_then_aborts()
+    test_stream_report()
+    print("\n🎉 Tüm akışlı indirme testleri başarılı!")
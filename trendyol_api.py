@@ -1,6 +1,8 @@
 import requests
+import asyncio
 import json
 import os
+import re
 import logging
 import time
 from datetime import datetime
@@ -8,10 +10,41 @@ from typing import Dict, List, Optional
 import hashlib
 import hmac
 import base64
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from link_resolver import short_link_cache, is_short_link, short_code, canonical_product_url, product_id_from_url
+from rate_limiter import rate_limiter
+from metrics import metrics
+from circuit_breaker import BreakerRegistry, breakers
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Aynı ürün için tekrar eden sorguları bu süre (saniye) boyunca ağa gitmeden yanıtla
+PRODUCT_CACHE_TTL = int(os.getenv('PRODUCT_CACHE_TTL', 60))
+PRODUCT_CACHE_SIZE = int(os.getenv('PRODUCT_CACHE_SIZE', 1000))
+# Hedge modu: birincil kaynak gecikirse ikinci kaynak paralel başlatılır, ilk başarılı sonuç alınır
+HEDGED_REQUESTS = os.getenv('HEDGED_REQUESTS', 'False').lower() == 'true'
+# Bekleme süresi birincil kaynağın son gecikmelerinin bu yüzdeliğidir
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 90))
+# Yeterli gecikme örneği birikene kadar kullanılan bekleme süresi (saniye)
+HEDGE_DEFAULT_DELAY = float(os.getenv('HEDGE_DEFAULT_DELAY', 2.0))
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.2
+# Senkron hedge için kaynak çağrılarını çalıştıran thread sayısı
+HEDGE_WORKERS = 16
+
+# Kaynağın değil ürünün durumunu bildiren hatalar: kaynak yanıt verdi, devre kesici için başarıdır
+PRODUCT_ERRORS = frozenset({
+    'Tükendi', 'Invalid URL or Product ID', 'URL does not belong to Trendyol',
+    'Could not extract price', 'Could not extract product name',
+    'Geçersiz ürün ID veya URL', 'Geçersiz Trendyol URL',
+})
+# Kaynak arızası sayılan istisnalar: bağlantı hataları ve zaman aşımları
+TRANSPORT_ERRORS = (requests.exceptions.RequestException, OSError, asyncio.TimeoutError, TimeoutError)
+_HTTP_STATUS = re.compile(r'HTTP (\d{3})')
+
 class TrendyolAPI:
     """
     Trendyol Marketplace API entegrasyonu
@@ -44,6 +77,16 @@ class TrendyolAPI:
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        self.link_cache = short_link_cache
+        self.rate_limiter = rate_limiter
+        self.breakers = breakers
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Session isteğini host'un hız sınırından geçirir ve yanıt durumunu bildirir"""
+        self.rate_limiter.acquire(url)
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
+        return response
     
     def _generate_signature(self, method: str, url: str, timestamp: str) -> str:
         """API imzası oluşturur"""
@@ -84,9 +127,9 @@ class TrendyolAPI:
             
             # İstek yap
             if method.upper() == 'GET':
-                response = self.session.get(url, timeout=self.timeout)
+                response = self._request('GET', url)
             elif method.upper() == 'POST':
-                response = self.session.post(url, json=data, timeout=self.timeout)
+                response = self._request('POST', url, json=data)
             else:
                 raise ValueError(f"Desteklenmeyen HTTP method: {method}")
             
@@ -104,13 +147,35 @@ class TrendyolAPI:
         """Public API isteği yapar (kimlik doğrulama gerektirmez)"""
         try:
             url = f"{self.base_url}{endpoint}"
-            response = self.session.get(url, timeout=self.timeout)
+            response = self._request('GET', url)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Public API isteği hatası: {e}")
             return None
     
+    def _guarded(self, name: str, call):
+        """
+        Alt endpoint çağrısını devre kesiciden geçirir
+
+        Devre açıksa istek yapılmadan None döner; None dışındaki yanıtlar başarı sayılır.
+        """
+        breaker = self.breakers.get(name)
+        if not breaker.allow():
+            logger.debug(f"Devre açık, endpoint atlandı: {name}")
+            return None
+        start = time.monotonic()
+        try:
+            result = call()
+        except Exception:
+            breaker.record_failure(time.monotonic() - start)
+            raise
+        if result is None:
+            breaker.record_failure(time.monotonic() - start)
+        else:
+            breaker.record_success(time.monotonic() - start)
+        return result
+    
     def get_product_by_id(self, product_id: str) -> Optional[dict]:
         """
         Ürün ID'si ile ürün bilgilerini getirir
@@ -127,13 +192,13 @@ class TrendyolAPI:
             # Önce supplier products endpoint'ini dene (authenticated)
             if self.api_key and self.api_secret and self.supplier_id:
                 endpoint = f"/sapigw/suppliers/{self.supplier_id}/products/{product_id}"
-                result = self._make_authenticated_request('GET', endpoint)
+                result = self._guarded('api.supplier', lambda: self._make_authenticated_request('GET', endpoint))
                 
                 if result:
                     return self._parse_supplier_product(result, product_id)
             
             # Public search endpoint'ini dene
-            search_result = self.search_products(product_id)
+            search_result = self._guarded('api.search', lambda: self.search_products(product_id))
             if search_result and search_result.get('products'):
                 for product in search_result['products']:
                     if str(product.get('id')) == str(product_id):
@@ -141,13 +206,13 @@ class TrendyolAPI:
             
             # Alternatif public endpoint'ler
             public_endpoints = [
-                f"/api/v1/product/{product_id}",
-                f"/api/product/{product_id}",
-                f"/public/product/{product_id}"
+                ('api.public_v1', f"/api/v1/product/{product_id}"),
+                ('api.public_product', f"/api/product/{product_id}"),
+                ('api.public', f"/public/product/{product_id}")
             ]
             
-            for endpoint in public_endpoints:
-                result = self._make_public_request(endpoint)
+            for name, endpoint in public_endpoints:
+                result = self._guarded(name, lambda: self._make_public_request(endpoint))
                 if result:
                     return self._parse_public_product(result, product_id)
             
@@ -179,7 +244,7 @@ class TrendyolAPI:
             }
             
             url = f"{self.base_url}{endpoint}"
-            response = self.session.get(url, params=params, timeout=self.timeout)
+            response = self._request('GET', url, params=params)
             
             if response.status_code == 200:
                 return response.json()
@@ -287,16 +352,14 @@ class TrendyolAPI:
             if url.isdigit():
                 return url
             
-            # Kısaltılmış link ise önce tam URL'yi al
-            if 'ty.gl' in url or 'tyml.gl' in url:
+            # Kısaltılmış link ise önce tam URL'yi al (kalıcı önbellekten)
+            if is_short_link(url):
                 logger.info(f"Kısaltılmış API linkten ID çıkarılıyor: {url}")
-                try:
-                    import requests
-                    response = requests.head(url, allow_redirects=True, timeout=10)
-                    url = response.url
-                    logger.info(f"API tam URL alındı: {url}")
-                except Exception as e:
-                    logger.warning(f"Kısaltılmış link çözülemedi: {e}")
+                cached = self.link_cache.get(url)
+                if cached and cached.get('product_id'):
+                    return cached['product_id']
+                url = self.link_cache.resolve(url, self._follow_redirects)
+                logger.info(f"API tam URL alındı: {url}")
             
             import re
             patterns = [
@@ -321,6 +384,17 @@ class TrendyolAPI:
             logger.error(f"URL'den ID çıkarma hatası: {e}")
             return None
     
+    def _follow_redirects(self, url: str) -> str:
+        """Kısaltılmış linkin yönlendirmelerini takip ederek tam URL'yi döndürür"""
+        try:
+            self.rate_limiter.acquire(url)
+            response = requests.head(url, allow_redirects=True, timeout=10)
+            self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
+            return response.url
+        except Exception as e:
+            logger.warning(f"Kısaltılmış link çözülemedi: {e}")
+            return url
+    
     def is_valid_url(self, url: str) -> bool:
         """URL'nin geçerli olup olmadığını kontrol eder"""
         if url.isdigit():
@@ -372,39 +446,437 @@ class TrendyolAPI:
             return {'success': False, 'error': f'Hata: {str(e)}'}
 
 
+def source_outcome(result: Optional[dict], error: Exception = None) -> Optional[bool]:
+    """
+    Kaynak denemesinin devre kesici için anlamı: True başarı, False kaynak arızası, None nötr
+
+    Yalnızca bağlantı hataları, zaman aşımları, 5xx ve 429 arızadır. Ürün düzeyindeki sonuçlar
+    (tükendi, geçersiz URL, fiyat çıkarılamadı, kaldırılmış ürün için 404 gibi) kaynağın yanıt verdiğini
+    gösterir ve başarı sayılır; sınıflandırılamayan sonuçlar devreyi etkilemez.
+    """
+    if error is not None:
+        return False if isinstance(error, TRANSPORT_ERRORS) else None
+    if result and result.get('success'):
+        return True
+    message = str((result or {}).get('error') or '')
+    status = _HTTP_STATUS.search(message)
+    if status:
+        code = int(status.group(1))
+        return not (code >= 500 or code == 429)
+    if 'Unexpected error' in message:
+        # Scraper'ların deneme döngüsü bağlantı/zaman aşımı istisnalarını bu mesajla döndürür
+        return False
+    if message in PRODUCT_ERRORS:
+        return True
+    return None
+
+
+def hedge_report(period: dict) -> Optional[str]:
+    """Dönemdeki hedge (yedek istek) özeti (dönemde hedge'li istek yoksa None)"""
+    if not period.get('hedge.requests'):
+        return None
+    saved = metrics.summary('hedge.saved_seconds')
+    return (f"Hedge: {period.get('hedge.fired', 0):.0f}/{period['hedge.requests']:.0f} istek "
+            f"(ikincil kaynak kazandı {period.get('hedge.won.secondary', 0):.0f}, "
+            f"kazanılan süre p50={saved['p50'] or 0:.2f} p99={saved['p99'] or 0:.2f} sn)")
+
+
+metrics.add_report('hedge', hedge_report)
+
+
+def product_key(url_or_id: str) -> str:
+    """
+    Ürün sorgusu için ağ isteği yapmadan anahtar üretir
+
+    Ürün ID'si çıkarılabiliyorsa (çıplak ID, kanonik URL, önbellekteki kısa link)
+    anahtar ID'dir; aksi halde normalize edilmiş link kullanılır.
+    """
+    url_or_id = (url_or_id or '').strip()
+    if url_or_id.isdigit():
+        return url_or_id
+    canonical = canonical_product_url(url_or_id)
+    if canonical:
+        return product_id_from_url(canonical) or canonical
+    if is_short_link(url_or_id):
+        cached = short_link_cache.get(url_or_id)
+        if cached and cached.get('product_id'):
+            return cached['product_id']
+        return short_code(url_or_id)
+    return url_or_id
+
+
+class SingleFlightCache:
+    """
+    Eşzamanlı ürün sorgularını birleştiren, sonuçları kısa süre saklayan katman
+
+    Aynı anahtar için yürüyen bir sorgu varsa yeni çağıranlar onun sonucunu bekler
+    (sync çağıranlar thread'de, async çağıranlar event loop'ta). Başarılı sonuçlar
+    `ttl` saniye boyunca ağa gitmeden döndürülür. Sonuçlar her çağırana kopya olarak verilir.
+    """
+
+    def __init__(self, ttl: int = PRODUCT_CACHE_TTL, max_size: int = PRODUCT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._results = OrderedDict()
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key: str) -> Optional[dict]:
+        entry = self._results.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self._results.move_to_end(key)
+            return entry[1]
+        return None
+
+    def _join(self, key: str):
+        """(önbellek sonucu, beklenecek future, lider mi) döndürür"""
+        with self._lock:
+            cached = self._cached(key)
+            if cached:
+                metrics.incr('product_fetch.cache_hit')
+                return dict(cached), None, False
+            flight = self._flights.get(key)
+            if flight:
+                metrics.incr('product_fetch.coalesced')
+                return None, flight, False
+            flight = Future()
+            self._flights[key] = flight
+            metrics.incr('product_fetch.miss')
+            return None, flight, True
+
+    def _finish(self, key: str, flight: Future, result: dict = None, error: Exception = None):
+        with self._lock:
+            if result and result.get('success') and self.ttl > 0:
+                self._results[key] = (time.monotonic(), result)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+            self._flights.pop(key, None)
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(result)
+
+    def get(self, key: str, fetch) -> dict:
+        """`fetch()` sonucunu tekil uçuş ve önbellek üzerinden döndürür (bloklayan sürüm)"""
+        cached, flight, leader = self._join(key)
+        if cached:
+            return cached
+        if not leader:
+            return dict(flight.result())
+        try:
+            result = fetch()
+        except Exception as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, result)
+        return dict(result)
+
+    async def get_async(self, key: str, fetch) -> dict:
+        """`await fetch()` sonucunu tekil uçuş ve önbellek üzerinden döndürür"""
+        cached, flight, leader = self._join(key)
+        if cached:
+            return cached
+        if not leader:
+            return dict(await asyncio.wrap_future(flight))
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            # Lider iptal edilse bile bekleyenler serbest kalmalı
+            self._finish(key, flight, {'success': False, 'error': 'Sorgu iptal edildi'})
+            raise
+        except Exception as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, result)
+        return dict(result)
+
+    def invalidate(self, key: str):
+        """Anahtarın önbellekteki sonucunu siler"""
+        with self._lock:
+            self._results.pop(key, None)
+
+
 class TrendyolAPIFallback:
     """
     Trendyol API için fallback sınıfı
     API çalışmadığında scraping'e geri döner
+    
+    Aynı ürün için eşzamanlı sorgular tek bir ağ isteğinde birleştirilir ve
+    sonuç PRODUCT_CACHE_TTL saniye boyunca önbellekten verilir.
+
+    Hedge modunda birincil kaynak `hedge_delay` içinde yanıt vermezse sıradaki kaynak
+    paralel başlatılır; ilk başarılı sonuç döner, diğeri iptal edilir (senkron yolda
+    çalışan thread durdurulamaz, sonucu yok sayılır).
     """
     
-    def __init__(self, api_client: TrendyolAPI = None, scraper = None):
+    def __init__(self, api_client: TrendyolAPI = None, scraper = None, async_scraper = None,
+                 cache: SingleFlightCache = None, breaker_registry: BreakerRegistry = None,
+                 hedged: bool = HEDGED_REQUESTS):
         self.api_client = api_client
         self.scraper = scraper
+        self.async_scraper = async_scraper
+        self.cache = cache or SingleFlightCache()
+        self.breakers = breaker_registry or breakers
+        self.hedged = hedged
+        self._hedge_executor = None
+    
+    def _with_canonical_url(self, url_or_id: str, result: dict) -> dict:
+        """
+        Kısaltılmış linkle gelen sonuçlarda URL'yi çözümlenmiş kanonik URL ile değiştirir,
+        böylece veritabanına kaydedilen URL periyodik kontrollerde tekrar çözülmez.
+        """
+        if is_short_link(url_or_id):
+            cached = short_link_cache.get(url_or_id)
+            if cached:
+                result['url'] = cached['canonical_url']
+        return result
         
     def get_product_info(self, url_or_id: str) -> dict:
         """
         Önce API'yi dener, başarısız olursa scraping'e geçer
+
+        Event loop içinden çağrılmamalıdır; async kod get_product_info_async kullanmalı.
+        """
+        return self.cache.get(product_key(url_or_id), lambda: self._fetch_product_info(url_or_id))
+
+    def _route(self, async_mode: bool = False) -> List[str]:
+        """Yapılandırılmış kaynakları son başarı oranı ve gecikmeye göre sıralar (eşitlikte önce API)"""
+        sources = []
+        if self.api_client:
+            sources.append('api')
+        if self.scraper or (async_mode and self.async_scraper):
+            sources.append('scraper')
+        return self.breakers.rank(sources, group='product_info')
+
+    def hedge_delay(self, source: str) -> float:
+        """İkinci kaynağı başlatmadan önce birincil kaynağın bekleneceği süre (son gecikmelerin p90'ı)"""
+        name = f'source.{source}.seconds'
+        if metrics.summary(name)['count'] < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, metrics.percentile(name, HEDGE_PERCENTILE))
+
+    def _record_hedge(self, primary: str, winner: Optional[str], elapsed: float):
+        """Hedge edilen isteğin kazananını ve kazanılan kuyruk gecikmesini kaydeder"""
+        metrics.observe('hedge.latency_seconds', elapsed)
+        if winner is None:
+            return
+        metrics.incr('hedge.won.primary' if winner == primary else 'hedge.won.secondary')
+        if winner != primary:
+            # Birincil kaynak en az `elapsed` sürecekti; bu kadar yavaş isteklerin medyanı tahmini bitiş
+            slower = sorted(v for v in metrics.samples(f'source.{primary}.seconds') if v > elapsed)
+            if slower:
+                metrics.observe('hedge.saved_seconds', slower[len(slower) // 2] - elapsed)
+
+    def _attempt(self, source: str, call) -> Optional[dict]:
+        """Tek kaynağı dener ve sonucu devre kesiciye yazar; başarısızsa None"""
+        breaker = self.breakers.get(source)
+        logger.info(f"{source} ile deneniyor...")
+        start = time.monotonic()
+        error = None
+        try:
+            result = call()
+        except Exception as e:
+            logger.error(f"{source} hatası: {e}")
+            result, error = None, e
+        except BaseException:
+            breaker.release()
+            raise
+        return self._settle(source, result, error, time.monotonic() - start)
+
+    def _settle(self, source: str, result: Optional[dict], error: Optional[Exception],
+                elapsed: float) -> Optional[dict]:
+        """Deneme sonucunu `source_outcome` ile devre kesiciye yazar; nötr sonuçta deneme hakkı geri verilir"""
+        breaker = self.breakers.get(source)
+        outcome = source_outcome(result, error)
+        if outcome is True:
+            breaker.record_success(elapsed)
+        elif outcome is False:
+            breaker.record_failure(elapsed)
+        else:
+            breaker.release()
+        if result and result.get('success'):
+            return result
+        logger.warning(f"{source} başarısız, sıradaki kaynağa geçiliyor...")
+        return None
+
+    def _allowed(self, sources: List[str]) -> List[str]:
+        """Devresi açık kaynakları atlayarak sıradaki kaynakları döndürür (half-open deneme hakkı alınır)"""
+        while sources:
+            source = sources.pop(0)
+            if self.breakers.get(source).allow():
+                return [source] + sources
+            logger.info(f"Devre açık, kaynak atlandı: {source}")
+        return []
+
+    def _fetch_product_info(self, url_or_id: str) -> dict:
+        """
+        Kaynak zincirini önbelleğe bakmadan çalıştırır
+
+        Kaynaklar skora göre sıralanır; devresi açık olan kaynak bekleme süresince atlanır.
         """
         try:
-            # Önce API'yi dene
-            if self.api_client:
-                logger.info("API ile deneniyor...")
-                result = self.api_client.get_product_info(url_or_id)
-                if result and result.get('success'):
-                    return result
-                logger.warning("API başarısız, scraping'e geçiliyor...")
-            
-            # API başarısız olursa scraping'e geç
-            if self.scraper:
-                logger.info("Scraping ile deneniyor...")
-                result = self.scraper.scrape_product(url_or_id)
-                if result and result.get('success'):
-                    result['source'] = 'scraping'
-                    return result
+            calls = {
+                'api': lambda: self.api_client.get_product_info(url_or_id),
+                'scraper': lambda: self.scraper.scrape_product(url_or_id),
+            }
+            sources = self._route()
+            if self.hedged and len(sources) > 1:
+                return self._fetch_hedged(url_or_id, sources, calls)
+
+            while True:
+                sources = self._allowed(sources)
+                if not sources:
+                    break
+                source = sources.pop(0)
+                result = self._attempt(source, calls[source])
+                if result:
+                    return self._finish_result(source, url_or_id, result)
             
             return {'success': False, 'error': 'Hem API hem scraping başarısız'}
             
         except Exception as e:
             logger.error(f"Fallback hatası: {e}")
-            return {'success': False, 'error': f'Fallback hatası: {str(e)}'}
\ No newline at end of file
+            return {'success': False, 'error': f'Fallback hatası: {str(e)}'}
+
+    def _fetch_hedged(self, url_or_id: str, sources: List[str], calls: dict) -> dict:
+        """Senkron hedge: kaynaklar thread havuzunda çalışır, kaybedenin sonucu yok sayılır"""
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+        metrics.incr('hedge.requests')
+        start = time.monotonic()
+        primary, hedged = None, False
+        pending = {}
+
+        def launch():
+            nonlocal sources, primary
+            sources = self._allowed(sources)
+            if sources:
+                source = sources.pop(0)
+                primary = primary or source
+                pending[self._hedge_executor.submit(self._attempt, source, calls[source])] = source
+
+        launch()
+        while pending:
+            delay = None
+            if sources and not hedged:
+                delay = max(0.0, self.hedge_delay(primary) - (time.monotonic() - start))
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                metrics.incr('hedge.fired')
+                launch()
+                continue
+            for future in done:
+                source = pending.pop(future)
+                result = future.result()
+                if result:
+                    if pending:
+                        metrics.incr('hedge.abandoned', len(pending))
+                    self._record_hedge(primary, source if hedged else None, time.monotonic() - start)
+                    return self._finish_result(source, url_or_id, result)
+            if not pending:
+                launch()
+
+        self._record_hedge(primary, None, time.monotonic() - start)
+        return {'success': False, 'error': 'Hem API hem scraping başarısız'}
+
+    def _finish_result(self, source: str, url_or_id: str, result: dict) -> dict:
+        if source == 'scraper':
+            result['source'] = 'scraping'
+        metrics.incr(f'route.served.{source}')
+        return self._with_canonical_url(url_or_id, result)
+
+    async def get_product_info_async(self, url_or_id: str) -> dict:
+        """
+        get_product_info'nun asenkron karşılığı
+        API çağrısı thread'de çalışır; scraping için varsa asenkron scraper
+        (paylaşılan bağlantı havuzu) kullanılır.
+        """
+        return await self.cache.get_async(product_key(url_or_id), lambda: self._fetch_product_info_async(url_or_id))
+
+    async def _attempt_async(self, source: str, call) -> Optional[dict]:
+        """_attempt'in asenkron karşılığı; iptal edilen denemenin devre hakkı geri verilir"""
+        breaker = self.breakers.get(source)
+        logger.info(f"{source} ile deneniyor...")
+        start = time.monotonic()
+        error = None
+        try:
+            result = await call(source)
+        except Exception as e:
+            logger.error(f"{source} hatası: {e}")
+            result, error = None, e
+        except BaseException:
+            # asyncio.CancelledError dahil
+            breaker.release()
+            raise
+        return self._settle(source, result, error, time.monotonic() - start)
+
+    async def _fetch_product_info_async(self, url_or_id: str) -> dict:
+        """
+        Asenkron kaynak zincirini önbelleğe bakmadan, skor sırasıyla çalıştırır
+
+        Hedge modunda birincil kaynak gecikirse sıradaki kaynak paralel başlatılır ve
+        ilk başarılı sonuçtan sonra diğer görev iptal edilir.
+        """
+        try:
+            async def call(source):
+                if source == 'api':
+                    return await asyncio.to_thread(self.api_client.get_product_info, url_or_id)
+                if self.async_scraper:
+                    return await self.async_scraper.scrape_product(url_or_id)
+                return await asyncio.to_thread(self.scraper.scrape_product, url_or_id)
+
+            sources = self._route(async_mode=True)
+            hedging = self.hedged and len(sources) > 1
+            if hedging:
+                metrics.incr('hedge.requests')
+            start = time.monotonic()
+            primary, hedged = None, False
+            pending = {}
+
+            def launch():
+                nonlocal sources, primary
+                sources = self._allowed(sources)
+                if sources:
+                    source = sources.pop(0)
+                    primary = primary or source
+                    pending[asyncio.ensure_future(self._attempt_async(source, call))] = source
+
+            launch()
+            try:
+                while pending:
+                    delay = None
+                    if hedging and sources and not hedged:
+                        delay = max(0.0, self.hedge_delay(primary) - (time.monotonic() - start))
+                    done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        hedged = True
+                        metrics.incr('hedge.fired')
+                        launch()
+                        continue
+                    for task in done:
+                        source = pending.pop(task)
+                        result = task.result()
+                        if result:
+                            if hedging:
+                                self._record_hedge(primary, source if hedged else None, time.monotonic() - start)
+                            return self._finish_result(source, url_or_id, result)
+                    if not pending:
+                        launch()
+            finally:
+                # Kazanan bulunduğunda (veya çağıran iptal edildiğinde) kalan denemeler iptal edilir
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    if hedged:
+                        metrics.incr('hedge.cancelled', len(pending))
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+            if hedging:
+                self._record_hedge(primary, None, time.monotonic() - start)
+            return {'success': False, 'error': 'Hem API hem scraping başarısız'}
+
+        except Exception as e:
+            logger.error(f"Fallback hatası: {e}")
+            return {'success': False, 'error': f'Fallback hatası: {str(e)}'}
@@ -6,7 +6,7 @@ Unified Web Application - Admin & User Panel
 Tek Cloudflare tunnel üzerinden hem admin hem user girişi
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, g, has_app_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import os
@@ -55,8 +55,18 @@ def init_components():
         return False
 
 def get_db():
-    """Thread-safe database connection"""
-    return Database()
+    """Thread-safe database connection (havuzdan alınır, db.close() havuza geri bırakır)"""
+    db = Database()
+    if has_app_context():
+        # Handler db.close()'a ulaşmadan hata verse de bağlantı istek sonunda bırakılır
+        g.setdefault('dbs', []).append(db)
+    return db
+
+@app.teardown_appcontext
+def teardown_db(exception):
+    """İstekte alınıp kapatılmamış veritabanı bağlantılarını havuza geri bırakır"""
+    for db in g.pop('dbs', []):
+        db.close()
 
 # ==================== ANA SAYFALAR ====================
 
@@ -515,16 +525,13 @@ def update_bot_status():
     global bot_status
     while True:
         try:
-            db = get_db()
-            
-            # Toplam ürün sayısını güncelle
-            guild_stats = db.get_all_guilds_stats()
+            with get_db() as db:
+                # Toplam ürün sayısını güncelle
+                guild_stats = db.get_all_guilds_stats()
             bot_status['total_products'] = sum(stat['product_count'] for stat in guild_stats) if guild_stats else 0
             bot_status['last_check'] = datetime.now().isoformat()
             bot_status['running'] = True
             
-            db.close()
-            
             # WebSocket ile güncelleme gönder
             socketio.emit('status_update', bot_status)
             
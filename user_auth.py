@@ -20,6 +20,8 @@ import logging
 from functools import wraps
 from flask import session, request, jsonify, redirect, url_for
 
+from migrations import migrate, USER_AUTH
+
 logger = logging.getLogger(__name__)
 
 class UserEncryption:
@@ -212,68 +214,7 @@ class UserManager:
     def _create_user_tables(self):
         """Kullanıcı tablolarını oluştur"""
         try:
-            # Kullanıcılar tablosu
-            self.db.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                discord_id TEXT UNIQUE NOT NULL,
-                username TEXT NOT NULL,
-                discriminator TEXT,
-                avatar TEXT,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1,
-                encryption_key_hash TEXT,
-                settings TEXT  -- Şifrelenmiş kullanıcı ayarları
-            )
-            ''')
-            
-            # Kullanıcı sunucuları tablosu
-            self.db.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_guilds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                guild_id TEXT NOT NULL,
-                guild_name TEXT,
-                permissions INTEGER DEFAULT 0,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            ''')
-            
-            # Kullanıcı oturumları tablosu
-            self.db.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                session_token TEXT UNIQUE NOT NULL,
-                expires_at TIMESTAMP NOT NULL,
-                ip_address TEXT,
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            ''')
-            
-            # Kullanıcı ürünleri tablosunu güncelle (şifreleme için)
-            self.db.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                product_id TEXT NOT NULL,
-                encrypted_data TEXT NOT NULL,  -- Şifrelenmiş ürün verisi
-                guild_id TEXT,
-                channel_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id),
-                UNIQUE(user_id, product_id, guild_id)
-            )
-            ''')
-            
-            self.db.conn.commit()
+            migrate(self.db.conn, USER_AUTH)
             logger.info("Kullanıcı tabloları oluşturuldu")
             
         except Exception as e:
@@ -498,11 +439,8 @@ def login_required(f):
         
         # Oturum doğrula
         from database import Database
-        db = Database()
-        user_manager = UserManager(db)
-        
-        user_data = user_manager.validate_session(session_token)
-        db.close()
+        with Database() as db:
+            user_data = UserManager(db).validate_session(session_token)
         
         if not user_data:
             session.clear()
@@ -522,11 +460,8 @@ def admin_required(f):
             return jsonify({'error': 'Giriş gerekli'}), 401
         
         from database import Database
-        db = Database()
-        user_manager = UserManager(db)
-        
-        is_admin = user_manager.is_global_admin(request.current_user['discord_id'])
-        db.close()
+        with Database() as db:
+            is_admin = UserManager(db).is_global_admin(request.current_user['discord_id'])
         
         if not is_admin:
             return jsonify({'error': 'Admin yetkisi gerekli'}), 403
@@ -548,17 +483,11 @@ def guild_access_required(f):
             return jsonify({'error': 'Sunucu ID gerekli'}), 400
         
         from database import Database
-        db = Database()
-        user_manager = UserManager(db)
-        
-        # Admin ise tüm sunuculara erişebilir
-        if user_manager.is_global_admin(request.current_user['discord_id']):
-            db.close()
-            return f(*args, **kwargs)
-        
-        # Normal kullanıcı için sunucu erişimi kontrol et
-        has_access = user_manager.has_guild_access(request.current_user['user_id'], guild_id)
-        db.close()
+        with Database() as db:
+            user_manager = UserManager(db)
+            # Admin ise tüm sunuculara erişebilir; normal kullanıcı için sunucu erişimi kontrol et
+            has_access = (user_manager.is_global_admin(request.current_user['discord_id'])
+                          or user_manager.has_guild_access(request.current_user['user_id'], guild_id))
         
         if not has_access:
             return jsonify({'error': 'Bu sunucuya erişim yetkiniz yok'}), 403
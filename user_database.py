@@ -11,6 +11,8 @@ import json
 import os
 import logging
 from datetime import datetime
+from migrations import migrate, USER_DATA
+from sqlite_pool import acquire, release
 from user_auth import UserEncryption
 
 logger = logging.getLogger(__name__)
@@ -24,7 +26,7 @@ class UserDatabase:
         
         try:
             os.makedirs(os.path.dirname(db_name), exist_ok=True)
-            self.conn = sqlite3.connect(db_name)
+            self.conn = acquire(db_name)
             self.cursor = self.conn.cursor()
             self._create_user_tables()
             logger.info(f"Kullanıcı veritabanı bağlantısı kuruldu: {db_name}")
@@ -35,67 +37,7 @@ class UserDatabase:
     def _create_user_tables(self):
         """Kullanıcı bazlı tabloları oluştur"""
         try:
-            # Kullanıcı ürünleri tablosu (şifrelenmiş)
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                product_id TEXT NOT NULL,
-                encrypted_data TEXT NOT NULL,
-                guild_id TEXT,
-                channel_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, product_id, guild_id)
-            )
-            ''')
-            
-            # Kullanıcı fiyat geçmişi (şifrelenmiş)
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_price_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                product_id TEXT NOT NULL,
-                encrypted_price_data TEXT NOT NULL,
-                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # Kullanıcı bildirimleri (şifrelenmiş)
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                encrypted_notification_data TEXT NOT NULL,
-                is_read BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            # Kullanıcı fiyat hedefleri (şifrelenmiş)
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_price_targets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                product_id TEXT NOT NULL,
-                encrypted_target_data TEXT NOT NULL,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                triggered_at TIMESTAMP NULL
-            )
-            ''')
-            
-            # Kullanıcı ayarları (şifrelenmiş)
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE NOT NULL,
-                encrypted_settings TEXT NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            ''')
-            
-            self.conn.commit()
+            migrate(self.conn, USER_DATA)
             logger.info("Kullanıcı tabloları oluşturuldu")
             
         except Exception as e:
@@ -618,6 +560,7 @@ class UserDatabase:
             return {}
     
     def close(self):
-        """Veritabanı bağlantısını kapat"""
+        """Veritabanı bağlantısını havuza bırak"""
         if self.conn:
-            self.conn.close()
\ No newline at end of file
+            release(self.conn)
+            self.conn = None
\ No newline at end of file
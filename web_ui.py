@@ -6,7 +6,7 @@ Trendyol Bot Web UI
 Flask tabanlı web arayüzü
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, g, has_app_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import os
@@ -55,8 +55,18 @@ def init_components():
         return False
 
 def get_db():
-    """Thread-safe database connection"""
-    return Database()
+    """Thread-safe database connection (havuzdan alınır, db.close() havuza geri bırakır)"""
+    db = Database()
+    if has_app_context():
+        # Handler db.close()'a ulaşmadan hata verse de bağlantı istek sonunda bırakılır
+        g.setdefault('dbs', []).append(db)
+    return db
+
+@app.teardown_appcontext
+def teardown_db(exception):
+    """İstekte alınıp kapatılmamış veritabanı bağlantılarını havuza geri bırakır"""
+    for db in g.pop('dbs', []):
+        db.close()
 
 # Ana sayfa
 @app.route('/')
@@ -740,16 +750,13 @@ def update_bot_status():
     while True:
         try:
             # Thread-safe database connection
-            db = get_db()
-            
-            # Toplam ürün sayısını güncelle
-            guild_stats = db.get_all_guilds_stats()
+            with get_db() as db:
+                # Toplam ürün sayısını güncelle
+                guild_stats = db.get_all_guilds_stats()
             bot_status['total_products'] = sum(stat['product_count'] for stat in guild_stats) if guild_stats else 0
             bot_status['last_check'] = datetime.now().isoformat()
             bot_status['running'] = True  # Web UI çalışıyorsa bot da çalışıyor kabul et
             
-            db.close()
-            
             # WebSocket ile güncelleme gönder
             socketio.emit('status_update', bot_status)
             
@@ -861,6 +868,23 @@ def monitoring_check_api():
         logger.error(f"Monitoring check API hatası: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/monitoring/strategies')
+def monitoring_strategies_api():
+    """API: Fiyat çıkarım stratejilerinin düzen bazlı dağılımı"""
+    try:
+        from strategy_stats import strategy_stats
+        
+        # Bot ayrı süreçte çalışır; dosyadaki güncel sayıları oku
+        strategy_stats.load()
+        return jsonify({
+            'layouts': strategy_stats.distribution(),
+            'shifted_layouts': strategy_stats.shifted_layouts()
+        })
+        
+    except Exception as e:
+        logger.error(f"Strateji istatistikleri API hatası: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/monitoring')
 def monitoring_page():
     """Monitoring sayfası"""